@@ -1,19 +1,52 @@
 import os
+import re
 import sys
+import json
+import itertools
 import traceback
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from importlib.metadata import version, PackageNotFoundError
 from pathlib import Path
 
-from anki_poker_master.parser.phh import parse
+from anki_poker_master.parser import hand_cache, hand_index, site_history
+from anki_poker_master.parser.phh import parse, parse_many, ParseResult
+from anki_poker_master.parser import solver
+from anki_poker_master.parser.study_spots import SpotRules
+from anki_poker_master.parser.postflop_scenario import (
+    parse_postflop_scenario_yml,
+    EXAMPLE_POSTFLOP_SCENARIO_FILE,
+)
 from anki_poker_master.parser.preflop_scenario import (
     parse_scenario_yml,
     EXAMPLE_SCENARIO_FILE,
 )
 from anki_poker_master.model import ValidationError
-from anki_poker_master.presenter.anki.phh import get_deck
-from anki_poker_master.presenter.anki.preflop_scenario import create_decks
-from anki_poker_master.presenter.anki import write_decks_to_file
+from anki_poker_master.model.hand_sampling import (
+    hand_score,
+    select_stratified,
+    select_top,
+)
+from anki_poker_master.model import push_fold
+from anki_poker_master.model.range_diff import diff_libraries
+from anki_poker_master.presenter.anki.phh import write_deck
+from anki_poker_master.presenter.html.preview import Preview, serve
+from anki_poker_master import service
+from anki_poker_master.presenter.html.site import export_site, INDEX_PAGE
+from anki_poker_master.presenter.html import range_diff
+from anki_poker_master.presenter.anki import HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS
+from anki_poker_master.session import BuildSession
+
+# Number of hands that are read before they are filtered with --query
+_HAND_BATCH_SIZE = 1000
+# The files within directories that are read by 'hand'
+_HAND_FILE_PATTERNS = ("*.phh", f"*{site_history.FILE_EXTENSION}")
+# Files that only 'hand' reads, the other commands need .phh files
+_NOT_PHH_EXTENSIONS = (
+    hand_cache.FILE_EXTENSION,
+    hand_index.FILE_EXTENSION,
+    site_history.FILE_EXTENSION,
+)
 
 
 def main():
@@ -48,7 +81,12 @@ def main_with_args(args):
     parser_range.set_defaults(func=_handle_range_subcommand)
 
     parser_range.add_argument(
-        "-s", "--scenarios", type=str, help="Path to the scenarios file"
+        "-s",
+        "--scenarios",
+        type=str,
+        help="Path to the scenarios file, or to a solver export "
+        f"({', '.join(solver.FILE_EXTENSIONS)}) with the frequencies of the "
+        "actions per hand",
     )
     parser_range.add_argument(
         "-o",
@@ -72,6 +110,62 @@ def main_with_args(args):
         action="append",
         help="Tag for the Anki decks. Can be specified multiple times.",
     )
+    parser_range.add_argument(
+        "--sprite",
+        action="store_true",
+        help="Draw all card images from a single sprite sheet instead of "
+        "using one image file per card. This results in fewer media files.",
+    )
+
+    parser_range.add_argument(
+        "--analytics",
+        action="store_true",
+        help="Add statistics of the ranges to the notes: number of "
+        "combinations, blockers and, for scenarios with a villain_range, "
+        "the preflop equity against it.",
+    )
+
+    parser_postflop = subparsers.add_parser(
+        "postflop",
+        help="Create decks for postflop scenarios (what to do with each class "
+        "of hands of a range on a board)",
+    )
+    parser_postflop.set_defaults(func=_handle_postflop_subcommand)
+    parser_postflop.add_argument(
+        "-s",
+        "--scenarios",
+        type=str,
+        help="Path to the postflop scenarios file",
+    )
+    parser_postflop.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Path to the resulting Anki package",
+        default="./AnkiPokerMaster.apkg",
+    )
+    parser_postflop.add_argument(
+        "-e",
+        "--example",
+        action="store_true",
+        help="Write example file to the path specified by --scenarios/-s if "
+        "and only if the file does not exist yet",
+    )
+    parser_postflop.add_argument(
+        "-t",
+        "--tag",
+        dest="tags",
+        metavar="TAG",
+        type=str,
+        action="append",
+        help="Tag for the Anki deck. Can be specified multiple times.",
+    )
+    parser_postflop.add_argument(
+        "--sprite",
+        action="store_true",
+        help="Draw all card images from a single sprite sheet instead of "
+        "using one image file per card. This results in fewer media files.",
+    )
 
     parser_hand = subparsers.add_parser("hand", help="Create decks for hand history")
     parser_hand.set_defaults(func=_handle_hand_subcommand)
@@ -93,6 +187,234 @@ def main_with_args(args):
         help="Tag for the Anki decks. Can be specified multiple times.",
     )
     parser_hand.add_argument(
+        "--sprite",
+        action="store_true",
+        help="Draw all card images from a single sprite sheet instead of "
+        "using one image file per card. This results in fewer media files.",
+    )
+    parser_hand.add_argument(
+        "--odds",
+        action="store_true",
+        help="Add the pot odds and the equity of the hero to the answers. The "
+        "equity is computed against _apm_villain_range if the hand has one and "
+        "otherwise against the known hole cards of the other players.",
+    )
+    parser_hand.add_argument(
+        "--shard-by",
+        choices=["title", "directory"],
+        help="Write one Anki package per hand title (e.g. 'NLHE 1/2') or per "
+        "directory containing the files, each with its own subdeck. The "
+        "name of the group is appended to the name of the output file.",
+    )
+    parser_hand.add_argument(
+        "--max-notes",
+        type=int,
+        metavar="N",
+        help="Split the output into numbered Anki packages with at most N "
+        "notes (hands) each.",
+    )
+    parser_hand.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of Anki packages to write in parallel when the output is "
+        "split, and of processes that convert site hand histories. Defaults "
+        "to the number of CPUs.",
+    )
+    parser_hand.add_argument(
+        "-q",
+        "--query",
+        type=str,
+        help="Only create notes for the hands that match the query, e.g. "
+        "'3bet pot, hero OOP, pot >= 40bb'. See the documentation of "
+        "'hand index' for the search terms.",
+    )
+    parser_hand.add_argument(
+        "--select",
+        type=int,
+        metavar="N",
+        help="Only create notes for the N most instructive hands: big pots "
+        "(in big blinds), many decisions of the hero, all-ins and multiway "
+        "pots score higher.",
+    )
+    parser_hand.add_argument(
+        "--stratify-by",
+        choices=list(_STRATA),
+        help="With --select, select the best hands of every street the hands "
+        "end on, every position of the hero or every hand title, in "
+        "proportion to the number of hands of each.",
+    )
+    _add_key_spots_arguments(parser_hand)
+    parser_hand.add_argument(
+        "phh_files",
+        metavar="FILE",
+        type=str,
+        nargs="+",
+        help="Path to one or multiple .phh files, PokerStars or GGPoker hand "
+        f"history files ({site_history.FILE_EXTENSION}), hand cache files "
+        f"({hand_cache.FILE_EXTENSION}, see 'hand compile') or hand indices "
+        f"({hand_index.FILE_EXTENSION}, see 'hand index'). If a directory "
+        f"is specified, all .phh and {site_history.FILE_EXTENSION} files "
+        "within that directory will be read recursively.",
+    )
+
+    parser_preview = subparsers.add_parser(
+        "preview",
+        help="Preview the cards in a web browser without creating an Anki package",
+    )
+    parser_preview.set_defaults(func=_handle_preview_subcommand)
+    parser_preview.add_argument(
+        "-s", "--scenarios", type=str, help="Path to the scenarios file"
+    )
+    parser_preview.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Address to listen on (default: %(default)s)",
+    )
+    parser_preview.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=8000,
+        help="Port to listen on (default: %(default)s)",
+    )
+    parser_preview.add_argument(
+        "--sprite",
+        action="store_true",
+        help="Draw all card images from a single sprite sheet.",
+    )
+    parser_preview.add_argument(
+        "phh_files",
+        metavar="FILE",
+        type=str,
+        nargs="*",
+        help="Path to one or multiple .phh files. If a directory is "
+        "specified, all .phh files within that directory will be "
+        "read recursively.",
+    )
+
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="Run an HTTP service that creates Anki packages from uploaded "
+        "scenarios files and .phh files",
+    )
+    parser_serve.set_defaults(func=_handle_serve_subcommand)
+    parser_serve.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Address to listen on (default: %(default)s)",
+    )
+    parser_serve.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=8000,
+        help="Port to listen on (default: %(default)s)",
+    )
+    parser_serve.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes. Defaults to the number of CPUs.",
+    )
+    parser_serve.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=4,
+        help="Maximum number of packages that are built at the same time "
+        "(default: %(default)s)",
+    )
+
+    parser_export_html = subparsers.add_parser(
+        "export-html",
+        help="Export the scenarios and hands as a static website",
+    )
+    parser_export_html.set_defaults(func=_handle_export_html_subcommand)
+    parser_export_html.add_argument(
+        "-s", "--scenarios", type=str, help="Path to the scenarios file"
+    )
+    parser_export_html.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Directory for the website. It must not exist or be empty.",
+        default="./AnkiPokerMaster-html",
+    )
+    parser_export_html.add_argument(
+        "--sprite",
+        action="store_true",
+        help="Draw all card images from a single sprite sheet.",
+    )
+    parser_export_html.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of pages to generate in parallel. Defaults to the number of CPUs.",
+    )
+    parser_export_html.add_argument(
+        "phh_files",
+        metavar="FILE",
+        type=str,
+        nargs="*",
+        help="Path to one or multiple .phh files. If a directory is "
+        "specified, all .phh files within that directory will be "
+        "read recursively.",
+    )
+
+    # Commands that operate on hand histories without creating a deck, e.g.
+    # "hand compile". They can't be subparsers of "hand" because its
+    # positional FILE arguments would be ambiguous.
+    parser_hand_commands = argparse.ArgumentParser(prog=f"{parser.prog} hand")
+    hand_subparsers = parser_hand_commands.add_subparsers()
+
+    parser_hand_compile = hand_subparsers.add_parser(
+        "compile",
+        help="Parse hand histories once and store them in a hand cache file "
+        "that can be passed to 'hand' instead of the .phh files",
+    )
+    parser_hand_compile.set_defaults(func=_handle_hand_compile_subcommand)
+    parser_hand_compile.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Path to the resulting hand cache file",
+        default=f"./AnkiPokerMaster{hand_cache.FILE_EXTENSION}",
+    )
+    _add_key_spots_arguments(parser_hand_compile)
+    parser_hand_compile.add_argument(
+        "phh_files",
+        metavar="FILE",
+        type=str,
+        nargs="+",
+        help="Path to one or multiple .phh files or PokerStars or GGPoker "
+        f"hand history files ({site_history.FILE_EXTENSION}). If a directory "
+        f"is specified, all .phh and {site_history.FILE_EXTENSION} files "
+        "within that directory will be read recursively.",
+    )
+
+    parser_hand_index = hand_subparsers.add_parser(
+        "index",
+        help="Parse hand histories and add them to a searchable index that "
+        "can be passed to 'hand' together with --query. Files that were "
+        "already indexed are only parsed again if they changed.",
+    )
+    parser_hand_index.set_defaults(func=_handle_hand_index_subcommand)
+    parser_hand_index.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Path to the hand index, which is created or updated",
+        default=f"./AnkiPokerMaster{hand_index.FILE_EXTENSION}",
+    )
+    parser_hand_index.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of files to parse in parallel. Defaults to the number of CPUs.",
+    )
+    parser_hand_index.add_argument(
         "phh_files",
         metavar="FILE",
         type=str,
@@ -102,7 +424,132 @@ def main_with_args(args):
         "read recursively.",
     )
 
-    args = parser.parse_args(args)
+    parser_hand_validate = hand_subparsers.add_parser(
+        "validate",
+        help="Parse and validate hand histories without creating a deck. One "
+        "result per file is printed as a line of JSON.",
+    )
+    parser_hand_validate.set_defaults(func=_handle_hand_validate_subcommand)
+    parser_hand_validate.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of files to parse in parallel. Defaults to the number of CPUs.",
+    )
+    parser_hand_validate.add_argument(
+        "phh_files",
+        metavar="FILE",
+        type=str,
+        nargs="+",
+        help="Path to one or multiple .phh files or PokerStars or GGPoker "
+        f"hand history files ({site_history.FILE_EXTENSION}). If a directory "
+        f"is specified, all .phh and {site_history.FILE_EXTENSION} files "
+        "within that directory will be read recursively.",
+    )
+
+    # Commands that compare scenarios files without creating a deck, e.g.
+    # "range diff". They are separate from "range" for the same reason.
+    parser_range_commands = argparse.ArgumentParser(prog=f"{parser.prog} range")
+    range_subparsers = parser_range_commands.add_subparsers()
+
+    parser_range_diff = range_subparsers.add_parser(
+        "diff",
+        help="Compare the ranges of the scenarios with the same game, position "
+        "and scenario in two scenarios files",
+    )
+    parser_range_diff.set_defaults(func=_handle_range_diff_subcommand)
+    parser_range_diff.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Path to an HTML report with the changed hands highlighted",
+    )
+    parser_range_diff.add_argument(
+        "old_scenarios",
+        metavar="OLD",
+        type=str,
+        help="Path to the old scenarios file or solver export",
+    )
+    parser_range_diff.add_argument(
+        "new_scenarios",
+        metavar="NEW",
+        type=str,
+        help="Path to the new scenarios file or solver export",
+    )
+
+    parser_range_push_fold = range_subparsers.add_parser(
+        "push-fold",
+        help="Create a deck with the push/fold charts (approximate Nash "
+        "equilibrium) of short stacks by stack depth and position",
+    )
+    parser_range_push_fold.set_defaults(func=_handle_range_push_fold_subcommand)
+    parser_range_push_fold.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Path to the resulting Anki package",
+        default="./AnkiPokerMaster.apkg",
+    )
+    parser_range_push_fold.add_argument(
+        "--stacks",
+        type=str,
+        default="1-25",
+        help="Stack depths in big blinds, as a range (e.g. 1-25) and/or a "
+        "comma-separated list (e.g. 5,10,15). Default: 1-25",
+    )
+    parser_range_push_fold.add_argument(
+        "-p",
+        "--players",
+        type=int,
+        default=6,
+        help=f"Number of players at the table (2 to {push_fold.MAX_PLAYERS}). "
+        "Default: 6",
+    )
+    parser_range_push_fold.add_argument(
+        "--ante",
+        type=float,
+        default=0.0,
+        help="Ante every player pays, in big blinds. Default: 0",
+    )
+    parser_range_push_fold.add_argument(
+        "--calling-ranges",
+        action="store_true",
+        help="Also create the scenarios of the players that call the push",
+    )
+    parser_range_push_fold.add_argument(
+        "-t",
+        "--tag",
+        dest="tags",
+        metavar="TAG",
+        type=str,
+        action="append",
+        help="Tag for the Anki decks. Can be specified multiple times.",
+    )
+    parser_range_push_fold.add_argument(
+        "--sprite",
+        action="store_true",
+        help="Draw all card images from a single sprite sheet instead of "
+        "using one image file per card. This results in fewer media files.",
+    )
+
+    command_parsers = {
+        "hand": (parser_hand_commands, hand_subparsers),
+        "range": (parser_range_commands, range_subparsers),
+    }
+    # The main parser only has options without values, so the first
+    # non-option argument is the subcommand.
+    cmd_i = next((i for i, a in enumerate(args) if not a.startswith("-")), None)
+    if (
+        cmd_i is not None
+        and args[cmd_i] in command_parsers
+        and args[cmd_i + 1 : cmd_i + 2]
+        and args[cmd_i + 1] in command_parsers[args[cmd_i]][1].choices
+    ):
+        args = command_parsers[args[cmd_i]][0].parse_args(
+            args[cmd_i + 1 :], namespace=parser.parse_args(args[:cmd_i])
+        )
+    else:
+        args = parser.parse_args(args)
     try:
         args.func(args)
     except AttributeError:
@@ -143,10 +590,81 @@ def _handle_range_subcommand(args):
         print(f"The file {pkg_path} already exists.")
         sys.exit(1)
 
-    _create_preflop_scenario_deck(args.scenarios, tags, args.verbose, pkg_path)
+    _create_preflop_scenario_deck(
+        args.scenarios,
+        tags,
+        args.verbose,
+        pkg_path,
+        sprite=args.sprite,
+        analytics=args.analytics,
+    )
 
 
-def _handle_hand_subcommand(args):
+def _handle_postflop_subcommand(args):
+    if args.example:
+        if not args.scenarios:
+            print("You need to specify --scenarios/-s to write an example file.")
+            return
+        if os.path.exists(args.scenarios):
+            print(f"The file {args.scenarios} already exists.")
+            sys.exit(1)
+        with open(args.scenarios, "w") as f:
+            f.write(EXAMPLE_POSTFLOP_SCENARIO_FILE)
+        print(f"Example postflop scenarios file written to {args.scenarios}")
+        return
+
+    if not args.scenarios:
+        print(
+            "You need to specify a postflop scenarios file. You can use "
+            "--example to create an example file."
+        )
+        sys.exit(1)
+    tags = ["poker"] if args.tags is None else args.tags.copy()
+    if args.output.endswith(".apkg"):
+        pkg_path = args.output
+    else:
+        pkg_path = f"{args.output}.apkg"
+    if os.path.exists(pkg_path):
+        print(f"The file {pkg_path} already exists.")
+        sys.exit(1)
+
+    try:
+        with open(args.scenarios, "r") as f:
+            scenarios = parse_postflop_scenario_yml(f.read())
+    except ValidationError as e:
+        print(e.humanize_error())
+        if args.verbose:
+            print()
+            traceback.print_exc()
+        sys.exit(1)
+    session = BuildSession(tags, sprite=args.sprite)
+    session.add_postflop_scenarios(scenarios)
+    session.write(pkg_path)
+
+
+def _handle_range_diff_subcommand(args):
+    if args.output and os.path.exists(args.output):
+        print(f"The file {args.output} already exists.")
+        sys.exit(1)
+    libraries = []
+    for scenarios_file in (args.old_scenarios, args.new_scenarios):
+        try:
+            libraries.append(_read_scenarios(scenarios_file))
+        except ValidationError as e:
+            print(f"{scenarios_file}: {e.humanize_error()}")
+            if args.verbose:
+                print()
+                traceback.print_exc()
+            sys.exit(1)
+    diff = diff_libraries(*libraries)
+    print(range_diff.to_text(diff), end="")
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(range_diff.to_html(diff))
+
+
+def _handle_range_push_fold_subcommand(args):
+    tags = ["poker"] if args.tags is None else args.tags.copy()
     if args.output.endswith(".apkg"):
         pkg_path = args.output
     else:
@@ -154,32 +672,448 @@ def _handle_hand_subcommand(args):
     if os.path.exists(pkg_path):
         print(f"The file {pkg_path} already exists.")
         sys.exit(1)
+    try:
+        stacks = _stack_depths(args.stacks)
+        skipped = [s for s in stacks if s < push_fold.min_stack(args.ante)]
+        scenarios = push_fold.push_fold_scenarios(
+            stacks, args.players, ante=args.ante, calling_ranges=args.calling_ranges
+        )
+    except ValueError as e:
+        print(f"Invalid push/fold chart: {e}")
+        sys.exit(1)
+    if skipped:
+        print(
+            "Skipped the stack depths below the big blind and the ante: "
+            + ", ".join(f"{s:g}BB" for s in skipped)
+        )
+    session = BuildSession(tags, sprite=args.sprite)
+    session.add_scenarios(scenarios)
+    session.write(pkg_path)
+
+
+def _stack_depths(text):
+    """
+    Parse stack depths like "1-25" or "5,10,15" (or both, e.g. "1-5,10").
+    """
+    stacks = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        try:
+            if end:
+                stacks += range(int(start), int(end) + 1)
+            else:
+                stacks.append(float(start))
+        except ValueError:
+            raise ValueError(f"'{text}' are invalid stack depths") from None
+    if not stacks:
+        raise ValueError(f"'{text}' are invalid stack depths")
+    return sorted(set(stacks))
+
+
+def _add_key_spots_arguments(parser):
+    parser.add_argument(
+        "--key-spots",
+        action="store_true",
+        help="In hands without 'apm study' commentary, only ask about the key "
+        "decisions of the hero instead of every action (see --spot-rules).",
+    )
+    parser.add_argument(
+        "--spot-rules",
+        default=",".join(SpotRules.RULES),
+        metavar="RULES",
+        help="With --key-spots, comma-separated list of the decisions that are "
+        "key decisions (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--min-pot-fraction",
+        type=float,
+        default=0.5,
+        metavar="F",
+        help="With --key-spots, a bet or call of at least this fraction of the "
+        "pot is a large bet (default: %(default)s).",
+    )
+
+
+def _spot_rules(args):
+    """
+    Return the SpotRules of --key-spots or None if it was not specified.
+    """
+    if not args.key_spots:
+        return None
+    try:
+        return SpotRules(
+            [r.strip() for r in args.spot_rules.split(",") if r.strip()],
+            args.min_pot_fraction,
+            max_spots=HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS,
+        )
+    except ValueError as e:
+        print(f"--spot-rules: {e}.")
+        sys.exit(1)
+
+
+def _handle_hand_subcommand(args):
+    if args.output.endswith(".apkg"):
+        pkg_path = args.output
+    else:
+        pkg_path = f"{args.output}.apkg"
+    if args.max_notes is not None and args.max_notes < 1:
+        print("--max-notes must be at least 1.")
+        sys.exit(1)
+
+    if args.select is not None and args.select < 1:
+        print("--select must be at least 1.")
+        sys.exit(1)
+    if args.stratify_by and args.select is None:
+        print("--stratify-by can only be used together with --select.")
+        sys.exit(1)
+    if args.shard_by is None and args.max_notes is None and os.path.exists(pkg_path):
+        # Without sharding the path is known before reading the hands
+        print(f"The file {pkg_path} already exists.")
+        sys.exit(1)
+    spot_rules = _spot_rules(args)
+
+    try:
+        files_and_hands = _read_hands(args.phh_files, args.query, spot_rules, args.jobs)
+        if args.select is None:
+            files_and_hands = list(files_and_hands)
+        else:
+            files_and_hands = _select_hands(
+                files_and_hands, args.select, args.stratify_by
+            )
+    except ValidationError as e:
+        print(e.humanize_error())
+        if args.verbose:
+            print()
+            traceback.print_exc()
+        sys.exit(1)
+    shards = _shard_hands(files_and_hands, pkg_path, args.shard_by, args.max_notes)
+    for shard_path, _, _ in shards:
+        if os.path.exists(shard_path):
+            print(f"The file {shard_path} already exists.")
+            sys.exit(1)
+
+    if len(shards) == 1:
+        shard_path, subdeck, hands = shards[0]
+        session = BuildSession(args.tags, sprite=args.sprite, odds=args.odds)
+        session.add_hands(hands, subdeck)
+        session.write(shard_path)
+        return
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [
+            executor.submit(
+                write_deck,
+                hands,
+                shard_path,
+                args.tags,
+                args.sprite,
+                subdeck,
+                args.odds,
+            )
+            for shard_path, subdeck, hands in shards
+        ]
+        for f in futures:
+            f.result()
+    for shard_path, _, hands in shards:
+        print(f"{len(hands)} hands written to {shard_path}")
+
+
+def _shard_hands(files_and_hands, pkg_path, shard_by, max_notes):
+    """
+    Split the hands into the Anki packages that should be written.
+
+    :returns: a list of (package path, subdeck or None, hands) tuples.
+    """
+    groups = {}
+    for f, hand in files_and_hands:
+        if shard_by == "title":
+            group = hand.title
+        elif shard_by == "directory":
+            group = "::".join(_directory_parts(f))
+        else:
+            group = None
+        groups.setdefault(group, []).append(hand)
+
+    stem = pkg_path[: -len(".apkg")]
+    shards = []
+    group_stems = set()
+    for group, hands in groups.items():
+        group_stem = stem
+        if group is not None:
+            group_stem += "-" + re.sub(r"[^A-Za-z0-9.]+", "_", group).strip("_")
+            # Different groups can have the same name in a path, e.g. the
+            # titles "NLHE 1/2" and "NLHE 1-2", so number the later ones
+            unique_stem = group_stem
+            nr = 2
+            while unique_stem in group_stems:
+                unique_stem = f"{group_stem}_{nr}"
+                nr += 1
+            group_stem = unique_stem
+        group_stems.add(group_stem)
+        if max_notes is None:
+            shards.append((f"{group_stem}.apkg", group, hands))
+            continue
+        for i in range(0, len(hands), max_notes):
+            shard_path = f"{group_stem}-{i // max_notes + 1}.apkg"
+            shards.append((shard_path, group, hands[i : i + max_notes]))
+    if not shards:
+        shards.append((pkg_path, None, []))
+    return shards
+
+
+def _directory_parts(f):
+    """
+    Return the parts of the path of the directory containing the file,
+    relative to the current working directory if possible.
+    """
+    directory = f.parent.resolve()
+    try:
+        directory = directory.relative_to(Path.cwd())
+    except ValueError:
+        pass
+    return [p for p in directory.parts if p != directory.anchor] or [Path.cwd().name]
+
+
+def _handle_preview_subcommand(args):
+    if not args.scenarios and not args.phh_files:
+        print("You need to specify a scenarios file and/or .phh files.")
+        sys.exit(1)
+    phh_files = [
+        f for f in _find_files(args.phh_files) if f.suffix not in _NOT_PHH_EXTENSIONS
+    ]
+    preview = Preview(args.scenarios, phh_files, sprite=args.sprite)
+    print(
+        f"Serving the preview on http://{args.host}:{args.port}/ "
+        "(press Ctrl+C to stop)",
+        flush=True,
+    )
+    try:
+        serve(preview, args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+def _handle_serve_subcommand(args):
+    if args.max_concurrent < 1:
+        print("--max-concurrent must be at least 1.")
+        sys.exit(1)
+    print(
+        f"Serving on http://{args.host}:{args.port}/ (press Ctrl+C to stop)",
+        flush=True,
+    )
+    try:
+        service.serve(args.host, args.port, args.jobs, args.max_concurrent)
+    except KeyboardInterrupt:
+        pass
+
+
+def _handle_export_html_subcommand(args):
+    if not args.scenarios and not args.phh_files:
+        print("You need to specify a scenarios file and/or .phh files.")
+        sys.exit(1)
+    output = Path(args.output)
+    if output.exists() and (not output.is_dir() or any(output.iterdir())):
+        print(f"The directory {output} already exists and is not empty.")
+        sys.exit(1)
+    phh_files = [
+        f for f in _find_files(args.phh_files) if f.suffix not in _NOT_PHH_EXTENSIONS
+    ]
+    try:
+        nr_pages = export_site(
+            output, args.scenarios, phh_files, args.sprite, max_workers=args.jobs
+        )
+    except ValidationError as e:
+        print(e.humanize_error())
+        if args.verbose:
+            print()
+            traceback.print_exc()
+        sys.exit(1)
+    print(f"{nr_pages} pages written to {output / INDEX_PAGE}")
+
+
+def _handle_hand_compile_subcommand(args):
+    if args.output.endswith(hand_cache.FILE_EXTENSION):
+        cache_path = args.output
+    else:
+        cache_path = f"{args.output}{hand_cache.FILE_EXTENSION}"
+    if os.path.exists(cache_path):
+        print(f"The file {cache_path} already exists.")
+        sys.exit(1)
+    spot_rules = _spot_rules(args)
+
+    try:
+        all_hands = [
+            hand for _, hand in _read_hands(args.phh_files, spot_rules=spot_rules)
+        ]
+    except ValidationError as e:
+        print(e.humanize_error())
+        if args.verbose:
+            print()
+            traceback.print_exc()
+        sys.exit(1)
+    Path(cache_path).write_bytes(hand_cache.dumps(all_hands))
+    print(f"{len(all_hands)} hands written to {cache_path}")
+
+
+def _handle_hand_index_subcommand(args):
+    if args.output.endswith(hand_index.FILE_EXTENSION):
+        index_path = args.output
+    else:
+        index_path = f"{args.output}{hand_index.FILE_EXTENSION}"
+    phh_files = [
+        f for f in _find_files(args.phh_files) if f.suffix not in _NOT_PHH_EXTENSIONS
+    ]
+    nr_hands, errors = hand_index.build_index(
+        index_path,
+        phh_files,
+        max_questions=HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS,
+        max_workers=args.jobs,
+    )
+    for result in errors:
+        print(f"{result.path}: {result.message}")
+    print(f"{nr_hands} hands in {index_path}")
+    if errors:
+        sys.exit(1)
+
 
-    all_hands = []
-    for f_name in args.phh_files:
+def _handle_hand_validate_subcommand(args):
+    has_errors = False
+    files = _find_files(args.phh_files, _HAND_FILE_PATTERNS)
+    site_files = [f for f in files if f.suffix == site_history.FILE_EXTENSION]
+    results = itertools.chain(
+        parse_many(
+            [f for f in files if f.suffix != site_history.FILE_EXTENSION],
+            max_questions=HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS,
+            max_workers=args.jobs,
+        ),
+        site_history.parse_site_files(
+            site_files,
+            max_questions=HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS,
+            max_workers=args.jobs,
+        ),
+    )
+    for result in results:
+        has_errors = has_errors or result.status == ParseResult.ERROR
+        print(json.dumps(result.to_dict()), flush=True)
+    if has_errors:
+        sys.exit(1)
+
+
+def _find_files(paths, patterns=("*.phh",)):
+    """
+    Return the files, replacing directories by all files within them that
+    match one of the patterns (by default .phh files).
+    """
+    files = []
+    for f_name in paths:
         f = Path(f_name)
         if f.is_dir():
-            for f2 in f.rglob("*.phh"):
-                all_hands.append(parse(f2.read_text()))
+            for pattern in patterns:
+                files.extend(f.rglob(pattern))
         elif f.is_file():
-            all_hands.append(parse(f.read_text()))
+            files.append(f)
+    return files
+
+
+def _read_hands(paths, query=None, spot_rules=None, max_workers=None):
+    """
+    Read the hands from .phh files, site hand history files, directories
+    containing them, hand cache files and hand indices. The hands are yielded
+    as they are read, so they don't all have to be kept in memory.
+
+    The hands of site hand history files that can't be converted are skipped
+    with a message, since a file contains thousands of hands.
+
+    :param query: if specified, only the hands that match it are yielded (see
+        hand_index.parse_query).
+    :param spot_rules: see phh.parse(). Hand caches and hand indices contain
+        the study spots that were chosen when they were created.
+    :param max_workers: number of processes that convert the hands of site
+        hand history files, see site_history.parse_site_files().
+    :returns: an iterator of (file, hand) tuples.
+    """
+    # The hands that are read from files are filtered in batches
+    unfiltered = []
+
+    def filtered():
+        batch = hand_index.filter_hands(unfiltered, query) if query else unfiltered[:]
+        unfiltered.clear()
+        return batch
+
+    for f in _find_files(paths, _HAND_FILE_PATTERNS):
+        if f.suffix == hand_index.FILE_EXTENSION:
+            yield from filtered()
+            # Only the hands that match the query are loaded from the index
+            yield from hand_index.search(f, query or "")
+            continue
+        if f.suffix == hand_cache.FILE_EXTENSION:
+            unfiltered.extend((f, h) for h in hand_cache.loads(f.read_bytes()))
+        elif f.suffix == site_history.FILE_EXTENSION:
+            for result in site_history.parse_site_files(
+                [f],
+                max_questions=HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS,
+                max_workers=max_workers,
+                spot_rules=spot_rules,
+            ):
+                if result.status == ParseResult.ERROR:
+                    print(f"Skipping {result.path}: {result.message}")
+                    continue
+                unfiltered.append((f, result.hand))
+                if len(unfiltered) >= _HAND_BATCH_SIZE:
+                    yield from filtered()
+        else:
+            unfiltered.append((f, parse(f.read_text(), spot_rules)))
+        if len(unfiltered) >= _HAND_BATCH_SIZE:
+            yield from filtered()
+    yield from filtered()
+
+
+def _select_hands(files_and_hands, k, stratify_by):
+    """
+    Return the k most instructive hands, see hand_sampling.
+    """
 
-    deck, media_files = get_deck(all_hands, tags=args.tags)
-    write_decks_to_file([deck], media_files, pkg_path)
+    def key(file_and_hand):
+        return hand_score(file_and_hand[1])
 
+    if stratify_by is None:
+        return select_top(files_and_hands, k, key)
+    return select_stratified(files_and_hands, k, key, _STRATA[stratify_by])
 
-def _create_preflop_scenario_deck(scenarios, tags, verbose, pkg_path):
+
+def _hero_position(hand):
+    hero_index = next(i for i, p in enumerate(hand.players) if p.is_hero)
+    return hand_index.positions(len(hand.players))[hero_index]
+
+
+# Groups of hands for --stratify-by
+_STRATA = {
+    "street": lambda fh: fh[1].streets[-1].name if fh[1].streets else "",
+    "position": lambda fh: _hero_position(fh[1]),
+    "title": lambda fh: fh[1].title,
+}
+
+
+def _read_scenarios(path):
+    """
+    Read the scenarios from a scenarios file or from a solver export.
+    """
+    if Path(path).suffix.lower() in solver.FILE_EXTENSIONS:
+        return list(solver.read_solver_file(path))
+    with open(path, "r") as f:
+        return parse_scenario_yml(f.read())
+
+
+def _create_preflop_scenario_deck(
+    scenarios, tags, verbose, pkg_path, sprite=False, analytics=False
+):
     try:
-        with open(scenarios, "r") as f:
-            scenarios = parse_scenario_yml(f.read())
+        scenarios = _read_scenarios(scenarios)
     except ValidationError as e:
         print(e.humanize_error())
         if verbose:
             print()
             traceback.print_exc()
         sys.exit(1)
-    decks, media_files = create_decks(
-        scenarios,
-        tags,
-    )
-    write_decks_to_file(decks, media_files, pkg_path)
+    session = BuildSession(tags, sprite=sprite, analytics=analytics)
+    session.add_scenarios(scenarios)
+    session.write(pkg_path)
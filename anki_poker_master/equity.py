@@ -0,0 +1,390 @@
+"""
+All-in equity of poker hands.
+
+The preflop equity of the 169 starting hands against each other is
+precomputed by Monte Carlo simulation and shipped with the package, so
+building decks never simulates preflop hands. Regenerate it with:
+
+    python -m anki_poker_master.equity [SAMPLES]
+
+The equity of hole cards on a given board against known hole cards or a range
+is computed on demand by enumerating the remaining cards (or sampling them if
+there are too many) and memoized, since the same spots come up again and again
+in large collections of hands.
+"""
+
+import random
+import sys
+from array import array
+from functools import lru_cache
+from itertools import chain, combinations, permutations, product
+from math import comb
+from typing import Dict, List, Sequence, Tuple
+
+from importlib_resources import files
+from poker.hand import Combo, Hand, Range
+
+from anki_poker_master.evaluator import RANKS, card_indices, evaluate
+
+
+def _table_hand(row: int, col: int) -> str:
+    if row > col:
+        return RANKS[row] + RANKS[col] + "s"
+    if row < col:
+        return RANKS[col] + RANKS[row] + "o"
+    return RANKS[row] * 2
+
+
+# The hands in the order of the cells of the range table, i.e. AA, AKs, AQs,
+# ... in the first row and AKo, KK, KQs, ... in the second.
+TABLE_HANDS: List[str] = [
+    _table_hand(row, col) for row in range(12, -1, -1) for col in range(12, -1, -1)
+]
+_TABLE_INDEX: Dict[str, int] = {h: i for i, h in enumerate(TABLE_HANDS)}
+
+_RESOURCE = "preflop_equity.bin"
+_NR_HANDS = len(TABLE_HANDS)
+_MAX_EQUITY = 0xFFFF
+
+# Maximum number of deals (hole cards of the villains and the rest of the
+# board) that are evaluated for one spot. If there are more, as many are
+# sampled, e.g. on the flop against a range.
+_MAX_DEALS = 5000
+# Up to this many missing cards of the board, the runouts are sampled from a
+# list of all of them
+_MAX_MISSING_CARDS = 2
+_SUIT_PERMUTATIONS = [dict(zip("cdhs", p)) for p in permutations("cdhs")]
+
+
+def hand_combos(hand: str) -> List[Tuple[int, int]]:
+    """
+    Return the combinations of the hand (e.g. "AKo") as pairs of card indices.
+    """
+    first, second = RANKS.index(hand[0]), RANKS.index(hand[1])
+    if len(hand) == 2:
+        pairs = [(s1, s2) for s1 in range(4) for s2 in range(s1 + 1, 4)]
+    elif hand[2] == "s":
+        pairs = [(s, s) for s in range(4)]
+    else:
+        pairs = [(s1, s2) for s1, s2 in product(range(4), repeat=2) if s1 != s2]
+    return [(first * 4 + s1, second * 4 + s2) for s1, s2 in pairs]
+
+
+class PreflopEquityTable:
+    """
+    The equity of every hand against every other hand, together with the
+    number of combinations of the two hands that don't share a card. The latter
+    is needed to weight the matchups when computing the equity of a range.
+    """
+
+    def __init__(self, equities: Sequence[int], nr_matchups: Sequence[int]):
+        self._equities = equities
+        self._nr_matchups = nr_matchups
+
+    @classmethod
+    def load(cls) -> "PreflopEquityTable":
+        data = files("anki_poker_master").joinpath("resources", _RESOURCE).read_bytes()
+        equities = array("H")
+        equities.frombytes(data[: 2 * _NR_HANDS * _NR_HANDS])
+        if sys.byteorder != "little":
+            equities.byteswap()
+        nr_matchups = array("B", data[2 * _NR_HANDS * _NR_HANDS :])
+        return cls(equities, nr_matchups)
+
+    def to_bytes(self) -> bytes:
+        equities = array("H", self._equities)
+        if sys.byteorder != "little":
+            equities.byteswap()
+        return equities.tobytes() + array("B", self._nr_matchups).tobytes()
+
+    def equity(self, hand: Hand, villain_hand: Hand) -> float:
+        """
+        Return the share of the pot the hand wins against the villain hand on
+        average.
+        """
+        i = _TABLE_INDEX[str(hand)] * _NR_HANDS + _TABLE_INDEX[str(villain_hand)]
+        return self._equities[i] / _MAX_EQUITY
+
+    def matchups(self, hand: str) -> Tuple[List[int], List[float]]:
+        """
+        Return the number of combinations of the hand and every other hand
+        that don't share a card, and the equity of the hand against every
+        other hand, both in the order of TABLE_HANDS.
+        """
+        row = _TABLE_INDEX[hand] * _NR_HANDS
+        nr_matchups = list(self._nr_matchups[row : row + _NR_HANDS])
+        equities = [e / _MAX_EQUITY for e in self._equities[row : row + _NR_HANDS]]
+        return nr_matchups, equities
+
+    def range_equity(
+        self, hands: Dict[Hand, float], villain_hands: Dict[Hand, float]
+    ) -> float:
+        """
+        Return the equity of a range against the villain range. Both ranges map
+        hands to their weights (e.g. 1 or the frequency of a mixed strategy).
+        Matchups are weighted by the number of combinations that don't share a
+        card.
+        """
+        total_weight = 0.0
+        total_equity = 0.0
+        villain = [(_TABLE_INDEX[str(h)], w) for h, w in villain_hands.items()]
+        for hand, weight in hands.items():
+            row = _TABLE_INDEX[str(hand)] * _NR_HANDS
+            for j, villain_weight in villain:
+                w = weight * villain_weight * self._nr_matchups[row + j]
+                total_weight += w
+                total_equity += w * self._equities[row + j]
+        if not total_weight:
+            raise ValueError("the ranges have no matchups without shared cards")
+        return total_equity / total_weight / _MAX_EQUITY
+
+
+@lru_cache(maxsize=None)
+def preflop_equity_table() -> PreflopEquityTable:
+    """
+    Return the shipped table, which is only read once.
+    """
+    return PreflopEquityTable.load()
+
+
+def compute_preflop_equity_table(samples: int, seed: int = 0) -> PreflopEquityTable:
+    """
+    Simulate the given number of boards for every matchup of two hands.
+    """
+    rng = random.Random(seed)
+    combos = [hand_combos(h) for h in TABLE_HANDS]
+    equities = [0] * (_NR_HANDS * _NR_HANDS)
+    nr_matchups = [0] * (_NR_HANDS * _NR_HANDS)
+    for i in range(_NR_HANDS):
+        for j in range(i, _NR_HANDS):
+            matchups = [
+                (a, b) for a in combos[i] for b in combos[j] if not set(a) & set(b)
+            ]
+            nr_matchups[i * _NR_HANDS + j] = nr_matchups[j * _NR_HANDS + i] = len(
+                matchups
+            )
+            if i == j:
+                equities[i * _NR_HANDS + j] = _MAX_EQUITY // 2
+                continue
+            points = 0
+            for _ in range(samples):
+                a, b = matchups[rng.randrange(len(matchups))]
+                board = _sample_board(rng, a + b)
+                hero = evaluate(board + list(a))
+                villain = evaluate(board + list(b))
+                points += 2 if hero > villain else 1 if hero == villain else 0
+            equity = round(points / (2 * samples) * _MAX_EQUITY)
+            equities[i * _NR_HANDS + j] = equity
+            equities[j * _NR_HANDS + i] = _MAX_EQUITY - equity
+    return PreflopEquityTable(equities, nr_matchups)
+
+
+@lru_cache(maxsize=65536)
+def equity_vs_cards(
+    hero_cards: Tuple[str, ...],
+    board: Tuple[str, ...],
+    villain_cards: Tuple[Tuple[str, ...], ...],
+) -> float:
+    """
+    Return the share of the pot the hero wins on average against the known
+    hole cards of one or more villains, e.g.
+    equity_vs_cards(("Ah", "Kh"), ("Qh", "7c", "2h"), (("Js", "Jd"),)).
+    """
+    if not villain_cards:
+        raise ValueError("there must be at least one villain")
+    if not board and len(villain_cards) == 1 and len(hero_cards) == 2:
+        return preflop_equity_table().equity(
+            _to_hand(hero_cards), _to_hand(villain_cards[0])
+        )
+    return _equity(
+        card_indices(hero_cards),
+        card_indices(board),
+        [[tuple(card_indices(cards))] for cards in villain_cards],
+        random.Random(repr((hero_cards, board, villain_cards))),
+    )
+
+
+@lru_cache(maxsize=65536)
+def equity_vs_range(
+    hero_cards: Tuple[str, ...], board: Tuple[str, ...], villain_range: str
+) -> float:
+    """
+    Return the share of the pot the hero wins on average against a villain
+    with a range of hands (e.g. "QQ+, AKs"). Villain hands that share a card
+    with the hero or the board are left out.
+    """
+    dead_cards = set(card_indices(hero_cards + board))
+    hands = Range(villain_range).hands
+    if not board and len(hero_cards) == 2:
+        # The table has the equity of every hand against every hand, so only
+        # the weights of the villain hands depend on the cards of the hero.
+        table = preflop_equity_table()
+        hero_hand = _to_hand(hero_cards)
+        total_weight = 0
+        total_equity = 0.0
+        for h in hands:
+            weight = sum(
+                1 for c in hand_combos(str(h)) if not dead_cards.intersection(c)
+            )
+            total_weight += weight
+            total_equity += weight * table.equity(hero_hand, h)
+        if not total_weight:
+            raise ValueError(f"every hand of {villain_range} shares a card with hero")
+        return total_equity / total_weight
+    return _postflop_equity_vs_range(
+        *_canonical_suits(hero_cards, board), villain_range
+    )
+
+
+@lru_cache(maxsize=65536)
+def _postflop_equity_vs_range(
+    hero_cards: Tuple[str, ...], board: Tuple[str, ...], villain_range: str
+) -> float:
+    dead_cards = set(card_indices(hero_cards + board))
+    villain_combos = [
+        c
+        for h in Range(villain_range).hands
+        for c in hand_combos(str(h))
+        if not dead_cards.intersection(c)
+    ]
+    return _equity(
+        card_indices(hero_cards),
+        card_indices(board),
+        [villain_combos],
+        random.Random(repr((hero_cards, board, villain_range))),
+    )
+
+
+def _canonical_suits(
+    hero_cards: Tuple[str, ...], board: Tuple[str, ...]
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Return the cards of the hero and the board with the suits renamed so that
+    spots that only differ by the suits, e.g. AhKh on Qh7c2d and AsKs on
+    Qs7c2d, are the same. The equity against a range doesn't depend on the
+    suits, since a range has every suit combination of its hands.
+    """
+    return min(
+        (
+            tuple(sorted(c[0] + suits[c[1]] for c in hero_cards)),
+            tuple(sorted(c[0] + suits[c[1]] for c in board)),
+        )
+        for suits in _SUIT_PERMUTATIONS
+    )
+
+
+def _to_hand(cards: Sequence[str]) -> Hand:
+    return Combo("".join(cards)).to_hand()
+
+
+def _equity(
+    hero: List[int],
+    board: List[int],
+    villains: List[List[Tuple[int, ...]]],
+    rng: random.Random,
+) -> float:
+    """
+    Return the equity of the hero against the villains, each with a list of
+    possible hole cards, by evaluating every deal or, if there are more than
+    _MAX_DEALS, a sample of them.
+    """
+    dead_cards = set(hero) | set(board)
+    hole_cards = [
+        deal
+        for deal in product(*villains)
+        if len(dead_cards.union(*deal)) == len(dead_cards) + sum(map(len, deal))
+    ]
+    if not hole_cards:
+        raise ValueError("the villains have no hole cards that aren't dealt yet")
+    nr_missing = 5 - len(board)
+    nr_unknown = 52 - len(dead_cards) - sum(map(len, hole_cards[0]))
+    points = 0.0
+    if len(hole_cards) * comb(nr_unknown, nr_missing) <= _MAX_DEALS:
+        hero_values: Dict[Tuple[int, ...], int] = {}
+        nr_deals = 0
+        for deal in hole_cards:
+            used = dead_cards.union(*deal)
+            deck = [c for c in range(52) if c not in used]
+            for runout in combinations(deck, nr_missing):
+                full_board = board + list(runout)
+                if runout not in hero_values:
+                    hero_values[runout] = evaluate(full_board + hero)
+                points += _share(
+                    hero_values[runout], [evaluate(full_board + list(v)) for v in deal]
+                )
+                nr_deals += 1
+        return points / nr_deals
+    if nr_missing > _MAX_MISSING_CARDS:
+        for _ in range(_MAX_DEALS):
+            deal = hole_cards[rng.randrange(len(hole_cards))]
+            full_board = (
+                board + _sample_board(rng, tuple(chain(dead_cards, *deal)))[:nr_missing]
+            )
+            points += _share(
+                evaluate(full_board + hero),
+                [evaluate(full_board + list(v)) for v in deal],
+            )
+        return points / _MAX_DEALS
+    # On the flop and the turn there are few runouts, so they are sampled from
+    # all of them and the value of the hand of the hero is only computed once
+    # per runout.
+    runouts = list(
+        combinations([c for c in range(52) if c not in dead_cards], nr_missing)
+    )
+    deal_cards = [frozenset(chain(*deal)) for deal in hole_cards]
+    hero_values = {}
+    nr_hole_cards = len(hole_cards)
+    nr_runouts = len(runouts)
+    random_ = rng.random
+    for _ in range(_MAX_DEALS):
+        i = int(random_() * nr_hole_cards)
+        deal = hole_cards[i]
+        runout = runouts[int(random_() * nr_runouts)]
+        while not deal_cards[i].isdisjoint(runout):
+            runout = runouts[int(random_() * nr_runouts)]
+        full_board = board + list(runout)
+        hero_value = hero_values.get(runout)
+        if hero_value is None:
+            hero_value = hero_values[runout] = evaluate(full_board + hero)
+        if len(deal) == 1:
+            villain_value = evaluate(full_board + list(deal[0]))
+            points += (
+                1.0
+                if hero_value > villain_value
+                else 0.5
+                if hero_value == villain_value
+                else 0.0
+            )
+        else:
+            points += _share(hero_value, [evaluate(full_board + list(v)) for v in deal])
+    return points / _MAX_DEALS
+
+
+def _share(hero_value: int, villain_values: List[int]) -> float:
+    """
+    Return the share of the pot the hero wins at showdown.
+    """
+    best = max(villain_values)
+    if hero_value > best:
+        return 1.0
+    if hero_value == best:
+        return 1 / (1 + villain_values.count(best))
+    return 0.0
+
+
+def _sample_board(rng: random.Random, dead_cards: Tuple[int, ...]) -> List[int]:
+    board = []
+    while len(board) < 5:
+        c = rng.randrange(52)
+        if c not in dead_cards and c not in board:
+            board.append(c)
+    return board
+
+
+if __name__ == "__main__":
+    table = compute_preflop_equity_table(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    )
+    path = files("anki_poker_master").joinpath("resources", _RESOURCE)
+    with open(str(path), "wb") as f:
+        f.write(table.to_bytes())
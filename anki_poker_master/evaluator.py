@@ -0,0 +1,145 @@
+"""
+Fast poker hand evaluator for hands of 5 to 7 cards. Cards are integers from
+0 to 51 (rank * 4 + suit). A hand is reduced to the counts of its ranks and,
+only if it contains five cards of one suit, to the ranks of that suit. Both are
+looked up in tables which are filled the first time a key is seen, so the
+evaluation of a hand is a handful of additions and one dictionary lookup.
+
+The values returned by evaluate() only have a meaning in relation to each
+other: the higher the value, the better the hand.
+"""
+
+from typing import Dict, List, Sequence
+
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = (
+    range(9)
+)
+
+# Three bits per rank for the number of cards of that rank
+_RANK_KEY = [1 << (3 * (c >> 2)) for c in range(52)]
+# Four bits per suit for the number of cards of that suit
+_SUIT_KEY = [1 << (4 * (c & 3)) for c in range(52)]
+_RANK_BIT = [1 << (c >> 2) for c in range(52)]
+
+# The wheel (A2345) is the lowest straight
+_STRAIGHTS = [0b1000000001111] + [0b11111 << i for i in range(9)]
+
+
+def card_index(card: str) -> int:
+    """
+    Return the integer of the card, e.g. "As".
+    """
+    if len(card) != 2 or card[0] not in RANKS or card[1] not in SUITS:
+        raise ValueError(f"Unexpected card: {card}")
+    return RANKS.index(card[0]) * 4 + SUITS.index(card[1])
+
+
+def card_indices(cards: Sequence[str]) -> List[int]:
+    return [card_index(c) for c in cards]
+
+
+def evaluate(cards: Sequence[int]) -> int:
+    """
+    Return the value of the best five card hand among the cards.
+    """
+    rank_key = 0
+    suit_key = 0
+    for c in cards:
+        rank_key += _RANK_KEY[c]
+        suit_key += _SUIT_KEY[c]
+    flush_suit = _FLUSH_SUIT[suit_key]
+    if flush_suit >= 0:
+        bits = 0
+        for c in cards:
+            if c & 3 == flush_suit:
+                bits |= _RANK_BIT[c]
+        return _FLUSH_VALUES[bits]
+    return _RANK_VALUES[rank_key]
+
+
+def category(value: int) -> int:
+    """
+    Return the category of the hand value, e.g. FLUSH.
+    """
+    return value >> 20
+
+
+def _value(hand_category: int, ranks: Sequence[int]) -> int:
+    """
+    Combine the category with up to five ranks (most significant first).
+    """
+    value = hand_category
+    for i in range(5):
+        value = (value << 4) | (ranks[i] if i < len(ranks) else 0)
+    return value
+
+
+def _straight_high(bits: int) -> int:
+    """
+    Return the highest rank of the best straight in the rank bits or -1.
+    """
+    for high in range(12, 2, -1):
+        straight = _STRAIGHTS[high - 3]
+        if bits & straight == straight:
+            return high
+    return -1
+
+
+class _FlushSuits(dict):
+    def __missing__(self, suit_key: int) -> int:
+        suit = next((s for s in range(4) if (suit_key >> (4 * s)) & 0xF >= 5), -1)
+        self[suit_key] = suit
+        return suit
+
+
+class _FlushValues(dict):
+    def __missing__(self, bits: int) -> int:
+        high = _straight_high(bits)
+        if high >= 0:
+            value = _value(STRAIGHT_FLUSH, [high])
+        else:
+            value = _value(FLUSH, [r for r in range(12, -1, -1) if bits >> r & 1])
+        self[bits] = value
+        return value
+
+
+class _RankValues(dict):
+    def __missing__(self, rank_key: int) -> int:
+        counts = [(rank_key >> (3 * r)) & 7 for r in range(13)]
+        # Ranks ordered by count and then by rank, e.g. the trips of a full
+        # house come before the pair
+        by_count = sorted(
+            (r for r in range(13) if counts[r]),
+            key=lambda r: (counts[r], r),
+            reverse=True,
+        )
+        top = counts[by_count[0]]
+        second = counts[by_count[1]] if len(by_count) > 1 else 0
+        bits = sum(1 << r for r in range(13) if counts[r])
+        high = _straight_high(bits)
+        if top == 4:
+            kicker = max(r for r in range(13) if counts[r] and r != by_count[0])
+            value = _value(QUADS, [by_count[0], kicker])
+        elif top == 3 and second >= 2:
+            value = _value(FULL_HOUSE, by_count[:2])
+        elif high >= 0:
+            value = _value(STRAIGHT, [high])
+        elif top == 3:
+            value = _value(TRIPS, by_count[:3])
+        elif top == 2 and second == 2:
+            kicker = max(r for r in by_count[2:])
+            value = _value(TWO_PAIR, by_count[:2] + [kicker])
+        elif top == 2:
+            value = _value(PAIR, by_count[:4])
+        else:
+            value = _value(HIGH_CARD, by_count[:5])
+        self[rank_key] = value
+        return value
+
+
+_FLUSH_SUIT: Dict[int, int] = _FlushSuits()
+_FLUSH_VALUES: Dict[int, int] = _FlushValues()
+_RANK_VALUES: Dict[int, int] = _RankValues()
@@ -4,6 +4,7 @@ import schema
 from poker import Range
 
 from anki_poker_master.helper import str_to_css_class
+from anki_poker_master.model.frequencies import RangeFrequencies
 
 
 class ValidationError(ValueError):
@@ -27,7 +28,16 @@ class PreflopScenario:
         range_colors: Dict = None,
         notes: str = None,
         source: str = None,
+        frequencies: RangeFrequencies = None,
+        villain_range: Range = None,
     ):
+        """
+        If the scenario has mixed strategies, frequencies contains how often
+        each hand takes each action and ranges contains every hand under the
+        action it takes most often.
+        villain_range is the range the equity of the ranges is computed
+        against, if any.
+        """
         self.ranges = ranges.copy()
         if "fold" not in [r.lower() for r in self.ranges]:
             # Make the fold range explicit if it's missing
@@ -47,3 +57,5 @@ class PreflopScenario:
                 self.extra_range_colors[str_to_css_class(color_k)] = color_v
         self.notes = notes
         self.source = source
+        self.frequencies = frequencies
+        self.villain_range = villain_range
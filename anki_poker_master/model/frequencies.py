@@ -0,0 +1,116 @@
+"""
+Mixed strategies, e.g. "raise AKo 70% of the time and call 30%", as they come
+out of solvers. The frequencies of all actions of a scenario are kept in one
+dense table with a row per hand of the 169 hand grid and a column per action.
+"""
+
+from array import array
+from typing import Dict, List
+
+from poker.hand import Hand, Range
+
+# All starting hands and the number of combinations of each (6 for pairs, 4
+# for suited and 12 for offsuit hands).
+HANDS: List[Hand] = sorted(Range("XX").hands)
+NR_COMBOS: List[int] = [6 if h.is_pair else 4 if h.is_suited else 12 for h in HANDS]
+TOTAL_COMBOS = sum(NR_COMBOS)
+HAND_INDEX: Dict[Hand, int] = {h: i for i, h in enumerate(HANDS)}
+
+# The action of the part of a hand that is not assigned to any action
+DEFAULT_ACTION = "Fold"
+
+# Frequencies are floats, so allow for rounding errors when adding them up
+_EPSILON = 1e-9
+
+
+class RangeFrequencies:
+    """
+    The frequency (between 0 and 1) with which every hand takes each action.
+    """
+
+    def __init__(self, actions: List[str]):
+        self.actions = list(actions)
+        self._action_index = {a: i for i, a in enumerate(self.actions)}
+        # Row-major: the frequencies of hand i are at [i * A, (i + 1) * A)
+        self._values = array("d", bytes(8 * len(HANDS) * len(self.actions)))
+
+    def set(self, hand: Hand, action: str, frequency: float):
+        i = HAND_INDEX[hand] * len(self.actions) + self._action_index[action]
+        self._values[i] = frequency
+
+    def add_range(self, action: str, hands: Range, frequency: float = 1.0):
+        """
+        Add the frequency to all hands of the range.
+        """
+        nr_actions = len(self.actions)
+        offset = self._action_index[action]
+        for h in hands.hands:
+            self._values[HAND_INDEX[h] * nr_actions + offset] += frequency
+
+    def get(self, hand: Hand, action: str) -> float:
+        i = HAND_INDEX[hand] * len(self.actions) + self._action_index[action]
+        return self._values[i]
+
+    def hand_frequencies(self, hand: Hand) -> Dict[str, float]:
+        """
+        Return the actions the hand takes with their frequencies, including
+        DEFAULT_ACTION if the frequencies don't add up to 1.
+        """
+        start = HAND_INDEX[hand] * len(self.actions)
+        result = {
+            a: f
+            for a, f in zip(
+                self.actions, self._values[start : start + len(self.actions)]
+            )
+            if f > _EPSILON
+        }
+        rest = 1.0 - sum(result.values())
+        if rest > _EPSILON:
+            default = next(
+                (a for a in self.actions if a.lower() == DEFAULT_ACTION.lower()),
+                DEFAULT_ACTION,
+            )
+            result[default] = result.get(default, 0.0) + rest
+        return result
+
+    def is_mixed(self, hand: Hand) -> bool:
+        return len(self.hand_frequencies(hand)) > 1
+
+    def overfull_hands(self) -> List[Hand]:
+        """
+        Return the hands whose frequencies add up to more than 100%.
+        """
+        nr_actions = len(self.actions)
+        return [
+            h
+            for i, h in enumerate(HANDS)
+            if sum(self._values[i * nr_actions : (i + 1) * nr_actions]) > 1 + _EPSILON
+        ]
+
+    def dominant_ranges(self) -> Dict[str, Range]:
+        """
+        Return the hands grouped by the action they take most often. Ties go
+        to the action that comes first. Hands that mostly take no action are
+        left out, they are folded. Every action is included, even if no hand
+        takes it most often.
+        """
+        nr_actions = len(self.actions)
+        hands: Dict[str, List[Hand]] = {a: [] for a in self.actions}
+        for i, h in enumerate(HANDS):
+            row = self._values[i * nr_actions : (i + 1) * nr_actions]
+            best = max(range(nr_actions), key=row.__getitem__)
+            if row[best] > _EPSILON and row[best] >= 1.0 - sum(row) - _EPSILON:
+                hands[self.actions[best]].append(h)
+        return {a: Range.from_objects(hands[a]) for a in self.actions}
+
+    def percentages(self) -> Dict[str, float]:
+        """
+        Return the share of all 1326 starting hand combinations that take each
+        action, weighted by the frequencies.
+        """
+        nr_actions = len(self.actions)
+        combos = [0.0] * nr_actions
+        for i, nr_combos in enumerate(NR_COMBOS):
+            for j in range(nr_actions):
+                combos[j] += self._values[i * nr_actions + j] * nr_combos
+        return {a: 100 * c / TOTAL_COMBOS for a, c in zip(self.actions, combos)}
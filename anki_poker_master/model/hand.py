@@ -1,33 +1,69 @@
 from numbers import Number
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Sequence
 
 from anki_poker_master.helper import format_n
 from anki_poker_master.model import ValidationError
 
 
 class Action:
-    pass
+    """
+    Base class of all actions. Actions are immutable and hashable value
+    objects so that identical actions can be shared.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
 
 class FoldAction(Action):
+    __slots__ = ()
+    # All folds are the same so there is only one instance
+    _instance: Optional["FoldAction"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        return FoldAction, ()
+
     def __str__(self):
         return "F"
 
+    def __repr__(self):
+        return "FoldAction()"
+
     def __eq__(self, other):
         return isinstance(other, FoldAction)
 
+    def __hash__(self):
+        return hash(FoldAction)
+
 
 class BetAction(Action):
+    __slots__ = ("_amount", "_is_all_in")
     _amount: Number
     _is_all_in: bool
 
     def __init__(self, amount: Number, is_all_in: bool = False) -> None:
-        self._amount = amount
-        self._is_all_in = is_all_in
+        object.__setattr__(self, "_amount", amount)
+        object.__setattr__(self, "_is_all_in", is_all_in)
+
+    def __reduce__(self):
+        return BetAction, (self._amount, self._is_all_in)
 
     def __str__(self):
         return f"B {format_n(self._amount)}" + (" (AI)" if self._is_all_in else "")
 
+    def __repr__(self):
+        return f"BetAction({self._amount!r}, is_all_in={self._is_all_in})"
+
     def __eq__(self, other):
         return (
             isinstance(other, BetAction)
@@ -35,6 +71,9 @@ class BetAction(Action):
             and self._is_all_in == other._is_all_in
         )
 
+    def __hash__(self):
+        return hash((BetAction, self._amount, self._is_all_in))
+
     def is_all_in(self) -> bool:
         return self._is_all_in
 
@@ -43,16 +82,23 @@ class BetAction(Action):
 
 
 class RaiseAction(Action):
+    __slots__ = ("_amount", "_is_all_in")
     _amount: Number
     _is_all_in: bool
 
     def __init__(self, amount: Number, is_all_in: bool = False) -> None:
-        self._amount = amount
-        self._is_all_in = is_all_in
+        object.__setattr__(self, "_amount", amount)
+        object.__setattr__(self, "_is_all_in", is_all_in)
+
+    def __reduce__(self):
+        return RaiseAction, (self._amount, self._is_all_in)
 
     def __str__(self):
         return f"R {format_n(self._amount)}" + (" (AI)" if self._is_all_in else "")
 
+    def __repr__(self):
+        return f"RaiseAction({self._amount!r}, is_all_in={self._is_all_in})"
+
     def __eq__(self, other):
         return (
             isinstance(other, RaiseAction)
@@ -60,6 +106,9 @@ class RaiseAction(Action):
             and self._is_all_in == other._is_all_in
         )
 
+    def __hash__(self):
+        return hash((RaiseAction, self._amount, self._is_all_in))
+
     def is_all_in(self) -> bool:
         return self._is_all_in
 
@@ -68,40 +117,88 @@ class RaiseAction(Action):
 
 
 class CheckAction(Action):
+    __slots__ = ()
+    # All checks are the same so there is only one instance
+    _instance: Optional["CheckAction"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        return CheckAction, ()
+
     def __str__(self):
         return "X"
 
+    def __repr__(self):
+        return "CheckAction()"
+
     def __eq__(self, other):
         return isinstance(other, CheckAction)
 
+    def __hash__(self):
+        return hash(CheckAction)
+
 
 class CallAction(Action):
+    __slots__ = ("_is_all_in",)
     _is_all_in: bool
+    # There are only two different calls (all-in or not) so there is only one
+    # instance of each
+    _instances: Dict[bool, "CallAction"] = {}
+
+    def __new__(cls, is_all_in: bool = False):
+        is_all_in = bool(is_all_in)
+        if is_all_in not in cls._instances:
+            instance = super().__new__(cls)
+            object.__setattr__(instance, "_is_all_in", is_all_in)
+            cls._instances[is_all_in] = instance
+        return cls._instances[is_all_in]
 
-    def __init__(self, is_all_in: bool = False) -> None:
-        self._is_all_in = is_all_in
+    def __reduce__(self):
+        return CallAction, (self._is_all_in,)
 
     def __str__(self):
         return "C"
 
+    def __repr__(self):
+        return f"CallAction(is_all_in={self._is_all_in})"
+
     def __eq__(self, other):
         return isinstance(other, CallAction) and self._is_all_in == other._is_all_in
 
+    def __hash__(self):
+        return hash((CallAction, self._is_all_in))
+
     def is_all_in(self) -> bool:
         return self._is_all_in
 
 
 class Question:
+    __slots__ = ("question", "answer", "action_table_indices", "pot", "to_call")
     question: str
     answer: str
     action_table_indices: Tuple[int, int]
+    # The chips in the middle (including the bets of the current street) and
+    # the amount the player has to call when it's their turn. None if unknown.
+    pot: Optional[Number]
+    to_call: Optional[Number]
 
     def __init__(
-        self, question: str, answer: str, action_table_indices: Tuple[int, int]
+        self,
+        question: str,
+        answer: str,
+        action_table_indices: Tuple[int, int],
+        pot: Optional[Number] = None,
+        to_call: Optional[Number] = None,
     ):
         self.question = question
         self.answer = answer
         self.action_table_indices = action_table_indices
+        self.pot = pot
+        self.to_call = to_call
 
     def __eq__(self, other):
         return (
@@ -109,23 +206,38 @@ class Question:
             and self.question == other.question
             and self.answer == other.answer
             and self.action_table_indices == other.action_table_indices
+            and self.pot == other.pot
+            and self.to_call == other.to_call
         )
 
     def __repr__(self):
         return (
-            f'Question("{self.question}", "{self.answer}", {self.action_table_indices})'
+            f'Question("{self.question}", "{self.answer}", '
+            f"{self.action_table_indices}, pot={self.pot!r}, to_call={self.to_call!r})"
         )
 
 
 class Street:
+    __slots__ = (
+        "name",
+        "board",
+        "initial_pots",
+        "initial_stacks",
+        "initial_players",
+        "first_player_actions",
+        "actions",
+        "questions",
+        "default_questions",
+    )
     name: str
     board: List[str]
     initial_pots: List[Number]
     initial_stacks: List[Number]
     initial_players: List[bool]
     first_player_actions: int
-    # will start with 'first_player_actions'
-    actions: List[List[Action]]
+    # will start with 'first_player_actions'. The actions of a row are a list
+    # while the street is being parsed and a tuple afterwards (see freeze()).
+    actions: List[Sequence[Action]]
     questions: List[Question]
     # one for every action that the 'hero' takes, only used if no explicit questions are asked
     default_questions: List[Question]
@@ -138,7 +250,7 @@ class Street:
         initial_players: List[bool],
         initial_stacks: List[Number],
         first_player_actions: int,
-        actions: List[List[Action]],
+        actions: List[Sequence[Action]],
         questions: Optional[List[Question]] = None,
         default_questions: Optional[List[Question]] = None,
     ):
@@ -161,13 +273,22 @@ class Street:
             and self.initial_players == other.initial_players
             and self.initial_stacks == other.initial_stacks
             and self.first_player_actions == other.first_player_actions
-            and self.actions == other.actions
+            and len(self.actions) == len(other.actions)
+            and all(tuple(a) == tuple(b) for a, b in zip(self.actions, other.actions))
             and self.questions == other.questions
             and self.default_questions == other.default_questions
         )
 
+    def freeze(self):
+        """
+        Store the actions of every row as a tuple, which needs less memory
+        than a list. Call it once no more actions will be added.
+        """
+        self.actions = [tuple(row) for row in self.actions]
+
 
 class Player:
+    __slots__ = ("name", "is_dealer", "is_hero")
     name: str
     is_dealer: bool
     is_hero: bool
@@ -192,20 +313,38 @@ class Player:
 
 
 class Hand:
+    # The PHH variant code, e.g. "NT" (no-limit Texas hold'em) or "PO"
+    # (pot-limit Omaha), see phh.SUPPORTED_VARIANTS
+    variant: str
     title: str
     # last one is the dealer
     players: List[Player]
+    # Two cards in hold'em, four in Omaha
     hero_cards: List[str]
     streets: List[Street]
     notes: str
     source: str
     context: str
     answers: List[str]
+    # The hole cards of the other players that are known, by player index
+    villain_cards: Dict[int, List[str]]
+    # The range the hero's equity is computed against instead of the known
+    # hole cards (empty if there is none)
+    villain_range: str
+    # The largest blind (or straddle) and the chips in the middle at the end
+    # of the hand, 0 if unknown
+    big_blind: Number
+    pot: Number
 
     def __init__(self):
+        self.variant: str = "NT"
         self.title: str = ""
         self.players: List[Player] = []
         self.hero_cards: List[str] = ["", ""]
+        self.villain_cards: Dict[int, List[str]] = {}
+        self.villain_range: str = ""
+        self.big_blind: Number = 0
+        self.pot: Number = 0
         self.streets: List[Street] = []
         self.notes: str = ""
         self.source: str = ""
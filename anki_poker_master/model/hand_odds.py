@@ -0,0 +1,115 @@
+"""
+Pot odds and equity of the hero at the study spots of a hand.
+
+The equity is computed against the villain range of the hand if there is one
+(see _apm_villain_range) and otherwise against the known hole cards of the
+players that are still in the hand. The equity calculations are memoized (see
+anki_poker_master.equity), so annotating many hands with the same spots is
+fast. The equity is only known for Texas hold'em, in other variants (e.g.
+Omaha or short deck) only the pot odds are.
+"""
+
+from numbers import Number
+from typing import List, Optional
+
+from anki_poker_master.equity import equity_vs_cards, equity_vs_range
+from anki_poker_master.model.hand import FoldAction, Hand, Question, Street
+
+# The variants whose hands anki_poker_master.equity can evaluate
+_EQUITY_VARIANTS = ("NT", "FT")
+
+
+class SpotOdds:
+    def __init__(
+        self,
+        pot: Optional[Number],
+        to_call: Optional[Number],
+        equity: Optional[float],
+        villain: str,
+    ):
+        # The chips in the middle and the amount the hero has to call, see
+        # Question
+        self.pot = pot
+        self.to_call = to_call
+        # Share of the pot the hero wins on average or None if nothing is known
+        # about the hands of the villains
+        self.equity = equity
+        # What the equity is computed against, e.g. "QQ+, AKs" or "JsJd"
+        self.villain = villain
+
+    @property
+    def pot_odds(self) -> Optional[float]:
+        """
+        Return the equity the hero needs to call profitably or None if there
+        is nothing to call.
+        """
+        if not self.to_call or self.pot is None:
+            return None
+        return self.to_call / (self.pot + self.to_call)
+
+
+def spot_odds(hand: Hand) -> List[SpotOdds]:
+    """
+    Return the odds of every question of the hand (in the order of the streets
+    and questions).
+    """
+    hand.validate()
+    if hand.variant not in _EQUITY_VARIANTS:
+        return [
+            SpotOdds(q.pot, q.to_call, None, "")
+            for street in hand.streets
+            for q in street.questions
+        ]
+    hero_cards = tuple(hand.hero_cards)
+    result = []
+    for street in hand.streets:
+        board = tuple(street.board)
+        for question in street.questions:
+            equity = None
+            villain = ""
+            # The equity functions raise a ValueError if the villains have no
+            # hole cards left that aren't dealt yet (e.g. AA with the hero
+            # holding two aces and an ace on the board). Then only the pot
+            # odds are known.
+            if hand.villain_range:
+                villain = hand.villain_range
+                try:
+                    equity = equity_vs_range(hero_cards, board, hand.villain_range)
+                except ValueError:
+                    equity = None
+            else:
+                villain_cards = tuple(
+                    tuple(hand.villain_cards[i])
+                    for i in _players_in_hand(hand, street, question)
+                    if i in hand.villain_cards
+                )
+                if villain_cards:
+                    villain = ", ".join("".join(cards) for cards in villain_cards)
+                    try:
+                        equity = equity_vs_cards(hero_cards, board, villain_cards)
+                    except ValueError:
+                        equity = None
+            result.append(SpotOdds(question.pot, question.to_call, equity, villain))
+    return result
+
+
+def _players_in_hand(hand: Hand, street: Street, question: Question) -> List[int]:
+    """
+    Return the indices of the players that haven't folded when the question
+    is asked, except for the hero.
+    """
+    question_row, question_col = question.action_table_indices
+    players = []
+    for row, actions in enumerate(street.actions):
+        player_index = (row + street.first_player_actions) % len(hand.players)
+        if hand.players[player_index].is_hero:
+            continue
+        if not street.initial_players[player_index]:
+            continue
+        # The same actions that are shown with the question, see
+        # presenter.html.phh
+        nr_actions = question_col + 1 if row < question_row else question_col
+        if FoldAction() in actions[:nr_actions]:
+            continue
+        players.append(player_index)
+    return players
@@ -0,0 +1,128 @@
+"""
+Select the most instructive hands of a large collection instead of creating
+a note for every hand.
+
+Hands are scored by how much there is to learn from them (see hand_score) and
+either the best hands overall (select_top) or the best hands of every group,
+e.g. of every street the hands end on, in proportion to the size of the group
+(select_stratified) are kept. The hands are consumed one by one and only the
+best ones seen so far are kept in a bounded heap, so selecting from millions of
+hands needs memory for the selected hands only.
+"""
+
+import heapq
+import math
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple, TypeVar
+
+from anki_poker_master.model.hand import BetAction, CallAction, Hand, RaiseAction
+
+T = TypeVar("T")
+
+# Weights of the features of a hand in its score, see hand_score
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    # Per doubling of the final pot measured in big blinds
+    "pot": 1.0,
+    # Per study spot (decision of the hero)
+    "decisions": 1.0,
+    # If a player is all-in
+    "all_in": 2.0,
+    # Per player beyond two that sees the flop
+    "multiway": 1.0,
+}
+
+
+def hand_score(hand: Hand, weights: Dict[str, float] = DEFAULT_WEIGHTS) -> float:
+    """
+    Return how instructive the hand is: the higher the better. Big pots, many
+    decisions of the hero, all-ins and multiway pots score higher.
+    """
+    pot_bb = hand.pot / hand.big_blind if hand.big_blind else 0
+    decisions = sum(len(s.questions) for s in hand.streets)
+    all_in = any(
+        isinstance(a, (BetAction, CallAction, RaiseAction)) and a.is_all_in()
+        for s in hand.streets
+        for row in s.actions
+        for a in row
+    )
+    players_flop = sum(hand.streets[1].initial_players) if len(hand.streets) > 1 else 0
+    return (
+        weights["pot"] * math.log2(1 + pot_bb)
+        + weights["decisions"] * decisions
+        + weights["all_in"] * all_in
+        + weights["multiway"] * max(players_flop - 2, 0)
+    )
+
+
+# (key, -position in the input, item). The position is unique, so items are
+# never compared, and earlier items win ties.
+_Entry = Tuple[float, int, T]
+
+
+def _push(heap: List[_Entry], entry: _Entry, k: int):
+    """
+    Add the entry to the min-heap, which keeps the k largest entries.
+    """
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _in_input_order(entries: Iterable[_Entry]) -> List[T]:
+    return [item for _, _, item in sorted(entries, key=lambda e: -e[1])]
+
+
+def select_top(items: Iterable[T], k: int, key: Callable[[T], float]) -> List[T]:
+    """
+    Return the k items with the highest key, in the order of the input. If
+    there is a tie, the earlier item is selected.
+    """
+    if k < 1:
+        raise ValueError("at least one item must be selected")
+    heap: List[_Entry] = []
+    for i, item in enumerate(items):
+        _push(heap, (key(item), -i, item), k)
+    return _in_input_order(heap)
+
+
+def select_stratified(
+    items: Iterable[T],
+    k: int,
+    key: Callable[[T], float],
+    stratum: Callable[[T], Hashable],
+) -> List[T]:
+    """
+    Return k items, in the order of the input, taken from every stratum (e.g.
+    the last street of a hand) in proportion to the number of its items.
+    Within a stratum the items with the highest key are selected. At most k
+    items per stratum are kept in memory.
+    """
+    if k < 1:
+        raise ValueError("at least one item must be selected")
+    heaps: Dict[Hashable, List[_Entry]] = {}
+    counts: Counter = Counter()
+    for i, item in enumerate(items):
+        s = stratum(item)
+        counts[s] += 1
+        _push(heaps.setdefault(s, []), (key(item), -i, item), k)
+    quotas = _allocate(k, counts)
+    return _in_input_order(
+        entry for s, heap in heaps.items() for entry in heapq.nlargest(quotas[s], heap)
+    )
+
+
+def _allocate(k: int, counts: Dict[Hashable, int]) -> Dict[Hashable, int]:
+    """
+    Split k into quotas proportional to the counts (largest remainder method,
+    earlier strata win ties). No quota exceeds its count.
+    """
+    total = sum(counts.values())
+    if k >= total:
+        return dict(counts)
+    exact = {s: k * n / total for s, n in counts.items()}
+    quotas = {s: math.floor(q) for s, q in exact.items()}
+    by_remainder = sorted(counts, key=lambda s: quotas[s] - exact[s])
+    for s in by_remainder[: k - sum(quotas.values())]:
+        quotas[s] += 1
+    return quotas
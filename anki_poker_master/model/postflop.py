@@ -0,0 +1,323 @@
+"""
+Postflop scenarios: what to do with every class of hands (e.g. top pair or a
+flush draw) of the range of the hero on a given board.
+
+The hand classes of all combinations on a board are computed at once and
+memoized, so decks with thousands of board spots compile quickly. Which pair a
+hand makes only depends on the ranks of the hole cards and the board, so it is
+looked up in a table that is filled the first time the ranks are seen (like
+the tables of anki_poker_master.evaluator).
+"""
+
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from poker import Card, Range
+
+from anki_poker_master.equity import hand_combos
+from anki_poker_master.evaluator import (
+    FLUSH,
+    FULL_HOUSE,
+    PAIR,
+    QUADS,
+    RANKS,
+    STRAIGHT,
+    STRAIGHT_FLUSH,
+    SUITS,
+    TRIPS,
+    TWO_PAIR,
+    card_index,
+    card_indices,
+    category,
+    evaluate,
+)
+
+# The made hands, from the strongest to the weakest. The hole cards of the hero
+# have to be part of the hand, e.g. a pair on the board is not a pair of the
+# hero.
+MADE_HANDS = (
+    "straight flush",
+    "quads",
+    "full house",
+    "flush",
+    "straight",
+    "set",
+    "trips",
+    "two pair",
+    "overpair",
+    "top pair",
+    "second pair",
+    "weak pair",
+)
+# The draws of hands without a made hand, which only exist before the river
+DRAWS = ("combo draw", "flush draw", "open-ended", "gutshot")
+AIR = "air"
+HAND_CLASSES = MADE_HANDS + DRAWS + (AIR,)
+
+_MADE_HAND_CATEGORIES = {
+    STRAIGHT_FLUSH: "straight flush",
+    QUADS: "quads",
+    FULL_HOUSE: "full house",
+    FLUSH: "flush",
+    STRAIGHT: "straight",
+}
+
+# The rank bits of the straights, the wheel (A2345) first
+_STRAIGHTS = [0b1000000001111] + [0b11111 << i for i in range(9)]
+
+
+class PostflopScenario:
+    def __init__(
+        self,
+        board: Sequence[str],
+        actions: Dict[str, Sequence[str]],
+        position: str,
+        scenario: str,
+        game: str,
+        hero_range: Optional[Range] = None,
+        default_action: str = "Check",
+        notes: str = None,
+        source: str = None,
+    ):
+        """
+        actions contains the hand classes (see HAND_CLASSES) that take each
+        action. The hand classes that aren't listed take the default_action.
+        hero_range is the range of the hero when the board is dealt, all hands
+        if it is None.
+        """
+        self.board = list(board)
+        self.actions = {a: list(classes) for a, classes in actions.items()}
+        self.position = position
+        self.scenario = scenario
+        self.game = game
+        self.hero_range = hero_range if hero_range is not None else Range("XX")
+        self.default_action = default_action
+        self.notes = notes
+        self.source = source
+
+    def action(self, hand_class: str) -> str:
+        """
+        Return the action the hands of the class take.
+        """
+        return next(
+            (a for a, classes in self.actions.items() if hand_class in classes),
+            self.default_action,
+        )
+
+    def hand_classes(self) -> Dict[str, List[str]]:
+        """
+        Return the combinations of the range of the hero (e.g. "AhKh") by hand
+        class, in the order of HAND_CLASSES and without the empty classes. The
+        combinations that contain a card of the board are left out.
+        """
+        classes = classify(tuple(self.board))
+        by_class: Dict[str, List[str]] = {c: [] for c in HAND_CLASSES}
+        for combo in _range_combos(self.hero_range):
+            key = _combo_key(combo)
+            if key in classes:
+                by_class[classes[key]].append(_combo_str(combo))
+        return {c: combos for c, combos in by_class.items() if combos}
+
+    def texture(self) -> List[str]:
+        return board_texture(self.board)
+
+
+def board_texture(board: Sequence[str]) -> List[str]:
+    """
+    Describe the board, e.g. ["A-high", "two-tone", "paired", "connected"].
+
+    The suits are "rainbow" (no two cards of one suit), "two-tone" (two cards
+    of one suit), "monotone" (all cards of one suit) or, on the turn and the
+    river, "flush possible" (three or more cards of one suit). The board is
+    "connected" if a straight is possible.
+    """
+    cards = card_indices(board)
+    ranks = [c >> 2 for c in cards]
+    suit_counts = [sum(1 for c in cards if c & 3 == s) for s in range(4)]
+    texture = [f"{RANKS[max(ranks)]}-high"]
+    if max(suit_counts) == len(cards):
+        texture.append("monotone")
+    elif max(suit_counts) >= 3:
+        texture.append("flush possible")
+    elif max(suit_counts) == 2:
+        texture.append("two-tone")
+    else:
+        texture.append("rainbow")
+    if len(set(ranks)) < len(ranks):
+        texture.append("paired")
+    bits = _rank_bits(ranks)
+    if any(bin(bits & s).count("1") >= 3 for s in _STRAIGHTS):
+        texture.append("connected")
+    return texture
+
+
+def hand_class(hole_cards: Sequence[str], board: Sequence[str]) -> str:
+    """
+    Return the hand class of the hole cards on the board (3 to 5 cards), e.g.
+    "top pair".
+    """
+    return _hand_class(tuple(card_indices(hole_cards)), tuple(card_indices(board)))
+
+
+@lru_cache(maxsize=4096)
+def classify(board: Tuple[str, ...]) -> Dict[Tuple[int, int], str]:
+    """
+    Return the hand class of every combination of hole cards on the board by
+    the card indices of the combination (the higher card first).
+    """
+    board_cards = tuple(card_indices(board))
+    if not 3 <= len(board_cards) <= 5 or len(set(board_cards)) < len(board_cards):
+        raise ValueError(f"Invalid board: {' '.join(board)}")
+    deck = [c for c in range(52) if c not in board_cards]
+    return {
+        (high, low): _hand_class((high, low), board_cards)
+        for low, high in combinations(deck, 2)
+    }
+
+
+def _hand_class(hole: Tuple[int, ...], board: Tuple[int, ...]) -> str:
+    cards = hole + board
+    value = evaluate(cards)
+    hand_category = category(value)
+    board_plays = len(board) == 5 and evaluate(board) == value
+    # Before the river the board alone can already be quads or a full house
+    if (
+        hand_category in _MADE_HAND_CATEGORIES
+        and not board_plays
+        and (len(board) == 5 or hand_category > _board_category(board))
+    ):
+        return _MADE_HAND_CATEGORIES[hand_category]
+    made = _RANK_CLASSES[
+        (tuple(sorted((c >> 2 for c in hole), reverse=True)), _board_ranks(board))
+    ]
+    if made is not None:
+        return made
+    if len(board) == 5:
+        return AIR
+    flush_draw = any(
+        sum(1 for c in cards if c & 3 == s) == 4 and any(c & 3 == s for c in hole)
+        for s in range(4)
+    )
+    straight_outs = _straight_outs(
+        _rank_bits(c >> 2 for c in cards), _rank_bits(c >> 2 for c in board)
+    )
+    if flush_draw and straight_outs:
+        return "combo draw"
+    if flush_draw:
+        return "flush draw"
+    if straight_outs >= 2:
+        return "open-ended"
+    if straight_outs == 1:
+        return "gutshot"
+    return AIR
+
+
+def _board_category(board: Tuple[int, ...]) -> int:
+    """
+    Return the category of the pairs, trips and quads of the board alone.
+    """
+    counts = sorted((_board_ranks(board).count(r) for r in set(c >> 2 for c in board)))
+    if counts[-1] == 4:
+        return QUADS
+    if counts[-1] == 3:
+        return FULL_HOUSE if len(counts) > 1 and counts[-2] >= 2 else TRIPS
+    if counts[-1] == 2:
+        return TWO_PAIR if counts[-2:] == [2, 2] else PAIR
+    return 0
+
+
+def _board_ranks(board: Tuple[int, ...]) -> Tuple[int, ...]:
+    return tuple(sorted((c >> 2 for c in board), reverse=True))
+
+
+def _rank_bits(ranks) -> int:
+    bits = 0
+    for r in ranks:
+        bits |= 1 << r
+    return bits
+
+
+def _straight_outs(bits: int, board_bits: int) -> int:
+    """
+    Return the number of ranks that complete a straight with the hole cards
+    but not with the board alone.
+    """
+
+    def is_straight(b: int) -> bool:
+        return any(b & s == s for s in _STRAIGHTS)
+
+    return sum(
+        1
+        for r in range(13)
+        if not bits >> r & 1
+        and is_straight(bits | 1 << r)
+        and not is_straight(board_bits | 1 << r)
+    )
+
+
+class _RankClasses(dict):
+    """
+    The made hands up to trips that only depend on the ranks, by the ranks of
+    the hole cards and of the board (both in descending order). None if the
+    hole cards don't make a pair.
+    """
+
+    def __missing__(
+        self, key: Tuple[Tuple[int, ...], Tuple[int, ...]]
+    ) -> Optional[str]:
+        hole, board = key
+        distinct = sorted(set(board), reverse=True)
+        paired = [r for r in hole if r in board]
+        result = None
+        if hole[0] == hole[1]:
+            if hole[0] in board:
+                result = "set"
+            else:
+                above = sum(1 for r in distinct if r > hole[0])
+                result = "overpair" if above == 0 else _pair_class(above)
+        elif paired and board.count(paired[0]) >= 2:
+            result = "trips"
+        elif len(paired) == 2:
+            result = "two pair"
+        elif paired:
+            result = _pair_class(distinct.index(paired[0]))
+        self[key] = result
+        return result
+
+
+def _pair_class(nr_ranks_above: int) -> str:
+    """
+    Return the class of a pair below nr_ranks_above ranks of the board.
+    """
+    return {0: "top pair", 1: "second pair"}.get(nr_ranks_above, "weak pair")
+
+
+_RANK_CLASSES: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], Optional[str]] = (
+    _RankClasses()
+)
+
+
+def _range_combos(hero_range: Range) -> List[Tuple[int, int]]:
+    """
+    Return the combinations of the range as pairs of card indices.
+    """
+    hands = [str(h) for h in hero_range.hands]
+    combos = [c for h in hands for c in hand_combos(h)]
+    if len(combos) == len(hero_range):
+        # Only whole hands, which are much faster to expand than Range.combos
+        return combos
+    return [(_card(c.first), _card(c.second)) for c in hero_range.combos]
+
+
+def _card(card: Card) -> int:
+    return card_index(str(card.rank) + card.suit.name[0].lower())
+
+
+def _combo_key(combo: Tuple[int, int]) -> Tuple[int, int]:
+    return (max(combo), min(combo))
+
+
+def _combo_str(combo: Tuple[int, int]) -> str:
+    high, low = _combo_key(combo)
+    return "".join(RANKS[c >> 2] + SUITS[c & 3] for c in (high, low))
@@ -0,0 +1,285 @@
+"""
+Push/fold charts for short stacks in tournaments: the hands to go all-in with
+when everybody folded to the player, and the hands to call the all-in with,
+by stack depth and position.
+
+The charts approximate a Nash equilibrium, which is found by fictitious play
+over the 169 starting hands: the pusher and the callers repeatedly play the
+best response to the average strategy of the other side. The equity of every
+hand against every other hand comes from the precomputed preflop equity table
+(see anki_poker_master.equity), so no hands are simulated, and each best
+response is a handful of dot products per hand.
+
+As usual for push/fold charts, only the first player that calls is
+considered (everybody behind folds) and the callers don't consider the
+players behind them.
+"""
+
+from functools import lru_cache
+from operator import mul
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from poker import Hand, Range
+
+from anki_poker_master.equity import TABLE_HANDS, preflop_equity_table
+from anki_poker_master.model import PreflopScenario
+
+# The positions in the order they act preflop, for up to nine players. A
+# table with fewer players has the last ones, e.g. SB and BB heads-up.
+POSITIONS = ["UTG", "UTG+1", "UTG+2", "LJ", "HJ", "CO", "BTN", "SB", "BB"]
+MAX_PLAYERS = len(POSITIONS)
+
+_BLINDS = {"SB": 0.5, "BB": 1.0}
+_NR_HANDS = len(TABLE_HANDS)
+_MAX_ITERATIONS = 500
+# The solver stops once the charts didn't change for this many iterations
+_STABLE_ITERATIONS = 30
+
+
+class PushFoldChart:
+    def __init__(
+        self,
+        stack: float,
+        position: str,
+        push: List[str],
+        calls: Dict[str, List[str]],
+    ):
+        # The effective stack in big blinds
+        self.stack = stack
+        # The position of the player that pushes
+        self.position = position
+        # The hands to push with, e.g. ["AA", "AKs"]
+        self.push = push
+        # The hands to call the push with by position of the caller
+        self.calls = calls
+
+
+def table_positions(nr_players: int) -> List[str]:
+    """
+    Return the positions of a table in the order they act preflop.
+    """
+    if not 2 <= nr_players <= MAX_PLAYERS:
+        raise ValueError(f"the number of players must be 2 to {MAX_PLAYERS}")
+    return POSITIONS[-nr_players:]
+
+
+def min_stack(ante: float = 0.0) -> float:
+    """
+    Return the smallest stack depth (in big blinds) that can post the big
+    blind and the ante.
+    """
+    return 1 + ante
+
+
+def solve(
+    stack: float,
+    position: str,
+    nr_players: int,
+    ante: float = 0.0,
+) -> PushFoldChart:
+    """
+    Return the push/fold chart of the position for the stack depth (in big
+    blinds). The ante is paid by every player, in big blinds.
+    """
+    return _solve(stack, position, nr_players, ante)[0]
+
+
+def push_fold_scenarios(
+    stacks: Iterable[float],
+    nr_players: int,
+    ante: float = 0.0,
+    calling_ranges: bool = False,
+) -> List[PreflopScenario]:
+    """
+    Return one scenario per stack depth and position that can push (every
+    position but the big blind), with the Push range. If calling_ranges is
+    True, there is also one scenario per player that can call the push, with
+    the Call range.
+
+    The stack depths below min_stack(ante) are skipped. Raises a ValueError if
+    that leaves no stack depth.
+    """
+    stacks = [s for s in stacks if s >= min_stack(ante)]
+    if not stacks:
+        raise ValueError(
+            f"no stack depth is at least {min_stack(ante):g}BB (the big blind "
+            "and the ante)"
+        )
+    game = f"Push/fold {nr_players}P"
+    if ante:
+        game += f", ante {ante:g}BB"
+    scenarios = []
+    for position in table_positions(nr_players)[:-1]:
+        for stack in stacks:
+            chart = solve(stack, position, nr_players, ante)
+            scenarios.append(
+                PreflopScenario(
+                    ranges={"Push": _range(chart.push)},
+                    position=position,
+                    scenario=f"{stack:g}BB, folded to you",
+                    game=game,
+                )
+            )
+            if not calling_ranges:
+                continue
+            for caller, hands in chart.calls.items():
+                scenarios.append(
+                    PreflopScenario(
+                        ranges={"Call": _range(hands)},
+                        position=caller,
+                        scenario=f"{stack:g}BB, {position} pushes",
+                        game=game,
+                    )
+                )
+    return scenarios
+
+
+def _range(hands: Sequence[str]) -> Range:
+    return Range.from_objects(Hand(h) for h in hands)
+
+
+@lru_cache(maxsize=None)
+def _matchups() -> Tuple[List[List[float]], List[List[float]]]:
+    """
+    Return for every hand the probability of every other hand (given the cards
+    of the hand) and the same multiplied by the equity against it, in the
+    order of TABLE_HANDS.
+    """
+    table = preflop_equity_table()
+    probabilities = []
+    weighted_equities = []
+    for hand in TABLE_HANDS:
+        nr_matchups, equities = table.matchups(hand)
+        total = sum(nr_matchups)
+        probabilities.append([n / total for n in nr_matchups])
+        weighted_equities.append([n * e / total for n, e in zip(nr_matchups, equities)])
+    return probabilities, weighted_equities
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(map(mul, a, b))
+
+
+class _Strategy:
+    """
+    The average strategy of one side over the 169 hands during fictitious
+    play, together with the probability of the strategy's hands and the
+    equity against them for every hand of the other side (the dot products
+    with the matchups). The best responses only change a few hands from one
+    iteration to the next, so the dot products are updated with the changes
+    instead of being computed again.
+    """
+
+    def __init__(
+        self,
+        initial: List[float],
+        probabilities: List[List[float]],
+        weighted_equities: List[List[float]],
+    ):
+        self._probabilities = probabilities
+        self._weighted_equities = weighted_equities
+        self.average = list(initial)
+        # The probability of the hands of the strategy given every hand (e.g.
+        # of being called with AKo) and the weighted equity against them
+        self.probability = [_dot(row, initial) for row in probabilities]
+        self.equity = [_dot(row, initial) for row in weighted_equities]
+        self._response = list(initial)
+        self._response_probability = list(self.probability)
+        self._response_equity = list(self.equity)
+
+    def update(self, response: List[float], step: float):
+        """
+        Move the average strategy towards the response by step.
+        """
+        changed = [
+            (h, new - old)
+            for h, (new, old) in enumerate(zip(response, self._response))
+            if new != old
+        ]
+        if changed:
+            for v in range(_NR_HANDS):
+                row = self._probabilities[v]
+                self._response_probability[v] += sum(row[h] * d for h, d in changed)
+                row = self._weighted_equities[v]
+                self._response_equity[v] += sum(row[h] * d for h, d in changed)
+        self._response = response
+        self.average = _step(self.average, response, step)
+        self.probability = _step(self.probability, self._response_probability, step)
+        self.equity = _step(self.equity, self._response_equity, step)
+
+    def chart(self) -> Tuple[bool, ...]:
+        return tuple(a >= 0.5 for a in self.average)
+
+
+def _step(values: List[float], targets: List[float], step: float) -> List[float]:
+    return [v + (t - v) * step for v, t in zip(values, targets)]
+
+
+@lru_cache(maxsize=1024)
+def _solve(
+    stack: float, position: str, nr_players: int, ante: float
+) -> Tuple[PushFoldChart, int]:
+    """
+    Return the chart and the number of iterations it took.
+    """
+    positions = table_positions(nr_players)
+    if position not in positions[:-1]:
+        raise ValueError(f"{position} can't push at a table of {nr_players} players")
+    if stack < min_stack(ante):
+        raise ValueError("the stack must be at least the big blind and the ante")
+    matchups = _matchups()
+    callers = positions[positions.index(position) + 1 :]
+    pusher_blind = _BLINDS.get(position, 0.0)
+    # The chips in the middle before anybody acts
+    dead = sum(_BLINDS.values()) + nr_players * ante
+    fold_ev = -pusher_blind - ante
+    steal_ev = dead - pusher_blind - ante
+    # The callers that post the same blind play the same strategy, so one
+    # strategy per blind is enough
+    blinds = sorted({_BLINDS.get(c, 0.0) for c in callers})
+    caller_blinds = [_BLINDS.get(c, 0.0) for c in callers]
+    # What the pusher wins if a player calls and loses, i.e. the stack of the
+    # caller and the dead money except the chips of both players
+    pot = {b: 2 * stack + dead - pusher_blind - b - 2 * ante for b in blinds}
+
+    push = _Strategy([1.0] * _NR_HANDS, *matchups)
+    call = {b: _Strategy([0.5] * _NR_HANDS, *matchups) for b in blinds}
+    charts = None
+    stable = 0
+    iteration = 1
+    for iteration in range(1, _MAX_ITERATIONS + 1):
+        # Best response of the pusher to the average calling ranges
+        push_response = []
+        for h in range(_NR_HANDS):
+            ev = 0.0
+            # The probability that all callers so far folded
+            reach = 1.0
+            for b in caller_blinds:
+                called = call[b].probability[h]
+                ev += reach * (call[b].equity[h] * pot[b] - called * stack)
+                reach *= 1 - called
+            ev += reach * steal_ev
+            push_response.append(1.0 if ev > fold_ev else 0.0)
+        # Best response of the callers to the average pushing range
+        call_responses = {b: [] for b in blinds}
+        for v in range(_NR_HANDS):
+            pushed = push.probability[v]
+            equity = push.equity[v] / pushed if pushed else 0.0
+            for b in blinds:
+                call_ev = equity * pot[b] - stack
+                call_responses[b].append(1.0 if call_ev > -b - ante else 0.0)
+        push.update(push_response, 1 / (iteration + 1))
+        for b in blinds:
+            call[b].update(call_responses[b], 1 / (iteration + 1))
+        new_charts = (push.chart(), tuple(call[b].chart() for b in blinds))
+        stable = stable + 1 if new_charts == charts else 0
+        charts = new_charts
+        if stable == _STABLE_ITERATIONS:
+            break
+
+    push_hands = [h for h, p in zip(TABLE_HANDS, push.chart()) if p]
+    calls = {
+        c: [h for h, p in zip(TABLE_HANDS, call[b].chart()) if p]
+        for c, b in zip(callers, caller_blinds)
+    }
+    return PushFoldChart(stack, position, push_hands, calls), iteration
@@ -0,0 +1,146 @@
+"""
+Statistics of the ranges of a scenario: the number of combinations, how often
+the hands hold an ace or a king and how many of the villain's premium hands
+that blocks, and the preflop equity against the villain range.
+
+Scenarios often share ranges (e.g. the same calling range in several spots),
+so the statistics are cached by the bitmask of the hands of the range.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from poker.hand import Hand, Range
+
+from anki_poker_master.equity import hand_combos, preflop_equity_table
+from anki_poker_master.model import PreflopScenario
+from anki_poker_master.model.frequencies import (
+    HAND_INDEX,
+    HANDS,
+    NR_COMBOS,
+    TOTAL_COMBOS,
+)
+
+# The villain hands whose combinations the blockers remove
+BLOCKED_HANDS = "AA, KK, AK"
+_BLOCKED_COMBOS = [
+    set(c) for h in Range(BLOCKED_HANDS).hands for c in hand_combos(str(h))
+]
+
+# Bitmask of the hands and, for mixed strategies, the weight of every hand
+_RangeKey = Tuple[int, Optional[Tuple[float, ...]]]
+
+
+class ActionAnalytics:
+    def __init__(
+        self,
+        action: str,
+        combos: float,
+        percent: float,
+        ace_percent: float,
+        king_percent: float,
+        blocked_percent: float,
+        equity: Optional[float],
+    ):
+        self.action = action
+        # Number of combinations, weighted by the frequencies
+        self.combos = combos
+        # Share of all 1326 combinations
+        self.percent = percent
+        # Share of the combinations of the range that contain an ace or a king
+        self.ace_percent = ace_percent
+        self.king_percent = king_percent
+        # Average share of the combinations of BLOCKED_HANDS that the hands of
+        # the range remove from the villain range
+        self.blocked_percent = blocked_percent
+        # Equity against the villain range or None if there is none
+        self.equity = equity
+
+
+def analyze(scenario: PreflopScenario) -> List[ActionAnalytics]:
+    """
+    Return the statistics of every action of the scenario that has hands.
+    """
+    villain_key = None
+    if scenario.villain_range is not None:
+        villain_key = _range_key({h: 1.0 for h in scenario.villain_range.hands})
+    result = []
+    for action in sorted(scenario.ranges):
+        weights = _weights(scenario, action)
+        if not weights:
+            continue
+        result.append(_analyze(action, _range_key(weights), villain_key))
+    return result
+
+
+def _weights(scenario: PreflopScenario, action: str) -> Dict[Hand, float]:
+    if scenario.frequencies is None:
+        return {h: 1.0 for h in scenario.ranges[action].hands}
+    weights = {}
+    for h in HANDS:
+        # Includes the part of the hand that is folded by default
+        f = scenario.frequencies.hand_frequencies(h).get(action, 0.0)
+        if f > 0:
+            weights[h] = f
+    return weights
+
+
+def _range_key(weights: Dict[Hand, float]) -> _RangeKey:
+    mask = 0
+    for h in weights:
+        mask |= 1 << HAND_INDEX[h]
+    if all(w == 1.0 for w in weights.values()):
+        return mask, None
+    return mask, tuple(weights[h] for h in HANDS if h in weights)
+
+
+def _hands(key: _RangeKey) -> Dict[Hand, float]:
+    mask, weights = key
+    hands = [h for i, h in enumerate(HANDS) if mask >> i & 1]
+    if weights is None:
+        return {h: 1.0 for h in hands}
+    return dict(zip(hands, weights))
+
+
+@lru_cache(maxsize=4096)
+def _analyze(
+    action: str, key: _RangeKey, villain_key: Optional[_RangeKey]
+) -> ActionAnalytics:
+    weights = _hands(key)
+    combos = 0.0
+    ace_combos = 0.0
+    king_combos = 0.0
+    blocked = 0.0
+    for h, w in weights.items():
+        nr_combos = w * NR_COMBOS[HAND_INDEX[h]]
+        combos += nr_combos
+        if "A" in str(h)[:2]:
+            ace_combos += nr_combos
+        if "K" in str(h)[:2]:
+            king_combos += nr_combos
+        blocked += nr_combos * _blocked_share(str(h))
+    equity = None
+    if villain_key is not None:
+        equity = preflop_equity_table().range_equity(weights, _hands(villain_key))
+    return ActionAnalytics(
+        action,
+        combos,
+        100 * combos / TOTAL_COMBOS,
+        100 * ace_combos / combos,
+        100 * king_combos / combos,
+        100 * blocked / combos,
+        equity,
+    )
+
+
+@lru_cache(maxsize=None)
+def _blocked_share(hand: str) -> float:
+    """
+    Return the average share of the combinations of BLOCKED_HANDS that share
+    a card with a combination of the hand.
+    """
+    combos = hand_combos(hand)
+    blocked = sum(
+        1 for c in combos for blocked_combo in _BLOCKED_COMBOS if blocked_combo & set(c)
+    )
+    return blocked / len(combos) / len(_BLOCKED_COMBOS)
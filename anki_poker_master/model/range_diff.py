@@ -0,0 +1,257 @@
+"""
+Compare the ranges of two preflop scenarios, e.g. "CO open at 100BB" and "CO
+open at 40BB". Every scenario is reduced to one action per starting hand of the
+169 hand grid, which makes comparing them a matter of comparing two lists. If
+one of the scenarios has mixed strategies, the frequencies of the actions of
+every hand are compared instead.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from poker.hand import Hand
+
+from anki_poker_master.model import PreflopScenario
+from anki_poker_master.model.frequencies import (
+    DEFAULT_ACTION,
+    HAND_INDEX,
+    HANDS,
+    NR_COMBOS,
+    TOTAL_COMBOS,
+)
+
+ScenarioKey = Tuple[str, str, str]
+
+
+class HandDiff:
+    """
+    A starting hand whose action differs between the two scenarios.
+    """
+
+    def __init__(
+        self,
+        hand: Hand,
+        old_action: str,
+        new_action: str,
+        old_frequencies: Optional[Dict[str, float]] = None,
+        new_frequencies: Optional[Dict[str, float]] = None,
+    ):
+        """
+        old_action and new_action are the actions the hand takes most often.
+        If one of the scenarios has mixed strategies, old_frequencies and
+        new_frequencies are the frequencies of all actions of the hand, and
+        the actions may be the same if only the frequencies changed.
+        """
+        self.hand = hand
+        self.old_action = old_action
+        self.new_action = new_action
+        self.old_frequencies = old_frequencies
+        self.new_frequencies = new_frequencies
+
+    @property
+    def old_description(self) -> str:
+        return _describe(self.old_action, self.old_frequencies)
+
+    @property
+    def new_description(self) -> str:
+        return _describe(self.new_action, self.new_frequencies)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, HandDiff)
+            and self.hand == other.hand
+            and self.old_action == other.old_action
+            and self.new_action == other.new_action
+            and self.old_frequencies == other.old_frequencies
+            and self.new_frequencies == other.new_frequencies
+        )
+
+    def __repr__(self):
+        frequencies = ""
+        if self.old_frequencies is not None or self.new_frequencies is not None:
+            frequencies = f", {self.old_frequencies!r}, {self.new_frequencies!r}"
+        return (
+            f"HandDiff({self.hand!r}, {self.old_action!r}, {self.new_action!r}"
+            f"{frequencies})"
+        )
+
+    def __str__(self):
+        return f"{self.hand} ({self.old_description} -> {self.new_description})"
+
+
+class ScenarioDiff:
+    """
+    The differences between an old and a new version of a scenario.
+
+    The percentages are the share of all 1326 starting hand combinations that
+    take an action, keyed by the name of the action.
+    """
+
+    def __init__(
+        self,
+        old: PreflopScenario,
+        new: PreflopScenario,
+        hand_diffs: List[HandDiff],
+        old_percentages: Dict[str, float],
+        new_percentages: Dict[str, float],
+    ):
+        self.old = old
+        self.new = new
+        self.hand_diffs = hand_diffs
+        self.old_percentages = old_percentages
+        self.new_percentages = new_percentages
+
+    @property
+    def key(self) -> ScenarioKey:
+        return scenario_key(self.new)
+
+    @property
+    def deltas(self) -> Dict[str, float]:
+        """
+        Return the change of the percentage of every action, sorted by the
+        name of the action.
+        """
+        actions = sorted(set(self.old_percentages) | set(self.new_percentages))
+        return {
+            a: self.new_percentages.get(a, 0.0) - self.old_percentages.get(a, 0.0)
+            for a in actions
+        }
+
+    def has_changes(self) -> bool:
+        return bool(self.hand_diffs)
+
+
+class LibraryDiff:
+    """
+    The differences between two lists of scenarios. Scenarios are matched by
+    game, position and scenario.
+    """
+
+    def __init__(
+        self,
+        scenario_diffs: List[ScenarioDiff],
+        only_old: List[PreflopScenario],
+        only_new: List[PreflopScenario],
+    ):
+        self.scenario_diffs = scenario_diffs
+        self.only_old = only_old
+        self.only_new = only_new
+
+    def has_changes(self) -> bool:
+        return (
+            any(d.has_changes() for d in self.scenario_diffs)
+            or bool(self.only_old)
+            or bool(self.only_new)
+        )
+
+
+def scenario_key(scenario: PreflopScenario) -> ScenarioKey:
+    return scenario.game, scenario.position, scenario.scenario
+
+
+def hand_actions(scenario: PreflopScenario) -> List[str]:
+    """
+    Return the action of every hand of HANDS in the scenario.
+    """
+    actions = [DEFAULT_ACTION] * len(HANDS)
+    for action, action_range in scenario.ranges.items():
+        for h in action_range.hands:
+            actions[HAND_INDEX[h]] = action
+    return actions
+
+
+def hand_frequencies(scenario: PreflopScenario) -> List[Dict[str, float]]:
+    """
+    Return the frequency of every action of every hand of HANDS in the
+    scenario, e.g. {"Raise": 0.7, "Call": 0.3}. A hand without a mixed strategy
+    takes its action with a frequency of 1.
+    """
+    if scenario.frequencies is None:
+        return [{a: 1.0} for a in hand_actions(scenario)]
+    return [scenario.frequencies.hand_frequencies(h) for h in HANDS]
+
+
+def diff_scenarios(old: PreflopScenario, new: PreflopScenario) -> ScenarioDiff:
+    """
+    Compare two scenarios hand by hand. Action names are compared case
+    insensitively, the names of the new scenario are used in the result. If
+    one of the scenarios has mixed strategies, a hand also differs if only the
+    frequencies of its actions changed.
+    """
+    old_actions = hand_actions(old)
+    new_actions = hand_actions(new)
+    old_frequencies = hand_frequencies(old)
+    new_frequencies = hand_frequencies(new)
+    mixed = old.frequencies is not None or new.frequencies is not None
+    hand_diffs = [
+        HandDiff(h, old_action, new_action, old_f, new_f)
+        if mixed
+        else HandDiff(h, old_action, new_action)
+        for h, old_action, new_action, old_f, new_f in zip(
+            HANDS, old_actions, new_actions, old_frequencies, new_frequencies
+        )
+        if _normalize(old_f) != _normalize(new_f)
+    ]
+    # Use the names of the new scenario so that e.g. "raise" and "Raise" are
+    # the same action in the percentages.
+    names = {a.lower(): a for f in old_frequencies for a in f}
+    names.update((a.lower(), a) for f in new_frequencies for a in f)
+    return ScenarioDiff(
+        old,
+        new,
+        hand_diffs,
+        _percentages(
+            [{names[a.lower()]: x for a, x in f.items()} for f in old_frequencies]
+        ),
+        _percentages(new_frequencies),
+    )
+
+
+def diff_libraries(
+    old: List[PreflopScenario], new: List[PreflopScenario]
+) -> LibraryDiff:
+    """
+    Compare all scenarios with the same game, position and scenario. The
+    scenario diffs are in the order of the new scenarios.
+    """
+    old_by_key = {scenario_key(s): s for s in old}
+    scenario_diffs = []
+    only_new = []
+    matched = set()
+    for s in new:
+        key = scenario_key(s)
+        if key in old_by_key:
+            scenario_diffs.append(diff_scenarios(old_by_key[key], s))
+            matched.add(key)
+        else:
+            only_new.append(s)
+    only_old = [s for s in old if scenario_key(s) not in matched]
+    return LibraryDiff(scenario_diffs, only_old, only_new)
+
+
+def _percentages(frequencies: List[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Return the share of all combinations that take each action, weighted by
+    the frequencies.
+    """
+    combos: Dict[str, float] = {}
+    for hand_frequencies, nr_combos in zip(frequencies, NR_COMBOS):
+        for action, frequency in hand_frequencies.items():
+            combos[action] = combos.get(action, 0) + frequency * nr_combos
+    return {a: 100 * n / TOTAL_COMBOS for a, n in combos.items()}
+
+
+def _normalize(hand_frequencies: Dict[str, float]) -> Dict[str, float]:
+    """
+    Return the frequencies by lower case action name, rounded to ignore float
+    rounding errors.
+    """
+    return {a.lower(): round(f, 6) for a, f in hand_frequencies.items()}
+
+
+def _describe(action: str, hand_frequencies: Optional[Dict[str, float]]) -> str:
+    """
+    Return e.g. "Raise 70%, Call 30%" for a mixed strategy, otherwise the action.
+    """
+    if not hand_frequencies or len(hand_frequencies) == 1:
+        return action
+    return ", ".join(f"{a} {round(100 * f, 1):g}%" for a, f in hand_frequencies.items())
@@ -0,0 +1,455 @@
+"""
+Compact binary format for parsed hands (.apmh files) so that a corpus of .phh
+files only needs to be parsed with pokerkit once. A compiled file can be loaded
+back into model.Hand objects without pokerkit.
+
+Layout (all integers are little-endian):
+
+    magic            4 bytes  b"APMH"
+    version          u16
+    body item size   u8 (2 or 4 bytes, depending on the largest value)
+    string count     u32
+    string lengths   u32 * string count (in characters)
+    strings size     u32
+    strings          UTF-8 encoded concatenation of all strings
+    number count     u32
+    number kinds     u8 * number count (0 for int, 1 for float)
+    numbers          i64 * number count (floats as IEEE 754 bits)
+    action count     u32
+    actions          (u32 kind, u32 number index) * action count
+    row count        u32
+    rows size        u32
+    rows             (u32 length, u32 action index * length) * row count
+    hand count       u32
+    body size        u32
+    body             (u16 or u32) * body size
+
+Strings, numbers, actions and rows of the action table are stored once in their tables and the body only
+contains indices into them. See _HandWriter.add_hand for the order of the
+values of every hand in the body.
+"""
+
+import gc
+import struct
+from array import array
+from numbers import Number
+from typing import Dict, List, Optional, Tuple
+
+from anki_poker_master.model import ValidationError
+from anki_poker_master.model.hand import (
+    Action,
+    BetAction,
+    CallAction,
+    CheckAction,
+    FoldAction,
+    Hand,
+    Player,
+    Question,
+    RaiseAction,
+    Street,
+)
+
+MAGIC = b"APMH"
+VERSION = 4
+FILE_EXTENSION = ".apmh"
+
+_HEADER = struct.Struct("<4sHB")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+# The array type codes of the body by the size of its items
+_BODY_TYPECODES = {2: "H", 4: "I"}
+
+# Action kinds as stored in the action table
+_FOLD = 0
+_CHECK = 1
+_CALL = 2
+_CALL_ALL_IN = 3
+_BET = 4
+_BET_ALL_IN = 5
+_RAISE = 6
+_RAISE_ALL_IN = 7
+
+_PLAYER_IS_DEALER = 1
+_PLAYER_IS_HERO = 2
+# Player flags -> is_dealer / is_hero
+_IS_DEALER = (False, True, False, True)
+_IS_HERO = (False, False, True, True)
+
+_NUMBER_INT = 0
+_NUMBER_FLOAT = 1
+
+
+def dumps(hands: List[Hand]) -> bytes:
+    """
+    Serialize the hands into the compact binary format.
+    """
+    writer = _HandWriter()
+    for hand in hands:
+        writer.add_hand(hand)
+    return writer.to_bytes()
+
+
+def loads(data: bytes) -> List[Hand]:
+    """
+    Deserialize hands that were serialized with dumps().
+    """
+    # Loading creates millions of small objects, none of them part of a
+    # reference cycle, so the cyclic garbage collector would only slow it down.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _HandReader(data).read_hands()
+    except ValidationError:
+        raise
+    except (struct.error, ValueError, IndexError, StopIteration) as e:
+        raise ValidationError("the hand cache is corrupt") from e
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _to_array(typecode: str, values) -> array:
+    result = array(typecode, values)
+    if result.itemsize != struct.calcsize(f"<{typecode}"):
+        raise RuntimeError(f"unexpected size of array typecode '{typecode}'")
+    return result
+
+
+class _HandWriter:
+    def __init__(self):
+        self._strings: Dict[str, int] = {}
+        # (kind, value) so that e.g. 1 and 1.0 are different numbers
+        self._numbers: Dict[Tuple[int, Number], int] = {}
+        self._actions: Dict[Tuple[int, int], int] = {}
+        self._rows: Dict[Tuple[int, ...], int] = {}
+        self._hand_count = 0
+        self._body = _to_array("I", [])
+
+    def add_hand(self, hand: Hand):
+        body = self._body
+        s = self._string
+        n = self._number
+        body.extend((s(hand.variant), s(hand.title), s(hand.notes), s(hand.source)))
+        body.extend((s(hand.context), s(hand.villain_range)))
+        body.extend((n(hand.big_blind), n(hand.pot)))
+        body.append(len(hand.answers))
+        body.extend(s(a) for a in hand.answers)
+        body.append(len(hand.hero_cards))
+        body.extend(s(c) for c in hand.hero_cards)
+        body.append(len(hand.villain_cards))
+        for player_index, cards in hand.villain_cards.items():
+            body.extend((player_index, len(cards)))
+            body.extend(s(c) for c in cards)
+        body.append(len(hand.players))
+        for p in hand.players:
+            flags = (_PLAYER_IS_DEALER if p.is_dealer else 0) | (
+                _PLAYER_IS_HERO if p.is_hero else 0
+            )
+            body.extend((s(p.name), flags))
+        body.append(len(hand.streets))
+        for street in hand.streets:
+            body.append(s(street.name))
+            body.append(len(street.board))
+            body.extend(s(c) for c in street.board)
+            body.append(len(street.initial_pots))
+            body.extend(n(pot) for pot in street.initial_pots)
+            body.append(len(street.initial_players))
+            body.extend(1 if playing else 0 for playing in street.initial_players)
+            body.append(len(street.initial_stacks))
+            body.extend(n(stack) for stack in street.initial_stacks)
+            body.append(street.first_player_actions)
+            body.append(len(street.actions))
+            body.extend(self._row(row) for row in street.actions)
+            for questions in (street.questions, street.default_questions):
+                body.append(len(questions))
+                for q in questions:
+                    body.extend((s(q.question), s(q.answer), *q.action_table_indices))
+                    body.extend(
+                        (self._optional_number(q.pot), self._optional_number(q.to_call))
+                    )
+        self._hand_count += 1
+
+    def to_bytes(self) -> bytes:
+        strings = list(self._strings)
+        encoded_strings = "".join(strings).encode("utf-8")
+        number_values = [
+            _I64.unpack(_F64.pack(value))[0] if kind == _NUMBER_FLOAT else value
+            for kind, value in self._numbers
+        ]
+        rows = _to_array("I", [])
+        for row in self._rows:
+            rows.append(len(row))
+            rows.extend(row)
+        body = self._body
+        if not body or max(body) < (1 << 16):
+            body = _to_array("H", body)
+        parts = [
+            _HEADER.pack(MAGIC, VERSION, body.itemsize),
+            _U32.pack(len(strings)),
+            _to_array("I", (len(x) for x in strings)).tobytes(),
+            _U32.pack(len(encoded_strings)),
+            encoded_strings,
+            _U32.pack(len(self._numbers)),
+            _to_array("B", (kind for kind, _ in self._numbers)).tobytes(),
+            _to_array("q", number_values).tobytes(),
+            _U32.pack(len(self._actions)),
+            _to_array("I", (x for a in self._actions for x in a)).tobytes(),
+            _U32.pack(len(self._rows)),
+            _U32.pack(len(rows)),
+            rows.tobytes(),
+            _U32.pack(self._hand_count),
+            _U32.pack(len(body)),
+            body.tobytes(),
+        ]
+        return b"".join(parts)
+
+    def _string(self, value: str) -> int:
+        return self._strings.setdefault(value, len(self._strings))
+
+    def _number(self, value: Number) -> int:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Unsupported number: {value!r}")
+        kind = _NUMBER_INT if isinstance(value, int) else _NUMBER_FLOAT
+        return self._numbers.setdefault((kind, value), len(self._numbers))
+
+    def _optional_number(self, value: Optional[Number]) -> int:
+        """
+        Return the index of the number plus one, or 0 for None.
+        """
+        return 0 if value is None else self._number(value) + 1
+
+    def _row(self, row) -> int:
+        key = tuple(self._action(a) for a in row)
+        return self._rows.setdefault(key, len(self._rows))
+
+    def _action(self, action: Action) -> int:
+        if isinstance(action, FoldAction):
+            key = (_FOLD, 0)
+        elif isinstance(action, CheckAction):
+            key = (_CHECK, 0)
+        elif isinstance(action, CallAction):
+            key = (_CALL_ALL_IN if action.is_all_in() else _CALL, 0)
+        elif isinstance(action, BetAction):
+            kind = _BET_ALL_IN if action.is_all_in() else _BET
+            key = (kind, self._number(action.amount()))
+        elif isinstance(action, RaiseAction):
+            kind = _RAISE_ALL_IN if action.is_all_in() else _RAISE
+            key = (kind, self._number(action.amount()))
+        else:
+            raise ValueError(f"Unexpected action: {action}")
+        return self._actions.setdefault(key, len(self._actions))
+
+
+class _HandReader:
+    def __init__(self, data: bytes):
+        self._data = memoryview(data)
+        self._pos = 0
+
+    def read_hands(self) -> List[Hand]:
+        magic, version, body_item_size = self._unpack(_HEADER)
+        if magic != MAGIC:
+            raise ValidationError("not a hand cache file")
+        if version != VERSION:
+            raise ValidationError(
+                f"unsupported hand cache version {version} (expected {VERSION})"
+            )
+        S = self._read_strings().__getitem__
+        numbers = self._read_numbers()
+        R = self._read_rows(self._read_actions(numbers)).__getitem__
+        N = numbers.__getitem__
+        # Optional numbers are stored as index + 1 with 0 meaning None
+        optional_numbers = [None] + numbers
+        optional_number = optional_numbers.__getitem__
+        (hand_count,) = self._unpack(_U32)
+        if body_item_size not in _BODY_TYPECODES:
+            raise ValidationError(
+                f"unsupported body item size {body_item_size} in the hand cache"
+            )
+        body = self._read_array(_BODY_TYPECODES[body_item_size]).tolist()
+        if self._pos != len(self._data):
+            raise ValidationError("the hand cache is corrupt")
+
+        # This is the hot loop when loading large corpora, so values are taken
+        # from the body in slices and converted with map() wherever possible.
+        hands = []
+        i = 0
+        for _ in range(hand_count):
+            hand = Hand()
+            (
+                variant,
+                title,
+                notes,
+                source,
+                context,
+                villain_range,
+                big_blind,
+                pot,
+                n,
+            ) = body[i : i + 9]
+            i += 9
+            hand.variant = S(variant)
+            hand.title = S(title)
+            hand.notes = S(notes)
+            hand.source = S(source)
+            hand.context = S(context)
+            hand.villain_range = S(villain_range)
+            hand.big_blind = N(big_blind)
+            hand.pot = N(pot)
+            hand.answers = list(map(S, body[i : i + n]))
+            i += n
+            n = body[i]
+            i += 1
+            hand.hero_cards = list(map(S, body[i : i + n]))
+            i += n
+            num_villains = body[i]
+            i += 1
+            for _ in range(num_villains):
+                player_index, n = body[i : i + 2]
+                i += 2
+                hand.villain_cards[player_index] = list(map(S, body[i : i + n]))
+                i += n
+            n = body[i]
+            i += 1
+            flags = body[i + 1 : i + 2 * n : 2]
+            hand.players = list(
+                map(
+                    Player,
+                    map(S, body[i : i + 2 * n : 2]),
+                    map(_IS_DEALER.__getitem__, flags),
+                    map(_IS_HERO.__getitem__, flags),
+                )
+            )
+            i += 2 * n
+            num_streets = body[i]
+            i += 1
+            for _ in range(num_streets):
+                name, n = body[i : i + 2]
+                i += 2
+                board = list(map(S, body[i : i + n]))
+                i += n
+                n = body[i]
+                i += 1
+                pots = list(map(N, body[i : i + n]))
+                i += n
+                n = body[i]
+                i += 1
+                initial_players = list(map(bool, body[i : i + n]))
+                i += n
+                n = body[i]
+                i += 1
+                stacks = list(map(N, body[i : i + n]))
+                i += n
+                first_player_actions, n = body[i : i + 2]
+                i += 2
+                rows = list(map(R, body[i : i + n]))
+                i += n
+                all_questions = []
+                for _ in range(2):  # questions and default questions
+                    n = body[i]
+                    end = i + 1 + 6 * n
+                    all_questions.append(
+                        list(
+                            map(
+                                Question,
+                                map(S, body[i + 1 : end : 6]),
+                                map(S, body[i + 2 : end : 6]),
+                                zip(body[i + 3 : end : 6], body[i + 4 : end : 6]),
+                                map(optional_number, body[i + 5 : end : 6]),
+                                map(optional_number, body[i + 6 : end : 6]),
+                            )
+                        )
+                    )
+                    i = end
+                hand.streets.append(
+                    Street(
+                        S(name),
+                        board,
+                        pots,
+                        initial_players,
+                        stacks,
+                        first_player_actions,
+                        rows,
+                        *all_questions,
+                    )
+                )
+            hands.append(hand)
+        if i != len(body):
+            raise ValidationError("the hand cache is corrupt")
+        return hands
+
+    def _unpack(self, s: struct.Struct) -> tuple:
+        values = s.unpack_from(self._data, self._pos)
+        self._pos += s.size
+        return values
+
+    def _read_array(self, typecode: str, count: Optional[int] = None) -> array:
+        """
+        Read an array of the given type. If count is not given, it is read from
+        the data first.
+        """
+        if count is None:
+            (count,) = self._unpack(_U32)
+        result = _to_array(typecode, [])
+        size = count * result.itemsize
+        if self._pos + size > len(self._data):
+            raise ValidationError("the hand cache is corrupt")
+        result.frombytes(self._data[self._pos : self._pos + size])
+        self._pos += size
+        return result
+
+    def _read_strings(self) -> List[str]:
+        lengths = self._read_array("I")
+        (size,) = self._unpack(_U32)
+        text = str(self._data[self._pos : self._pos + size], "utf-8")
+        self._pos += size
+        strings = []
+        start = 0
+        for length in lengths:
+            strings.append(text[start : start + length])
+            start += length
+        if start != len(text):
+            raise ValidationError("the hand cache is corrupt")
+        return strings
+
+    def _read_numbers(self) -> List[Number]:
+        (count,) = self._unpack(_U32)
+        kinds = self._read_array("B", count)
+        values = self._read_array("q", count)
+        return [
+            _F64.unpack(_I64.pack(value))[0] if kind == _NUMBER_FLOAT else value
+            for kind, value in zip(kinds, values)
+        ]
+
+    def _read_actions(self, numbers: List[Number]) -> List[Action]:
+        (count,) = self._unpack(_U32)
+        raw = self._read_array("I", 2 * count)
+        actions = []
+        for i in range(0, len(raw), 2):
+            kind, number_i = raw[i], raw[i + 1]
+            if kind == _FOLD:
+                actions.append(FoldAction())
+            elif kind == _CHECK:
+                actions.append(CheckAction())
+            elif kind in (_CALL, _CALL_ALL_IN):
+                actions.append(CallAction(kind == _CALL_ALL_IN))
+            elif kind in (_BET, _BET_ALL_IN):
+                actions.append(BetAction(numbers[number_i], kind == _BET_ALL_IN))
+            elif kind in (_RAISE, _RAISE_ALL_IN):
+                actions.append(RaiseAction(numbers[number_i], kind == _RAISE_ALL_IN))
+            else:
+                raise ValidationError(f"the hand cache contains unknown action {kind}")
+        return actions
+
+    def _read_rows(self, actions: List[Action]) -> List[Tuple[Action, ...]]:
+        (count,) = self._unpack(_U32)
+        raw = self._read_array("I").tolist()
+        rows = []
+        i = 0
+        for _ in range(count):
+            n = raw[i]
+            rows.append(tuple(map(actions.__getitem__, raw[i + 1 : i + 1 + n])))
+            i += 1 + n
+        if i != len(raw):
+            raise ValidationError("the hand cache is corrupt")
+        return rows
@@ -0,0 +1,453 @@
+"""
+Searchable index of a corpus of hand histories, stored in an SQLite database
+(.apmi files), so that a study subset can be selected from many thousands of
+hands without parsing them again.
+
+Every hand is stored with the features that can be searched (see
+hand_features) and the hand itself in the hand cache format, so the hands that
+match a query are loaded without pokerkit. Indexing a corpus again only parses
+the files that were added or changed since.
+
+A query is a comma-separated list of terms that must all match, e.g.
+"3bet pot, hero OOP, hero QQ+ AKs, pot >= 40bb". See QUERY_TERMS.
+"""
+
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import poker
+
+from anki_poker_master.model import ValidationError
+from anki_poker_master.model.hand import BetAction, CallAction, Hand, RaiseAction
+from anki_poker_master.parser import hand_cache
+from anki_poker_master.parser.phh import ParseResult, parse_many
+
+FILE_EXTENSION = ".apmi"
+
+# Stored in "PRAGMA user_version". Indices of another version (or with hands in
+# another hand cache version) are rebuilt from scratch by build_index() and
+# can't be searched.
+_SCHEMA_VERSION = 1
+_USER_VERSION = (_SCHEMA_VERSION << 16) | hand_cache.VERSION
+
+_COLUMNS = (
+    "title",
+    "notes",
+    "source",
+    "context",
+    "villain_range",
+    "answers",
+    "hero_cards",
+    "hero_hand",
+    "position",
+    "nr_players",
+    "preflop_raises",
+    "nr_players_flop",
+    "hero_in_position",
+    "nr_streets",
+    "board",
+    "flop_suits",
+    "flop_paired",
+    "all_in",
+    "big_blind",
+    "pot",
+    "pot_bb",
+    "nr_questions",
+)
+
+_SCHEMA = f"""
+CREATE TABLE hands (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    {", ".join(_COLUMNS)},
+    hand BLOB NOT NULL
+);
+CREATE INDEX hands_path ON hands (path);
+CREATE INDEX hands_hero_cards ON hands (hero_cards);
+CREATE INDEX hands_position ON hands (position);
+CREATE INDEX hands_preflop_raises ON hands (preflop_raises);
+CREATE INDEX hands_pot_bb ON hands (pot_bb);
+"""
+
+# The names of the positions of the players that aren't the blinds or the
+# dealer, from the player after the big blind to the player before the dealer
+_LATE_POSITIONS = ["LJ", "HJ", "CO"]
+
+
+def positions(nr_players: int) -> List[str]:
+    """
+    Return the names of the positions of the players in the order of the
+    hand history (the small blind first and the dealer last), e.g.
+    ["SB", "BB", "UTG", "HJ", "CO", "BTN"] for six players.
+    """
+    if nr_players <= 2:
+        return ["BB", "BTN"][-nr_players:]
+    nr_middle = nr_players - 3
+    nr_late = min(max(nr_middle - 1, 0), len(_LATE_POSITIONS))
+    middle = [f"UTG+{i}" if i else "UTG" for i in range(nr_middle - nr_late)]
+    middle += _LATE_POSITIONS[len(_LATE_POSITIONS) - nr_late :]
+    return ["SB", "BB"] + middle + ["BTN"]
+
+
+def hand_features(hand: Hand) -> Dict[str, Any]:
+    """
+    Return the searchable features of the hand by column name.
+    """
+    hero_index = next(i for i, p in enumerate(hand.players) if p.is_hero)
+    hero_cards = "".join(hand.hero_cards)
+    hero_hand = ""
+    if len(hand.hero_cards) == 2:
+        combo = poker.Combo(hero_cards)
+        hero_cards = _combo_str(combo)
+        hero_hand = str(combo.to_hand())
+    preflop_raises = 0
+    if hand.streets:
+        preflop_raises = sum(
+            1
+            for row in hand.streets[0].actions
+            for a in row
+            if isinstance(a, (BetAction, RaiseAction))
+        )
+    nr_players_flop = 0
+    hero_in_position = None
+    if len(hand.streets) > 1:
+        in_hand = hand.streets[1].initial_players
+        nr_players_flop = sum(in_hand)
+        if in_hand[hero_index]:
+            # After the flop the players act in the order of the hand history
+            hero_in_position = not any(in_hand[hero_index + 1 :])
+    board = hand.streets[-1].board if hand.streets else []
+    flop = board[:3]
+    all_in = any(
+        isinstance(a, (BetAction, CallAction, RaiseAction)) and a.is_all_in()
+        for s in hand.streets
+        for row in s.actions
+        for a in row
+    )
+    return {
+        "title": hand.title,
+        "notes": hand.notes,
+        "source": hand.source,
+        "context": hand.context,
+        "villain_range": hand.villain_range,
+        "answers": "\n".join(hand.answers),
+        "hero_cards": hero_cards,
+        "hero_hand": hero_hand,
+        "position": positions(len(hand.players))[hero_index],
+        "nr_players": len(hand.players),
+        "preflop_raises": preflop_raises,
+        "nr_players_flop": nr_players_flop,
+        "hero_in_position": hero_in_position,
+        "nr_streets": len(hand.streets),
+        "board": "".join(board),
+        "flop_suits": len({c[1] for c in flop}) if flop else None,
+        "flop_paired": len({c[0] for c in flop}) < len(flop) if flop else None,
+        "all_in": all_in,
+        "big_blind": hand.big_blind,
+        "pot": hand.pot,
+        "pot_bb": hand.pot / hand.big_blind if hand.big_blind else None,
+        "nr_questions": sum(len(s.questions) for s in hand.streets),
+    }
+
+
+def _combo_str(combo: poker.Combo) -> str:
+    """
+    Return the combination in the notation of the hand histories, e.g. "AhKd".
+    """
+    return "".join(
+        str(card.rank) + card.suit.name[0].lower()
+        for card in (combo.first, combo.second)
+    )
+
+
+def build_index(
+    index_path: Union[str, Path],
+    phh_files: Iterable[Path],
+    max_questions: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Tuple[int, List[ParseResult]]:
+    """
+    Add the hands of the .phh files to the index, creating it if it doesn't
+    exist. Only files that are new or changed since they were indexed are
+    parsed, and hands of files that no longer exist are removed.
+
+    :param max_questions: see parse_many().
+    :param max_workers: number of worker processes to parse the files.
+    :returns: the number of hands in the index and the results of the files
+        that could not be parsed.
+    """
+    with closing(_connect(index_path)) as db, db:
+        indexed = dict(db.execute("SELECT path, mtime_ns FROM hands"))
+        removed = [p for p in indexed if not os.path.exists(p)]
+        db.executemany("DELETE FROM hands WHERE path = ?", [(p,) for p in removed])
+        mtimes = {}
+        for f in phh_files:
+            path = str(Path(f).resolve())
+            mtime_ns = os.stat(path).st_mtime_ns
+            if indexed.get(path) != mtime_ns:
+                mtimes[path] = mtime_ns
+        errors = []
+        for result in parse_many(
+            mtimes, max_questions=max_questions, max_workers=max_workers
+        ):
+            db.execute("DELETE FROM hands WHERE path = ?", (result.path,))
+            if result.status == ParseResult.ERROR:
+                errors.append(result)
+                continue
+            _insert(db, result.path, mtimes[result.path], result.hand)
+        (nr_hands,) = db.execute("SELECT COUNT(*) FROM hands").fetchone()
+    return nr_hands, errors
+
+
+def search(
+    index_path: Union[str, Path], query: str = ""
+) -> Iterator[Tuple[Path, Hand]]:
+    """
+    Return the hands of the index that match the query, ordered by path. The
+    hands are loaded one at a time while iterating.
+    """
+    if not Path(index_path).is_file():
+        raise ValidationError(f"the hand index {index_path} does not exist")
+    where, params = parse_query(query)
+    # Check the index now rather than when the hands are iterated
+    _connect_read_only(index_path).close()
+    return _search(index_path, where, params)
+
+
+def filter_hands(
+    files_and_hands: Iterable[Tuple[Path, Hand]], query: str
+) -> List[Tuple[Path, Hand]]:
+    """
+    Return the (file, hand) tuples whose hands match the query, in their
+    original order.
+    """
+    files_and_hands = list(files_and_hands)
+    where, params = parse_query(query)
+    with closing(_connect(":memory:")) as db:
+        db.executemany(
+            f"INSERT INTO hands (id, path, mtime_ns, {', '.join(_COLUMNS)}, hand) "
+            f"VALUES (?, '', 0, {', '.join('?' * len(_COLUMNS))}, x'')",
+            (
+                (i, *(hand_features(hand)[c] for c in _COLUMNS))
+                for i, (_, hand) in enumerate(files_and_hands)
+            ),
+        )
+        ids = [i for (i,) in db.execute(f"SELECT id FROM hands WHERE {where}", params)]
+    return [files_and_hands[i] for i in sorted(ids)]
+
+
+def _connect(index_path: Union[str, Path]) -> sqlite3.Connection:
+    db = sqlite3.connect(str(index_path))
+    (user_version,) = db.execute("PRAGMA user_version").fetchone()
+    if user_version != _USER_VERSION:
+        with db:
+            db.execute("DROP TABLE IF EXISTS hands")
+            db.executescript(_SCHEMA)
+            db.execute(f"PRAGMA user_version = {_USER_VERSION}")
+    return db
+
+
+def _connect_read_only(index_path: Union[str, Path]) -> sqlite3.Connection:
+    uri = f"{Path(index_path).resolve().as_uri()}?mode=ro"
+    db = sqlite3.connect(uri, uri=True)
+    try:
+        (user_version,) = db.execute("PRAGMA user_version").fetchone()
+    except sqlite3.DatabaseError as e:
+        db.close()
+        raise ValidationError(f"{index_path} is not a hand index") from e
+    if user_version == 0:
+        db.close()
+        raise ValidationError(f"{index_path} is not a hand index")
+    if user_version != _USER_VERSION:
+        db.close()
+        raise ValidationError(
+            f"the hand index {index_path} was built by another version, "
+            "run 'hand index' again"
+        )
+    return db
+
+
+def _insert(db: sqlite3.Connection, path: str, mtime_ns: int, hand: Hand):
+    features = hand_features(hand)
+    db.execute(
+        f"INSERT INTO hands (path, mtime_ns, {', '.join(_COLUMNS)}, hand) "
+        f"VALUES (?, ?, {', '.join('?' * len(_COLUMNS))}, ?)",
+        (path, mtime_ns, *(features[c] for c in _COLUMNS), hand_cache.dumps([hand])),
+    )
+
+
+def _search(
+    index_path: Union[str, Path], where: str, params: List[Any]
+) -> Iterator[Tuple[Path, Hand]]:
+    with closing(_connect_read_only(index_path)) as db:
+        rows = db.execute(
+            f"SELECT path, hand FROM hands WHERE {where} ORDER BY path, id", params
+        )
+        for path, blob in rows:
+            yield Path(path), hand_cache.loads(blob)[0]
+
+
+_Condition = Tuple[str, List[Any]]
+_COMPARISON = r"\s*(<=|>=|<|>|=)\s*(\d+(?:\.\d+)?)"
+_TEXT_COLUMNS = ("title", "notes", "source", "context", "villain_range", "answers")
+
+
+def _preflop_raises(match: re.Match) -> _Condition:
+    kind = match[1].lower()
+    if kind == "limped":
+        return "preflop_raises = 0", []
+    if kind in ("single raised", "2bet"):
+        return "preflop_raises = 1", []
+    operator = ">=" if match[2] else "="
+    return f"preflop_raises {operator} ?", [int(kind[0]) - 1]
+
+
+def _hero_range(match: re.Match) -> _Condition:
+    try:
+        combos = poker.Range(match[1]).combos
+    except ValueError as e:
+        raise ValidationError(f"'{match[1]}' is not a range like 'QQ+ AKs'") from e
+    return (
+        "hero_cards IN (SELECT value FROM json_each(?))",
+        [json.dumps([_combo_str(c) for c in combos])],
+    )
+
+
+def _board_cards(match: re.Match) -> _Condition:
+    cards = re.findall("..", match[1].replace(" ", ""))
+    return (
+        " AND ".join(["instr(board, ?) > 0"] * len(cards)),
+        [c[0].upper() + c[1].lower() for c in cards],
+    )
+
+
+def _comparison(column: str) -> Callable[[re.Match], _Condition]:
+    return lambda m: (f"{column} {m[1]} ?", [float(m[2])])
+
+
+def _contains(match: re.Match) -> _Condition:
+    column = match[1].lower().replace(" ", "_")
+    return f"instr(lower({column}), ?) > 0", [match[2].lower()]
+
+
+_POSITIONS = r"SB|BB|UTG(?:\+\d)?|LJ|HJ|CO|BTN"
+
+# (pattern, description, function returning the SQL condition and its
+# parameters). The patterns are matched in order against the whole term and
+# ignore the case.
+QUERY_TERMS: List[Tuple[str, str, Callable[[re.Match], _Condition]]] = [
+    (
+        r"(limped|single raised|2bet|3bet|4bet|5bet)(\+)? pot",
+        "number of raises before the flop, e.g. '3bet pot' or '4bet+ pot'",
+        _preflop_raises,
+    ),
+    (
+        r"hero (ip|oop)",
+        "the hero acts last (IP) or not (OOP) after the flop",
+        lambda m: ("hero_in_position = ?", [m[1].lower() == "ip"]),
+    ),
+    (
+        rf"hero ({_POSITIONS})",
+        "position of the hero, e.g. 'hero BTN'",
+        lambda m: ("position = ?", [m[1].upper()]),
+    ),
+    (
+        r"hero (.+)",
+        "hole cards of the hero in a range (hands separated by spaces), "
+        "e.g. 'hero QQ+ AKs' or 'hero AhKh'",
+        _hero_range,
+    ),
+    (
+        r"(rainbow|two-tone|monotone)(?: flop)?",
+        "number of suits on the flop",
+        lambda m: (
+            "flop_suits = ?",
+            [{"monotone": 1, "two-tone": 2, "rainbow": 3}[m[1].lower()]],
+        ),
+    ),
+    (r"paired(?: flop| board)?", "the flop is paired", lambda m: ("flop_paired", [])),
+    (
+        r"board ((?:[2-9tjqka][cdhs] ?)+)",
+        "the board contains the cards, e.g. 'board Ah' or 'board Ah Kd'",
+        _board_cards,
+    ),
+    (
+        r"(flop|turn|river)",
+        "the hand reaches the street",
+        lambda m: (
+            "nr_streets >= ?",
+            [{"flop": 2, "turn": 3, "river": 4}[m[1].lower()]],
+        ),
+    ),
+    (
+        r"heads-up",
+        "two players see the flop",
+        lambda m: ("nr_players_flop = 2", []),
+    ),
+    (
+        r"multiway",
+        "three or more players see the flop",
+        lambda m: ("nr_players_flop >= 3", []),
+    ),
+    (r"all-in", "a player is all-in", lambda m: ("all_in", [])),
+    (
+        rf"pot{_COMPARISON}\s*bb",
+        "size of the pot in big blinds, e.g. 'pot >= 40bb'",
+        lambda m: (f"pot_bb {m[1]} ?", [float(m[2])]),
+    ),
+    (
+        rf"pot{_COMPARISON}",
+        "size of the pot in chips, e.g. 'pot > 1000'",
+        _comparison("pot"),
+    ),
+    (
+        rf"players{_COMPARISON}",
+        "number of players, e.g. 'players <= 6'",
+        _comparison("nr_players"),
+    ),
+    (
+        rf"({'|'.join(c.replace('_', '[_ ]') for c in _TEXT_COLUMNS)})\s*:\s*(.+)",
+        "the _apm_* field or the title contains a text, e.g. 'source: WSOP'",
+        _contains,
+    ),
+]
+_COMPILED_TERMS = [(re.compile(p, re.IGNORECASE), f) for p, _, f in QUERY_TERMS]
+
+
+def parse_query(query: str) -> Tuple[str, List[Any]]:
+    """
+    Convert a query into an SQL condition and its parameters. Raises a
+    ValidationError if a term is not understood.
+    """
+    conditions = []
+    params: List[Any] = []
+    for term in query.split(","):
+        term = " ".join(term.split())
+        if not term:
+            continue
+        for pattern, condition in _COMPILED_TERMS:
+            match = pattern.fullmatch(term)
+            if match:
+                sql, term_params = condition(match)
+                conditions.append(f"({sql})")
+                params.extend(term_params)
+                break
+        else:
+            raise ValidationError(f"unknown search term '{term}'")
+    return " AND ".join(conditions) or "1", params
@@ -1,7 +1,21 @@
 import enum
-import tomllib
-from typing import Dict, Any, List, Optional, Generator, Tuple, Callable
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Number
+from pathlib import Path
+from typing import (
+    Dict,
+    Any,
+    List,
+    Optional,
+    Generator,
+    Tuple,
+    Callable,
+    Iterator,
+    Iterable,
+    Union,
+)
 
+import poker
 import pokerkit
 import schema
 from pokerkit import (
@@ -28,6 +42,18 @@ from anki_poker_master.model.hand import (
     RaiseAction,
     FoldAction,
 )
+from anki_poker_master.parser.study_spots import Spot, SpotRules
+
+# The PHH variants that can be parsed and the titles of their hands. They are
+# the variants with hole cards and a board, so they are dealt and played in
+# the same streets.
+SUPPORTED_VARIANTS = {
+    "NT": "NLHE",
+    "FT": "LHE",
+    "NS": "NLHE Short Deck",
+    "PO": "PLO",
+    "FO/8": "LO8",
+}
 
 
 class _ParserState(enum.Enum):
@@ -57,23 +83,53 @@ class _Parser:
     """
 
     _parser_state: _ParserState
-    _pk_operation_iterator: Generator[
-        Tuple[pokerkit.State, pokerkit.Operation], None, None
-    ]
-    _pk_current_state: pokerkit.State
+    _pk_operation_iterator: Generator[pokerkit.Operation, None, None]
+    # The one and only pokerkit state. It is updated in place while the hand
+    # history is replayed, so it always reflects the current operation.
+    _pk_state: pokerkit.State
     _pk_current_operation: pokerkit.Operation
     _nr_players_dealt: int
+    # Number of questions and default questions asked so far (in all streets). They are also
+    # the index of the answer in _apm_answers for the next question of each kind.
+    _nr_questions: int
+    _nr_default_questions: int
+    # The chips in the middle, the bets and the stacks before the current
+    # operation was applied (see _remember_chips)
+    _pot: Number
+    _bets: List[Number]
+    _stacks: List[Number]
+    # Whether a player raised in the current street (preflop the first bet is a
+    # raise of the blinds)
+    _street_has_raise: bool
+    # The decisions of the hero, one per default question (in all streets)
+    _spots: List[Spot]
+    _spot_rules: Optional[SpotRules]
     _hand: Hand
 
-    def __init__(self, hh: pokerkit.HandHistory, custom_fields: Dict[str, Any]):
+    def __init__(
+        self,
+        hh: pokerkit.HandHistory,
+        custom_fields: Dict[str, Any],
+        spot_rules: Optional[SpotRules] = None,
+    ):
         """
         :param hh: valid pokerkit.HandHistory object
         :param custom_fields: valid custom (user-defined) fields extracted from the
             .phh file (e.g. _apm_source).
+        :param spot_rules: see parse().
         """
         self._parser_state = _ParserState.SETUP
-        self._pk_operation_iterator = self._create_pk_operation_iterator(hh)
+        pk_state_actions = hh.state_actions
+        self._pk_state, _ = next(pk_state_actions)
+        self._pk_operation_iterator = self._create_pk_operation_iterator(
+            pk_state_actions, self._pk_state, hh.actions
+        )
         self._nr_players_dealt = 0
+        self._nr_questions = 0
+        self._nr_default_questions = 0
+        self._street_has_raise = False
+        self._spots = []
+        self._spot_rules = spot_rules
         self._custom_fields = custom_fields
         self._hand = Hand()
         if custom_fields.get("_apm_notes", None):
@@ -84,19 +140,17 @@ class _Parser:
             self._hand.context = custom_fields["_apm_context"]
         if custom_fields.get("_apm_answers", None):
             self._hand.answers = custom_fields["_apm_answers"]
-        player_count = hh.create_state().player_count
+        if custom_fields.get("_apm_villain_range", None):
+            self._hand.villain_range = custom_fields["_apm_villain_range"]
+        player_count = self._pk_state.player_count
         for i in range(player_count):
             name = f"p{i + 1}"
             if hh.players:
                 name = hh.players[i]
             is_dealer = i == player_count - 1
             self._hand.players.append(Player(name, is_dealer, False))
-        if hh.variant == "NT":
-            self._hand.title = "NLHE"
-        elif hh.variant == "FT":
-            self._hand.title = "LHE"
-        else:
-            self._hand.title = hh.variant
+        self._hand.variant = hh.variant
+        self._hand.title = SUPPORTED_VARIANTS[hh.variant]
 
     def get_hand(self) -> Hand:
         """
@@ -141,9 +195,7 @@ class _Parser:
         while self._parser_state != _ParserState.DONE:
             if advance_pk_operation:
                 try:
-                    self._pk_current_state, self._pk_current_operation = next(
-                        self._pk_operation_iterator
-                    )
+                    self._pk_current_operation = next(self._pk_operation_iterator)
                 except StopIteration:
                     self._parser_state = _ParserState.DONE
             advance_pk_operation = state_handler_mapping[self._parser_state]()
@@ -151,16 +203,31 @@ class _Parser:
 
     @staticmethod
     def _create_pk_operation_iterator(
-        hh: pokerkit.HandHistory,
-    ) -> (Generator)[Tuple[pokerkit.State, pokerkit.Operation], None, None]:
+        pk_state_actions: Iterator[Tuple[pokerkit.State, Optional[str]]],
+        pk_state: pokerkit.State,
+        actions: List[str],
+    ) -> Generator[pokerkit.Operation, None, None]:
         """
-        Helper function to create a generator to iterate over pokerkit states and operations.
+        Helper function to create a generator that replays the hand history once and yields
+        every pokerkit operation right after it was applied to pk_state.
+
+        The replay stops after the last action that is not a showdown, because nothing after
+        that ends up in the Hand and evaluating the showdown is expensive.
         """
+        nr_relevant_actions = 0
+        for i, action in enumerate(actions):
+            if action.split()[1] != "sm":
+                nr_relevant_actions = i + 1
+        nr_actions = 0
         index = 0
-        for s in hh:
-            while index < len(s.operations):
-                yield s, s.operations[index]
+        for _, action in pk_state_actions:
+            while index < len(pk_state.operations):
+                yield pk_state.operations[index]
                 index += 1
+            if action is not None:
+                nr_actions += 1
+                if nr_actions == nr_relevant_actions:
+                    return
 
     def _state_handler_setup(self) -> bool:
         """
@@ -169,7 +236,7 @@ class _Parser:
         """
         if isinstance(self._pk_current_operation, HoleDealing):
             self._nr_players_dealt += 1
-            if self._nr_players_dealt == self._pk_current_state.player_count:
+            if self._nr_players_dealt == self._pk_state.player_count:
                 self._parser_state = _ParserState.END_SETUP
                 return False
         return True
@@ -179,12 +246,16 @@ class _Parser:
         Initialize the pots, figure out which player is the hero and then transition to preflop.
         """
         hero_index, self._hand.hero_cards = _get_hero(
-            self._pk_current_state.hole_cards,
+            self._pk_state.hole_cards,
             self._custom_fields.get("_apm_hero", None),
         )
         self._hand.players[hero_index].is_hero = True
-        blinds = sum(self._pk_current_state.blinds_or_straddles)
-        pot_amounts = list(self._pk_current_state.pot_amounts)
+        for i, cards in enumerate(self._pk_state.hole_cards):
+            if i != hero_index and cards and all(not c.unknown_status for c in cards):
+                self._hand.villain_cards[i] = [repr(c) for c in cards]
+        blinds = sum(self._pk_state.blinds_or_straddles)
+        self._hand.big_blind = max(self._pk_state.blinds_or_straddles, default=0)
+        pot_amounts = list(self._pk_state.pot_amounts)
         if not pot_amounts:
             pot_amounts = [0]
         pot_amounts[0] += blinds
@@ -193,18 +264,19 @@ class _Parser:
                 "Preflop",
                 [],
                 pot_amounts,
-                [True for _ in range(self._pk_current_state.player_count)],
-                self._pk_current_state.stacks.copy(),
+                [True for _ in range(self._pk_state.player_count)],
+                self._pk_state.stacks.copy(),
                 2,
-                [[] for _ in range(self._pk_current_state.player_count)],
+                [[] for _ in range(self._pk_state.player_count)],
             )
         )
+        self._remember_chips()
         self._hand.title += " " + "/".join(
-            format_n(b) for b in self._pk_current_state.blinds_or_straddles if b
+            format_n(b) for b in self._pk_state.blinds_or_straddles if b
         )
-        if any(self._pk_current_state.antes):
-            second_ante = self._pk_current_state.antes[1]
-            if all(a == second_ante for a in self._pk_current_state.antes):
+        if any(self._pk_state.antes):
+            second_ante = self._pk_state.antes[1]
+            if all(a == second_ante for a in self._pk_state.antes):
                 self._hand.title += f" (ante {format_n(second_ante)})"
             else:
                 # The ante is collected once per round from the BB
@@ -242,15 +314,14 @@ class _Parser:
         player_i_for_action_table = (
             self._pk_current_operation.player_index
             - self._hand.streets[current_street_index].first_player_actions
-        ) % self._pk_current_state.player_count
+        ) % self._pk_state.player_count
         commentary = self._pk_current_operation.commentary
         if commentary:
             commentary = commentary.strip()
         action: Action = Action()
         if isinstance(self._pk_current_operation, CheckingOrCalling):
             is_all_in = (
-                self._pk_current_state.stacks[self._pk_current_operation.player_index]
-                == 0
+                self._pk_state.stacks[self._pk_current_operation.player_index] == 0
             )
             if self._pk_current_operation.amount > 0:
                 action = CallAction(is_all_in)
@@ -259,11 +330,10 @@ class _Parser:
         elif isinstance(self._pk_current_operation, CompletionBettingOrRaisingTo):
             is_bet = all(
                 bet == 0 or i == self._pk_current_operation.player_index
-                for i, bet in enumerate(self._pk_current_state.bets)
+                for i, bet in enumerate(self._pk_state.bets)
             )
             is_all_in = (
-                self._pk_current_state.stacks[self._pk_current_operation.player_index]
-                == 0
+                self._pk_state.stacks[self._pk_current_operation.player_index] == 0
             )
             if is_bet:
                 action = BetAction(self._pk_current_operation.amount, is_all_in)
@@ -281,17 +351,8 @@ class _Parser:
                 answer = commentary[len("apm study:") :].strip()
             else:
                 # Choose the correct answer from _apm_answers
-                number_previous_questions = 0
-                for i in range(len(self._hand.streets)):
-                    if i <= current_street_index:
-                        number_previous_questions += len(
-                            self._hand.streets[i].questions
-                        )
-                if (
-                    number_previous_questions < len(self._hand.answers)
-                    and self._hand.answers[number_previous_questions]
-                ):
-                    answer = self._hand.answers[number_previous_questions]
+                answer = self._get_answer(self._nr_questions, answer)
+            self._nr_questions += 1
             next_action_i = len(
                 self._hand.streets[current_street_index].actions[
                     player_i_for_action_table
@@ -302,41 +363,92 @@ class _Parser:
                     "What do you do?",
                     answer,
                     (player_i_for_action_table, next_action_i),
+                    *self._pot_and_to_call(self._pk_current_operation.player_index),
                 )
             )
         elif self._hand.players[self._pk_current_operation.player_index].is_hero:
             # Collect the default questions for any action performed by the hero since we can't
             # know until the very end whether any "apm study" commentary exists. The default
             # questions would then be the fallback.
-            answer: str = str(action)
-            number_previous_questions = 0
-            for i in range(len(self._hand.streets)):
-                if i <= current_street_index:
-                    number_previous_questions += len(
-                        self._hand.streets[i].default_questions
-                    )
-            if (
-                number_previous_questions < len(self._hand.answers)
-                and self._hand.answers[number_previous_questions]
-            ):
-                answer = self._hand.answers[number_previous_questions]
+            answer = self._get_answer(self._nr_default_questions, str(action))
+            self._nr_default_questions += 1
             next_action_i = len(
                 self._hand.streets[current_street_index].actions[
                     player_i_for_action_table
                 ]
             )
+            self._spots.append(self._spot(action, next_action_i == 0))
             self._hand.streets[current_street_index].default_questions.append(
                 Question(
                     "What do you do?",
                     answer,
                     (player_i_for_action_table, next_action_i),
+                    *self._pot_and_to_call(self._pk_current_operation.player_index),
                 )
             )
         self._hand.streets[current_street_index].actions[
             player_i_for_action_table
         ].append(action)  # action should be a type to make it easier to style it later
+        if isinstance(action, RaiseAction):
+            self._street_has_raise = True
+        self._remember_chips()
         return True
 
+    def _remember_chips(self):
+        """
+        Remember the chips in the middle, the bets and the stacks. The pokerkit
+        state is only seen after an action was applied, so this is called after
+        every action and at the beginning of every street to know them before
+        the next action.
+        """
+        self._pot = sum(self._pk_state.pot_amounts) + sum(self._pk_state.bets)
+        # The pot only grows until it is pushed to the winner at the end
+        self._hand.pot = max(self._hand.pot, self._pot)
+        self._bets = list(self._pk_state.bets)
+        self._stacks = list(self._pk_state.stacks)
+
+    def _pot_and_to_call(self, player_index: int) -> Tuple[Number, Number]:
+        """
+        Return the pot and the amount the player has to call before the
+        current action.
+        """
+        to_call = min(
+            max(self._bets) - self._bets[player_index], self._stacks[player_index]
+        )
+        return self._pot, to_call
+
+    def _spot(self, action: Action, new_street: bool) -> Spot:
+        """
+        Describe the decision of the player of the current operation, who is
+        about to perform the action.
+        """
+        player_index = self._pk_current_operation.player_index
+        pot, to_call = self._pot_and_to_call(player_index)
+        put_in = to_call
+        if isinstance(action, (BetAction, RaiseAction)):
+            put_in = self._pk_current_operation.amount - self._bets[player_index]
+        is_all_in = isinstance(action, (BetAction, CallAction, RaiseAction)) and (
+            action.is_all_in()
+        )
+        return Spot(
+            facing_raise=self._street_has_raise and to_call > 0,
+            new_street=new_street,
+            all_in=is_all_in or 0 < self._stacks[player_index] <= to_call,
+            pot_fraction=put_in / pot if pot else 0,
+        )
+
+    def _get_answer(self, question_index: int, default: str) -> str:
+        """
+        Return the answer from _apm_answers for the question with the given index (counting
+        from the first question of the hand) or the default if there is none.
+        """
+        if (
+            question_index < len(self._hand.answers)
+            and self._hand.answers[question_index]
+        ):
+            return self._hand.answers[question_index]
+        return default
+
     def _street_end_state_helper(
         self, next_street_name: str, next_state: _ParserState
     ) -> bool:
@@ -344,20 +456,22 @@ class _Parser:
         Helper method to do the processing of the end of streets (end_preflop, end_flop, ...), used by the
         relevant _state_handlers .
         """
-        pot_amounts = list(self._pk_current_state.pot_amounts)
+        pot_amounts = list(self._pk_state.pot_amounts)
         if not pot_amounts:
             pot_amounts = [0]
         self._hand.streets.append(
             Street(
                 next_street_name,
-                [repr(c[0]) for c in self._pk_current_state.board_cards],
+                [repr(c[0]) for c in self._pk_state.board_cards],
                 pot_amounts,
-                self._pk_current_state.statuses.copy(),
-                self._pk_current_state.stacks.copy(),
+                self._pk_state.statuses.copy(),
+                self._pk_state.stacks.copy(),
                 0,
-                [[] for _ in range(self._pk_current_state.player_count)],
+                [[] for _ in range(self._pk_state.player_count)],
             )
         )
+        self._remember_chips()
+        self._street_has_raise = False
         self._parser_state = next_state
         return True
 
@@ -368,13 +482,23 @@ class _Parser:
         # Validate that the number of answers in _apm_answers matches the number of questions.
         # This can't be done without parsing all the actions, so it's easiest to do it at the end.
         # If necessary, replace the questions with the default questions.
-        number_questions = sum(len(s.questions) for s in self._hand.streets)
+        number_questions = self._nr_questions
         if number_questions == 0:
-            number_questions = sum(len(s.default_questions) for s in self._hand.streets)
+            number_questions = self._nr_default_questions
+            selected = range(number_questions)
+            # _apm_answers answers every action of the hero, so the rules
+            # can't choose the study spots
+            if self._spot_rules is not None and not self._hand.answers:
+                selected = set(self._spot_rules.select(self._spots))
+            i = 0
             for s in self._hand.streets:
-                s.questions = s.default_questions
+                s.questions = [
+                    q for j, q in enumerate(s.default_questions, i) if j in selected
+                ]
+                i += len(s.default_questions)
         for s in self._hand.streets:
             s.default_questions = []
+            s.freeze()
         if self._hand.answers and len(self._hand.answers) != number_questions:
             raise ValidationError(
                 f"_apm_answers contains {len(self._hand.answers)} answers "
@@ -383,11 +507,14 @@ class _Parser:
         return True
 
 
-def parse(content: str) -> Hand:
+def parse(content: str, spot_rules: Optional[SpotRules] = None) -> Hand:
     """
     Parse the content of a .phh (poker hand history) file.
 
     :param content: content of the .phh (poker hand history) file.
+    :param spot_rules: if the hand has no "apm study" commentary (and no _apm_answers),
+        only the decisions of the hero that match these rules are study spots instead
+        of every action of the hero.
     :returns: the parsed hand.
     """
     if not content:
@@ -403,29 +530,157 @@ def parse(content: str) -> Hand:
             f"Error parsing PHH with content:\n{content_for_err}"
         ) from e
 
-    if hh.variant not in ("NT", "FT"):
-        # TODO Validate whether other variants work with little additional effort, but for now focus on NLHE
-        raise ValidationError(f"the variant '{hh.variant}' is not supported")
+    if hh.variant not in SUPPORTED_VARIANTS:
+        raise ValidationError(
+            f"the variant '{hh.variant}' is not supported, the supported variants "
+            f"are {', '.join(SUPPORTED_VARIANTS)}"
+        )
 
     custom_fields = _get_and_validate_custom_fields(
-        content, hh.create_state().player_count
+        hh.user_defined_fields, len(hh.starting_stacks)
     )
-    parser = _Parser(hh, custom_fields)
+    parser = _Parser(hh, custom_fields, spot_rules)
     return parser.get_hand()
 
 
-def _get_and_validate_custom_fields(content: str, player_count: int) -> Dict[str, Any]:
+class ParseResult:
+    """
+    The result of parsing and validating one .phh file with parse_many().
+    """
+
+    OK = "ok"
+    WARNING = "warning"
+    ERROR = "error"
+
+    path: str
+    status: str
+    # Explanation of the error or the warnings, empty if the status is OK
+    message: str
+    # None if the status is ERROR
+    hand: Optional[Hand]
+
+    def __init__(
+        self, path: str, status: str, message: str = "", hand: Optional[Hand] = None
+    ):
+        self.path = path
+        self.status = status
+        self.message = message
+        self.hand = hand
+
+    def to_dict(self) -> Dict[str, str]:
+        """
+        Return the result (without the hand) e.g. for serializing it as JSON.
+        """
+        result = {"file": self.path, "status": self.status}
+        if self.message:
+            result["message"] = self.message
+        return result
+
+
+def parse_many(
+    paths: Iterable[Union[str, Path]],
+    max_questions: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    spot_rules: Optional[SpotRules] = None,
+) -> Iterator[ParseResult]:
+    """
+    Parse and validate many .phh files in parallel. One result is yielded per file, in the
+    same order as the paths, as soon as it is available. Errors are reported in the results
+    instead of being raised.
+
+    :param paths: paths of the .phh files.
+    :param max_questions: if specified, hands with more questions (study spots) are an error.
+    :param max_workers: maximum number of worker processes. Defaults to the number of CPUs.
+        If it is 1 the files are parsed in the current process.
+    :param spot_rules: see parse().
+    """
+    paths = [str(p) for p in paths]
+    if max_workers == 1 or len(paths) <= 1:
+        for path in paths:
+            yield _parse_file(path, max_questions, spot_rules)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(
+            _parse_file,
+            paths,
+            [max_questions] * len(paths),
+            [spot_rules] * len(paths),
+            chunksize=16,
+        )
+
+
+def _parse_file(
+    path: str, max_questions: Optional[int], spot_rules: Optional[SpotRules] = None
+) -> ParseResult:
+    """
+    Parse and validate a single .phh file for parse_many().
+    """
+    return parse_checked(
+        path,
+        lambda: Path(path).read_text(encoding="utf-8"),
+        max_questions,
+        spot_rules,
+    )
+
+
+def parse_checked(
+    path: str,
+    read: Callable[[], str],
+    max_questions: Optional[int],
+    spot_rules: Optional[SpotRules] = None,
+) -> ParseResult:
+    """
+    Parse and validate a single hand like parse_many() does, reporting errors in the
+    result instead of raising them.
+
+    :param path: where the hand comes from, for the result.
+    :param read: returns the content of the .phh file. Errors while reading (e.g.
+        converting the hand to .phh) are reported like parse errors.
+    """
+    try:
+        hand = parse(read(), spot_rules)
+        hand.validate()
+    except ValidationError as e:
+        message = e.humanize_error()
+        if e.__cause__ is not None and not isinstance(e.__cause__, schema.SchemaError):
+            message += f": {e.__cause__}"
+        return ParseResult(path, ParseResult.ERROR, message)
+    except Exception as e:  # e.g. invalid actions that pokerkit refuses
+        return ParseResult(path, ParseResult.ERROR, f"{type(e).__name__}: {e}")
+
+    number_questions = sum(len(s.questions) for s in hand.streets)
+    if max_questions is not None and number_questions > max_questions:
+        return ParseResult(
+            path,
+            ParseResult.ERROR,
+            f"the hand has {number_questions} study spots but at most "
+            f"{max_questions} are supported, it must be split into multiple hands",
+        )
+    if number_questions == 0:
+        message = "the hand has no study spots because the hero never acts"
+        if spot_rules is not None:
+            message = (
+                "the hand has no study spots because no decision of the hero "
+                "matches the rules"
+            )
+        return ParseResult(path, ParseResult.WARNING, message, hand)
+    return ParseResult(path, ParseResult.OK, hand=hand)
+
+
+def _get_and_validate_custom_fields(
+    user_defined_fields: Dict[str, Any], player_count: int
+) -> Dict[str, Any]:
     """
     The .phh file may contain custom fields (called user-defined fields in the specification). We
     are only interested in the ones starting with '_apm_' so we filter and validate them.
 
-    :param content: content of the .phh (poker hand history) file.
+    :param user_defined_fields: the user-defined fields that pokerkit found in the .phh file (so
+        that the file doesn't have to be parsed again).
     :param player_count: number of players in the poker hand history.
-    :returns: the parsed and validated custom fields.
+    :returns: the validated custom fields.
     """
     custom_fields = dict()
-    raw_hh = tomllib.loads(content)
-    for key, val in raw_hh.items():
+    for key, val in user_defined_fields.items():
         if key.startswith("_apm_"):
             custom_fields[key] = val
 
@@ -442,6 +697,10 @@ def _get_and_validate_custom_fields(content: str, player_count: int) -> Dict[str
             schema.Optional("_apm_notes"): str,
             schema.Optional("_apm_context"): str,
             schema.Optional("_apm_answers"): [str],
+            schema.Optional("_apm_villain_range"): schema.And(
+                str,
+                schema.Schema(_is_range, error="must be a range like 'QQ+, AKs'"),
+            ),
         }
     )
 
@@ -451,6 +710,14 @@ def _get_and_validate_custom_fields(content: str, player_count: int) -> Dict[str
         raise ValidationError('Error validating user-defined "_apm" fields') from e
 
 
+def _is_range(value: str) -> bool:
+    try:
+        poker.Range(value)
+    except ValueError:
+        return False
+    return True
+
+
 def _get_hero(
     hole_cards: List[List[Card]], apm_hero: Optional[int]
 ) -> (int, List[str]):
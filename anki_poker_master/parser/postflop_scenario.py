@@ -0,0 +1,176 @@
+import re
+from typing import Dict, List
+
+import schema
+import yaml
+from poker import Range
+
+from anki_poker_master.model import ValidationError
+from anki_poker_master.model.postflop import HAND_CLASSES, PostflopScenario
+
+
+def parse_postflop_scenario_yml(scenario_yml: str) -> List[PostflopScenario]:
+    """
+    Parse a YAML string containing postflop scenarios and return a list of
+    PostflopScenario objects. The input is assumed to be non-validated.
+    """
+    initial_schema = schema.Schema(
+        schema.And(
+            schema.Use(yaml.safe_load),
+            [
+                {
+                    schema.Optional("DEFAULT"): bool,
+                    schema.Optional("game"): str,
+                    schema.Optional("position"): str,
+                    schema.Optional("scenario"): str,
+                    schema.Optional("board"): _BoardSchema(),
+                    schema.Optional("hero_range"): schema.Schema(
+                        schema.Use(lambda x: Range(str(x))),
+                        error="'{}' is an invalid range",
+                    ),
+                    schema.Optional("actions"): {str: _HandClassesSchema()},
+                    schema.Optional("default_action"): str,
+                    schema.Optional("notes"): schema.Use(
+                        lambda x: "" if x is None else str(x)
+                    ),
+                    schema.Optional("source"): schema.Use(
+                        lambda x: "" if x is None else str(x)
+                    ),
+                }
+            ],
+        )
+    )
+    try:
+        v_scenarios = initial_schema.validate(scenario_yml)
+    except schema.SchemaError as e:
+        raise ValidationError("error validating the postflop scenarios file") from e
+    defaults = [s for s in v_scenarios if s.pop("DEFAULT", False)]
+    if len(defaults) > 1:
+        raise ValidationError("There can only be one DEFAULT scenario.")
+    for default in defaults:
+        v_scenarios.remove(default)
+        for scenario in v_scenarios:
+            for key, value in default.items():
+                scenario.setdefault(key, value)
+
+    strict_schema = schema.Schema(
+        [
+            {
+                "game": str,
+                "position": str,
+                "scenario": str,
+                "board": [str],
+                "actions": {str: [str]},
+                schema.Optional("hero_range"): Range,
+                schema.Optional("default_action"): str,
+                schema.Optional("notes"): str,
+                schema.Optional("source"): str,
+            }
+        ]
+    )
+    try:
+        v_scenarios = strict_schema.validate(v_scenarios)
+    except schema.SchemaError as e:
+        raise ValidationError("error validating the postflop scenarios file") from e
+
+    # A hand class can only take one action
+    for s in v_scenarios:
+        actions: Dict[str, str] = {}
+        for action, hand_classes in s["actions"].items():
+            for hand_class in hand_classes:
+                if hand_class in actions:
+                    raise ValidationError(
+                        f"Hand class '{hand_class}' is listed for the actions "
+                        f"'{actions[hand_class]}' and '{action}' in scenario "
+                        f"'{s['game']} / {s['scenario']} / {s['position']}'"
+                    )
+                actions[hand_class] = action
+
+    return [
+        PostflopScenario(
+            board=s["board"],
+            actions=s["actions"],
+            position=s["position"],
+            scenario=s["scenario"],
+            game=s["game"],
+            hero_range=s.get("hero_range"),
+            default_action=s.get("default_action", "Check"),
+            notes=s.get("notes"),
+            source=s.get("source"),
+        )
+        for s in v_scenarios
+    ]
+
+
+EXAMPLE_POSTFLOP_SCENARIO_FILE = """
+## The postflop scenario file is a list of scenarios. Each scenario is a
+## dictionary with the following keys: game, position, scenario, board,
+## hero_range, actions, default_action, notes and source.
+## board is the flop, turn or river, e.g. "Ah 7c 2d".
+## hero_range is the range of the hero when the board is dealt. The default
+## is all hands.
+## actions lists the hand classes that take each action. The hand classes
+## are: straight flush, quads, full house, flush, straight, set, trips,
+## two pair, overpair, top pair, second pair, weak pair, combo draw,
+## flush draw, open-ended, gutshot and air.
+## The hand classes that are not listed take the default_action, which is
+## Check unless specified otherwise.
+
+- game: "Cash 100BB 6P"
+  position: "BTN vs BB"
+  scenario: "Single raised pot, BB checks"
+  board: "Ah 7c 2d"
+  hero_range: "22+, A2s+, K9s+, Q9s+, J9s+, T8s+, 97s+, 86s+, 75s+, 65s, 54s, A8o+, KTo+, QTo+, JTo"
+  actions:
+    "Bet 33%": "set, two pair, top pair, overpair, second pair, gutshot, air"
+  source: pokertrainer.se
+
+- game: "Cash 100BB 6P"
+  position: "BTN vs BB"
+  scenario: "Single raised pot, BB checks"
+  board: "Jh Th 4c"
+  hero_range: "22+, A2s+, K9s+, Q9s+, J9s+, T8s+, 97s+, 86s+, 75s+, 65s, 54s, A8o+, KTo+, QTo+, JTo"
+  actions:
+    "Bet 75%": "straight, set, two pair, top pair, overpair, combo draw, open-ended"
+    "Bet 33%": "flush draw, gutshot"
+
+## You can specify one default scenario that sets the default values for all
+## fields that are not specified in the other scenarios.
+# - DEFAULT: true
+#   game: "Cash 100BB 6P"
+#   default_action: Fold
+""".lstrip()
+
+
+# The cards of a board, e.g. "Ah 7c 2d", "Ah,7c,2d" or "Ah7c2d"
+_CARD_RE = re.compile(r"[2-9TJQKA][cdhs]")
+
+
+class _BoardSchema:
+    def validate(self, data):
+        text = str(data)
+        cards = _CARD_RE.findall(text)
+        if (
+            _CARD_RE.sub("", text).strip(" ,;")
+            or not 3 <= len(cards) <= 5
+            or len(set(cards)) < len(cards)
+        ):
+            err_msg = f"'{text}' is an invalid board, it must be 3 to 5 different cards"
+            raise schema.SchemaError(err_msg, err_msg)
+        return cards
+
+
+class _HandClassesSchema:
+    def validate(self, data):
+        if isinstance(data, list):
+            hand_classes = [str(c).strip().lower() for c in data]
+        else:
+            hand_classes = [c.strip().lower() for c in str(data).split(",")]
+        for hand_class in hand_classes:
+            if hand_class not in HAND_CLASSES:
+                err_msg = (
+                    f"'{hand_class}' is an invalid hand class, the hand "
+                    f"classes are {', '.join(HAND_CLASSES)}"
+                )
+                raise schema.SchemaError(err_msg, err_msg)
+        return hand_classes
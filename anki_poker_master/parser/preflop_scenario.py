@@ -1,10 +1,12 @@
-from typing import List, Dict
+import re
+from typing import List, Dict, Tuple
 
 import schema
 import yaml
 from poker import Range
 
 from anki_poker_master.model import ValidationError, PreflopScenario
+from anki_poker_master.model.frequencies import RangeFrequencies
 
 
 def parse_scenario_yml(scenario_yml: str) -> List[PreflopScenario]:
@@ -31,6 +33,7 @@ def parse_scenario_yml(scenario_yml: str) -> List[PreflopScenario]:
                     schema.Optional("position"): str,
                     schema.Optional("scenario"): str,
                     schema.Optional("ranges"): {str: _RangeSchema()},
+                    schema.Optional("villain_range"): _RangeSchema(),
                     schema.Optional("notes"): schema.Use(
                         lambda x: "" if x is None else str(x)
                     ),
@@ -75,10 +78,19 @@ def parse_scenario_yml(scenario_yml: str) -> List[PreflopScenario]:
                 "game": str,
                 "position": str,
                 "scenario": str,
-                "ranges": {str: Range},
+                "ranges": {str: schema.Or(Range, _WeightedRange)},
                 schema.Optional("notes"): str,
                 schema.Optional("source"): str,
                 schema.Optional("range_colors"): object,
+                schema.Optional("villain_range"): schema.And(
+                    schema.Schema(
+                        Range, error="the villain range can't have frequencies"
+                    ),
+                    schema.Schema(
+                        lambda r: len(r.hands) > 0,
+                        error="the villain range can't be empty",
+                    ),
+                ),
             }
         ]
     )
@@ -95,12 +107,17 @@ def parse_scenario_yml(scenario_yml: str) -> List[PreflopScenario]:
                         f"Range color defined for action '{action}', but no range is defined for that action."
                     )
 
-    # validate that ranges within a scenario cannot overlap
+    # validate that ranges within a scenario cannot overlap, unless the hands
+    # are only taken with a frequency
     for s in v_scenarios2:
         for action in s["ranges"]:
             for other_action in s["ranges"]:
                 if action == other_action:
                     continue
+                if not isinstance(s["ranges"][action], Range) or not isinstance(
+                    s["ranges"][other_action], Range
+                ):
+                    continue
                 hands1 = set(s["ranges"][action].hands)
                 hands2 = set(s["ranges"][other_action].hands)
                 if hands1.intersection(hands2):
@@ -110,6 +127,17 @@ def parse_scenario_yml(scenario_yml: str) -> List[PreflopScenario]:
                         + f"'{s['game']} / {s['scenario']} / {s['position']}'"
                     )
 
+    for s in v_scenarios2:
+        if _has_frequencies(s):
+            overfull_hands = _frequencies(s["ranges"]).overfull_hands()
+            if overfull_hands:
+                raise ValidationError(
+                    "The frequencies of "
+                    + ", ".join(str(h) for h in overfull_hands)
+                    + " add up to more than 100% in scenario "
+                    + f"'{s['game']} / {s['scenario']} / {s['position']}'"
+                )
+
     return convert_scenarios(v_scenarios2)
 
 
@@ -120,6 +148,10 @@ def convert_scenarios(scenarios: Dict) -> List[PreflopScenario]:
         position = scenario["position"]
         scenario_name = scenario["scenario"]
         ranges = scenario["ranges"]
+        frequencies = None
+        if _has_frequencies(scenario):
+            frequencies = _frequencies(ranges)
+            ranges = frequencies.dominant_ranges()
         notes = scenario.get("notes", None)
         source = scenario.get("source", None)
         range_colors = {}
@@ -140,6 +172,8 @@ def convert_scenarios(scenarios: Dict) -> List[PreflopScenario]:
                 range_colors=range_colors,
                 notes=notes,
                 source=source,
+                frequencies=frequencies,
+                villain_range=scenario.get("villain_range"),
             ),
         )
     return result
@@ -211,13 +245,64 @@ EXAMPLE_SCENARIO_FILE = """
 """.lstrip()
 
 
+def _has_frequencies(scenario: Dict) -> bool:
+    return any(isinstance(r, _WeightedRange) for r in scenario["ranges"].values())
+
+
+def _frequencies(ranges: Dict) -> RangeFrequencies:
+    frequencies = RangeFrequencies(list(ranges))
+    for action, r in ranges.items():
+        parts = r.parts if isinstance(r, _WeightedRange) else [(r, 1.0)]
+        for hands, frequency in parts:
+            frequencies.add_range(action, hands, frequency)
+    return frequencies
+
+
+class _WeightedRange:
+    """
+    A range in which some hands are only taken with a frequency, e.g.
+    "QQ+, AKo:0.7" or "QQ+, AKo:70%".
+    """
+
+    def __init__(self, parts: List[Tuple[Range, float]]):
+        self.parts = parts
+
+
+# A range followed by a colon and its frequency, e.g. "AKo:0.7" or "AJs+:70%"
+_WEIGHTED_RANGE_RE = re.compile(r"([^\s,;:]+)\s*:\s*([^\s,;]*)")
+
+
 class _RangeSchema:
     def validate(self, data):
         if data is None:
             err_msg = "range can't be empty or null"
             raise schema.SchemaError(err_msg, err_msg)
+        data = str(data)
+        weighted = _WEIGHTED_RANGE_RE.findall(data)
         try:
-            return Range(str(data))
+            if not weighted:
+                return Range(data)
+            parts = []
+            rest = _WEIGHTED_RANGE_RE.sub("", data)
+            if rest.strip(" ,;"):
+                parts.append((Range(rest), 1.0))
+            for r, frequency in weighted:
+                parts.append((Range(r), self._frequency(frequency)))
+            return _WeightedRange(parts)
         except ValueError:
             err_msg = f"'{data}' is an invalid range"
             raise schema.SchemaError(err_msg, err_msg)
+
+    @staticmethod
+    def _frequency(value: str) -> float:
+        try:
+            if value.endswith("%"):
+                frequency = float(value[:-1]) / 100
+            else:
+                frequency = float(value)
+        except ValueError:
+            frequency = None
+        if frequency is None or not 0 < frequency <= 1:
+            err_msg = f"'{value}' is an invalid frequency"
+            raise schema.SchemaError(err_msg, err_msg)
+        return frequency
@@ -0,0 +1,365 @@
+"""
+Convert the text hand histories of online poker sites (PokerStars and
+GGPoker) to .phh so that they can be parsed like any other hand history.
+
+Sites write thousands of hands into one file. The files are read line by line
+and split into hands (see split_hands), so they never have to be in memory at
+once, and the hands are converted and parsed in batches by a pool of worker
+processes (see parse_site_files).
+
+Amounts with cents (cash games) are converted to cents, since .phh amounts
+should be integers, e.g. a $0.01/$0.02 hand becomes a 1/2 hand.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+from typing import (
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from anki_poker_master.model import ValidationError
+from anki_poker_master.parser.phh import ParseResult, parse_checked
+from anki_poker_master.parser.study_spots import SpotRules
+
+# Site hand history files are plain text files
+FILE_EXTENSION = ".txt"
+
+# The first line of a hand, e.g.
+# PokerStars Hand #233043339012:  Hold'em No Limit ($0.01/$0.02 USD) - ...
+# Poker Hand #RC1234567890: Hold'em No Limit ($0.02/$0.05) - ...
+_HAND_START = re.compile(
+    r"^(?P<site>PokerStars|Poker) (?:Zoom |Home Game )?Hand #(?P<id>\w+):"
+    r"\s*(?P<game>.*)$"
+)
+# The game in the first line and the PHH variant
+_VARIANTS = [
+    (re.compile(r"Hold'em No Limit"), "NT"),
+    (re.compile(r"Hold'em Limit"), "FT"),
+    (re.compile(r"Omaha Pot Limit"), "PO"),
+    (re.compile(r"Omaha Hi/Lo Limit"), "FO/8"),
+]
+# A limit game is played with a small and a big bet instead of a minimum bet
+_LIMIT_VARIANTS = ("FT", "FO/8")
+_NR_HOLE_CARDS = {"NT": 2, "FT": 2, "PO": 4, "FO/8": 4}
+_AMOUNT = r"[$€£]?([\d,]+(?:\.\d+)?)"
+_STAKES = re.compile(rf"\({_AMOUNT}/{_AMOUNT}")
+_BUTTON = re.compile(r"^Table '.*'.* Seat #(\d+) is the button")
+_SEAT = re.compile(rf"^Seat (\d+): (.+?) \({_AMOUNT} in chips[^)]*\)(.*)$")
+_STREET = re.compile(r"^\*\*\* (.+?) \*\*\*(.*)$")
+_CARDS = re.compile(r"\[([^\]]+)\]")
+_DEALT = re.compile(r"^Dealt to (.+?) \[([^\]]+)\]")
+_SHOWED = re.compile(r"^Seat \d+: (.+?)(?: \([^)]*\))? (?:showed|mucked) \[([^\]]+)\]")
+
+# Number of hands that a worker converts and parses at once
+_BATCH_SIZE = 64
+
+
+def split_hands(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """
+    Split the lines of a site hand history file into hands.
+
+    :returns: an iterator of (number of the first line of the hand, text of
+        the hand) tuples.
+    """
+    hand: List[str] = []
+    first_line = 0
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if _HAND_START.match(line):
+            if hand:
+                yield first_line, "\n".join(hand).strip()
+            hand = [line]
+            first_line = line_number
+        elif hand:
+            hand.append(line)
+    if hand:
+        yield first_line, "\n".join(hand).strip()
+
+
+class _Hand:
+    """
+    The parts of a site hand history that end up in the .phh file, with the
+    amounts as they are written by the site.
+    """
+
+    def __init__(self, site: str, hand_id: str, variant: str, stakes: List[str]):
+        self.site = site
+        self.hand_id = hand_id
+        self.variant = variant
+        self.stakes = stakes
+        self.button_seat = 0
+        # (seat, name, stack) of the players that are dealt in
+        self.seats: List[Tuple[int, str, str]] = []
+        self.antes: Dict[str, str] = {}
+        self.small_blind: Optional[Tuple[str, str]] = None
+        self.big_blind: Optional[Tuple[str, str]] = None
+        self.hero = ""
+        self.hole_cards: Dict[str, List[str]] = {}
+        # (player name or "" for the dealer, action, amount or cards)
+        self.actions: List[Tuple[str, str, str]] = []
+        self.folded: Set[str] = set()
+        self.all_in: Set[str] = set()
+        # The player that bet or raised last in the street, or the first one
+        # to act if nobody did. The showdown starts with this player.
+        self.opener = ""
+        self.showdown = False
+
+    def show_all_in(self):
+        """
+        If the players are all-in before the board is dealt completely, they
+        show their cards before the remaining board cards are dealt.
+        """
+        names = [name for _, name, _ in self.seats]
+        active = [name for name in names if name not in self.folded]
+        not_all_in = [name for name in active if name not in self.all_in]
+        if self.showdown or len(active) < 2 or len(not_all_in) > 1:
+            return
+        start = names.index(self.opener)
+        for name in names[start:] + names[:start]:
+            if name not in self.folded:
+                self.actions.append((name, "sm", ""))
+        self.showdown = True
+
+
+def to_phh(text: str) -> str:
+    """
+    Convert one hand of a site hand history to the content of a .phh file.
+    Raises a ValidationError if the hand can't be converted.
+    """
+    hand = _read_hand(text)
+    amounts = [s for _, _, s in hand.seats] + hand.stakes + list(hand.antes.values())
+    amounts += [a for _, kind, a in hand.actions if kind in ("cc", "cbr") and a]
+    amounts += [a for _, a in (hand.small_blind, hand.big_blind) if a]
+    decimals = max(_decimals(a) for a in amounts)
+
+    def n(amount: str) -> int:
+        return int(Decimal(amount.replace(",", "")).scaleb(decimals))
+
+    names = [name for _, name, _ in hand.seats]
+    index = {name: i for i, name in enumerate(names)}
+    antes = [n(hand.antes.get(name, "0")) for name in names]
+    blinds = [0] * len(names)
+    # The small blind is the first player after the dealer and the big blind
+    # the second one, except heads-up where the dealer is the small blind
+    sb_index, bb_index = (len(names) - 1, 0) if len(names) == 2 else (0, 1)
+    for (name, amount), expected in (
+        (hand.small_blind, sb_index),
+        (hand.big_blind, bb_index),
+    ):
+        if name is not None and index[name] != expected:
+            raise ValidationError(f"{name} posts a blind outside of the blinds")
+        if name is not None:
+            blinds[expected] = n(amount)
+    if len(names) == 2:
+        # pokerkit expects the blinds and antes of the small blind first
+        blinds.reverse()
+        antes.reverse()
+
+    lines = [f"variant = {json.dumps(hand.variant)}"]
+    lines.append(f"antes = {antes}")
+    lines.append(f"blinds_or_straddles = {blinds}")
+    if hand.variant in _LIMIT_VARIANTS:
+        lines.append(f"small_bet = {n(hand.stakes[0])}")
+        lines.append(f"big_bet = {n(hand.stakes[1])}")
+    else:
+        lines.append(f"min_bet = {n(hand.stakes[1])}")
+    lines.append(f"starting_stacks = {[n(stack) for _, _, stack in hand.seats]}")
+    lines.append("actions = [")
+    unknown = "??" * _NR_HOLE_CARDS[hand.variant]
+    for i, name in enumerate(names):
+        cards = "".join(hand.hole_cards.get(name, [])) or unknown
+        lines.append(f'  "d dh p{i + 1} {cards}",')
+    for name, kind, value in hand.actions:
+        if not name:
+            lines.append(f'  "d db {value}",')
+        elif kind == "cbr":
+            lines.append(f'  "p{index[name] + 1} cbr {n(value)}",')
+        elif kind == "sm":
+            if name not in hand.hole_cards:
+                raise ValidationError(f"{name} is all-in, but the cards are unknown")
+            lines.append(f'  "p{index[name] + 1} sm -",')
+        else:
+            lines.append(f'  "p{index[name] + 1} {kind}",')
+    lines.append("]")
+    lines.append(f"players = {json.dumps(names, ensure_ascii=False)}")
+    lines.append(f"_apm_hero = {index[hand.hero] + 1}")
+    source = f"{'GGPoker' if hand.site == 'Poker' else hand.site} Hand #{hand.hand_id}"
+    lines.append(f"_apm_source = {json.dumps(source)}")
+    return "\n".join(lines) + "\n"
+
+
+def _decimals(amount: str) -> int:
+    _, _, fraction = amount.partition(".")
+    return len(fraction)
+
+
+def _read_hand(text: str) -> _Hand:
+    """
+    Read the parts of the hand that are needed for the .phh file.
+    """
+    lines = text.splitlines()
+    header = _HAND_START.match(lines[0]) if lines else None
+    if header is None:
+        raise ValidationError("the hand history doesn't start with a hand number")
+    variant = next((v for p, v in _VARIANTS if p.search(header["game"])), None)
+    stakes = _STAKES.search(header["game"])
+    if variant is None or stakes is None:
+        raise ValidationError(f"the game '{header['game']}' is not supported")
+    hand = _Hand(header["site"], header["id"], variant, [stakes[1], stakes[2]])
+
+    i = 1
+    if i < len(lines) and (button := _BUTTON.match(lines[i])):
+        hand.button_seat = int(button[1])
+        i += 1
+    seats = []
+    while i < len(lines) and (seat := _SEAT.match(lines[i])):
+        if "sitting out" not in seat[4] and "out of hand" not in seat[4]:
+            seats.append((int(seat[1]), seat[2], seat[3]))
+        i += 1
+    if len(seats) < 2:
+        raise ValidationError("the hand has less than two players")
+    # The players in the order of the .phh file: the dealer is the last one
+    seats.sort(key=lambda s: (s[0] <= hand.button_seat, s[0]))
+    hand.seats = seats
+    names = sorted((name for _, name, _ in seats), key=len, reverse=True)
+    player_line = re.compile(
+        rf"^({'|'.join(re.escape(name) for name in names)}): (.*)$"
+    )
+
+    # The first player to act preflop is the one after the big blind
+    hand.opener = seats[1 if len(seats) == 2 else 2 % len(seats)][1]
+    street = ""
+    for line in lines[i:]:
+        if m := _STREET.match(line):
+            street = m[1]
+            if street in ("FLOP", "TURN", "RIVER"):
+                hand.show_all_in()
+                hand.opener = seats[0][1]
+                cards = _CARDS.findall(m[2])
+                new_cards = cards[-1].split() if cards else []
+                hand.actions.append(("", "db", "".join(new_cards)))
+            elif street not in ("HOLE CARDS", "SHOW DOWN", "SHOWDOWN", "SUMMARY"):
+                raise ValidationError(f"'*** {street} ***' is not supported")
+            continue
+        if m := _DEALT.match(line):
+            hand.hero = m[1]
+            hand.hole_cards[m[1]] = m[2].split()
+            continue
+        if m := _SHOWED.match(line):
+            hand.hole_cards.setdefault(m[1], m[2].split())
+            continue
+        m = player_line.match(line)
+        if m is None:
+            continue
+        _read_action(hand, m[1], m[2], street)
+    if not hand.hero:
+        raise ValidationError("the hole cards of the hero are unknown")
+    return hand
+
+
+def _read_action(hand: _Hand, name: str, action: str, street: str):
+    """
+    Read the action of a player, e.g. "raises $0.04 to $0.06".
+    """
+    if street in ("SHOW DOWN", "SHOWDOWN", "SUMMARY"):
+        if m := re.match(r"shows \[([^\]]+)\]", action):
+            hand.hole_cards.setdefault(name, m[1].split())
+        return
+    if m := re.match(rf"posts the ante {_AMOUNT}", action):
+        hand.antes[name] = m[1]
+    elif m := re.match(rf"posts small blind {_AMOUNT}", action):
+        hand.small_blind = (name, m[1])
+    elif m := re.match(rf"posts big blind {_AMOUNT}", action):
+        hand.big_blind = (name, m[1])
+    elif action.startswith("posts"):
+        raise ValidationError(f"'{name}: {action}' is not supported")
+    elif action.startswith("folds"):
+        hand.actions.append((name, "f", ""))
+        hand.folded.add(name)
+    elif action.startswith("checks"):
+        hand.actions.append((name, "cc", ""))
+    elif m := re.match(rf"calls {_AMOUNT}", action):
+        hand.actions.append((name, "cc", m[1]))
+    elif m := re.match(rf"(?:bets|raises {_AMOUNT} to) {_AMOUNT}", action):
+        hand.actions.append((name, "cbr", m[m.lastindex]))
+        hand.opener = name
+    if action.endswith("and is all-in"):
+        hand.all_in.add(name)
+
+
+def parse_site_files(
+    paths: Iterable[Union[str, Path]],
+    max_questions: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    spot_rules: Optional[SpotRules] = None,
+) -> Iterator[ParseResult]:
+    """
+    Convert and parse the hands of site hand history files in parallel. One
+    result is yielded per hand, in the order of the files and hands, as soon
+    as it is available. The path of a result is the path of the file and the
+    line the hand starts at, e.g. "hands.txt:120".
+
+    :param max_questions: see phh.parse_many().
+    :param max_workers: maximum number of worker processes. Defaults to the
+        number of CPUs. If it is 1 the hands are parsed in the current process.
+    :param spot_rules: see phh.parse().
+    """
+    batches = _batches(paths)
+    if max_workers == 1:
+        for batch in batches:
+            yield from _parse_batch(batch, max_questions, spot_rules)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Only a few batches are converted at a time, so that the hands of
+        # large files aren't all read into memory
+        max_pending = 2 * (max_workers or os.cpu_count() or 1)
+        pending: Deque[Future] = deque()
+        for batch in batches:
+            pending.append(
+                executor.submit(_parse_batch, batch, max_questions, spot_rules)
+            )
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _batches(paths: Iterable[Union[str, Path]]) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Return batches of (location, text) tuples of the hands of the files.
+    """
+    batch = []
+    for path in paths:
+        with open(path, encoding="utf-8-sig") as f:
+            for line_number, text in split_hands(f):
+                batch.append((f"{path}:{line_number}", text))
+                if len(batch) == _BATCH_SIZE:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def _parse_batch(
+    batch: List[Tuple[str, str]],
+    max_questions: Optional[int],
+    spot_rules: Optional[SpotRules],
+) -> List[ParseResult]:
+    return [
+        parse_checked(location, partial(to_phh, text), max_questions, spot_rules)
+        for location, text in batch
+    ]
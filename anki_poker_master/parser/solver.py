@@ -0,0 +1,249 @@
+"""
+Import preflop scenarios from solver and range viewer exports. The exports
+are converted to PreflopScenario objects directly, without the detour via the
+scenarios YAML file, and are read one scenario (solver node) at a time so that
+large exports don't need to fit in memory.
+
+Two formats are supported, both with the frequency of every action per hand
+(e.g. "AKo") or per combination (e.g. "AhKd"). Frequencies are fractions
+("0.7") or percentages ("70%"). Hands that are missing are folded.
+
+CSV with one row per hand and a column per action. The rows of a scenario must
+be consecutive:
+
+    game,position,scenario,hand,Raise,Call
+    NLHE,UTG,Opening,AKo,0.7,0.3
+
+JSON Lines with one scenario per line (or a JSON array of such objects):
+
+    {"game": "NLHE", "position": "UTG", "scenario": "Opening",
+     "frequencies": {"AKo": {"Raise": 0.7, "Call": 0.3}}}
+
+The optional "notes" and "source" columns or keys are taken over as well.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from poker.hand import Combo, Hand
+
+from anki_poker_master.model import PreflopScenario, ValidationError
+from anki_poker_master.model.frequencies import (
+    HAND_INDEX,
+    HANDS,
+    NR_COMBOS,
+    RangeFrequencies,
+)
+
+FILE_EXTENSIONS = (".csv", ".json", ".jsonl")
+
+_KEY_COLUMNS = ("game", "position", "scenario")
+_INFO_COLUMNS = ("notes", "source")
+
+_Key = Tuple[str, str, str]
+
+
+def read_solver_file(path: Path) -> Iterator[PreflopScenario]:
+    """
+    Read the scenarios from a CSV or JSON export, depending on the file
+    extension.
+    """
+    path = Path(path)
+    if path.suffix.lower() not in FILE_EXTENSIONS:
+        raise ValidationError(
+            f"unknown solver export format '{path.suffix}', expected one of "
+            + ", ".join(FILE_EXTENSIONS)
+        )
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            yield from parse_solver_csv(f)
+        else:
+            yield from parse_solver_json(f)
+
+
+def parse_solver_csv(lines: Iterable[str]) -> Iterator[PreflopScenario]:
+    """
+    Parse a CSV export and yield one scenario per group of consecutive rows
+    with the same game, position and scenario.
+    """
+    reader = csv.DictReader(lines)
+    header = reader.fieldnames or []
+    missing = [c for c in _KEY_COLUMNS + ("hand",) if c not in header]
+    if missing:
+        raise ValidationError(f"the CSV export has no column '{missing[0]}'")
+    actions = [c for c in header if c not in _KEY_COLUMNS + _INFO_COLUMNS + ("hand",)]
+    if not actions:
+        raise ValidationError("the CSV export has no action columns")
+
+    builder = None
+    done = set()
+    for row in reader:
+        key = tuple(row[c] for c in _KEY_COLUMNS)
+        if builder is None or key != builder.key:
+            if builder is not None:
+                yield builder.build()
+            if key in done:
+                raise ValidationError(
+                    f"line {reader.line_num}: the rows of scenario "
+                    + f"'{_title(key)}' are not consecutive"
+                )
+            done.add(key)
+            builder = _ScenarioBuilder(key, actions)
+        try:
+            for c in _INFO_COLUMNS:
+                if row.get(c):
+                    builder.info[c] = row[c]
+            if not row["hand"]:
+                # A short row has no value for the hand column at all
+                raise ValidationError("the hand is missing")
+            builder.add(row["hand"], {a: _frequency(row[a]) for a in actions if row[a]})
+        except ValidationError as e:
+            raise ValidationError(f"line {reader.line_num}: {e}") from e
+    if builder is not None:
+        yield builder.build()
+
+
+def parse_solver_json(lines: Iterable[str]) -> Iterator[PreflopScenario]:
+    """
+    Parse a JSON Lines export (or a JSON array) and yield one scenario per
+    object.
+    """
+    lines = iter(lines)
+    for line_num, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        if line.lstrip().startswith("["):
+            # A JSON array can't be read incrementally with the standard
+            # library, so it is read as a whole.
+            nodes = _load_json(line + "".join(lines), line_num)
+            if not isinstance(nodes, list):
+                raise ValidationError(f"line {line_num}: expected a JSON array")
+            for i, node in enumerate(nodes):
+                yield _scenario_from_json(node, f"scenario {i + 1}")
+            return
+        yield _scenario_from_json(_load_json(line, line_num), f"line {line_num}")
+
+
+def _load_json(text: str, line_num: int):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValidationError(f"line {line_num}: invalid JSON") from e
+
+
+def _scenario_from_json(node, location: str) -> PreflopScenario:
+    try:
+        if not isinstance(node, dict):
+            raise ValidationError("expected a JSON object")
+        for k in _KEY_COLUMNS:
+            if not isinstance(node.get(k), str):
+                raise ValidationError(f"'{k}' is missing or not a string")
+        frequencies = node.get("frequencies")
+        if not isinstance(frequencies, dict) or not all(
+            isinstance(v, dict) for v in frequencies.values()
+        ):
+            raise ValidationError("'frequencies' must map hands to action frequencies")
+        actions = []
+        for hand_frequencies in frequencies.values():
+            actions.extend(a for a in hand_frequencies if a not in actions)
+        builder = _ScenarioBuilder(tuple(node[k] for k in _KEY_COLUMNS), actions)
+        for k in _INFO_COLUMNS:
+            if node.get(k):
+                builder.info[k] = str(node[k])
+        for hand, hand_frequencies in frequencies.items():
+            builder.add(hand, {a: _frequency(f) for a, f in hand_frequencies.items()})
+        return builder.build()
+    except ValidationError as e:
+        raise ValidationError(f"{location}: {e}") from e
+
+
+_MIXED_NOTATIONS_ERROR = (
+    "the frequencies of {} are given both for the hand and for its combinations"
+)
+
+
+class _ScenarioBuilder:
+    """
+    Collect the frequencies of one scenario. Frequencies given per combination
+    are averaged over all combinations of the hand. The frequencies of a hand
+    can be given per hand or per combination, but not both, and only once.
+    """
+
+    def __init__(self, key: _Key, actions: List[str]):
+        self.key = key
+        self.info: Dict[str, str] = {}
+        self._frequencies = RangeFrequencies(actions)
+        self._combo_sums: Dict[Tuple[Hand, str], float] = {}
+        self._combos: Set[Combo] = set()
+        self._combo_hands: Set[Hand] = set()
+        self._hands: Set[Hand] = set()
+
+    def add(self, hand: str, frequencies: Dict[str, float]):
+        if len(hand) == 4:
+            try:
+                combo = Combo(hand)
+            except ValueError as e:
+                raise ValidationError(f"'{hand}' is an invalid hand") from e
+            h = combo.to_hand()
+            if h in self._hands:
+                raise ValidationError(_MIXED_NOTATIONS_ERROR.format(h))
+            if combo in self._combos:
+                raise ValidationError(f"'{hand}' is given more than once")
+            self._combos.add(combo)
+            self._combo_hands.add(h)
+            for a, f in frequencies.items():
+                self._combo_sums[h, a] = self._combo_sums.get((h, a), 0.0) + f
+            return
+        try:
+            h = Hand(hand)
+        except ValueError as e:
+            raise ValidationError(f"'{hand}' is an invalid hand") from e
+        if h in self._combo_hands:
+            raise ValidationError(_MIXED_NOTATIONS_ERROR.format(h))
+        if h in self._hands:
+            raise ValidationError(f"'{hand}' is given more than once")
+        self._hands.add(h)
+        for a, f in frequencies.items():
+            self._frequencies.set(h, a, f)
+
+    def build(self) -> PreflopScenario:
+        for (h, a), f in self._combo_sums.items():
+            self._frequencies.set(h, a, f / NR_COMBOS[HAND_INDEX[h]])
+        overfull_hands = self._frequencies.overfull_hands()
+        if overfull_hands:
+            raise ValidationError(
+                "The frequencies of "
+                + ", ".join(str(h) for h in overfull_hands)
+                + f" add up to more than 100% in scenario '{_title(self.key)}'"
+            )
+        game, position, scenario = self.key
+        mixed = any(self._frequencies.is_mixed(h) for h in HANDS)
+        return PreflopScenario(
+            self._frequencies.dominant_ranges(),
+            position,
+            scenario,
+            game,
+            notes=self.info.get("notes"),
+            source=self.info.get("source"),
+            frequencies=self._frequencies if mixed else None,
+        )
+
+
+def _frequency(value) -> float:
+    try:
+        if isinstance(value, str) and value.strip().endswith("%"):
+            frequency = float(value.strip()[:-1]) / 100
+        else:
+            frequency = float(value)
+    except (TypeError, ValueError):
+        frequency = None
+    if frequency is None or not 0 <= frequency <= 1:
+        raise ValidationError(f"'{value}' is an invalid frequency")
+    return frequency
+
+
+def _title(key: _Key) -> str:
+    game, position, scenario = key
+    return f"{game} / {scenario} / {position}"
@@ -0,0 +1,110 @@
+"""
+Rules to pick the key decisions of the hero as study spots in hand histories
+without "apm study" commentary, instead of asking about every action of the
+hero.
+
+The parser describes every decision of the hero with a Spot while it replays
+the hand, and SpotRules decides at the end which of them become questions.
+"""
+
+from typing import Iterable, List, Optional, Sequence
+
+
+class Spot:
+    """
+    A decision of the hero, as seen right before the hero acts.
+    """
+
+    # The hero has to call a raise (preflop the first bet is a raise of the
+    # blinds). Facing a bet alone is not enough, see pot_fraction.
+    facing_raise: bool
+    # The first action of the hero in the street
+    new_street: bool
+    # The hero goes all-in or has to call an all-in (or a bet that covers the
+    # stack of the hero)
+    all_in: bool
+    # The chips the hero has to call or puts in the middle, as a fraction of
+    # the pot before the action
+    pot_fraction: float
+
+    def __init__(
+        self,
+        facing_raise: bool,
+        new_street: bool,
+        all_in: bool,
+        pot_fraction: float,
+    ):
+        self.facing_raise = facing_raise
+        self.new_street = new_street
+        self.all_in = all_in
+        self.pot_fraction = pot_fraction
+
+    def __repr__(self):
+        return (
+            f"Spot(facing_raise={self.facing_raise}, new_street={self.new_street}, "
+            f"all_in={self.all_in}, pot_fraction={self.pot_fraction:.2f})"
+        )
+
+
+class SpotRules:
+    """
+    Decide which decisions of the hero are study spots. A decision is a study
+    spot if it matches at least one of the enabled rules. If there are more
+    than max_spots, the ones that match the most rules are kept (the earlier
+    one if there is a tie).
+    """
+
+    FACING_RAISE = "facing-raise"
+    NEW_STREET = "new-street"
+    ALL_IN = "all-in"
+    LARGE_BET = "large-bet"
+    RULES = (FACING_RAISE, NEW_STREET, ALL_IN, LARGE_BET)
+
+    rules: Sequence[str]
+    # A bet or call of at least this fraction of the pot is a large bet
+    min_pot_fraction: float
+    max_spots: Optional[int]
+
+    def __init__(
+        self,
+        rules: Iterable[str] = RULES,
+        min_pot_fraction: float = 0.5,
+        max_spots: Optional[int] = None,
+    ):
+        self.rules = tuple(rules)
+        unknown = [r for r in self.rules if r not in self.RULES]
+        if unknown:
+            raise ValueError(
+                f"unknown study spot rules {', '.join(unknown)}, "
+                f"the rules are {', '.join(self.RULES)}"
+            )
+        if min_pot_fraction < 0:
+            raise ValueError("the minimum pot fraction must not be negative")
+        if max_spots is not None and max_spots < 1:
+            raise ValueError("at least one study spot must be allowed")
+        self.min_pot_fraction = min_pot_fraction
+        self.max_spots = max_spots
+
+    def matches(self, spot: Spot) -> int:
+        """
+        Return the number of enabled rules that the spot matches.
+        """
+        matches = {
+            self.FACING_RAISE: spot.facing_raise,
+            self.NEW_STREET: spot.new_street,
+            self.ALL_IN: spot.all_in,
+            self.LARGE_BET: spot.pot_fraction >= self.min_pot_fraction,
+        }
+        return sum(matches[r] for r in self.rules)
+
+    def select(self, spots: Sequence[Spot]) -> List[int]:
+        """
+        Return the indices of the spots that are study spots, in ascending
+        order.
+        """
+        matching = [(self.matches(s), i) for i, s in enumerate(spots)]
+        matching = [(n, i) for n, i in matching if n > 0]
+        if self.max_spots is not None:
+            matching.sort(key=lambda m: (-m[0], m[1]))
+            matching = matching[: self.max_spots]
+        return sorted(i for _, i in matching)
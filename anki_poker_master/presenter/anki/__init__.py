@@ -141,10 +141,6 @@ HAND_HISTORY_MODEL = genanki.Model(
 def write_decks_to_file(
     decks: List[genanki.Deck], media_files: Set[str], filename: str
 ):
-    media_files_full_path = []
-    for media_file in media_files:
-        image_path = files("anki_poker_master").joinpath(
-            "resources", "images", media_file
-        )
-        media_files_full_path.append(image_path)
+    images = files("anki_poker_master").joinpath("resources", "images")
+    media_files_full_path = [images.joinpath(media_file) for media_file in media_files]
     genanki.Package(decks, media_files_full_path).write_to_file(filename)
@@ -1,47 +1,114 @@
-import random
 from hashlib import sha256
-from typing import Set, List, Tuple, Optional
+from typing import Iterable, Set, List, Tuple, Optional
 
 from genanki import Note, Deck
 
 from anki_poker_master.model.hand import Hand
+from anki_poker_master.model.hand_odds import spot_odds
 from anki_poker_master.presenter.anki import (
     HAND_HISTORY_MODEL,
     HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS,
+    write_decks_to_file,
 )
+from anki_poker_master.presenter.html import card
 from anki_poker_master.presenter.html import phh as html_phh
 
 
+DECK_NAME = "AnkiPokerMaster::HandHistory"
+
+
 def get_deck(
     hands: List[Hand],
     tags: Optional[List[str]] = None,
+    sprite: bool = False,
+    subdeck: Optional[str] = None,
+    odds: bool = False,
 ) -> Tuple[Deck, Set[str]]:
+    """
+    Create the deck containing one note per hand. If subdeck is specified
+    (e.g. "NLHE 1/2"), the deck is a subdeck of the hand history deck.
+    If odds is True, the pot odds and the equity of the hero are added to the
+    answers.
+    """
+    name = deck_name(subdeck)
+    deck = Deck(deck_id(name), name)
+    return deck, add_notes(deck, hands, tags=tags, sprite=sprite, odds=odds)
+
+
+def add_notes(
+    deck: Deck,
+    hands: Iterable[Hand],
+    tags: Optional[List[str]] = None,
+    sprite: bool = False,
+    odds: bool = False,
+) -> Set[str]:
+    """
+    Add one note per hand to the deck and return the media files they need.
+    """
     all_media_files = set()
-    deck = Deck(random.randrange(1 << 30, 1 << 31), "AnkiPokerMaster::HandHistory")
     for hand in hands:
-        note, media_files = get_note(hand, tags=tags)
+        note, media_files = get_note(hand, tags=tags, sprite=sprite, odds=odds)
         all_media_files.update(media_files)
         deck.add_note(note)
-    return deck, all_media_files
+    return all_media_files
+
+
+def write_deck(
+    hands: List[Hand],
+    filename: str,
+    tags: Optional[List[str]] = None,
+    sprite: bool = False,
+    subdeck: Optional[str] = None,
+    odds: bool = False,
+):
+    """
+    Create the deck for the hands (see get_deck) and write it to an Anki
+    package.
+    """
+    deck, media_files = get_deck(
+        hands, tags=tags, sprite=sprite, subdeck=subdeck, odds=odds
+    )
+    write_decks_to_file([deck], media_files, filename)
+
+
+def deck_name(subdeck: Optional[str] = None) -> str:
+    return DECK_NAME if subdeck is None else f"{DECK_NAME}::{subdeck}"
+
+
+def deck_id(name: str) -> int:
+    """
+    Derive the deck ID from the deck name so that packages that are created
+    separately (e.g. the shards of a collection of hands) agree on the ID of
+    each deck.
+    """
+    digest = sha256(name.encode("utf-8")).digest()
+    return (1 << 30) + int.from_bytes(digest[:4], "big") % (1 << 30)
 
 
 def get_note(
     hand: Hand,
     tags: Optional[List[str]] = None,
+    sprite: bool = False,
+    odds: bool = False,
 ) -> (Note, Set[str]):
     hand.validate()
     all_media_files = set()
-    all_media_files.update([f"apm-card-small-{c}.png" for c in hand.hero_cards])
+    all_media_files.update(
+        card.media_file(c, small=True, sprite=sprite) for c in hand.hero_cards
+    )
     hero_cards = "\n".join(
-        f'<img src="apm-card-small-{c}.png" alt="{c}" title="{c}">'
-        for c in hand.hero_cards
+        card.to_html(c, small=True, sprite=sprite) for c in hand.hero_cards
+    )
+    for street in hand.streets:
+        all_media_files.update(
+            card.media_file(c, small=True, sprite=sprite) for c in street.board
+        )
+    answers = [q.answer for street in hand.streets for q in street.questions]
+    if odds:
+        answers = [a + html_phh.get_odds(o) for a, o in zip(answers, spot_odds(hand))]
+    question_answers: List[Tuple[str, str]] = list(
+        zip(html_phh.get_questions_only(hand, sprite=sprite), answers)
     )
-    question_answers: List[Tuple[str, str]] = []
-    for i, street in enumerate(hand.streets):
-        all_media_files.update([f"apm-card-small-{c}.png" for c in street.board])
-        for j, question in enumerate(street.questions):
-            html_question = html_phh.get_question_only(hand, i, j)
-            question_answers.append((html_question, question.answer))
 
     if len(question_answers) > HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS:
         raise ValueError(
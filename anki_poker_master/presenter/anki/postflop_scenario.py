@@ -0,0 +1,111 @@
+from typing import List, Optional, Set, Tuple
+
+import genanki
+from poker import Range
+
+from anki_poker_master.model.postflop import PostflopScenario
+from anki_poker_master.presenter.anki import BASIC_MODEL
+from anki_poker_master.presenter.anki.phh import deck_id
+from anki_poker_master.presenter.html import card
+
+DECK_NAME = "AnkiPokerMaster::Postflop"
+
+# Number of combinations of a hand class that are shown as examples
+_NR_EXAMPLES = 3
+_ALL_HANDS = set(Range("XX").hands)
+
+
+def create_decks(
+    scenarios: List[PostflopScenario],
+    tags: Optional[List[str]] = None,
+    sprite: bool = False,
+) -> Tuple[List[genanki.Deck], Set[str]]:
+    """
+    Create the Anki deck for the postflop scenarios and return it together with
+    the media files it needs.
+    """
+    deck = genanki.Deck(deck_id(DECK_NAME), DECK_NAME)
+    media_files = add_notes(deck, scenarios, tags, sprite=sprite)
+    return [deck], media_files
+
+
+def add_notes(
+    deck: genanki.Deck,
+    scenarios: List[PostflopScenario],
+    tags: Optional[List[str]] = None,
+    sprite: bool = False,
+) -> Set[str]:
+    """
+    Add one note per hand class of the range of the hero to the deck and return
+    the media files they need.
+    """
+    all_media_files = set()
+    for scenario in scenarios:
+        hand_classes = scenario.hand_classes()
+        all_media_files.update(
+            card.media_file(c, sprite=sprite) for c in scenario.board
+        )
+        header = html_header(scenario, sprite=sprite)
+        notes = scenario.notes + "<br>\n" if scenario.notes else ""
+        notes += html_hand_classes(scenario, hand_classes)
+        for hand_class, combos in hand_classes.items():
+            examples = ", ".join(combos[:_NR_EXAMPLES])
+            if len(combos) > _NR_EXAMPLES:
+                examples += ", ..."
+            deck.add_note(
+                genanki.Note(
+                    model=BASIC_MODEL,
+                    fields=[
+                        header
+                        + f"How should you play <b>{hand_class}</b> "
+                        + f"(e.g. {examples})?",
+                        f"You should <b>{scenario.action(hand_class)}</b>.",
+                        notes,
+                        scenario.source if scenario.source else "",
+                    ],
+                    tags=tags if tags else [],
+                )
+            )
+    return all_media_files
+
+
+def html_header(scenario: PostflopScenario, sprite: bool = False) -> str:
+    """
+    Return the game, scenario, position, range of the hero and the board with
+    its texture.
+    """
+    html = f"""
+<b>Game: </b>{scenario.game}
+<br>
+<b>Scenario: </b>{scenario.scenario}
+<br>
+<b>Position: </b>{scenario.position}
+<br>
+""".lstrip()
+    if set(scenario.hero_range.hands) != _ALL_HANDS:
+        html += f"<b>Range: </b>{scenario.hero_range}\n<br>\n"
+    html += f"<b>Board: </b>{', '.join(scenario.texture())}\n<br>\n"
+    html += (
+        "<div class='row'>"
+        + "".join(card.to_html(c, sprite=sprite) for c in scenario.board)
+        + "</div>\n"
+    )
+    return html
+
+
+def html_hand_classes(scenario: PostflopScenario, hand_classes=None) -> str:
+    """
+    Return a table with the number of combinations and the action of every
+    hand class of the range of the hero.
+    """
+    if hand_classes is None:
+        hand_classes = scenario.hand_classes()
+    html = ["<table class='legend'>"]
+    html.append("<tr><th></th><th>Combos</th><th>Action</th></tr>")
+    for hand_class, combos in hand_classes.items():
+        html.append(
+            f"<tr><th class='row'>{hand_class}</th><td>{len(combos)}</td>"
+            f"<td>{scenario.action(hand_class)}</td></tr>"
+        )
+    html.append("</table>")
+    return "\n".join(html) + "\n"
@@ -8,7 +8,11 @@ from poker import Range, Rank, Hand
 from anki_poker_master import helper
 from anki_poker_master.helper import str_to_css_class
 from anki_poker_master.model import PreflopScenario
+from anki_poker_master.model import range_analytics
+from anki_poker_master.model.frequencies import RangeFrequencies
+from anki_poker_master.model.range_diff import ScenarioDiff
 from anki_poker_master.presenter.anki import BASIC_MODEL
+from anki_poker_master.presenter.html import card
 
 _ALL_CARD_HEADER = """
 <div class="row">
@@ -24,6 +28,21 @@ _ALL_CARD_HEADER = """
 """.lstrip()
 # CSS above is duplicate, no??
 
+# Highlight of the hands whose action changed in html_diff
+DIFF_CSS = """table.range.diff td {
+    opacity: 0.35;
+}
+table.range.diff td.changed {
+    opacity: 1;
+    font-weight: bold;
+    outline: 3px solid #000000;
+    outline-offset: -3px;
+}
+.nightMode table.range.diff td.changed {
+    outline-color: #FFFFFF;
+}
+"""
+
 
 _HEADER_FMT = (
     _ALL_CARD_HEADER
@@ -206,18 +225,62 @@ _SCENARIO_MODEL = genanki.Model(
 def create_decks(
     scenarios: List[PreflopScenario],
     tags: List[str] = None,
+    sprite: bool = False,
+    analytics: bool = False,
 ) -> Tuple[List[genanki.Deck], Set[str]]:
-    all_media_files = set()
+    """
+    Create the Anki decks for the scenarios and return them together with the
+    media files they need.
+    If sprite is True, the cards are drawn from the card sprite sheet instead
+    of using one image file per card.
+    If analytics is True, the statistics of the ranges (see html_analytics)
+    are added to the notes.
+    """
     deck_standard = genanki.Deck(
         random.randrange(1 << 30, 1 << 31), "AnkiPokerMaster::Standard"
     )
     deck_detailed = genanki.Deck(
         random.randrange(1 << 30, 1 << 31), "AnkiPokerMaster::Detailed"
     )
+    media_files = add_notes(
+        deck_standard,
+        deck_detailed,
+        scenarios,
+        tags,
+        sprite=sprite,
+        analytics=analytics,
+    )
+    return [deck_standard, deck_detailed], media_files
+
+
+def add_notes(
+    deck_standard: genanki.Deck,
+    deck_detailed: genanki.Deck,
+    scenarios: List[PreflopScenario],
+    tags: List[str] = None,
+    sprite: bool = False,
+    analytics: bool = False,
+) -> Set[str]:
+    """
+    Add the notes of the scenarios to the standard and the detailed deck (see
+    create_decks) and return the media files they need.
+    """
+    all_media_files = set()
     for scenario in scenarios:
+        tables = html_tables(scenario)
+        # The range table of the notes of all row and hand questions
+        table_notes = tables[0] + "<br>" + html_legend(scenario)
+        scenario_notes = scenario.notes if scenario.notes else ""
+        if analytics:
+            scenario_notes += html_analytics(scenario)
         ranges_txt = ""
+        percentages = {}
+        if scenario.frequencies:
+            percentages = {
+                a: round(p, 2) for a, p in scenario.frequencies.percentages().items()
+            }
         for action in sorted(scenario.ranges):
-            percentage = scenario.ranges[action].percent
+            percentage = percentages.get(action, scenario.ranges[action].percent)
             ranges_txt += (
                 f"<b>{action}</b> ({percentage}%): {scenario.ranges[action]}<br>"
             )
@@ -230,13 +293,9 @@ def create_decks(
                     scenario.scenario,
                     scenario.position,
                     ranges_txt,
-                    scenario.notes if scenario.notes else "",
+                    scenario_notes,
                     scenario.source if scenario.source else "",
-                    html_full(scenario),
-                    html_top_left_quadrant_blank(scenario),
-                    html_top_right_quadrant_blank(scenario),
-                    html_bottom_left_quadrant_blank(scenario),
-                    html_bottom_right_quadrant_blank(scenario),
+                    *tables,
                     extra_css(scenario.extra_range_colors, scenario),
                     html_legend(scenario),
                 ],
@@ -289,30 +348,30 @@ def create_decks(
             "pairs",
         ]:
             if c == "pairs":
-                img1 = "apm-card-Xh.png"
-                img2 = "apm-card-Xc.png"
+                card1 = "Xh"
+                card2 = "Xc"
                 question = "How should you play pairs?"
             else:
-                img1 = f"apm-card-{c[0]}h.png"
-                img2 = f"apm-card-{c[1]}{'h' if c[2] == 's' else 'c'}.png"
+                card1 = f"{c[0]}h"
+                card2 = f"{c[1]}{'h' if c[2] == 's' else 'c'}"
                 if c[0] == "A":
                     # In this case it's obvious that there is no higher card
                     question = f"How should you play {c}?"
                 else:
                     question = f"How should you play {c} (where {c[0]} is higher)?"
-            all_media_files.add(img1)
-            all_media_files.add(img2)
+            all_media_files.add(card.media_file(card1, sprite=sprite))
+            all_media_files.add(card.media_file(card2, sprite=sprite))
             full_question = (
                 header_basic_model
                 + question
                 + "<div class='row'>"
-                + f'<img src="{img1}">'
-                + f'<img src="{img2}">'
+                + card.to_html(card1, sprite=sprite)
+                + card.to_html(card2, sprite=sprite)
                 + "</div>"
             )
-            answer = _get_row_question_answer(c, scenario.ranges)
-            notes = (scenario.notes + "<br>\n") if scenario.notes else ""
-            notes += html_full(scenario) + "<br>" + html_legend(scenario)
+            answer = _get_row_question_answer(c, scenario.ranges, scenario.frequencies)
+            notes = (scenario_notes + "<br>\n") if scenario_notes else ""
+            notes += table_notes
             deck_standard.add_note(
                 genanki.Note(
                     model=BASIC_MODEL,
@@ -327,21 +386,33 @@ def create_decks(
             )
         for range in scenario.ranges:
             for hand in scenario.ranges[range].hands:
-                img1 = f"apm-card-{hand.first}h.png"
-                img2 = f"apm-card-{hand.second}{'h' if hand.is_suited else 'c'}.png"
-                all_media_files.add(img1)
-                all_media_files.add(img2)
+                card1 = f"{hand.first}h"
+                card2 = f"{hand.second}{'h' if hand.is_suited else 'c'}"
+                all_media_files.add(card.media_file(card1, sprite=sprite))
+                all_media_files.add(card.media_file(card2, sprite=sprite))
                 full_question = (
                     header_basic_model
                     + f"How should you play {hand}?"
                     + "<div class='row'>"
-                    + f'<img src="{img1}">'
-                    + f'<img src="{img2}">'
+                    + card.to_html(card1, sprite=sprite)
+                    + card.to_html(card2, sprite=sprite)
                     + "</div>"
                 )
-                answer = f"You should <b>{range}</b>."
-                notes = (scenario.notes + "<br>\n") if scenario.notes else ""
-                notes += html_full(scenario) + "<br>" + html_legend(scenario)
+                if scenario.frequencies and scenario.frequencies.is_mixed(hand):
+                    answer = (
+                        "You should "
+                        + " and ".join(
+                            f"<b>{a}</b> {_format_frequency(f)}"
+                            for a, f in scenario.frequencies.hand_frequencies(
+                                hand
+                            ).items()
+                        )
+                        + " of the time."
+                    )
+                else:
+                    answer = f"You should <b>{range}</b>."
+                notes = (scenario_notes + "<br>\n") if scenario_notes else ""
+                notes += table_notes
                 deck_detailed.add_note(
                     genanki.Note(
                         model=BASIC_MODEL,
@@ -354,16 +425,19 @@ def create_decks(
                         tags=tags if tags else [],
                     )
                 )
-    return [deck_standard, deck_detailed], all_media_files
+    return all_media_files
 
 
-def _get_row_question_answer(hand: str, ranges: dict) -> str:
+def _get_row_question_answer(
+    hand: str, ranges: dict, frequencies: RangeFrequencies = None
+) -> str:
     """
     hand is a string like "AXs", "AXo" or "77", that's why it's a "row question"
     because it refers to a single row (or column) in the table. Note also that
     we are only interested in the part of the row (column) that lies to the left
     (below) the pair diagonal.
     For this row we want to know what the correct action is, given the ranges.
+    Hands with a mixed strategy are listed with their frequencies.
     """
     range_keys = sorted([k for k in ranges])
     ranges_new = {k: set() for k in range_keys}
@@ -394,21 +468,86 @@ def _get_row_question_answer(hand: str, ranges: dict) -> str:
     else:
         for k in answer_ranges:
             result.append(f"<b>{k}:</b> {answer_ranges[k]}")
+    if frequencies:
+        mixed = [
+            f"{h} ({_describe_frequencies(frequencies.hand_frequencies(h))})"
+            for h in sorted(potential_hands, reverse=True)
+            if frequencies.is_mixed(h)
+        ]
+        if mixed:
+            result.append("<b>Mixed:</b> " + ", ".join(mixed))
     return "<br>".join(result)
 
 
 def html_full(scenario: PreflopScenario) -> str:
-    return _to_html(scenario.ranges)
+    return _table(_cells(scenario.ranges, frequencies=scenario.frequencies))
+
+
+def html_tables(scenario: PreflopScenario) -> List[str]:
+    """
+    Return the tables of html_full, html_top_left_quadrant_blank,
+    html_top_right_quadrant_blank, html_bottom_left_quadrant_blank and
+    html_bottom_right_quadrant_blank. The cells are only rendered once.
+    """
+    cells = _cells(scenario.ranges, frequencies=scenario.frequencies)
+    return [_table(cells)] + [
+        _table(cells, ["markable"], quadrant) for quadrant in _QUADRANTS
+    ]
+
+
+def html_diff(diff: ScenarioDiff) -> str:
+    """
+    Return the table of the new ranges of the diff with the hands whose action
+    changed highlighted (see DIFF_CSS).
+    """
+    changed_hands = {
+        d.hand: f"{d.old_description} \u2192 {d.new_description}"
+        for d in diff.hand_diffs
+    }
+    return _to_html(
+        diff.new.ranges, table_css_classes=["diff"], changed_hands=changed_hands
+    )
+
+
+def html_analytics(scenario: PreflopScenario) -> str:
+    """
+    Return a table with the number of combinations of every action, the share
+    of them that hold an ace or a king, how many of the villain's premium hands
+    they block and, if the scenario has a villain range, their equity against
+    it.
+    """
+    rows = range_analytics.analyze(scenario)
+    has_equity = scenario.villain_range is not None
+    html = ["<table class='analytics'>"]
+    header = "<tr><th></th><th>Combos</th><th>With A</th><th>With K</th>"
+    header += f"<th>Blocks {range_analytics.BLOCKED_HANDS}</th>"
+    if has_equity:
+        header += f"<th>Equity vs {scenario.villain_range}</th>"
+    html.append(header + "</tr>")
+    for r in rows:
+        row = (
+            f"<tr><th class='row'>{r.action}</th>"
+            f"<td>{round(r.combos, 1):g} ({r.percent:.1f}%)</td>"
+            f"<td>{r.ace_percent:.0f}%</td><td>{r.king_percent:.0f}%</td>"
+            f"<td>{r.blocked_percent:.1f}%</td>"
+        )
+        if has_equity:
+            row += f"<td>{100 * r.equity:.1f}%</td>"
+        html.append(row + "</tr>")
+    html.append("</table>")
+    return "\n".join(html) + "\n"
 
 
 def html_blank() -> str:
     return _to_html({"blank": Range("XX")}, table_css_classes=["markable"])
 
 
-def _html_quadrant_blank(scenario: PreflopScenario, quadrant) -> str:
-    ranges = scenario.ranges.copy()
-    ranges["blank"] = Range(quadrant)
-    return _to_html(ranges, table_css_classes=["markable"])
+def _html_quadrant_blank(scenario: PreflopScenario, quadrant: Set[Hand]) -> str:
+    return _table(
+        _cells(scenario.ranges, frequencies=scenario.frequencies),
+        ["markable"],
+        quadrant,
+    )
 
 
 def html_top_left_quadrant_blank(scenario: PreflopScenario) -> str:
@@ -461,7 +600,10 @@ def extra_css(extra_range_colors, scenario: PreflopScenario) -> str:
     css = []
     for action in sorted(range_colors.keys()):
         color_light, color_dark = range_colors[action]
-        css += [indent * " " + f"table.range td.{action}, table.legend td.{action} {{"]
+        css += [
+            indent * " "
+            + f"table.range td.{action}, table.legend td.{action}, table.range span.{action} {{"
+        ]
         indent += 4
         css += [indent * " " + f"background-color: {color_light};"]
         indent -= 4
@@ -469,7 +611,7 @@ def extra_css(extra_range_colors, scenario: PreflopScenario) -> str:
 
         css += [
             indent * " "
-            + f".nightMode table.range td.{action}, .nightMode table.legend td.{action} {{"
+            + f".nightMode table.range td.{action}, .nightMode table.legend td.{action}, .nightMode table.range span.{action} {{"
         ]
         indent += 4
         css += [indent * " " + f"background-color: {color_dark};"]
@@ -532,10 +674,21 @@ def html_legend(scenario: PreflopScenario) -> str:
 
 # Note that there is overlap between the quadrants since the grid is 13x13.
 # Each quadrant is 7x7.
-_TOP_LEFT_QUADRANT = "98+, A8+, K8+, Q8+, J8+, T8+, 88+"
-_TOP_RIGHT_QUADRANT = "A8s-, K8s-, Q8s-, J8s-, T8s-, 98s-, 87s-, 88"
-_BOTTOM_LEFT_QUADRANT = "A8o-, K8o-, Q8o-, J8o-, T8o-, 98o-, 87o-, 88"
-_BOTTOM_RIGHT_QUADRANT = "88-, 87-, 76-, 65-, 54-, 43-, 32-"
+_TOP_LEFT_QUADRANT = frozenset(Range("98+, A8+, K8+, Q8+, J8+, T8+, 88+").hands)
+_TOP_RIGHT_QUADRANT = frozenset(
+    Range("A8s-, K8s-, Q8s-, J8s-, T8s-, 98s-, 87s-, 88").hands
+)
+_BOTTOM_LEFT_QUADRANT = frozenset(
+    Range("A8o-, K8o-, Q8o-, J8o-, T8o-, 98o-, 87o-, 88").hands
+)
+_BOTTOM_RIGHT_QUADRANT = frozenset(Range("88-, 87-, 76-, 65-, 54-, 43-, 32-").hands)
+_QUADRANTS = [
+    _TOP_LEFT_QUADRANT,
+    _TOP_RIGHT_QUADRANT,
+    _BOTTOM_LEFT_QUADRANT,
+    _BOTTOM_RIGHT_QUADRANT,
+]
+_CENTER_HAND = Hand("88")
 
 # These colors are used in inverted order i.e. the last one will be chosen
 # first.
@@ -556,17 +709,37 @@ _EASY_TO_READ_COLORS = [
 
 
 def _to_html(
-    action_ranges: Dict[str, Range], table_css_classes: List[str] = None
+    action_ranges: Dict[str, Range],
+    table_css_classes: List[str] = None,
+    changed_hands: Dict[Hand, str] = None,
+    frequencies: RangeFrequencies = None,
 ) -> str:
-    table_classes = {"range"}
-    if table_css_classes:
-        table_classes.update(c.lower() for c in table_css_classes)
-    indent = 0
-    html = [indent * " " + f'<table class="{" ".join(sorted(table_classes))}">']
-    indent += 4
+    """
+    Return the 13x13 table of the ranges. The cells of the hands in the
+    special "blank" range are blanked out and the cells of changed_hands are
+    highlighted with the description of the change as tooltip. The cells of
+    hands with a mixed strategy are split according to the frequencies.
+    """
+    ranges = {a: r for a, r in action_ranges.items() if a != "blank"}
+    blank = set(action_ranges["blank"].hands) if "blank" in action_ranges else set()
+    return _table(_cells(ranges, changed_hands, frequencies), table_css_classes, blank)
+
+
+def _cells(
+    action_ranges: Dict[str, Range],
+    changed_hands: Dict[Hand, str] = None,
+    frequencies: RangeFrequencies = None,
+) -> List[List[Tuple[Hand, str, str]]]:
+    """
+    Return the cells of the 13x13 table of the ranges (see _to_html) row by
+    row, each as the hand, the <td> of the hand and the <td> of the hand
+    blanked out. The tables with different hands blanked out (see _table)
+    share the cells, so they are only rendered once.
+    """
+    action_hands = [(a, set(action_ranges[a].hands)) for a in sorted(action_ranges)]
+    rows = []
     for row in reversed(Rank):
-        html.append(indent * " " + "<tr>")
-        indent += 4
+        cells = []
         for col in reversed(Rank):
             if row > col:
                 suit = "s"
@@ -578,33 +751,86 @@ def _to_html(
                 suit = ""
                 hand_type = "pair"
             action = "fold"
-            blank = False
             hand = Hand(row.val + col.val + suit)
-            for a in sorted(action_ranges):
-                if a == "blank":
-                    # Handled later
-                    continue
-                if hand in action_ranges[a].hands:
+            for a, hands in action_hands:
+                if hand in hands:
                     action = a
-            # Overwrite if blank
-            if "blank" in action_ranges:
-                if hand in action_ranges["blank"].hands:
-                    blank = True
-            css_classes = f"{str_to_css_class(action)} {hand_type}" + (
-                " blank" if blank else ""
-            )
-            if hand == Hand("88"):
-                css_classes += " center"
-            html.append(
-                indent * " "
-                + '<td class="%s">%s</td>'
-                % (
-                    css_classes,
+            css_classes = f"{str_to_css_class(action)} {hand_type}"
+            cells.append(
+                (
                     hand,
-                ),
+                    _cell(hand, css_classes, False, changed_hands, frequencies),
+                    _cell(hand, css_classes, True, changed_hands, frequencies),
+                )
             )
+        rows.append(cells)
+    return rows
+
+
+def _cell(
+    hand: Hand,
+    css_classes: str,
+    blank: bool,
+    changed_hands: Dict[Hand, str] = None,
+    frequencies: RangeFrequencies = None,
+) -> str:
+    if blank:
+        css_classes += " blank"
+    if hand == _CENTER_HAND:
+        css_classes += " center"
+    if frequencies and not blank and frequencies.is_mixed(hand):
+        hand_frequencies = frequencies.hand_frequencies(hand)
+        bar = "".join(
+            f'<span class="{str_to_css_class(a)}" '
+            f'style="width: {_format_frequency(f)}"></span>'
+            for a, f in hand_frequencies.items()
+        )
+        return (
+            f'<td class="{css_classes} mixed" '
+            + f'title="{_describe_frequencies(hand_frequencies)}">'
+            + f'{hand}<div class="frequencies">{bar}</div></td>'
+        )
+    if changed_hands and hand in changed_hands:
+        return (
+            f'<td class="{css_classes} changed" '
+            + f'title="{changed_hands[hand]}">{hand}</td>'
+        )
+    return f'<td class="{css_classes}">{hand}</td>'
+
+
+def _table(
+    cells: List[List[Tuple[Hand, str, str]]],
+    table_css_classes: List[str] = None,
+    blank: Set[Hand] = frozenset(),
+) -> str:
+    """
+    Return the table of the cells (see _cells) with the hands in blank
+    blanked out.
+    """
+    table_classes = {"range"}
+    if table_css_classes:
+        table_classes.update(c.lower() for c in table_css_classes)
+    indent = 0
+    html = [indent * " " + f'<table class="{" ".join(sorted(table_classes))}">']
+    indent += 4
+    for row in cells:
+        html.append(indent * " " + "<tr>")
+        indent += 4
+        for hand, cell, blank_cell in row:
+            html.append(indent * " " + (blank_cell if hand in blank else cell))
         indent -= 4
         html.append(indent * " " + "</tr>")
     indent -= 4
     html.append(indent * " " + "</table>")
     return "\n".join(html) + "\n"
+
+
+def _format_frequency(frequency: float) -> str:
+    return f"{round(100 * frequency, 1):g}%"
+
+
+def _describe_frequencies(hand_frequencies: Dict[str, float]) -> str:
+    """
+    Return e.g. "Raise 70%, Call 30%".
+    """
+    return ", ".join(f"{a} {_format_frequency(f)}" for a, f in hand_frequencies.items())
@@ -0,0 +1,60 @@
+"""
+HTML for the playing card images. By default every card is a separate image
+file. In sprite mode all cards of one size are drawn from a single sprite sheet
+so that a package only contains one media file per card size.
+"""
+
+from typing import Tuple
+
+# Layout of the sprite sheets: one column per rank and one row per suit.
+# The "X" rank (unknown card) only exists for the large cards.
+_SMALL_SPRITE_RANKS = "23456789TJQKA"
+_LARGE_SPRITE_RANKS = "23456789TJQKAX"
+_SPRITE_SUITS = "cdhs"
+
+# The leading underscore tells Anki that the file is referenced from the CSS,
+# otherwise "Check Media" would consider it unused.
+SMALL_SPRITE = "_apm-card-small-sprite.png"
+LARGE_SPRITE = "_apm-card-sprite.png"
+
+
+def media_file(card: str, small: bool = False, sprite: bool = False) -> str:
+    """
+    Return the name of the media file needed to display the card (e.g. "As").
+    """
+    if sprite:
+        return SMALL_SPRITE if small else LARGE_SPRITE
+    if small:
+        return f"apm-card-small-{card}.png"
+    return f"apm-card-{card}.png"
+
+
+def to_html(card: str, small: bool = False, sprite: bool = False) -> str:
+    """
+    Return the HTML to display the card (e.g. "As").
+    """
+    if not sprite:
+        if small:
+            return f'<img src="{media_file(card, small)}" alt="{card}" title="{card}">'
+        return f'<img src="{media_file(card, small)}">'
+    x, y = _sprite_position(card, small)
+    size_class = "apm-card-small" if small else "apm-card-large"
+    return (
+        f'<span class="apm-card {size_class}" '
+        f'style="background-position: {x}% {y}%" title="{card}"></span>'
+    )
+
+
+def _sprite_position(card: str, small: bool) -> Tuple[str, str]:
+    """
+    Return the CSS background-position percentages of the card within the
+    sprite sheet.
+    """
+    ranks = _SMALL_SPRITE_RANKS if small else _LARGE_SPRITE_RANKS
+    if len(card) != 2 or card[0] not in ranks or card[1] not in _SPRITE_SUITS:
+        raise ValueError(f"Unexpected card: {card}")
+    col = ranks.index(card[0])
+    row = _SPRITE_SUITS.index(card[1])
+    x = round(col * 100 / (len(ranks) - 1), 4)
+    y = round(row * 100 / (len(_SPRITE_SUITS) - 1), 4)
+    return f"{x:g}", f"{y:g}"
@@ -1,4 +1,8 @@
+from typing import Dict, List, Optional, Tuple, Type
+
 from anki_poker_master.helper import format_n
+from anki_poker_master.model.hand_odds import SpotOdds
+from anki_poker_master.presenter.html import card
 from anki_poker_master.model.hand import (
     Hand,
     Action,
@@ -9,137 +13,257 @@ from anki_poker_master.model.hand import (
     RaiseAction,
 )
 
+# CSS classes per action type. The second value is used instead of the first
+# one if the action is an all-in (None if the action can't be an all-in).
+_ACTION_CSS_CLASSES: Dict[Type[Action], Tuple[str, Optional[str]]] = {
+    CheckAction: ("check-action", None),
+    RaiseAction: ("raise-action", "raise-action all-in-action"),
+    FoldAction: ("fold-action", None),
+    BetAction: ("bet-action", "bet-action all-in-action"),
+    CallAction: ("call-action", "call-action all-in-action"),
+}
+
+_TABLE_HEAD = (
+    '<table class="player-actions {shrink}">\n'
+    "<thead>\n"
+    "<tr>\n"
+    '<th scope="col">Player</th>\n'
+    '<th scope="col">Stack</th>\n'
+    '<th scope="col" colspan="{colspan}">Actions</th>\n'
+    "</tr>"
+    "</thead>\n"
+    "<tbody>\n"
+)
+_TABLE_FOOT = "</tbody>\n</table>\n"
+_ROW_END = "</tr>\n"
+_EMPTY_CELL = "<td></td>"
+_QUESTION_CELL = '<td><span class="question-action">?</span></td>'
+
 
 def _action_to_html(action: Action) -> str:
-    css_classes = []
-    content = str(action)
-    if isinstance(action, CheckAction):
-        css_classes.append("check-action")
-    elif isinstance(action, RaiseAction):
-        css_classes.append("raise-action")
-    elif isinstance(action, FoldAction):
-        css_classes.append("fold-action")
-    elif isinstance(action, BetAction):
-        css_classes.append("bet-action")
-    elif isinstance(action, CallAction):
-        css_classes.append("call-action")
-    else:
-        raise ValueError(f"Unexpected action: {action}")
-
-    if isinstance(action, (CallAction, RaiseAction, BetAction)):
-        if action.is_all_in():
-            css_classes.append("all-in-action")
-
-    return f'<span class="{" ".join(css_classes)}">{content}</span>'
+    try:
+        css_class, css_class_all_in = _ACTION_CSS_CLASSES[type(action)]
+    except KeyError:
+        raise ValueError(f"Unexpected action: {action}") from None
+    if css_class_all_in and action.is_all_in():
+        css_class = css_class_all_in
+    return f'<span class="{css_class}">{action}</span>'
+
+
+def _table_head(max_num_actions: int) -> str:
+    return _TABLE_HEAD.format(
+        shrink="shrink" if max_num_actions >= 3 else "", colspan=max_num_actions
+    )
+
+
+class _HandRenderer:
+    """
+    Render the questions of a hand as HTML. Everything that does not depend on
+    the question (the row headers and action cells of every street as well as
+    entire streets that precede the question) is rendered at most once, so
+    rendering all questions of a hand does not render the same streets over
+    and over again.
+    """
+
+    def __init__(self, hand: Hand, sprite: bool = False):
+        self._hand = hand
+        self._sprite = sprite
+        self._street_intros: Dict[int, str] = {}
+        self._row_headers: Dict[int, List[str]] = {}
+        self._action_cells: Dict[int, List[List[str]]] = {}
+        self._full_streets: Dict[int, str] = {}
+
+    def question_only(self, street_index_for_question: int, question_index: int) -> str:
+        """
+        Return the HTML of all streets up to the question identified by the
+        street and question index. The indices must be valid.
+        """
+        street = self._hand.streets[street_index_for_question]
+        question = street.questions[question_index]
+        question_row, question_col = question.action_table_indices
+        buf = [self._full_street(i) for i in range(street_index_for_question)]
+        buf.append(self._street_intro(street_index_for_question))
+        buf.append(_table_head(question_col + 1))
+        row_headers = self._street_row_headers(street_index_for_question)
+        action_cells = self._street_action_cells(street_index_for_question)
+        for i, cells in enumerate(action_cells):
+            # Actions up to the question are shown in the rows before the
+            # question and strictly before the question in the other rows.
+            # Later actions are hidden to avoid giving hints how many more
+            # actions are to come.
+            num_cells = question_col + 1 if i < question_row else question_col
+            shown = cells[:num_cells]
+            buf.append(row_headers[i])
+            buf.extend(shown)
+            buf.extend([_EMPTY_CELL] * (num_cells - len(shown)))
+            if i == question_row:
+                buf.append(_QUESTION_CELL)
+            elif i > question_row:
+                buf.append(_EMPTY_CELL)
+            buf.append(_ROW_END)
+        buf.append(_TABLE_FOOT)
+        buf.append(f"<p>\n<strong>{question.question}</strong>\n</p>\n")
+        return "".join(buf)
+
+    def _street_intro(self, street_index: int) -> str:
+        """
+        Return the street name, the pot and the board.
+        """
+        if street_index not in self._street_intros:
+            street = self._hand.streets[street_index]
+            if len(street.initial_pots) == 1:
+                pot_str = format_n(street.initial_pots[0])
+            else:
+                pot_str = f"[ {' | '.join(map(format_n, street.initial_pots))} ]"
+            buf = [f"<h2>{street.name}</h2>\n", f"<p>Pot: {pot_str}</p>\n"]
+            if street.board:
+                buf.append('<div class="board">\n')
+                for c in street.board:
+                    buf.append(card.to_html(c, small=True, sprite=self._sprite))
+                    buf.append("\n")
+                buf.append("</div>\n")
+            self._street_intros[street_index] = "".join(buf)
+        return self._street_intros[street_index]
+
+    def _street_row_headers(self, street_index: int) -> List[str]:
+        """
+        Return the beginning of every table row (player and stack) in the order
+        in which the players act.
+        """
+        if street_index not in self._row_headers:
+            street = self._hand.streets[street_index]
+            players = self._hand.players
+            row_headers = []
+            for i in range(len(street.actions)):
+                player_index = (i + street.first_player_actions) % len(players)
+                player = players[player_index]
+                row_classes = []
+                if player.is_hero:
+                    row_classes.append("hero")
+                if not street.initial_players[player_index]:
+                    row_classes.append("not-playing")
+                if row_classes:
+                    row_start = f'<tr class="{", ".join(row_classes)}">\n'
+                else:
+                    row_start = "<tr>\n"
+                dealer = ' <span class="dealerbtn">D</span>' if player.is_dealer else ""
+                row_headers.append(
+                    f"{row_start}<td>{player.name}{dealer}</td>\n"
+                    f"<td>{format_n(street.initial_stacks[player_index])}</td>\n"
+                )
+            self._row_headers[street_index] = row_headers
+        return self._row_headers[street_index]
+
+    def _street_action_cells(self, street_index: int) -> List[List[str]]:
+        """
+        Return the table cells of all actions per row.
+        """
+        if street_index not in self._action_cells:
+            self._action_cells[street_index] = [
+                [f"<td>{_action_to_html(a)}</td>" for a in row]
+                for row in self._hand.streets[street_index].actions
+            ]
+        return self._action_cells[street_index]
+
+    def _full_street(self, street_index: int) -> str:
+        """
+        Return the HTML of a street with all of its actions.
+        """
+        if street_index not in self._full_streets:
+            action_cells = self._street_action_cells(street_index)
+            max_num_actions = max(len(cells) for cells in action_cells)
+            buf = [self._street_intro(street_index), _table_head(max_num_actions)]
+            for row_header, cells in zip(
+                self._street_row_headers(street_index), action_cells
+            ):
+                buf.append(row_header)
+                buf.extend(cells)
+                buf.extend([_EMPTY_CELL] * (max_num_actions - len(cells)))
+                buf.append(_ROW_END)
+            buf.append(_TABLE_FOOT)
+            self._full_streets[street_index] = "".join(buf)
+        return self._full_streets[street_index]
 
 
 def get_question(
-    hand: Hand, street_index_for_question: int, question_index: int
+    hand: Hand,
+    street_index_for_question: int,
+    question_index: int,
+    sprite: bool = False,
 ) -> str:
     """
     Return the HTML representation of the hand ending at the question identified
     by the street and question index.
+    If sprite is True, the cards are drawn from the card sprite sheet.
     """
     hand.validate_with_indices(street_index_for_question, question_index)
 
-    result = f"""<div class="hand-history">
-<h1>{hand.title}</h1>
-"""
+    result = '<div class="hand-history">\n'
+    result += get_intro(hand, sprite=sprite)
+    result += get_question_only(
+        hand, street_index_for_question, question_index, sprite=sprite
+    )
+    result += "</div>\n"
+    return result
+
+
+def get_intro(hand: Hand, sprite: bool = False) -> str:
+    """
+    Return the HTML of the title, context, pocket cards and name of the hero
+    that precedes the streets of the hand.
+    """
+    result = f"<h1>{hand.title}</h1>\n"
     if hand.context:
         result += f"<p>{hand.context}</p>\n"
     result += '<div class="pocket-cards">\n'
     for c in hand.hero_cards:
-        result += f'<img src="apm-card-small-{c}.png" alt="{c}" title="{c}">\n'
+        result += card.to_html(c, small=True, sprite=sprite) + "\n"
     result += "</div>\n"
     result += f"<p><strong>Hero:</strong> {hand.get_hero().name}</p>\n"
-    result += get_question_only(hand, street_index_for_question, question_index)
-    result += "</div>\n"
     return result
 
 
 def get_question_only(
-    hand: Hand, street_index_for_question: int, question_index: int
+    hand: Hand,
+    street_index_for_question: int,
+    question_index: int,
+    sprite: bool = False,
 ) -> str:
     hand.validate_with_indices(street_index_for_question, question_index)
+    return _HandRenderer(hand, sprite).question_only(
+        street_index_for_question, question_index
+    )
 
-    result = ""
-    table_is_done = False
-    question = None
-
-    for street_i, street in enumerate(hand.streets):
-        is_last_street = street_index_for_question == street_i
-        if table_is_done:
-            break
-        if is_last_street:
-            question = street.questions[question_index]
-            max_num_actions = question.action_table_indices[1] + 1
-        else:
-            max_num_actions = max(len(r) for r in street.actions)
-        result += f"<h2>{street.name}</h2>\n"
-        if len(street.initial_pots) == 1:
-            pot_str = format_n(street.initial_pots[0])
-        else:
-            pot_str = f"[ {' | '.join(map(format_n, street.initial_pots))} ]"
-        result += f"<p>Pot: {pot_str}</p>\n"
-        if street.board:
-            result += '<div class="board">\n'
-            for c in street.board:
-                result += f'<img src="apm-card-small-{c}.png" alt="{c}" title="{c}">\n'
-            result += "</div>\n"
-        result += f'<table class="player-actions {"shrink" if max_num_actions >= 3 else ""}">\n'
-        result += "<thead>\n"
-        result += "<tr>\n"
-        result += '<th scope="col">Player</th>\n'
-        result += '<th scope="col">Stack</th>\n'
-        result += f'<th scope="col" colspan="{max_num_actions}">Actions</th>\n'
-        result += "</tr>"
-        result += "</thead>\n"
-        result += "<tbody>\n"
-        for i in range(len(street.actions)):
-            player_index = (i + street.first_player_actions) % len(hand.players)
-            player = hand.players[player_index]
-            row_classes = []
-            if player.is_hero:
-                row_classes.append("hero")
-            if not street.initial_players[player_index]:
-                row_classes.append("not-playing")
-            if row_classes:
-                result += f'<tr class="{", ".join(row_classes)}">\n'
-            else:
-                result += "<tr>\n"
-            result += f"<td>{player.name}"
-            if player.is_dealer:
-                result += ' <span class="dealerbtn">D</span>'
-            result += "</td>\n"
-            result += f"<td>{format_n(street.initial_stacks[player_index])}</td>\n"
-            for j in range(max_num_actions):
-                action: str
-                if is_last_street:
-                    if j > question.action_table_indices[1]:
-                        # avoid giving hints how many more actions are to come
-                        break
-                    if question.action_table_indices == (i, j):
-                        action = '<span class="question-action">?</span>'
-                        table_is_done = True
-                    elif j < len(street.actions[i]) and (
-                        j < question.action_table_indices[1]
-                        or i < question.action_table_indices[0]
-                    ):
-                        action = _action_to_html(street.actions[i][j])
-                    else:
-                        action = ""
-                else:  # not last street
-                    if j < len(street.actions[i]):
-                        action = _action_to_html(street.actions[i][j])
-                    else:
-                        action = ""
-                result += f"<td>{action}</td>"
-            result += "</tr>\n"
-        result += "</tbody>\n"
-        result += "</table>\n"
-
-    result += f"""<p>
-<strong>{question.question}</strong>
-</p>
-"""
-    return result
+
+def get_questions_only(hand: Hand, sprite: bool = False) -> List[str]:
+    """
+    Return the same as get_question_only for every question of the hand (in
+    the order of the streets and questions). This is much faster than calling
+    get_question_only for each question since the streets are only rendered
+    once.
+    """
+    hand.validate()
+    renderer = _HandRenderer(hand, sprite)
+    return [
+        renderer.question_only(street_i, question_i)
+        for street_i, street in enumerate(hand.streets)
+        for question_i in range(len(street.questions))
+    ]
+
+
+def get_odds(odds: SpotOdds) -> str:
+    """
+    Return the HTML of the pot odds and the equity of a study spot, which is
+    shown together with the answer. Empty if neither is known.
+    """
+    lines = []
+    if odds.pot_odds is not None:
+        lines.append(
+            f"Pot odds: {100 * odds.pot_odds:.0f}% "
+            f"({format_n(odds.to_call)} to call, pot {format_n(odds.pot)})"
+        )
+    if odds.equity is not None:
+        lines.append(f"Equity: {100 * odds.equity:.0f}% vs {odds.villain}")
+    if not lines:
+        return ""
+    return '<p class="odds">' + "<br>\n".join(lines) + "</p>\n"
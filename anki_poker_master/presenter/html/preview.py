@@ -0,0 +1,362 @@
+"""
+Preview the cards in a web browser without creating an Anki package. The pages
+are rendered on demand from the same HTML building blocks that are used for the
+Anki notes and kept in an in-memory LRU cache. The scenarios and hand history
+files are read again whenever they change, so editing a file and reloading the
+page is enough to see the result.
+"""
+
+import html
+import http.server
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from importlib_resources import files
+
+from anki_poker_master import helper
+from anki_poker_master.model import PreflopScenario, ValidationError
+from anki_poker_master.model.hand import Hand
+from anki_poker_master.parser.phh import parse
+from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+from anki_poker_master.presenter.anki import preflop_scenario as anki_scenario
+from anki_poker_master.presenter.html import phh as html_phh
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<link rel="stylesheet" href="{assets}default.css">
+</head>
+<body class="card">
+<p><a href="{home}">All cards</a></p>
+{body}
+<script src="{assets}default.js"></script>
+</body>
+</html>
+"""
+
+_FOOTER_ITEM = """<p>
+<small><b>{label}:</b></small>
+<br>
+<small>{value}</small>
+</p>
+"""
+
+_HTML = "text/html; charset=utf-8"
+
+# Scenario card -> (label, function returning the HTML table for the question)
+_SCENARIO_CARDS: Dict[str, Tuple[str, Callable[[PreflopScenario], str]]] = {
+    "top-left": ("Top left quadrant", anki_scenario.html_top_left_quadrant_blank),
+    "top-right": ("Top right quadrant", anki_scenario.html_top_right_quadrant_blank),
+    "bottom-left": (
+        "Bottom left quadrant",
+        anki_scenario.html_bottom_left_quadrant_blank,
+    ),
+    "bottom-right": (
+        "Bottom right quadrant",
+        anki_scenario.html_bottom_right_quadrant_blank,
+    ),
+    "full": ("Entire table", lambda _: helper.blank_table()),
+}
+
+
+def render_page(title: str, body: str, home: str = "/", assets: str = "/") -> str:
+    """
+    Return the complete HTML page. The title must already be escaped. The
+    stylesheet and script are loaded from the assets URL prefix and the
+    "All cards" link points to home.
+    """
+    return _PAGE.format(title=title, body=body, home=home, assets=assets)
+
+
+def scenario_header(scenario: PreflopScenario) -> str:
+    """
+    Return the game, scenario and position of the scenario together with the
+    CSS for its extra range colors.
+    """
+    result = ""
+    css = anki_scenario.extra_css(scenario.extra_range_colors, scenario)
+    if css:
+        result += f"<style>\n{css}</style>\n"
+    result += (
+        f"<b>Game: </b>{scenario.game}\n<br>\n"
+        f"<b>Scenario: </b>{scenario.scenario}\n<br>\n"
+        f"<b>Position: </b>{scenario.position}\n<br>\n"
+    )
+    return result
+
+
+def footer(notes: Optional[str], source: Optional[str]) -> str:
+    """
+    Return the notes and source of a scenario or hand, if any.
+    """
+    result = ""
+    for label, value in (("Notes", notes), ("Source", source)):
+        if value:
+            result += _FOOTER_ITEM.format(label=label, value=value)
+    return result
+
+
+class Response:
+    def __init__(self, status: int, content_type: str, body: bytes):
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+
+
+class _LRUCache:
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._items: OrderedDict = OrderedDict()
+
+    def get_or_create(self, key, create: Callable):
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+        value = create()
+        self._items[key] = value
+        if len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+        return value
+
+
+class Preview:
+    """
+    Render the preview pages of the scenarios in scenarios_file and of the
+    hands in the .phh files.
+    """
+
+    def __init__(
+        self,
+        scenarios_file: Optional[str] = None,
+        phh_files: Optional[List[Path]] = None,
+        sprite: bool = False,
+        cache_size: int = 256,
+    ):
+        self._scenarios_file = Path(scenarios_file) if scenarios_file else None
+        self._phh_files = [Path(f) for f in phh_files or []]
+        self._sprite = sprite
+        # Parsed files and rendered pages. The keys contain the modification
+        # time of the file they are based on, so they are never stale.
+        self._parsed = _LRUCache(cache_size)
+        self._pages = _LRUCache(cache_size)
+
+    def render(self, path: str) -> Response:
+        """
+        Return the response for the URL path (e.g. "/scenarios/0/top-left").
+        """
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if parts and parts[-1] == "default.css":
+            return Response(200, "text/css", helper.default_css().encode("utf-8"))
+        if parts and parts[-1] == "default.js":
+            return Response(200, "text/javascript", helper.default_js().encode("utf-8"))
+        if parts and parts[-1].endswith(".png"):
+            image = files("anki_poker_master").joinpath(
+                "resources", "images", parts[-1]
+            )
+            if image.is_file():
+                return Response(200, "image/png", image.read_bytes())
+            return self._not_found()
+
+        route = self._route(parts)
+        if route is None:
+            return self._not_found()
+        try:
+            body = self._pages.get_or_create(
+                (route, self._version(route)), lambda: self._render_page(route)
+            )
+        except ValidationError as e:
+            message = e.humanize_error()
+            if e.__cause__ is not None:
+                message += f"\n{e.__cause__}"
+            return self._error(message)
+        except Exception as e:  # e.g. invalid actions that pokerkit refuses
+            return self._error(f"{type(e).__name__}: {e}")
+        if body is None:
+            return self._not_found()
+        return Response(200, _HTML, body.encode("utf-8"))
+
+    def _route(self, parts: List[str]) -> Optional[Tuple]:
+        """
+        Return the page identified by the parts of the URL path, e.g.
+        ("scenarios", 0, "top-left") or ("hands", 0, 1, 2), or None if there
+        is no such page. The existence of scenarios and questions is only
+        checked when rendering since it depends on the content of the files.
+        """
+        if not parts:
+            return ()
+        kind, numbers = parts[0], parts[1:]
+        if kind == "scenarios" and len(numbers) == 2:
+            numbers, name = numbers[:1], numbers[1]
+            if name not in _SCENARIO_CARDS:
+                return None
+        else:
+            name = None
+        if not numbers or not all(n.isdigit() for n in numbers):
+            return None
+        numbers = tuple(int(n) for n in numbers)
+        if kind == "scenarios" and len(numbers) == 1:
+            return (kind, *numbers) + ((name,) if name else ())
+        if (
+            kind == "hands"
+            and len(numbers) in (1, 3)
+            and numbers[0] < len(self._phh_files)
+        ):
+            return (kind, *numbers)
+        return None
+
+    def _version(self, route: Tuple) -> Tuple:
+        """
+        Return the modification times of the files the page depends on.
+        """
+        if not route or route[0] == "scenarios":
+            return (self._mtime(self._scenarios_file),)
+        return (self._mtime(self._phh_files[route[1]]),)
+
+    @staticmethod
+    def _mtime(path: Optional[Path]) -> Optional[int]:
+        if path is None or not path.exists():
+            return None
+        return path.stat().st_mtime_ns
+
+    def _render_page(self, route: Tuple) -> Optional[str]:
+        if not route:
+            return self._render_index()
+        if route[0] == "scenarios":
+            scenarios = self._scenarios()
+            i = route[1]
+            if i >= len(scenarios):
+                return None
+            if len(route) == 2:
+                return self._render_scenario(i, scenarios[i])
+            return self._render_scenario_card(scenarios[i], route[2])
+        hand = self._hand(route[1])
+        if len(route) == 2:
+            return self._render_hand(route[1], hand)
+        street_i, question_i = route[2:]
+        if street_i < len(hand.streets) and question_i < len(
+            hand.streets[street_i].questions
+        ):
+            return self._render_hand_question(hand, street_i, question_i)
+        return None
+
+    def _scenarios(self) -> List[PreflopScenario]:
+        if self._scenarios_file is None:
+            return []
+        return self._parsed.get_or_create(
+            (self._scenarios_file, self._mtime(self._scenarios_file)),
+            lambda: parse_scenario_yml(self._scenarios_file.read_text()),
+        )
+
+    def _hand(self, i: int) -> Hand:
+        f = self._phh_files[i]
+        return self._parsed.get_or_create(
+            (f, self._mtime(f)), lambda: parse(f.read_text())
+        )
+
+    def _render_index(self) -> str:
+        body = []
+        if self._scenarios_file is not None:
+            body.append("<h1>Scenarios</h1>\n<ul>")
+            for i, s in enumerate(self._scenarios()):
+                summary = html.escape(f"{s.game} / {s.scenario} / {s.position}")
+                body.append(f'<li><a href="/scenarios/{i}">{summary}</a></li>')
+            body.append("</ul>")
+        if self._phh_files:
+            body.append("<h1>Hand histories</h1>\n<ul>")
+            for i, f in enumerate(self._phh_files):
+                body.append(f'<li><a href="/hands/{i}">{html.escape(str(f))}</a></li>')
+            body.append("</ul>")
+        return render_page(title="AnkiPokerMaster", body="\n".join(body))
+
+    def _render_scenario(self, i: int, scenario: PreflopScenario) -> str:
+        links = "".join(
+            f'<li><a href="/scenarios/{i}/{name}">{label}</a></li>'
+            for name, (label, _) in _SCENARIO_CARDS.items()
+        )
+        body = (
+            scenario_header(scenario)
+            + anki_scenario.html_full(scenario)
+            + "<br>"
+            + anki_scenario.html_legend(scenario)
+            + footer(scenario.notes, scenario.source)
+            + f"<p>Fill in the blank:</p>\n<ul>{links}</ul>\n"
+        )
+        title = f"{scenario.game} / {scenario.scenario} / {scenario.position}"
+        return render_page(title=html.escape(title), body=body)
+
+    def _render_scenario_card(self, scenario: PreflopScenario, name: str) -> str:
+        label, question = _SCENARIO_CARDS[name]
+        body = (
+            scenario_header(scenario)
+            + f"<br>Fill in the blank ({label.lower()})<br>\n"
+            + question(scenario)
+            + "<br>"
+            + anki_scenario.html_legend(scenario)
+            + "<hr id='answer'>\n"
+            + anki_scenario.html_full(scenario)
+            + "<br>"
+            + anki_scenario.html_legend(scenario)
+            + footer(scenario.notes, scenario.source)
+        )
+        title = f"{scenario.game} / {scenario.scenario} / {scenario.position}"
+        return render_page(title=html.escape(f"{title} ({label})"), body=body)
+
+    def _render_hand(self, i: int, hand: Hand) -> str:
+        items = []
+        number = 0
+        for street_i, street in enumerate(hand.streets):
+            for question_i in range(len(street.questions)):
+                number += 1
+                items.append(
+                    f'<li><a href="/hands/{i}/{street_i}/{question_i}">'
+                    f"{street.name}, question {number}</a></li>"
+                )
+        body = f"<h1>{hand.title}</h1>\n<ul>\n" + "\n".join(items) + "\n</ul>\n"
+        return render_page(title=html.escape(hand.title), body=body)
+
+    def _render_hand_question(self, hand: Hand, street_i: int, question_i: int) -> str:
+        body = (
+            html_phh.get_question(hand, street_i, question_i, sprite=self._sprite)
+            + "<hr id='answer'>\n"
+            + hand.streets[street_i].questions[question_i].answer
+            + "<br>\n"
+            + footer(hand.notes, hand.source)
+        )
+        return render_page(title=html.escape(hand.title), body=body)
+
+    @staticmethod
+    def _error(message: str) -> Response:
+        body = "<pre>" + html.escape(message) + "</pre>"
+        return Response(
+            500, _HTML, render_page(title="Error", body=body).encode("utf-8")
+        )
+
+    @staticmethod
+    def _not_found() -> Response:
+        body = render_page(title="Not found", body="<p>Not found</p>")
+        return Response(404, _HTML, body.encode("utf-8"))
+
+
+def serve(preview: Preview, host: str = "127.0.0.1", port: int = 8000):
+    """
+    Serve the preview over HTTP until interrupted.
+    """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            response = preview.render(self.path)
+            self.send_response(response.status)
+            self.send_header("Content-Type", response.content_type)
+            self.send_header("Content-Length", str(len(response.body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(response.body)
+
+    # Not threaded: the caches are not thread-safe and a preview only has one
+    # user anyway.
+    with http.server.HTTPServer((host, port), Handler) as server:
+        server.serve_forever()
@@ -0,0 +1,114 @@
+"""
+Present the differences between two scenario files, as text for the terminal
+and as a self-contained HTML report with one highlighted table per scenario.
+"""
+
+import html
+from typing import List
+
+from anki_poker_master import helper
+from anki_poker_master.model import PreflopScenario
+from anki_poker_master.model.range_diff import LibraryDiff, ScenarioDiff
+from anki_poker_master.presenter.anki import preflop_scenario as anki_scenario
+from anki_poker_master.presenter.html.preview import footer
+
+_REPORT = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+{css}</style>
+</head>
+<body class="card">
+{body}
+</body>
+</html>
+"""
+
+
+def to_text(diff: LibraryDiff) -> str:
+    """
+    Return a summary of the differences with the percentage deltas of every
+    action and the hands whose action changed.
+    """
+    lines = []
+    for d in diff.scenario_diffs:
+        if not d.has_changes():
+            continue
+        lines.append(_title(d.new))
+        for action, delta in d.deltas.items():
+            old = d.old_percentages.get(action, 0.0)
+            new = d.new_percentages.get(action, 0.0)
+            if delta:
+                lines.append(f"    {action}: {old:.1f}% -> {new:.1f}% ({delta:+.1f})")
+        lines.append(f"    Changed hands: {', '.join(str(h) for h in d.hand_diffs)}")
+    for label, scenarios in (("old", diff.only_old), ("new", diff.only_new)):
+        for s in scenarios:
+            lines.append(f"Only in the {label} file: {_title(s)}")
+    if not lines:
+        lines.append("The ranges are the same.")
+    return "\n".join(lines) + "\n"
+
+
+def to_html(diff: LibraryDiff) -> str:
+    """
+    Return an HTML page showing every scenario that changed with the new
+    ranges, the changed hands highlighted and a table of the percentage deltas.
+    """
+    body = []
+    for d in diff.scenario_diffs:
+        if d.has_changes():
+            body.append(_scenario_diff_html(d))
+    for label, scenarios in (("old", diff.only_old), ("new", diff.only_new)):
+        if scenarios:
+            body.append(f"<h2>Only in the {label} file</h2>\n<ul>")
+            body.extend(f"<li>{html.escape(_title(s))}</li>" for s in scenarios)
+            body.append("</ul>")
+    if not body:
+        body.append("<p>The ranges are the same.</p>")
+    return _REPORT.format(
+        title="Range diff",
+        css=helper.default_css() + anki_scenario.DIFF_CSS + _extra_css(diff),
+        body="\n".join(body),
+    )
+
+
+def _scenario_diff_html(d: ScenarioDiff) -> str:
+    rows = []
+    for action, delta in d.deltas.items():
+        old = d.old_percentages.get(action, 0.0)
+        new = d.new_percentages.get(action, 0.0)
+        rows.append(
+            f"<tr><th class='row'>{action}</th>"
+            f"<td>{old:.1f}%</td><td>{new:.1f}%</td><td>{delta:+.1f}</td></tr>"
+        )
+    return (
+        f"<h2>{html.escape(_title(d.new))}</h2>\n"
+        + anki_scenario.html_diff(d)
+        + "<br>"
+        + anki_scenario.html_legend(d.new)
+        + "<table class='diff-percentages'>\n"
+        + "<tr><th></th><th>Old</th><th>New</th><th>Delta</th></tr>\n"
+        + "\n".join(rows)
+        + "\n</table>\n"
+        + footer(d.new.notes, d.new.source)
+    )
+
+
+def _extra_css(diff: LibraryDiff) -> str:
+    """
+    Return the CSS for the extra range colors of all scenarios. Every rule is
+    only included once.
+    """
+    rules: List[str] = []
+    for d in diff.scenario_diffs:
+        css = anki_scenario.extra_css(d.new.extra_range_colors, d.new)
+        if css and css not in rules:
+            rules.append(css)
+    return "".join(rules)
+
+
+def _title(scenario: PreflopScenario) -> str:
+    return f"{scenario.game} / {scenario.scenario} / {scenario.position}"
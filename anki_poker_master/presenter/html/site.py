@@ -0,0 +1,168 @@
+"""
+Export the scenarios and hands as a static website that can be browsed or
+shared without Anki. There is an index page and one page per scenario and per
+hand, rendered from the same HTML building blocks as the Anki notes and the
+preview. The pages are generated in parallel while the stylesheet, script and
+card images are shared by all pages and written only once.
+"""
+
+import html
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+from importlib_resources import files
+
+from anki_poker_master import helper
+from anki_poker_master.model import PreflopScenario, ValidationError
+from anki_poker_master.parser.phh import parse
+from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+from anki_poker_master.presenter.anki import preflop_scenario as anki_scenario
+from anki_poker_master.presenter.html import card
+from anki_poker_master.presenter.html import phh as html_phh
+from anki_poker_master.presenter.html.preview import (
+    footer,
+    render_page,
+    scenario_header,
+)
+
+INDEX_PAGE = "index.html"
+
+# Scenarios of the worker process. They are parsed once per worker because
+# PreflopScenario objects can't be pickled.
+_worker_scenarios: List[PreflopScenario] = []
+
+
+def scenario_page(i: int) -> str:
+    return f"scenario-{i}.html"
+
+
+def hand_page(i: int) -> str:
+    return f"hand-{i}.html"
+
+
+def export_site(
+    output_dir: str,
+    scenarios_file: Optional[str] = None,
+    phh_files: Optional[List[Path]] = None,
+    sprite: bool = False,
+    max_workers: Optional[int] = None,
+) -> int:
+    """
+    Write the static website to output_dir, which is created if necessary.
+    If sprite is True, the cards are drawn from the card sprite sheets.
+    If max_workers is 1 the pages are generated in this process.
+
+    :returns: the number of pages written, including the index.
+    :raises ValidationError: if the scenarios or a hand history are invalid.
+    """
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    scenarios_yml = Path(scenarios_file).read_text() if scenarios_file else None
+    scenarios = parse_scenario_yml(scenarios_yml) if scenarios_yml else []
+    phh_files = [Path(f) for f in phh_files or []]
+
+    jobs = [(_write_scenario_page, (out, i)) for i in range(len(scenarios))]
+    jobs += [(_write_hand_page, (out, i, f, sprite)) for i, f in enumerate(phh_files)]
+    if max_workers == 1 or len(jobs) <= 1:
+        _init_worker(scenarios_yml)
+        results = [fn(*job_args) for fn, job_args in jobs]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(scenarios_yml,),
+        ) as executor:
+            futures = [executor.submit(fn, *job_args) for fn, job_args in jobs]
+            results = [f.result() for f in futures]
+
+    media_files = set()
+    hand_titles = []
+    for title, page_media_files in results[len(scenarios) :]:
+        hand_titles.append(title)
+        media_files.update(page_media_files)
+    _write_assets(out, media_files)
+    (out / INDEX_PAGE).write_text(_render_index(scenarios, phh_files, hand_titles))
+    return len(jobs) + 1
+
+
+def _init_worker(scenarios_yml: Optional[str]):
+    global _worker_scenarios
+    _worker_scenarios = parse_scenario_yml(scenarios_yml) if scenarios_yml else []
+
+
+def _write_assets(out: Path, media_files: Set[str]):
+    (out / "default.css").write_text(helper.default_css())
+    (out / "default.js").write_text(helper.default_js())
+    images = files("anki_poker_master").joinpath("resources", "images")
+    for f in sorted(media_files):
+        (out / f).write_bytes(images.joinpath(f).read_bytes())
+
+
+def _render_index(
+    scenarios: List[PreflopScenario], phh_files: List[Path], hand_titles: List[str]
+) -> str:
+    body = []
+    if scenarios:
+        body.append("<h1>Scenarios</h1>\n<ul>")
+        for i, s in enumerate(scenarios):
+            summary = html.escape(f"{s.game} / {s.scenario} / {s.position}")
+            body.append(f'<li><a href="{scenario_page(i)}">{summary}</a></li>')
+        body.append("</ul>")
+    if phh_files:
+        body.append("<h1>Hand histories</h1>\n<ul>")
+        for i, (f, title) in enumerate(zip(phh_files, hand_titles)):
+            label = html.escape(f"{title} ({f.name})")
+            body.append(f'<li><a href="{hand_page(i)}">{label}</a></li>')
+        body.append("</ul>")
+    return render_page("AnkiPokerMaster", "\n".join(body), home=INDEX_PAGE, assets="")
+
+
+def _write_scenario_page(out: Path, i: int) -> Tuple[str, Set[str]]:
+    scenario = _worker_scenarios[i]
+    body = (
+        scenario_header(scenario)
+        + anki_scenario.html_full(scenario)
+        + "<br>"
+        + anki_scenario.html_legend(scenario)
+        + footer(scenario.notes, scenario.source)
+    )
+    title = f"{scenario.game} / {scenario.scenario} / {scenario.position}"
+    page = render_page(html.escape(title), body, home=INDEX_PAGE, assets="")
+    (out / scenario_page(i)).write_text(page)
+    return title, set()
+
+
+def _write_hand_page(
+    out: Path, i: int, phh_file: Path, sprite: bool
+) -> Tuple[str, Set[str]]:
+    try:
+        hand = parse(phh_file.read_text())
+        questions = html_phh.get_questions_only(hand, sprite=sprite)
+    except ValidationError as e:
+        # Raised again with the complete message because the cause is lost
+        # when the exception is sent back from a worker process.
+        raise ValidationError(f"{phh_file}: {e.humanize_error()}") from e
+    except Exception as e:  # e.g. invalid actions that pokerkit refuses
+        raise ValidationError(f"{phh_file}: {type(e).__name__}: {e}") from e
+
+    media_files = {
+        card.media_file(c, small=True, sprite=sprite) for c in hand.hero_cards
+    }
+    body = '<div class="hand-history">\n' + html_phh.get_intro(hand, sprite=sprite)
+    question_htmls = iter(questions)
+    for street in hand.streets:
+        media_files.update(
+            card.media_file(c, small=True, sprite=sprite) for c in street.board
+        )
+        for question in street.questions:
+            body += (
+                next(question_htmls)
+                + "<details>\n<summary>Answer</summary>\n"
+                + question.answer
+                + "\n</details>\n"
+            )
+    body += "</div>\n" + footer(hand.notes, hand.source)
+    page = render_page(html.escape(hand.title), body, home=INDEX_PAGE, assets="")
+    (out / hand_page(i)).write_text(page)
+    return hand.title, media_files
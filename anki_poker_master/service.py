@@ -0,0 +1,308 @@
+"""
+HTTP service that creates Anki packages from uploaded scenarios files and hand
+histories, so other programs don't have to start the command line (and build
+everything from scratch) for every package.
+
+    POST /scenarios   body: scenarios file (YAML)
+    POST /hands       body: one .phh file, or a JSON list of .phh contents
+
+The options of the package are passed in the query string, e.g.
+"/hands?tags=poker,nlhe&sprite=1&odds=1". The response is the .apkg file or,
+if the upload is invalid, status 400 with the error message.
+
+Parsing and writing the package is done in a pool of worker processes. The
+number of packages that are built at the same time is limited, and the
+packages are cached by a hash of the upload and the options, so the same
+upload is only built once.
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from anki_poker_master.model import ValidationError
+from anki_poker_master.parser.phh import parse
+from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+from anki_poker_master.presenter.anki import HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS
+from anki_poker_master.session import BuildSession
+
+SCENARIOS = "scenarios"
+HANDS = "hands"
+
+_OPTIONS = ("sprite", "analytics", "odds")
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+_CHUNK_SIZE = 64 * 1024
+
+
+class Options:
+    """
+    The options of a package, see BuildSession.
+    """
+
+    def __init__(
+        self,
+        tags: Optional[List[str]] = None,
+        sprite: bool = False,
+        analytics: bool = False,
+        odds: bool = False,
+    ):
+        self.tags = list(tags) if tags else []
+        self.sprite = sprite
+        self.analytics = analytics
+        self.odds = odds
+
+    @classmethod
+    def from_query(cls, query: str) -> "Options":
+        """
+        Read the options from a query string, e.g. "tags=poker,nlhe&sprite=1".
+        """
+        params = parse_qs(query)
+        tags = [t for v in params.get("tags", []) for t in v.split(",") if t]
+        flags = {
+            o: params.get(o, ["0"])[-1].lower() in ("1", "true", "yes")
+            for o in _OPTIONS
+        }
+        return cls(tags, **flags)
+
+    def key(self) -> str:
+        return json.dumps([self.tags] + [getattr(self, o) for o in _OPTIONS])
+
+
+def build_package(kind: str, content: bytes, options: Options) -> bytes:
+    """
+    Parse the upload and return the Anki package. Raises a ValidationError if
+    the upload is invalid.
+
+    :param kind: SCENARIOS or HANDS.
+    :param content: the uploaded scenarios file or hand histories (see the
+        module documentation).
+    """
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise ValidationError("the upload is not valid UTF-8") from e
+    session = BuildSession(
+        options.tags,
+        sprite=options.sprite,
+        analytics=options.analytics,
+        odds=options.odds,
+    )
+    if kind == SCENARIOS:
+        session.add_scenarios(parse_scenario_yml(text))
+    else:
+        hands = [parse(phh) for phh in _phh_contents(text)]
+        for i, hand in enumerate(hands):
+            hand.validate()
+            number_questions = sum(len(s.questions) for s in hand.streets)
+            if number_questions > HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS:
+                raise ValidationError(
+                    f"hand {i + 1} has {number_questions} study spots but at most "
+                    f"{HAND_HISTORY_MODEL_MAX_NUM_QUESTIONS} are supported"
+                )
+        session.add_hands(hands)
+    fd, path = tempfile.mkstemp(suffix=".apkg")
+    os.close(fd)
+    try:
+        session.write(path)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def _phh_contents(text: str) -> List[str]:
+    if not text.lstrip().startswith("["):
+        return [text]
+    try:
+        contents = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValidationError("the upload is not a valid JSON list") from e
+    if not isinstance(contents, list) or not all(isinstance(c, str) for c in contents):
+        raise ValidationError("the upload must be a JSON list of .phh contents")
+    return contents
+
+
+def _build_in_worker(kind: str, content: bytes, options: Options) -> Tuple[bool, bytes]:
+    """
+    Run build_package() in a worker process. Validation errors are returned
+    as messages since their causes (which contain the details) can't be
+    pickled.
+    """
+    try:
+        return True, build_package(kind, content, options)
+    except ValidationError as e:
+        return False, e.humanize_error().encode("utf-8")
+    except Exception as e:  # e.g. invalid actions that pokerkit refuses
+        return False, f"{type(e).__name__}: {e}".encode("utf-8")
+
+
+class DeckService:
+    """
+    Build Anki packages in worker processes, at most max_concurrent at a time,
+    and keep the last cache_size results (packages and error messages).
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_concurrent: int = 4,
+        cache_size: int = 64,
+        max_upload_size: int = 32 * 1024 * 1024,
+    ):
+        self._max_workers = max_workers
+        self._cache_size = cache_size
+        self.max_upload_size = max_upload_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        # Results by content hash. A build that is still running is stored as
+        # its future, so identical uploads that arrive at the same time are
+        # only built once, and replaced by the result when it is done.
+        self._results: OrderedDict = OrderedDict()
+
+    def __enter__(self):
+        # Forking a process with a running event loop and the threads of the
+        # executor can deadlock the child, so the workers are started fresh.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._executor.shutdown(cancel_futures=True)
+        self._executor = None
+
+    async def build(
+        self, kind: str, content: bytes, options: Options
+    ) -> Tuple[bool, bytes]:
+        """
+        Return (True, package) or (False, error message) for the upload.
+        """
+        key = hashlib.sha256(
+            f"{kind}\0{options.key()}\0".encode("utf-8") + content
+        ).hexdigest()
+        if key in self._results:
+            self._results.move_to_end(key)
+            result = self._results[key]
+            if isinstance(result, asyncio.Future):
+                return await asyncio.shield(result)
+            return result
+        future = asyncio.get_running_loop().create_future()
+        self._results[key] = future
+        if len(self._results) > self._cache_size:
+            self._results.popitem(last=False)
+        try:
+            async with self._semaphore:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _build_in_worker, kind, content, options
+                )
+        except BaseException as e:
+            # Don't cache failures of the service itself, e.g. a crashed worker
+            self._results.pop(key, None)
+            future.set_exception(e)
+            # Mark the exception as retrieved if nobody else waits for it
+            future.exception()
+            raise
+        future.set_result(result)
+        if key in self._results:
+            self._results[key] = result
+        return result
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Handle one HTTP request (the connection is closed afterwards).
+        """
+        try:
+            try:
+                status, content_type, body = await self._respond(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:  # e.g. a worker process that crashed
+                status, content_type, body = _text(500, f"{type(e).__name__}: {e}")
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("ascii")
+            )
+            for i in range(0, len(body), _CHUNK_SIZE):
+                writer.write(body[i : i + _CHUNK_SIZE])
+                await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, reader: asyncio.StreamReader) -> Tuple[int, str, bytes]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if len(request_line) != 3:
+            return _text(400, "invalid request")
+        method, target, _ = request_line
+        url = urlsplit(target)
+        kind = url.path.strip("/")
+        if kind not in (SCENARIOS, HANDS):
+            return _text(404, "not found")
+        if method != "POST":
+            return _text(405, "use POST to upload a file")
+        try:
+            length = int(headers["content-length"])
+        except (KeyError, ValueError):
+            return _text(411, "the Content-Length header is required")
+        if length < 0:
+            return _text(400, "invalid Content-Length")
+        if length > self.max_upload_size:
+            return _text(
+                413, f"the upload must not exceed {self.max_upload_size} bytes"
+            )
+        content = await reader.readexactly(length)
+        ok, result = await self.build(kind, content, Options.from_query(url.query))
+        if not ok:
+            return 400, "text/plain; charset=utf-8", result
+        return 200, "application/apkg", result
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8000):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def _text(status: int, message: str) -> Tuple[int, str, bytes]:
+    return status, "text/plain; charset=utf-8", message.encode("utf-8")
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_workers: Optional[int] = None,
+    max_concurrent: int = 4,
+):
+    """
+    Serve the HTTP service until interrupted.
+    """
+    with DeckService(max_workers, max_concurrent) as service:
+        asyncio.run(service.serve_forever(host, port))
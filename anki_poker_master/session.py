@@ -0,0 +1,143 @@
+"""
+Programmatic API to create Anki packages without the command line.
+
+The note types, the CSS and the JavaScript are built once when the package is
+imported, so a long-running process can keep one BuildSession (or create many)
+and create packages without paying that cost again:
+
+    session = BuildSession(tags=["poker"])
+    session.add_scenarios(parse_scenario_yml(scenarios_yml))
+    session.add_postflop_scenarios(parse_postflop_scenario_yml(postflop_yml))
+    session.add_hands([parse(phh) for phh in phh_files])
+    session.write("Poker.apkg")
+    session.clear()
+"""
+
+import random
+from typing import Dict, Iterable, List, Optional, Set
+
+import genanki
+
+from anki_poker_master.model import PreflopScenario
+from anki_poker_master.model.hand import Hand
+from anki_poker_master.model.postflop import PostflopScenario
+from anki_poker_master.presenter.anki import phh, postflop_scenario, preflop_scenario
+from anki_poker_master.presenter.anki import write_decks_to_file
+
+
+class BuildSession:
+    """
+    Collect the notes of scenarios and hands, which can be added in several
+    steps, and write them to one or more Anki packages.
+    """
+
+    def __init__(
+        self,
+        tags: Optional[List[str]] = None,
+        sprite: bool = False,
+        analytics: bool = False,
+        odds: bool = False,
+    ):
+        """
+        :param tags: tags of all notes.
+        :param sprite: draw the cards from the card sprite sheet instead of
+            using one image file per card.
+        :param analytics: add the statistics of the ranges to the notes of the
+            scenarios (see preflop_scenario.html_analytics).
+        :param odds: add the pot odds and the equity of the hero to the answers
+            of the hands.
+        """
+        self.tags = list(tags) if tags else []
+        self.sprite = sprite
+        self.analytics = analytics
+        self.odds = odds
+        self._scenario_decks: List[genanki.Deck] = []
+        self._postflop_decks: List[genanki.Deck] = []
+        # The hand history decks by subdeck (None for the main deck)
+        self._hand_decks: Dict[Optional[str], genanki.Deck] = {}
+        self._media_files: Set[str] = set()
+
+    def add_scenarios(self, scenarios: Iterable[PreflopScenario]):
+        """
+        Add the notes of the scenarios to the preflop decks.
+        """
+        if not self._scenario_decks:
+            self._scenario_decks = [
+                genanki.Deck(random.randrange(1 << 30, 1 << 31), name)
+                for name in ("AnkiPokerMaster::Standard", "AnkiPokerMaster::Detailed")
+            ]
+        self._media_files.update(
+            preflop_scenario.add_notes(
+                *self._scenario_decks,
+                list(scenarios),
+                self.tags,
+                sprite=self.sprite,
+                analytics=self.analytics,
+            )
+        )
+
+    def add_postflop_scenarios(self, scenarios: Iterable[PostflopScenario]):
+        """
+        Add the notes of the postflop scenarios to the postflop deck.
+        """
+        if not self._postflop_decks:
+            self._postflop_decks = [
+                genanki.Deck(
+                    phh.deck_id(postflop_scenario.DECK_NAME),
+                    postflop_scenario.DECK_NAME,
+                )
+            ]
+        self._media_files.update(
+            postflop_scenario.add_notes(
+                self._postflop_decks[0],
+                list(scenarios),
+                self.tags,
+                sprite=self.sprite,
+            )
+        )
+
+    def add_hands(self, hands: Iterable[Hand], subdeck: Optional[str] = None):
+        """
+        Add one note per hand to the hand history deck or, if subdeck is
+        specified (e.g. "NLHE 1/2"), to a subdeck of it.
+        """
+        if subdeck not in self._hand_decks:
+            name = phh.deck_name(subdeck)
+            self._hand_decks[subdeck] = genanki.Deck(phh.deck_id(name), name)
+        self._media_files.update(
+            phh.add_notes(
+                self._hand_decks[subdeck],
+                hands,
+                tags=self.tags,
+                sprite=self.sprite,
+                odds=self.odds,
+            )
+        )
+
+    @property
+    def decks(self) -> List[genanki.Deck]:
+        return (
+            self._scenario_decks
+            + self._postflop_decks
+            + list(self._hand_decks.values())
+        )
+
+    @property
+    def nr_notes(self) -> int:
+        return sum(len(d.notes) for d in self.decks)
+
+    def write(self, filename: str):
+        """
+        Write all notes added so far to an Anki package. The notes are kept, so
+        more can be added and written to another package.
+        """
+        write_decks_to_file(self.decks, self._media_files, filename)
+
+    def clear(self):
+        """
+        Remove all notes, e.g. to start with the next package.
+        """
+        self._scenario_decks = []
+        self._postflop_decks = []
+        self._hand_decks = {}
+        self._media_files = set()
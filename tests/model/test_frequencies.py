@@ -0,0 +1,62 @@
+import pytest
+from poker.hand import Hand, Range
+
+
+def test_hand_frequencies():
+    from anki_poker_master.model.frequencies import RangeFrequencies
+
+    frequencies = RangeFrequencies(["Raise", "Call"])
+    frequencies.add_range("Raise", Range("QQ+, AKo"))
+    frequencies.set(Hand("AKo"), "Raise", 0.7)
+    frequencies.set(Hand("AKo"), "Call", 0.3)
+    frequencies.add_range("Call", Range("AQs"), 0.25)
+
+    assert frequencies.get(Hand("AKo"), "Raise") == 0.7
+    assert frequencies.hand_frequencies(Hand("AA")) == {"Raise": 1.0}
+    assert frequencies.hand_frequencies(Hand("AKo")) == {"Raise": 0.7, "Call": 0.3}
+    assert frequencies.hand_frequencies(Hand("AQs")) == {"Call": 0.25, "Fold": 0.75}
+    assert frequencies.hand_frequencies(Hand("72o")) == {"Fold": 1.0}
+    assert frequencies.is_mixed(Hand("AKo"))
+    assert not frequencies.is_mixed(Hand("KK"))
+    assert frequencies.overfull_hands() == []
+
+
+def test_overfull_hands():
+    from anki_poker_master.model.frequencies import RangeFrequencies
+
+    frequencies = RangeFrequencies(["Raise", "Call"])
+    frequencies.add_range("Raise", Range("AKo, AQo"), 0.7)
+    frequencies.add_range("Call", Range("AKo"), 0.4)
+    frequencies.add_range("Call", Range("AQo"), 0.3)
+
+    assert frequencies.overfull_hands() == [Hand("AKo")]
+
+
+def test_dominant_ranges():
+    from anki_poker_master.model.frequencies import RangeFrequencies
+
+    frequencies = RangeFrequencies(["Raise", "Call", "Limp"])
+    frequencies.add_range("Raise", Range("QQ+"))
+    frequencies.add_range("Raise", Range("AKo"), 0.7)
+    frequencies.add_range("Call", Range("AKo"), 0.3)
+    frequencies.add_range("Call", Range("JJ"), 0.5)
+    frequencies.add_range("Call", Range("TT"), 0.4)
+
+    assert frequencies.dominant_ranges() == {
+        "Raise": Range("QQ+, AKo"),
+        "Call": Range("JJ"),
+        "Limp": Range.from_objects([]),
+    }
+
+
+def test_percentages():
+    from anki_poker_master.model.frequencies import RangeFrequencies
+
+    frequencies = RangeFrequencies(["Raise", "Call"])
+    frequencies.add_range("Raise", Range("AA"))
+    frequencies.add_range("Raise", Range("AKo"), 0.5)
+    frequencies.add_range("Call", Range("AKo"), 0.5)
+
+    assert frequencies.percentages() == pytest.approx(
+        {"Raise": 100 * 12 / 1326, "Call": 100 * 6 / 1326}
+    )
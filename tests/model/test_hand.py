@@ -0,0 +1,73 @@
+import copy
+import pickle
+
+import pytest
+
+
+def test_fold_check_and_call_actions_are_shared():
+    """
+    Actions without an amount only exist once, no matter how often they occur.
+    """
+    from anki_poker_master.model.hand import CallAction, CheckAction, FoldAction
+
+    assert FoldAction() is FoldAction()
+    assert CheckAction() is CheckAction()
+    assert CallAction() is CallAction(False)
+    assert CallAction(True) is CallAction(is_all_in=True)
+    assert CallAction(True) is not CallAction(False)
+
+
+@pytest.mark.parametrize(
+    "action_factory",
+    [
+        lambda m: m.FoldAction(),
+        lambda m: m.CheckAction(),
+        lambda m: m.CallAction(True),
+        lambda m: m.BetAction(10, True),
+        lambda m: m.RaiseAction(25.5),
+    ],
+)
+def test_actions_are_immutable_value_objects(action_factory):
+    from anki_poker_master.model import hand
+
+    action = action_factory(hand)
+    with pytest.raises(AttributeError):
+        action.foo = 1
+    with pytest.raises(AttributeError):
+        action._is_all_in = False
+    assert not hasattr(action, "__dict__")
+    assert action == action_factory(hand)
+    assert hash(action) == hash(action_factory(hand))
+    assert len({action, action_factory(hand)}) == 1
+    assert pickle.loads(pickle.dumps(action)) == action
+    assert copy.deepcopy(action) == action
+
+
+def test_bet_and_raise_are_different():
+    from anki_poker_master.model.hand import BetAction, RaiseAction
+
+    assert BetAction(10) != RaiseAction(10)
+    assert BetAction(10) != BetAction(10, is_all_in=True)
+    assert BetAction(10) != BetAction(20)
+
+
+def test_street_freeze():
+    """
+    Freezing a street stores the actions compactly but does not change its
+    value.
+    """
+    from anki_poker_master.model.hand import Street, BetAction, FoldAction
+
+    street = Street(
+        "Preflop",
+        [],
+        [3],
+        [True, True, True],
+        [199, 198, 200],
+        2,
+        [[BetAction(50)], [FoldAction()], []],
+    )
+    frozen = copy.deepcopy(street)
+    frozen.freeze()
+    assert frozen.actions == [(BetAction(50),), (FoldAction(),), ()]
+    assert frozen == street
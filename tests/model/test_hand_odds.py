@@ -0,0 +1,88 @@
+import pytest
+
+_HAND = """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 7d2c",
+  "d dh p2 Th8c",
+  "d dh p3 AsAc",
+  "p3 cbr 12",
+  "p1 f",
+  "p2 cc",
+  "d db AhTs8h",
+  "p2 cc",
+  "p3 cbr 20",
+  "p2 cc",
+]
+_apm_hero = 2
+"""
+
+
+def test_spot_odds_vs_known_cards():
+    from anki_poker_master.equity import equity_vs_cards
+    from anki_poker_master.model.hand_odds import spot_odds
+    from anki_poker_master.parser.phh import parse
+
+    hand = parse(_HAND)
+    assert hand.villain_cards == {0: ["7d", "2c"], 2: ["As", "Ac"]}
+
+    preflop, flop_check, flop_call = spot_odds(hand)
+
+    assert (preflop.pot, preflop.to_call) == (18, 8)
+    assert preflop.pot_odds == pytest.approx(8 / 26)
+    # p1 has folded, so only the cards of p3 count
+    assert preflop.villain == "AsAc"
+    assert preflop.equity == equity_vs_cards(("Th", "8c"), (), (("As", "Ac"),))
+    assert flop_check.pot_odds is None
+    assert flop_check.equity == flop_call.equity
+    assert flop_check.equity == equity_vs_cards(
+        ("Th", "8c"), ("Ah", "Ts", "8h"), (("As", "Ac"),)
+    )
+    assert flop_call.pot_odds == pytest.approx(20 / 66)
+
+
+def test_spot_odds_vs_range():
+    from anki_poker_master.equity import equity_vs_range
+    from anki_poker_master.model.hand_odds import spot_odds
+    from anki_poker_master.parser.phh import parse
+
+    hand = parse(_HAND + '_apm_villain_range = "QQ+, AK"\n')
+
+    odds = spot_odds(hand)
+
+    assert [o.villain for o in odds] == ["QQ+, AK"] * 3
+    assert odds[0].equity == equity_vs_range(("Th", "8c"), (), "QQ+, AK")
+
+
+def test_spot_odds_without_villain_cards():
+    from anki_poker_master.model.hand_odds import spot_odds
+    from anki_poker_master.parser.phh import parse
+
+    hand = parse(_HAND.replace("AsAc", "????").replace("7d2c", "????"))
+
+    odds = spot_odds(hand)
+
+    assert [o.equity for o in odds] == [None, None, None]
+    assert [o.villain for o in odds] == ["", "", ""]
+    assert odds[0].pot_odds == pytest.approx(8 / 26)
+
+
+def test_spot_odds_without_live_villain_combos():
+    from anki_poker_master.model.hand_odds import spot_odds
+    from anki_poker_master.parser.phh import parse
+
+    # With AsAc in the hand of the hero and the Ah on the flop, the villain
+    # can only hold AhAd preflop and no combination of AA on the flop
+    hand = parse(
+        _HAND.replace("AsAc", "????").replace("Th8c", "AsAc")
+        + '_apm_villain_range = "AA"\n'
+    )
+
+    preflop, flop_check, flop_call = spot_odds(hand)
+
+    assert preflop.equity == pytest.approx(0.5, abs=0.01)
+    assert [flop_check.equity, flop_call.equity] == [None, None]
+    assert flop_call.pot_odds == pytest.approx(20 / 66)
@@ -0,0 +1,122 @@
+import math
+
+import pytest
+
+_HAND = """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 Th8c",
+  "d dh p3 ????",
+  "p3 cbr 12",
+  "p1 cc",
+  "p2 cc",
+  "d db AhTs8h",
+  "p1 cc",
+  "p2 cbr 20",
+  "p3 cbr 438",
+  "p1 f",
+  "p2 cc",
+]
+"""
+
+
+def test_hand_score():
+    from anki_poker_master.model.hand_sampling import hand_score
+    from anki_poker_master.parser.phh import parse
+
+    hand = parse(_HAND)
+    assert (hand.pot, hand.big_blind) == (852, 4)
+
+    # Pot of 213 BB, three decisions of the hero, an all-in and three players
+    # on the flop
+    assert hand_score(hand) == pytest.approx(math.log2(214) + 3 + 2 + 1)
+    assert hand_score(
+        hand, {"pot": 0, "decisions": 1, "all_in": 0, "multiway": 0}
+    ) == pytest.approx(3)
+
+
+def test_select_top():
+    from anki_poker_master.model.hand_sampling import select_top
+
+    items = [3, 9, 1, 7, 9, 2, 8]
+
+    assert select_top(iter(items), 3, key=lambda x: x) == [9, 9, 8]
+    assert select_top(items, 1, key=lambda x: x) == [9]
+    assert select_top(items, 10, key=lambda x: x) == items
+    # Earlier items win ties and the result is in the order of the input
+    assert select_top(["b", "a", "c", "d"], 2, key=lambda x: 0) == ["b", "a"]
+
+
+def test_select_top_keeps_k_items(monkeypatch):
+    from anki_poker_master.model import hand_sampling
+
+    sizes = []
+    push = hand_sampling._push
+
+    def spy(heap, entry, k):
+        push(heap, entry, k)
+        sizes.append(len(heap))
+
+    monkeypatch.setattr(hand_sampling, "_push", spy)
+    assert hand_sampling.select_top(range(10_000), 5, key=lambda x: -x) == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+    assert max(sizes) == 5
+
+
+def test_select_stratified():
+    from anki_poker_master.model.hand_sampling import select_stratified
+
+    # 6 flop hands, 3 river hands and 1 preflop hand
+    items = [
+        ("flop", 1),
+        ("river", 5),
+        ("flop", 6),
+        ("flop", 2),
+        ("preflop", 9),
+        ("flop", 8),
+        ("river", 3),
+        ("flop", 4),
+        ("flop", 7),
+        ("river", 1),
+    ]
+
+    selected = select_stratified(items, 5, key=lambda x: x[1], stratum=lambda x: x[0])
+
+    # 3 of 6 flop hands, 1.5 of 3 river hands and 0.5 of 1 preflop hands. The
+    # remainders of river and preflop are equal, so the stratum that comes
+    # first gets the extra hand.
+    assert selected == [
+        ("river", 5),
+        ("flop", 6),
+        ("flop", 8),
+        ("river", 3),
+        ("flop", 7),
+    ]
+
+
+def test_select_stratified_all():
+    from anki_poker_master.model.hand_sampling import select_stratified
+
+    items = list(range(5))
+    assert (
+        select_stratified(items, 9, key=lambda x: x, stratum=lambda x: x % 2) == items
+    )
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_select_at_least_one(k):
+    from anki_poker_master.model.hand_sampling import select_stratified, select_top
+
+    with pytest.raises(ValueError):
+        select_top([1], k, key=lambda x: x)
+    with pytest.raises(ValueError):
+        select_stratified([1], k, key=lambda x: x, stratum=lambda x: x)
@@ -0,0 +1,114 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "hole_cards, board, expected",
+    [
+        ("AhKd", "Ac 7d 2s", "top pair"),
+        ("7h7d", "Ac 7s 2s", "set"),
+        ("Kc7c", "Kd 7h 4s", "two pair"),
+        ("Kc4c", "Kd Kh 4s", "full house"),
+        ("Ad2d", "Kd 7d 4d", "flush"),
+        ("Ah2c", "3d 4c 5s", "straight"),
+        ("KsQs", "As Js Ts 9s 2d", "straight flush"),
+        ("AhAs", "Kd 7c 4s", "overpair"),
+        ("8c8s", "Kd 7c 4s", "second pair"),
+        ("7h6h", "Kd 7c 4s", "second pair"),
+        ("3c3s", "Kd 7c 4s", "weak pair"),
+        ("Kh2h", "Kd Kc 7s", "trips"),
+        ("AhKh", "Qh 7h 2s", "flush draw"),
+        ("QhJh", "Th 9h 2s", "combo draw"),
+        ("QhJc", "Th 9c 2s", "open-ended"),
+        ("QhJc", "Th 8c 2s", "gutshot"),
+        ("5h3h", "Kd 7c 4s", "gutshot"),
+        ("Ah3c", "Kd 7c 4s", "air"),
+        # The board plays
+        ("AhQc", "2d 7c 7s 9h 9c", "air"),
+        ("2h3c", "Td Jc Qs Kh Ac", "air"),
+        # A pair on the board is not a pair of the hero
+        ("AhQc", "Kd Kc 7s", "air"),
+    ],
+)
+def test_hand_class(hole_cards, board, expected):
+    from anki_poker_master.model.postflop import hand_class
+
+    assert hand_class([hole_cards[:2], hole_cards[2:]], board.split()) == expected
+
+
+def test_classify():
+    from anki_poker_master.model.postflop import HAND_CLASSES, classify
+
+    classes = classify(("Ah", "7c", "2d"))
+    # All combinations without the cards of the board
+    assert len(classes) == 49 * 48 // 2
+    assert set(classes.values()) <= set(HAND_CLASSES)
+    # The lookup is memoized
+    assert classify(("Ah", "7c", "2d")) is classes
+
+    with pytest.raises(ValueError):
+        classify(("Ah", "Ah", "2d"))
+    with pytest.raises(ValueError):
+        classify(("Ah", "7c"))
+
+
+@pytest.mark.parametrize(
+    "board, expected",
+    [
+        ("Ah 7c 2d", ["A-high", "rainbow"]),
+        ("9h 8h 7h", ["9-high", "monotone", "connected"]),
+        ("Kd Kh 4d", ["K-high", "two-tone", "paired"]),
+        ("Kd Qd 4s 2d", ["K-high", "flush possible"]),
+    ],
+)
+def test_board_texture(board, expected):
+    from anki_poker_master.model.postflop import board_texture
+
+    assert board_texture(board.split()) == expected
+
+
+def test_scenario_hand_classes():
+    from poker import Range
+
+    from anki_poker_master.model.postflop import PostflopScenario
+
+    scenario = PostflopScenario(
+        board=["Ah", "7c", "2d"],
+        actions={"Bet": ["set", "top pair"]},
+        position="BTN",
+        scenario="SRP",
+        game="NLHE",
+        hero_range=Range("AA, 77, AKs, KQs"),
+    )
+
+    hand_classes = scenario.hand_classes()
+    assert {c: len(combos) for c, combos in hand_classes.items()} == {
+        "set": 6,
+        "top pair": 3,
+        "air": 4,
+    }
+    assert "AsAd" in hand_classes["set"]
+    assert scenario.action("set") == "Bet"
+    assert scenario.action("air") == "Check"
+
+
+def test_scenario_hand_classes_of_combinations():
+    from poker import Range
+
+    from anki_poker_master.model.postflop import PostflopScenario
+
+    scenario = PostflopScenario(
+        board=["Ah", "7c", "2d"],
+        actions={},
+        position="BTN",
+        scenario="SRP",
+        game="NLHE",
+        hero_range=Range("AsKs, Ah7h, QQ, KdQd, 7s7h"),
+    )
+
+    # Ah7h contains a card of the board
+    assert scenario.hand_classes() == {
+        "set": ["7s7h"],
+        "top pair": ["AsKs"],
+        "second pair": ["QdQc", "QhQc", "QhQd", "QsQc", "QsQd", "QsQh"],
+        "air": ["KdQd"],
+    }
@@ -0,0 +1,102 @@
+import pytest
+from poker.hand import Range
+
+
+def _percentage(hands):
+    from anki_poker_master.equity import hand_combos
+
+    return 100 * sum(len(hand_combos(h)) for h in hands) / 1326
+
+
+def test_table_positions():
+    from anki_poker_master.model.push_fold import table_positions
+
+    assert table_positions(2) == ["SB", "BB"]
+    assert table_positions(6) == ["LJ", "HJ", "CO", "BTN", "SB", "BB"]
+    assert len(table_positions(9)) == 9
+    with pytest.raises(ValueError):
+        table_positions(1)
+    with pytest.raises(ValueError):
+        table_positions(10)
+
+
+def test_heads_up():
+    from anki_poker_master.model.push_fold import solve
+
+    chart = solve(10, "SB", 2)
+    assert list(chart.calls) == ["BB"]
+    # The Nash equilibrium at 10BB is to push about 58% of the hands and to
+    # call about 37% of them
+    assert 55 < _percentage(chart.push) < 62
+    assert 34 < _percentage(chart.calls["BB"]) < 40
+    assert {"AA", "K2o", "22"} <= set(chart.push)
+    assert "72o" not in chart.push
+    assert {"AA", "A2o", "K9o"} <= set(chart.calls["BB"])
+    assert "72o" not in chart.calls["BB"]
+
+    # With a stack of one big blind everybody pushes and calls
+    chart = solve(1, "SB", 2)
+    assert len(chart.push) == len(chart.calls["BB"]) == 169
+
+
+def test_ranges_get_tighter():
+    from anki_poker_master.model.push_fold import solve
+
+    pushes = [_percentage(solve(s, "BTN", 3).push) for s in (2, 8, 15)]
+    assert pushes == sorted(pushes, reverse=True)
+    # The earlier the position, the tighter the range
+    assert _percentage(solve(8, "BTN", 3).push) < _percentage(solve(8, "SB", 3).push)
+    # An ante makes stealing the blinds more attractive
+    assert _percentage(solve(8, "BTN", 3).push) < _percentage(
+        solve(8, "BTN", 3, ante=0.25).push
+    )
+
+
+def test_invalid():
+    from anki_poker_master.model.push_fold import solve
+
+    with pytest.raises(ValueError):
+        solve(10, "BB", 2)
+    with pytest.raises(ValueError):
+        solve(10, "UTG", 6)
+    with pytest.raises(ValueError):
+        solve(0.5, "SB", 2)
+
+
+def test_push_fold_scenarios():
+    from anki_poker_master.model.push_fold import push_fold_scenarios, solve
+
+    scenarios = push_fold_scenarios([5, 10], 2)
+    assert [(s.position, s.scenario) for s in scenarios] == [
+        ("SB", "5BB, folded to you"),
+        ("SB", "10BB, folded to you"),
+    ]
+    assert scenarios[1].game == "Push/fold 2P"
+    assert scenarios[1].ranges["Push"] == Range.from_objects(
+        Range(h).hands[0] for h in solve(10, "SB", 2).push
+    )
+    assert "Fold" in scenarios[1].ranges
+
+    scenarios = push_fold_scenarios([10], 3, ante=0.125, calling_ranges=True)
+    assert [(s.position, s.scenario, list(s.ranges)[0]) for s in scenarios] == [
+        ("BTN", "10BB, folded to you", "Push"),
+        ("SB", "10BB, BTN pushes", "Call"),
+        ("BB", "10BB, BTN pushes", "Call"),
+        ("SB", "10BB, folded to you", "Push"),
+        ("BB", "10BB, SB pushes", "Call"),
+    ]
+    assert {s.game for s in scenarios} == {"Push/fold 3P, ante 0.125BB"}
+
+
+def test_push_fold_scenarios_skip_short_stacks():
+    from anki_poker_master.model.push_fold import min_stack, push_fold_scenarios
+
+    assert min_stack() == 1
+    assert min_stack(0.25) == 1.25
+    scenarios = push_fold_scenarios([1, 1.25, 2], 2, ante=0.25)
+    assert [s.scenario for s in scenarios] == [
+        "1.25BB, folded to you",
+        "2BB, folded to you",
+    ]
+    with pytest.raises(ValueError):
+        push_fold_scenarios([1], 2, ante=0.25)
@@ -0,0 +1,71 @@
+import pytest
+
+_SCENARIOS = """
+- game: NLHE
+  position: BB
+  scenario: vs BTN open
+  villain_range: 22+, A2s+, K9s+, ATo+, KJo+
+  ranges:
+      Raise: QQ+, AKs, A5s:0.5
+      Call: 22-JJ, AQs-A6s, KTs+, AJo+
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+      Raise: 77+, AJs+
+"""
+
+
+@pytest.fixture
+def scenarios():
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    return parse_scenario_yml(_SCENARIOS)
+
+
+def test_analyze(scenarios):
+    from anki_poker_master.model.range_analytics import analyze
+
+    call, fold, raise_ = analyze(scenarios[0])
+    assert raise_.action == "Raise"
+    # QQ+ (18) + AKs (4) + half of A5s (2)
+    assert raise_.combos == pytest.approx(24)
+    assert raise_.percent == pytest.approx(100 * 24 / 1326)
+    # AA (6), AKs (4) and A5s (2) hold an ace, KK (6) and AKs (4) a king
+    assert raise_.ace_percent == pytest.approx(100 * 12 / 24)
+    assert raise_.king_percent == pytest.approx(100 * 10 / 24)
+    assert 0 < raise_.equity < 1
+    assert call.action == "Call"
+    assert call.equity < raise_.equity
+    # The folded half of A5s
+    assert fold.combos == pytest.approx(1326 - 24 - call.combos)
+
+
+def test_analyze_blockers(scenarios):
+    from poker.hand import Range
+
+    from anki_poker_master.model import PreflopScenario
+    from anki_poker_master.model.range_analytics import BLOCKED_HANDS, analyze
+
+    assert BLOCKED_HANDS == "AA, KK, AK"
+    _, raise_ = analyze(scenarios[1])
+    # 77-JJ block none of the 28 combinations of AA, KK and AK, QQ+ and AJs+ do
+    assert raise_.blocked_percent > 0
+    assert raise_.equity is None
+    _, aa_only = analyze(
+        PreflopScenario({"Raise": Range("AA")}, "UTG", "Opening", "NLHE")
+    )
+    # AA blocks the 5 other combinations of AA that share one of its aces,
+    # and 8 of the 16 combinations of AK
+    assert aa_only.blocked_percent == pytest.approx(100 * 13 / 28)
+
+
+def test_analyze_is_cached(scenarios):
+    from anki_poker_master.model import range_analytics
+
+    range_analytics._analyze.cache_clear()
+    range_analytics.analyze(scenarios[0])
+    range_analytics.analyze(scenarios[0])
+    info = range_analytics._analyze.cache_info()
+    assert info.misses == 3
+    assert info.hits == 3
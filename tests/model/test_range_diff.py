@@ -0,0 +1,128 @@
+import pytest
+from poker.hand import Hand, Range
+
+_OLD = """
+- game: NLHE
+  position: CO
+  scenario: Open
+  ranges:
+      Raise: 55+, A9s+, KTs+, AJo+
+- game: NLHE
+  position: BTN
+  scenario: Open
+  ranges:
+      Raise: 22+
+"""
+
+_NEW = """
+- game: NLHE
+  position: CO
+  scenario: Open
+  ranges:
+      raise: 44+, A8s+, KTs+, AJo+
+      Call: 22-33
+- game: NLHE
+  position: SB
+  scenario: Open
+  ranges:
+      Raise: 22+
+"""
+
+
+def test_hands():
+    from anki_poker_master.model.range_diff import HANDS
+
+    assert len(HANDS) == 169
+    assert set(HANDS) == set(Range("XX").hands)
+
+
+def test_diff_scenarios():
+    from anki_poker_master.model import PreflopScenario
+    from anki_poker_master.model.range_diff import HandDiff, diff_scenarios
+
+    old = PreflopScenario({"Raise": Range("55+, A9s+")}, "CO", "Open", "NLHE")
+    new = PreflopScenario(
+        {"raise": Range("44+, A8s+"), "Call": Range("22-33")}, "CO", "Open", "NLHE"
+    )
+
+    diff = diff_scenarios(old, new)
+
+    assert diff.has_changes()
+    assert sorted(diff.hand_diffs, key=lambda d: str(d.hand)) == [
+        HandDiff(Hand("22"), "Fold", "Call"),
+        HandDiff(Hand("33"), "Fold", "Call"),
+        HandDiff(Hand("44"), "Fold", "raise"),
+        HandDiff(Hand("A8s"), "Fold", "raise"),
+    ]
+    # 55+ (10 pairs) and A9s+ (5 suited hands) out of 1326 combinations
+    assert diff.old_percentages["raise"] == pytest.approx(100 * 80 / 1326)
+    # 44+ (11 pairs) and A8s+ (6 suited hands)
+    assert diff.new_percentages["raise"] == pytest.approx(100 * 90 / 1326)
+    assert diff.deltas == pytest.approx(
+        {
+            "Call": 100 * 12 / 1326,
+            "Fold": -100 * 22 / 1326,
+            "raise": 100 * 10 / 1326,
+        }
+    )
+
+
+def test_diff_same_scenario():
+    from anki_poker_master.model import PreflopScenario
+    from anki_poker_master.model.range_diff import diff_scenarios
+
+    scenario = PreflopScenario({"Raise": Range("55+")}, "CO", "Open", "NLHE")
+
+    diff = diff_scenarios(scenario, scenario)
+
+    assert not diff.has_changes()
+    assert diff.deltas == {"Fold": 0.0, "Raise": 0.0}
+
+
+def test_diff_libraries():
+    from anki_poker_master.model.range_diff import diff_libraries
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    diff = diff_libraries(parse_scenario_yml(_OLD), parse_scenario_yml(_NEW))
+
+    assert diff.has_changes()
+    assert [d.key for d in diff.scenario_diffs] == [("NLHE", "CO", "Open")]
+    assert len(diff.scenario_diffs[0].hand_diffs) == 4
+    assert [s.position for s in diff.only_old] == ["BTN"]
+    assert [s.position for s in diff.only_new] == ["SB"]
+
+    same = diff_libraries(parse_scenario_yml(_OLD), parse_scenario_yml(_OLD))
+    assert not same.has_changes()
+
+
+def test_diff_frequencies():
+    from anki_poker_master.model.range_diff import diff_scenarios
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.presenter.anki.preflop_scenario import html_diff
+
+    scenario_yml = """
+- game: NLHE
+  position: UTG
+  scenario: Open
+  ranges:
+    Raise: "AKo:{}, QQ+"
+    Call: "AKo:{}"
+"""
+    (old,) = parse_scenario_yml(scenario_yml.format(0.7, 0.3))
+    (new,) = parse_scenario_yml(scenario_yml.format(0.55, 0.45))
+
+    diff = diff_scenarios(old, new)
+
+    # AKo is raised most of the time in both, but the frequencies changed
+    assert diff.has_changes()
+    assert [str(d) for d in diff.hand_diffs] == [
+        "AKo (Raise 70%, Call 30% -> Raise 55%, Call 45%)"
+    ]
+    # The 12 combinations of AKo are weighted by the frequencies
+    assert diff.deltas == pytest.approx(
+        {"Call": 100 * 12 * 0.15 / 1326, "Fold": 0.0, "Raise": -100 * 12 * 0.15 / 1326}
+    )
+    assert 'title="Raise 70%, Call 30% → Raise 55%, Call 45%">AKo</td>' in (
+        html_diff(diff)
+    )
+    assert not diff_scenarios(old, old).has_changes()
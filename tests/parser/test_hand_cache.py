@@ -0,0 +1,141 @@
+import pathlib
+
+import pytest
+
+EXAMPLE_FILES_DIR = (
+    pathlib.Path(__file__).parent
+    / "testdata"
+    / "test_phh"
+    / "test_parser_example_files_success"
+)
+
+
+def _assert_hands_equal(expected, actual):
+    assert len(expected) == len(actual)
+    for a, b in zip(expected, actual):
+        for attr in (
+            "variant",
+            "title",
+            "players",
+            "hero_cards",
+            "streets",
+            "notes",
+            "source",
+            "context",
+            "answers",
+            "villain_cards",
+            "villain_range",
+            "big_blind",
+            "pot",
+        ):
+            assert getattr(a, attr) == getattr(b, attr), attr
+
+
+def test_roundtrip_example_files():
+    from anki_poker_master.parser import hand_cache
+    from anki_poker_master.parser.phh import parse
+
+    hands = [
+        parse(f.read_text("utf8")) for f in sorted(EXAMPLE_FILES_DIR.glob("*.phh"))
+    ]
+    assert hands
+
+    loaded = hand_cache.loads(hand_cache.dumps(hands))
+
+    _assert_hands_equal(hands, loaded)
+
+
+def test_roundtrip_keeps_number_types_and_metadata():
+    from anki_poker_master.model.hand import (
+        BetAction,
+        CallAction,
+        FoldAction,
+        Hand,
+        Player,
+        Question,
+        RaiseAction,
+        Street,
+    )
+    from anki_poker_master.parser import hand_cache
+
+    hand = Hand()
+    hand.variant = "PO"
+    hand.title = "Überraschung"
+    hand.notes = "notes"
+    hand.source = "https://example.com"
+    hand.context = "context"
+    hand.answers = ["a1", "a2"]
+    hand.hero_cards = ["As", "Kd", "Qh", "Jc"]
+    hand.players = [Player("SB", False, True), Player("BB", True, False)]
+    hand.streets = [
+        Street(
+            "Pre-flop",
+            [],
+            [0],
+            [True, True],
+            [100, 200.5],
+            0,
+            [
+                (RaiseAction(3, False), FoldAction()),
+                (CallAction(True),),
+                (BetAction(1.5, True),),
+            ],
+            [Question("q1", "a1", (0, 1))],
+        )
+    ]
+
+    (loaded,) = hand_cache.loads(hand_cache.dumps([hand]))
+
+    _assert_hands_equal([hand], [loaded])
+    assert type(loaded.streets[0].initial_stacks[0]) is int
+    assert type(loaded.streets[0].initial_stacks[1]) is float
+    assert type(loaded.streets[0].actions[0][0].amount()) is int
+    assert loaded.streets[0].actions[0][1] is FoldAction()
+
+
+def test_empty():
+    from anki_poker_master.parser import hand_cache
+
+    assert hand_cache.loads(hand_cache.dumps([])) == []
+
+
+def test_not_a_hand_cache():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser import hand_cache
+
+    with pytest.raises(ValidationError, match="not a hand cache file"):
+        hand_cache.loads(b'variant = "NT"\n')
+
+
+def test_unsupported_version():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser import hand_cache
+
+    data = bytearray(hand_cache.dumps([]))
+    data[4] = hand_cache.VERSION + 1
+
+    with pytest.raises(ValidationError, match="unsupported hand cache version"):
+        hand_cache.loads(bytes(data))
+
+
+def test_unsupported_body_item_size():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser import hand_cache
+
+    data = bytearray(hand_cache.dumps([]))
+    data[6] = 3
+
+    with pytest.raises(ValidationError, match="unsupported body item size 3"):
+        hand_cache.loads(bytes(data))
+
+
+def test_truncated():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser import hand_cache
+    from anki_poker_master.parser.phh import parse
+
+    hand = parse((EXAMPLE_FILES_DIR / "dwan-ivey-2009.phh").read_text("utf8"))
+    data = hand_cache.dumps([hand])
+
+    with pytest.raises(ValidationError, match="corrupt"):
+        hand_cache.loads(data[:-10])
@@ -0,0 +1,211 @@
+import os
+import pathlib
+import shutil
+
+import pytest
+
+EXAMPLE_FILES_DIR = (
+    pathlib.Path(__file__).parent
+    / "testdata"
+    / "test_phh"
+    / "test_parser_example_files_success"
+)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = tmp_path / "corpus"
+    shutil.copytree(EXAMPLE_FILES_DIR, corpus)
+    return corpus
+
+
+@pytest.fixture
+def index_path(tmp_path, corpus):
+    from anki_poker_master.parser.hand_index import build_index
+
+    index_path = tmp_path / "hands.apmi"
+    nr_hands, errors = build_index(
+        index_path, sorted(corpus.glob("*.phh")), max_workers=1
+    )
+    assert nr_hands == 5
+    assert errors == []
+    return index_path
+
+
+def test_positions():
+    from anki_poker_master.parser.hand_index import positions
+
+    assert positions(2) == ["BB", "BTN"]
+    assert positions(3) == ["SB", "BB", "BTN"]
+    assert positions(6) == ["SB", "BB", "UTG", "HJ", "CO", "BTN"]
+    assert positions(9) == [
+        "SB",
+        "BB",
+        "UTG",
+        "UTG+1",
+        "UTG+2",
+        "LJ",
+        "HJ",
+        "CO",
+        "BTN",
+    ]
+
+
+def test_hand_features():
+    from anki_poker_master.parser.hand_index import hand_features
+    from anki_poker_master.parser.phh import parse
+
+    hand = parse((EXAMPLE_FILES_DIR / "dwan-ivey-2009.phh").read_text())
+    features = hand_features(hand)
+
+    assert features["hero_cards"] == "7h6h"
+    assert features["hero_hand"] == "76s"
+    assert features["position"] == "BTN"
+    assert features["preflop_raises"] == 2
+    assert features["nr_players_flop"] == 2
+    assert features["hero_in_position"] is True
+    assert features["board"] == "Jc3d5c4hJh"
+    assert features["flop_suits"] == 2
+    assert features["flop_paired"] is False
+    assert features["all_in"] is True
+    assert features["pot_bb"] == pytest.approx(709.6)
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("", ["00-15-36", "00-18-39", "01-51-27", "02-53-09", "dwan-ivey-2009"]),
+        ("3bet pot", ["01-51-27", "dwan-ivey-2009"]),
+        ("3bet pot, hero OOP", []),
+        ("limped pot, hero SB", ["00-18-39"]),
+        ("2bet+ pot, hero oop", ["00-15-36"]),
+        ("hero TT+ 76s", ["01-51-27", "dwan-ivey-2009"]),
+        ("hero Ts2d", ["00-15-36"]),
+        ("paired flop", ["00-18-39"]),
+        ("rainbow, river", ["00-15-36"]),
+        ("board Jd Th", ["00-15-36"]),
+        ("all-in, multiway", []),
+        ("pot >= 100bb", ["dwan-ivey-2009"]),
+        ("pot < 1500000, players = 3", ["dwan-ivey-2009"]),
+        ("title: LHE 100", ["01-51-27"]),
+    ],
+)
+def test_search(index_path, query, expected):
+    from anki_poker_master.parser.hand_index import search
+
+    assert [f.stem for f, _ in search(index_path, query)] == expected
+
+
+def test_search_returns_the_parsed_hands(index_path, corpus):
+    from anki_poker_master.parser.hand_index import search
+    from anki_poker_master.parser.phh import parse
+
+    ((path, hand),) = search(index_path, "hero 76s")
+
+    expected = parse((corpus / "dwan-ivey-2009.phh").read_text())
+    assert path == (corpus / "dwan-ivey-2009.phh").resolve()
+    assert hand.streets == expected.streets
+    assert hand.players == expected.players
+    assert hand.pot == expected.pot
+
+
+def test_only_changed_files_are_indexed_again(index_path, corpus, monkeypatch):
+    from anki_poker_master.parser import hand_index
+
+    parsed = []
+    parse_many = hand_index.parse_many
+
+    def spy(paths, **kwargs):
+        parsed.extend(paths)
+        return parse_many(paths, **kwargs)
+
+    monkeypatch.setattr(hand_index, "parse_many", spy)
+    changed = corpus / "00-15-36.phh"
+    changed.write_text(
+        changed.read_text() + '\n_apm_source = "https://example.com/wsop"\n'
+    )
+    os.utime(changed, ns=(1, 1))
+    (corpus / "02-53-09.phh").unlink()
+
+    nr_hands, errors = hand_index.build_index(
+        index_path, sorted(corpus.glob("*.phh")), max_workers=1
+    )
+
+    assert parsed == [str(changed.resolve())]
+    assert nr_hands == 4
+    assert errors == []
+    assert [f.stem for f, _ in hand_index.search(index_path, "source: WSOP")] == [
+        "00-15-36"
+    ]
+
+
+def test_invalid_files_are_reported(index_path, tmp_path):
+    from anki_poker_master.parser.hand_index import build_index
+
+    invalid = tmp_path / "invalid.phh"
+    invalid.write_text('variant = "NT"')
+
+    nr_hands, errors = build_index(index_path, [invalid], max_workers=1)
+
+    assert nr_hands == 5
+    assert [e.path for e in errors] == [str(invalid.resolve())]
+
+
+def test_filter_hands():
+    from anki_poker_master.parser.hand_index import filter_hands
+    from anki_poker_master.parser.phh import parse
+
+    files_and_hands = [
+        (f, parse(f.read_text())) for f in sorted(EXAMPLE_FILES_DIR.glob("*.phh"))
+    ]
+
+    assert filter_hands(files_and_hands, "hero BTN") == [
+        files_and_hands[2],
+        files_and_hands[4],
+    ]
+
+
+@pytest.mark.parametrize("query", ["3bet", "hero XYZ", "pot > x"])
+def test_invalid_query(query):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.hand_index import parse_query
+
+    with pytest.raises(ValidationError):
+        parse_query(query)
+
+
+def test_search_missing_index(tmp_path):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.hand_index import search
+
+    with pytest.raises(ValidationError):
+        search(tmp_path / "missing.apmi")
+
+
+def test_search_index_of_another_version(index_path):
+    import sqlite3
+    from contextlib import closing
+
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.hand_index import search
+
+    with closing(sqlite3.connect(index_path)) as db, db:
+        (nr_hands,) = db.execute("SELECT COUNT(*) FROM hands").fetchone()
+        db.execute("PRAGMA user_version = 3")
+    with pytest.raises(ValidationError, match="run 'hand index' again"):
+        search(index_path)
+    # The index is left as it is
+    with closing(sqlite3.connect(index_path)) as db:
+        assert db.execute("SELECT COUNT(*) FROM hands").fetchone() == (nr_hands,)
+
+
+@pytest.mark.parametrize("content", [b"", b"not a database" * 10])
+def test_search_file_that_isnt_an_index(tmp_path, content):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.hand_index import search
+
+    path = tmp_path / "other.apmi"
+    path.write_bytes(content)
+    with pytest.raises(ValidationError, match="is not a hand index"):
+        search(path)
+    assert path.read_bytes() == content
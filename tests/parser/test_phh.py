@@ -257,6 +257,35 @@ _apm_context = {apm_context}
     assert "should be instance of 'str'" in excinfo.value.humanize_error()
 
 
+@pytest.mark.parametrize(
+    "apm_villain_range, err_msg",
+    [
+        ("10", "should be instance of 'str'"),
+        ('"QQ+, A1s"', "must be a range like 'QQ+, AKs'"),
+    ],
+)
+def test_phh_parse_invalid_apm_villain_range(apm_villain_range, err_msg):
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.model import ValidationError
+
+    content = f"""variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  # Pre-flop
+  "d dh p1 ????",
+  "d dh p2 Th7s",
+  "d dh p3 ????",
+]
+_apm_villain_range = {apm_villain_range}
+"""
+    with pytest.raises(ValidationError) as excinfo:
+        parse(content)
+    assert err_msg in excinfo.value.humanize_error()
+
+
 @pytest.mark.parametrize("apm_answers", ["true", "10"])
 def test_phh_parse_invalid_apm_answers_1(apm_answers):
     from anki_poker_master.parser.phh import parse
@@ -352,7 +381,102 @@ antes = [0, 0, 0, 0, 0, 0, 0, 0, 0]
     assert "Error parsing PHH with content:" in excinfo.value.humanize_error()
 
 
-@pytest.mark.parametrize("variant", ["NS", "PO"])
+_PLO_HAND = """variant = "PO"
+antes = [0, 0, 0]
+blinds_or_straddles = [1, 2, 0]
+min_bet = 2
+starting_stacks = [200, 200, 200]
+actions = [
+  "d dh p1 ????????",
+  "d dh p2 ????????",
+  "d dh p3 AsAhKsQd",
+  "p3 cbr 7",
+  "p1 f",
+  "p2 cbr 22",
+  "p3 cbr 51",
+  "p2 cc",
+  "d db Kc8h2c",
+  "p2 cc",
+  "p3 cbr 100",
+  "p2 cc",
+]
+"""
+
+_SHORT_DECK_HAND = """variant = "NS"
+antes = [3, 3, 3]
+blinds_or_straddles = [0, 0, 3]
+min_bet = 3
+starting_stacks = [300, 300, 300]
+actions = [
+  "d dh p1 AsKs",
+  "d dh p2 ????",
+  "d dh p3 ????",
+  "p1 cbr 12",
+  "p2 f",
+  "p3 cc",
+  "d db Ts9s6h",
+  "p1 cbr 15",
+  "p3 cbr 285",
+  "p1 cc",
+]
+"""
+
+_OMAHA_HI_LO_HAND = """variant = "FO/8"
+antes = [0, 0]
+blinds_or_straddles = [1, 2]
+small_bet = 2
+big_bet = 4
+starting_stacks = [100, 100]
+actions = [
+  "d dh p1 ????????",
+  "d dh p2 Ac2d5h9s",
+  "p2 cbr 4",
+  "p1 cc",
+  "d db 3c4d8h",
+  "p1 cc",
+  "p2 cbr 2",
+]
+"""
+
+
+@pytest.mark.parametrize(
+    "content, variant, title, hero_cards, answers",
+    [
+        (
+            _PLO_HAND,
+            "PO",
+            "PLO 1/2",
+            ["As", "Ah", "Ks", "Qd"],
+            [["R 7", "R 51"], ["B 100"]],
+        ),
+        (
+            _SHORT_DECK_HAND,
+            "NS",
+            "NLHE Short Deck 3 (ante 3)",
+            ["As", "Ks"],
+            [["R 12"], ["B 15", "C"]],
+        ),
+        (
+            _OMAHA_HI_LO_HAND,
+            "FO/8",
+            "LO8 1/2",
+            ["Ac", "2d", "5h", "9s"],
+            [["R 4"], ["B 2"]],
+        ),
+    ],
+)
+def test_parser_other_variants(content, variant, title, hero_cards, answers):
+    from anki_poker_master.parser.phh import parse
+
+    hand = parse(content)
+
+    assert hand.variant == variant
+    assert hand.title == title
+    assert hand.hero_cards == hero_cards
+    assert [[q.answer for q in s.questions] for s in hand.streets] == answers
+
+
+@pytest.mark.parametrize("variant", ["F7S", "FB"])
 def test_parser_invalid_poker_variant(variant):
     from anki_poker_master.parser.phh import parse
     from anki_poker_master.model import ValidationError
@@ -417,10 +541,12 @@ actions = [
         [108, 416, 450],
         2,
         [[RaiseAction(12)], [FoldAction()], [CallAction()]],
-        [Question("What do you do?", "C", (2, 0))],
+        [Question("What do you do?", "C", (2, 0), pot=18, to_call=8)],
     )
 
     assert hand.streets[0] == expected_preflop
+    assert hand.big_blind == 4
+    assert hand.pot == 26
 
 
 def test_parser_with_flop():
@@ -469,8 +595,8 @@ actions = [
         0,
         [[], [CheckAction(), CallAction()], [BetAction(20)]],
         [
-            Question("What do you do?", "X", (1, 0)),
-            Question("What do you do?", "C", (1, 1)),
+            Question("What do you do?", "X", (1, 0), pot=26, to_call=0),
+            Question("What do you do?", "C", (1, 1), pot=46, to_call=20),
         ],
     )
 
@@ -524,7 +650,7 @@ actions = [
         0,
         [[], [CheckAction()], [CheckAction()]],
         [
-            Question("What do you do?", "X", (1, 0)),
+            Question("What do you do?", "X", (1, 0), pot=66, to_call=0),
         ],
     )
 
@@ -582,7 +708,7 @@ actions = [
         0,
         [[], [BetAction(388, is_all_in=True)], [FoldAction()]],
         [
-            Question("What do you do?", "B 388 (AI)", (1, 0)),
+            Question("What do you do?", "B 388 (AI)", (1, 0), pot=66, to_call=0),
         ],
     )
 
@@ -638,17 +764,23 @@ def test_parser_questions():
         "What do you do?",
         "C",
         (2, 0),
+        pot=18,
+        to_call=8,
     )
     # Note that the inline answer takes precedence over the one in _apm_answers
     assert hand.streets[1].questions[0] == Question(
         "What do you do?",
         "Check, but 3bet to 60 would be fine too.",
         (1, 1),
+        pot=46,
+        to_call=20,
     )
     assert hand.streets[3].questions[0] == Question(
         "What do you do?",
         "Going all in is best.",
         (1, 0),
+        pot=66,
+        to_call=0,
     )
 
 
@@ -752,27 +884,167 @@ def test_parser_questions_default_all_hero_actions():
         "What do you do?",
         "80% Call, 20% Raise.",
         (2, 0),
+        pot=18,
+        to_call=8,
     )
     assert hand.streets[1].questions[0] == Question(
         "What do you do?",
         "Check and only very rarely bet as a bluff.",
         (1, 0),
+        pot=26,
+        to_call=0,
     )
     assert hand.streets[1].questions[1] == Question(
         "What do you do?",
         "Call.",
         (1, 1),
+        pot=46,
+        to_call=20,
     )
     assert hand.streets[2].questions[0] == Question(
         "What do you do?",
         "X",
         (1, 0),
+        pot=66,
+        to_call=0,
     )
     assert hand.streets[3].questions[0] == Question(
         "What do you do?",
         "Go all in.",
         (1, 0),
+        pot=66,
+        to_call=0,
+    )
+
+
+def test_parser_questions_default_many_hero_actions():
+    """
+    Verify that the answers are assigned in order when the hero acts many times
+    (every action becoming a default question).
+    """
+    from anki_poker_master.parser.phh import parse
+
+    raises = []
+    bet = 2
+    for i in range(19):
+        bet *= 2
+        raises.append(f'"p{2 - i % 2} cbr {bet}",')
+    answers = [f'"Answer {i}",' for i in range(10)]
+    content = f"""variant = "NT"
+antes = [0, 0]
+blinds_or_straddles = [1, 2]
+min_bet = 2
+starting_stacks = [10000000, 10000000]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 AsAd",
+  {"".join(raises)}
+  "p1 f",
+]
+_apm_hero = 2
+_apm_answers = [{"".join(answers)}]
+"""
+    hand = parse(content)
+
+    assert [q.answer for q in hand.streets[0].questions] == [
+        f"Answer {i}" for i in range(10)
+    ]
+    assert [q.action_table_indices for q in hand.streets[0].questions] == [
+        (1, i) for i in range(10)
+    ]
+
+
+_KEY_SPOTS_HAND = """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 Th8c",
+  "d dh p3 ????",
+  "p3 cbr 12",
+  "p1 f",
+  "p2 cc",
+  "d db AhTs8h",
+  "p2 cc",
+  "p3 cbr 20",
+  "p2 cc",
+  "d db 4s",
+  "p2 cc",
+  "p3 cc",
+  "d db Tc",
+  "p2 cbr 388",
+  "p3 f",
+]
+"""
+
+
+@pytest.mark.parametrize(
+    "rules, expected",
+    [
+        # The flop call of a bet of less than half the pot is no key decision
+        ({}, [["C"], ["X"], ["X"], ["B 388 (AI)"]]),
+        ({"max_spots": 2}, [["C"], [], [], ["B 388 (AI)"]]),
+        (
+            {"rules": ["large-bet"], "min_pot_fraction": 0.4},
+            [["C"], ["C"], [], ["B 388 (AI)"]],
+        ),
+        ({"rules": ["facing-raise", "all-in"]}, [["C"], [], [], ["B 388 (AI)"]]),
+    ],
+)
+def test_parser_questions_default_key_spots(rules, expected):
+    """
+    Verify that only the decisions of the hero that match the spot rules are study spots.
+    """
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.parser.study_spots import SpotRules
+
+    hand = parse(_KEY_SPOTS_HAND, SpotRules(**rules))
+
+    assert [[q.answer for q in s.questions] for s in hand.streets] == expected
+    assert hand.streets[3].questions[0].action_table_indices == (1, 0)
+
+
+def test_parser_questions_key_spots_ignored():
+    """
+    Verify that the spot rules don't apply if the hand has "apm study" commentary or
+    _apm_answers.
+    """
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.parser.study_spots import SpotRules
+
+    rules = SpotRules(["all-in"])
+    studied = _KEY_SPOTS_HAND.replace(
+        '"p2 cc",\n  "d db 4s"', '"p2 cc # apm study",\n  "d db 4s"'
     )
+    hand = parse(studied, rules)
+    assert [len(s.questions) for s in hand.streets] == [0, 1, 0, 0]
+
+    answered = _KEY_SPOTS_HAND + '_apm_answers = ["1", "2", "3", "4", "5"]\n'
+    hand = parse(answered, rules)
+    assert [q.answer for s in hand.streets for q in s.questions] == [
+        "1",
+        "2",
+        "3",
+        "4",
+        "5",
+    ]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"rules": ["unknown"]},
+        {"min_pot_fraction": -1},
+        {"max_spots": 0},
+    ],
+)
+def test_spot_rules_invalid(kwargs):
+    from anki_poker_master.parser.study_spots import SpotRules
+
+    with pytest.raises(ValueError):
+        SpotRules(**kwargs)
 
 
 def test_parser_with_same_antes_for_all():
@@ -910,7 +1182,11 @@ actions = [
 ]
 """
     hand = parse(content)
-    assert hand.streets[0].actions == [[CallAction()], [FoldAction()], [CheckAction()]]
+    assert hand.streets[0].actions == [
+        (CallAction(),),
+        (FoldAction(),),
+        (CheckAction(),),
+    ]
 
 
 def test_preflop_bet_action_not_possible() -> None:
@@ -940,9 +1216,9 @@ actions = [
 """
     hand = parse(content)
     assert hand.streets[0].actions == [
-        [RaiseAction(12)],
-        [FoldAction()],
-        [CallAction()],
+        (RaiseAction(12),),
+        (FoldAction(),),
+        (CallAction(),),
     ]
 
 
@@ -973,7 +1249,114 @@ actions = [
 """
     hand = parse(content)
     assert hand.streets[0].actions == [
-        [RaiseAction(450, is_all_in=True)],
-        [CallAction(is_all_in=True)],
-        [FoldAction()],
+        (RaiseAction(450, is_all_in=True),),
+        (CallAction(is_all_in=True),),
+        (FoldAction(),),
+    ]
+
+
+def test_operation_iterator_stops_after_last_relevant_action() -> None:
+    """
+    Verify that every operation is yielded exactly once and in order, and that
+    the replay stops after the last action that is not a showdown.
+    """
+    from pokerkit import HandHistory, HoleCardsShowingOrMucking
+    from anki_poker_master.parser.phh import _Parser
+
+    content = """variant = "NT"
+antes = [0, 0]
+blinds_or_straddles = [1, 2]
+min_bet = 2
+starting_stacks = [100, 100]
+actions = [
+  "d dh p1 AsAd",
+  "d dh p2 KsKd",
+  "p2 cc",
+  "p1 cc",
+  "d db 2c3c4c",
+  "p1 cc",
+  "p2 cc",
+  "d db 5h",
+  "p1 cc",
+  "p2 cc",
+  "d db 9d",
+  "p1 cc",
+  "p2 cc",
+  "p1 sm AsAd",
+  "p2 sm KsKd",
+]
+"""
+    hh = HandHistory.loads(content)
+    all_operations = list(hh)[-1].operations
+
+    state_actions = hh.state_actions
+    state, _ = next(state_actions)
+    operations = list(
+        _Parser._create_pk_operation_iterator(state_actions, state, hh.actions)
+    )
+
+    assert operations == all_operations[: len(operations)]
+    assert not any(isinstance(o, HoleCardsShowingOrMucking) for o in operations)
+    assert any(isinstance(o, HoleCardsShowingOrMucking) for o in all_operations)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_parse_many(tmp_path, max_workers) -> None:
+    """
+    Verify that parse_many() returns one result per file in the same order and
+    reports errors and warnings instead of raising them.
+    """
+    from anki_poker_master.parser.phh import parse_many, ParseResult
+
+    ok_content = (
+        pathlib.Path(__file__).parent
+        / "testdata"
+        / "test_phh"
+        / "test_parser_example_files_success"
+        / "dwan-ivey-2009.phh"
+    ).read_text("utf8")
+    hero_never_acts_content = """variant = "NT"
+antes = [0, 0]
+blinds_or_straddles = [1, 2]
+min_bet = 2
+starting_stacks = [100, 100]
+actions = [
+  "d dh p1 AsAd",
+  "d dh p2 ????",
+  "p2 f",
+]
+"""
+    files = {
+        "ok.phh": ok_content,
+        "empty.phh": "",
+        "warning.phh": hero_never_acts_content,
+        "unknown_hero.phh": hero_never_acts_content.replace("AsAd", "????"),
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_text(content)
+
+    results = list(
+        parse_many(
+            [tmp_path / name for name in files],
+            max_questions=3,
+            max_workers=max_workers,
+        )
+    )
+
+    assert [r.path for r in results] == [str(tmp_path / name) for name in files]
+    assert [r.status for r in results] == [
+        ParseResult.ERROR,  # 5 questions
+        ParseResult.ERROR,
+        ParseResult.WARNING,
+        ParseResult.ERROR,
     ]
+    assert "5 study spots but at most 3" in results[0].message
+    assert results[1].message == "Invalid PHH (empty)"
+    assert results[2].hand.players[0].is_hero
+    assert results[3].message == "The hole cards of the hero must be known."
+    assert results[3].hand is None
+
+    (result,) = parse_many([tmp_path / "ok.phh"])
+    assert result.status == ParseResult.OK
+    assert result.message == ""
+    assert result.to_dict() == {"file": str(tmp_path / "ok.phh"), "status": "ok"}
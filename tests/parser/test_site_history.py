@@ -0,0 +1,105 @@
+import pathlib
+
+import pytest
+
+TESTDATA_DIR = pathlib.Path(__file__).parent / "testdata" / "test_site_history"
+
+
+def _hands(file_name):
+    from anki_poker_master.parser.site_history import split_hands
+
+    with open(TESTDATA_DIR / file_name, encoding="utf-8") as f:
+        return list(split_hands(f))
+
+
+def test_split_hands():
+    from anki_poker_master.parser.site_history import split_hands
+
+    hands = _hands("pokerstars.txt")
+    assert [line for line, _ in hands] == [1, 39, 60, 82]
+    assert hands[1][1].startswith("PokerStars Hand #233043339013:")
+    assert hands[1][1].endswith("Seat 7: shark (big blind) collected (310)")
+
+    # Lines before the first hand are ignored
+    assert list(split_hands(["garbage\n", "\n"])) == []
+    assert list(split_hands(["x\n", "Poker Hand #RC1: Hold'em\n", "a\n"])) == [
+        (2, "Poker Hand #RC1: Hold'em\na")
+    ]
+
+
+def test_to_phh_cash_game():
+    from anki_poker_master.parser.site_history import to_phh
+
+    phh = to_phh(_hands("pokerstars.txt")[0][1])
+
+    # The amounts are converted to cents, the player that is sitting out is
+    # left out and the dealer is the last player
+    assert "blinds_or_straddles = [1, 2, 0, 0]\n" in phh
+    assert "min_bet = 2\n" in phh
+    assert "starting_stacks = [50, 200, 213, 200]\n" in phh
+    assert 'players = ["villain5", "villain1", "villain2", "Hero"]\n' in phh
+    assert "_apm_hero = 4\n" in phh
+    assert '_apm_source = "PokerStars Hand #233043339012"\n' in phh
+    # The cards that are shown at the showdown are dealt
+    assert '"d dh p2 JdJc"' in phh
+    assert '"d dh p1 ????"' in phh
+    # The players that are all-in show their cards before the river is dealt
+    assert '"p2 cbr 170",\n  "p4 cc",\n  "p2 sm -",\n  "p4 sm -",\n  "d db Ts",' in phh
+
+
+def test_to_phh_heads_up():
+    from anki_poker_master.parser.site_history import to_phh
+
+    phh = to_phh(_hands("pokerstars.txt")[1][1])
+
+    # The blinds and antes of the small blind (the dealer) come first
+    assert "antes = [5, 5]\n" in phh
+    assert "blinds_or_straddles = [25, 50]\n" in phh
+    assert 'players = ["shark", "Hero"]\n' in phh
+
+
+def test_to_phh_errors():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.site_history import to_phh
+
+    with pytest.raises(ValidationError, match="newbie posts a blind outside"):
+        to_phh(_hands("pokerstars.txt")[3][1])
+    with pytest.raises(ValidationError, match="'Razz.*' is not supported"):
+        to_phh("PokerStars Hand #1:  Razz ($0.10/$0.20 USD)")
+    with pytest.raises(ValidationError, match="doesn't start with a hand number"):
+        to_phh("Hand #1")
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_parse_site_files(max_workers):
+    from anki_poker_master.parser.phh import ParseResult
+    from anki_poker_master.parser.site_history import parse_site_files
+
+    results = list(
+        parse_site_files(
+            [TESTDATA_DIR / "pokerstars.txt", TESTDATA_DIR / "ggpoker.txt"],
+            max_workers=max_workers,
+        )
+    )
+
+    assert [(r.path, r.status) for r in results] == [
+        (f"{TESTDATA_DIR / 'pokerstars.txt'}:1", ParseResult.OK),
+        (f"{TESTDATA_DIR / 'pokerstars.txt'}:39", ParseResult.OK),
+        (f"{TESTDATA_DIR / 'pokerstars.txt'}:60", ParseResult.OK),
+        (f"{TESTDATA_DIR / 'pokerstars.txt'}:82", ParseResult.ERROR),
+        (f"{TESTDATA_DIR / 'ggpoker.txt'}:1", ParseResult.OK),
+    ]
+    assert [r.hand.title for r in results if r.hand] == [
+        "NLHE 1/2",
+        "NLHE 25/50 (ante 5)",
+        "PLO 5/10",
+        "NLHE 2/5",
+    ]
+    assert [
+        [q.answer for s in r.hand.streets for q in s.questions]
+        for r in results
+        if r.hand
+    ] == [["R 6", "B 8", "C", "C"], ["R 150", "F"], ["R 35", "B 50"], ["R 50", "B 35"]]
+    gg_hand = results[-1].hand
+    assert gg_hand.source == "GGPoker Hand #RC1234567890"
+    assert gg_hand.hero_cards == ["Qh", "Qs"]
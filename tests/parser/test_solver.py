@@ -0,0 +1,195 @@
+import io
+import json
+
+import pytest
+from poker.hand import Hand, Range
+
+_CSV = """game,position,scenario,hand,Raise,Call,notes
+NLHE,UTG,Opening,AA,1,0,From the solver
+NLHE,UTG,Opening,AKo,0.7,0.3,
+NLHE,UTG,Opening,AQs,50%,,
+NLHE,BTN,Opening,AhKd,1,,
+NLHE,BTN,Opening,AsKc,0.5,0.5,
+"""
+
+
+def test_parse_solver_csv():
+    from anki_poker_master.parser.solver import parse_solver_csv
+
+    utg, btn = parse_solver_csv(io.StringIO(_CSV))
+
+    assert (utg.game, utg.position, utg.scenario) == ("NLHE", "UTG", "Opening")
+    assert utg.notes == "From the solver"
+    assert utg.ranges["Raise"] == Range("AA, AQs, AKo")
+    assert utg.ranges["Call"] == Range.from_objects([])
+    assert utg.frequencies.hand_frequencies(Hand("AKo")) == pytest.approx(
+        {"Raise": 0.7, "Call": 0.3}
+    )
+    assert utg.frequencies.hand_frequencies(Hand("AQs")) == pytest.approx(
+        {"Raise": 0.5, "Fold": 0.5}
+    )
+
+    # Combinations are averaged over the 12 combinations of AKo
+    assert btn.position == "BTN"
+    assert btn.frequencies.hand_frequencies(Hand("AKo")) == pytest.approx(
+        {"Raise": 1.5 / 12, "Call": 0.5 / 12, "Fold": 10 / 12}
+    )
+
+
+def test_parse_solver_csv_is_lazy():
+    from anki_poker_master.parser.solver import parse_solver_csv
+
+    lines = iter(_CSV.splitlines(keepends=True))
+    scenarios = parse_solver_csv(lines)
+
+    assert next(scenarios).position == "UTG"
+    # Only the rows of the first scenario and the first row of the next one
+    # have been read
+    assert next(lines).startswith("NLHE,BTN,Opening,AsKc")
+
+
+def test_parse_solver_csv_pure_strategy():
+    from anki_poker_master.parser.solver import parse_solver_csv
+
+    (scenario,) = parse_solver_csv(
+        io.StringIO("game,position,scenario,hand,Raise\nNLHE,UTG,Opening,AA,1\n")
+    )
+
+    assert scenario.frequencies is None
+    assert scenario.ranges["Raise"] == Range("AA")
+
+
+@pytest.mark.parametrize(
+    "csv_text, err_msg",
+    [
+        ("game,position,hand,Raise\n", "the CSV export has no column 'scenario'"),
+        ("game,position,scenario,hand\n", "the CSV export has no action columns"),
+        (
+            "game,position,scenario,hand,Raise\nNLHE,UTG,Opening,AX,1\n",
+            "line 2: 'AX' is an invalid hand",
+        ),
+        (
+            "game,position,scenario,hand,Raise\nNLHE,UTG,Opening,AA,2\n",
+            "line 2: '2' is an invalid frequency",
+        ),
+        (
+            "game,position,scenario,hand,Raise,Call\nNLHE,UTG,Opening,AA,0.7,0.7\n",
+            "The frequencies of AA add up to more than 100% in scenario "
+            "'NLHE / Opening / UTG'",
+        ),
+        (
+            "game,position,scenario,hand,Raise\n"
+            "NLHE,UTG,Opening,AA,1\n"
+            "NLHE,BTN,Opening,AA,1\n"
+            "NLHE,UTG,Opening,KK,1\n",
+            "line 4: the rows of scenario 'NLHE / Opening / UTG' are not consecutive",
+        ),
+        (
+            "game,position,scenario,hand,Raise\nNLHE,UTG,Opening\n",
+            "line 2: the hand is missing",
+        ),
+        (
+            "game,position,scenario,hand,Raise\nNLHE,UTG,Opening,,1\n",
+            "line 2: the hand is missing",
+        ),
+        (
+            "game,position,scenario,hand,Raise\n"
+            "NLHE,UTG,Opening,AKo,1\n"
+            "NLHE,UTG,Opening,AhKd,0\n",
+            "line 3: the frequencies of AKo are given both for the hand and for its "
+            "combinations",
+        ),
+        (
+            "game,position,scenario,hand,Raise\n"
+            "NLHE,UTG,Opening,AhKd,0\n"
+            "NLHE,UTG,Opening,AKo,1\n",
+            "line 3: the frequencies of AKo are given both for the hand and for its "
+            "combinations",
+        ),
+        (
+            "game,position,scenario,hand,Raise,Call\n"
+            "NLHE,UTG,Opening,AKo,1,0\n"
+            "NLHE,UTG,Opening,AKo,0,1\n",
+            "line 3: 'AKo' is given more than once",
+        ),
+        (
+            "game,position,scenario,hand,Raise\n"
+            "NLHE,UTG,Opening,AhKh,1\n"
+            "NLHE,UTG,Opening,AdKd,1\n"
+            "NLHE,UTG,Opening,AcKc,1\n"
+            "NLHE,UTG,Opening,KhAh,1\n",
+            "line 5: 'KhAh' is given more than once",
+        ),
+    ],
+)
+def test_parse_solver_csv_invalid(csv_text, err_msg):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.solver import parse_solver_csv
+
+    with pytest.raises(ValidationError) as excinfo:
+        list(parse_solver_csv(io.StringIO(csv_text)))
+    assert err_msg in excinfo.value.humanize_error()
+
+
+def test_parse_solver_json():
+    from anki_poker_master.parser.solver import parse_solver_json
+
+    node = {
+        "game": "NLHE",
+        "position": "UTG",
+        "scenario": "Opening",
+        "source": "Solver",
+        "frequencies": {"AA": {"Raise": 1}, "AKo": {"Raise": 0.7, "Call": "30%"}},
+    }
+    json_lines = json.dumps(node) + "\n\n" + json.dumps({**node, "position": "BTN"})
+
+    utg, btn = parse_solver_json(io.StringIO(json_lines))
+
+    assert utg.source == "Solver"
+    assert utg.ranges["Raise"] == Range("AA, AKo")
+    assert utg.frequencies.hand_frequencies(Hand("AKo")) == pytest.approx(
+        {"Raise": 0.7, "Call": 0.3}
+    )
+    assert btn.position == "BTN"
+
+    (scenario,) = parse_solver_json(io.StringIO(json.dumps([node], indent=2)))
+    assert scenario.ranges["Raise"] == Range("AA, AKo")
+
+
+@pytest.mark.parametrize(
+    "json_text, err_msg",
+    [
+        ("{", "line 1: invalid JSON"),
+        ("[1]", "scenario 1: expected a JSON object"),
+        ('{"game": "NLHE"}', "line 1: 'position' is missing or not a string"),
+        (
+            '{"game": "NLHE", "position": "UTG", "scenario": "Opening"}',
+            "line 1: 'frequencies' must map hands to action frequencies",
+        ),
+        (
+            '{"game": "NLHE", "position": "UTG", "scenario": "Opening", '
+            '"frequencies": {"AKo": {"Raise": 1}, "AhKd": {"Raise": 0}}}',
+            "line 1: the frequencies of AKo are given both for the hand and for its "
+            "combinations",
+        ),
+    ],
+)
+def test_parse_solver_json_invalid(json_text, err_msg):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.solver import parse_solver_json
+
+    with pytest.raises(ValidationError) as excinfo:
+        list(parse_solver_json(io.StringIO(json_text)))
+    assert err_msg in excinfo.value.humanize_error()
+
+
+def test_read_solver_file(tmp_path):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.solver import read_solver_file
+
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text(_CSV)
+    assert len(list(read_solver_file(csv_file))) == 2
+
+    with pytest.raises(ValidationError):
+        list(read_solver_file(tmp_path / "export.txt"))
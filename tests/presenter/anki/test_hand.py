@@ -31,3 +31,79 @@ def test_validate_max_number_questions(testdata_dir, golden_dir, pytestconfig):
     hand_split_2 = parse(content_split_history_2.read_text())
     (note_split_2, media_files_split_2) = get_note(hand_split_2)
     assert len(note_split_2.cards) == 6  # 6 questions (study spots)
+
+
+def test_odds_in_answers():
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.presenter.anki.phh import get_note
+
+    hand = parse(
+        """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 Th8c",
+  "d dh p3 ????",
+  "p3 cbr 12",
+  "p1 f",
+  "p2 cc",
+  "d db AhTs8h",
+  "p2 cc",
+  "p3 cbr 20",
+  "p2 cc",
+]
+_apm_villain_range = "22+, AJs+, KQs"
+"""
+    )
+
+    note, _ = get_note(hand, odds=True)
+    note_without_odds, _ = get_note(hand)
+
+    answers = [f for f in note.fields if '<p class="odds">' in f]
+    assert len(answers) == 3
+    assert answers[0].startswith('C<p class="odds">Pot odds: 31% (8 to call, pot 18)')
+    assert all("vs 22+, AJs+, KQs</p>" in a for a in answers)
+    assert not any('<p class="odds">' in f for f in note_without_odds.fields)
+
+
+def test_omaha_note():
+    """
+    Test that the four hole cards of an Omaha hand are shown and that only the
+    pot odds are added to the answers (the equity is only known in hold'em).
+    """
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.presenter.anki.phh import get_note
+
+    hand = parse(
+        """variant = "PO"
+antes = [0, 0, 0]
+blinds_or_straddles = [1, 2, 0]
+min_bet = 2
+starting_stacks = [200, 200, 200]
+actions = [
+  "d dh p1 7c6c5d4d",
+  "d dh p2 ????????",
+  "d dh p3 AsAhKsQd",
+  "p3 cbr 7",
+  "p1 f",
+  "p2 cbr 22",
+  "p3 cc",
+]
+_apm_hero = 3
+"""
+    )
+
+    note, media_files = get_note(hand, odds=True)
+
+    hero_cards = note.fields[3]
+    assert hero_cards.count("<img") == 4
+    assert len(media_files) == 4
+    answers = [f for f in note.fields if '<p class="odds">' in f]
+    # The hole cards of p1 are known, but there is no equity
+    assert answers == [
+        'R 7<p class="odds">Pot odds: 40% (2 to call, pot 3)</p>\n',
+        'C<p class="odds">Pot odds: 33% (15 to call, pot 30)</p>\n',
+    ]
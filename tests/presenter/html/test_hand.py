@@ -349,3 +349,108 @@ def test_long_history(testdata_dir, golden_dir, pytestconfig):
         golden_dir / "question.html",
         _create_html_content(content),
     )
+
+
+def test_sprite(golden_dir, pytestconfig):
+    """
+    In sprite mode the hero and board cards are drawn from the card sprite
+    sheet instead of being separate images.
+    """
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.presenter.html.phh import get_question
+
+    content = """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 Th8c",
+  "d dh p3 ????",
+  "p3 cbr 12",
+  "p1 f",
+  "p2 cc",
+  "d db AhTs8h",
+  "p2 cc",
+  "p3 cbr 20",
+  "p2 cc # apm study",
+]
+"""
+    hand = parse(content)
+    content = get_question(hand, 1, 0, sprite=True)
+
+    assert "<img" not in content
+
+    compare_or_update_golden(
+        pytestconfig,
+        golden_dir / "question.html",
+        _create_html_content(content),
+    )
+
+
+def test_get_questions_only():
+    """
+    Rendering all questions of a hand at once must give exactly the same
+    result as rendering each question on its own.
+    """
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.presenter.html.phh import (
+        get_question_only,
+        get_questions_only,
+    )
+
+    content = """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 Th8c",
+  "d dh p3 ????",
+  "p3 cbr 12",
+  "p1 f",
+  "p2 cc",
+  "d db AhTs8h",
+  "p2 cc",
+  "p3 cbr 20",
+  "p2 cc",
+  "d db 4s",
+  "p2 cc",
+  "p3 cbr 20",
+  "p2 cbr 40",
+  "p3 cbr 80",
+  "p2 cbr 160",
+  "p3 cbr 320",
+  "p2 cc",
+  "d db Tc",
+  "p2 cbr 68",
+  "p3 f",
+]
+"""
+    hand = parse(content)
+    expected = [
+        get_question_only(hand, i, j)
+        for i, street in enumerate(hand.streets)
+        for j in range(len(street.questions))
+    ]
+    assert len(expected) == 8
+    assert get_questions_only(hand) == expected
+
+
+def test_get_odds():
+    from anki_poker_master.model.hand_odds import SpotOdds
+    from anki_poker_master.presenter.html.phh import get_odds
+
+    assert get_odds(SpotOdds(150, 50, 0.412, "QQ+, AKs")) == (
+        '<p class="odds">Pot odds: 25% (50 to call, pot 150)<br>\n'
+        "Equity: 41% vs QQ+, AKs</p>\n"
+    )
+    assert get_odds(SpotOdds(150, 0, 0.5, "JsJd")) == (
+        '<p class="odds">Equity: 50% vs JsJd</p>\n'
+    )
+    assert get_odds(SpotOdds(1500.5, 300, None, "")) == (
+        '<p class="odds">Pot odds: 17% (300 to call, pot 1\u2009500.5)</p>\n'
+    )
+    assert get_odds(SpotOdds(None, None, None, "")) == ""
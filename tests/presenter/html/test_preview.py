@@ -0,0 +1,129 @@
+"""
+Test the preview of the cards in a web browser.
+"""
+
+import os
+import pathlib
+
+import pytest
+
+_SCENARIOS = """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+      Raise: 88+, AK
+"""
+
+_PHH_FILE = (
+    pathlib.Path(__file__).parent.parent.parent
+    / "parser"
+    / "testdata"
+    / "test_phh"
+    / "test_parser_example_files_success"
+    / "dwan-ivey-2009.phh"
+)
+
+
+@pytest.fixture
+def preview(tmp_path):
+    from anki_poker_master.presenter.html.preview import Preview
+
+    scenarios_file = tmp_path / "scenarios.yml"
+    scenarios_file.write_text(_SCENARIOS)
+    return Preview(str(scenarios_file), [_PHH_FILE])
+
+
+def test_index(preview):
+    response = preview.render("/")
+    assert response.status == 200
+    assert response.content_type.startswith("text/html")
+    body = response.body.decode("utf-8")
+    assert '<a href="/scenarios/0">NLHE / Opening / UTG</a>' in body
+    assert f'<a href="/hands/0">{_PHH_FILE}</a>' in body
+
+
+def test_scenario(preview):
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.presenter.anki.preflop_scenario import (
+        html_full,
+        html_legend,
+        html_top_left_quadrant_blank,
+    )
+
+    (scenario,) = parse_scenario_yml(_SCENARIOS)
+
+    body = preview.render("/scenarios/0").body.decode("utf-8")
+    assert html_full(scenario) in body
+    assert html_legend(scenario) in body
+    assert '<a href="/scenarios/0/top-left">' in body
+
+    body = preview.render("/scenarios/0/top-left").body.decode("utf-8")
+    assert html_top_left_quadrant_blank(scenario) in body
+    assert body.index("<hr id='answer'>") < body.index(html_full(scenario))
+
+
+def test_hand(preview):
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.presenter.html.phh import get_question
+
+    hand = parse(_PHH_FILE.read_text())
+
+    body = preview.render("/hands/0").body.decode("utf-8")
+    assert '<a href="/hands/0/1/0">' in body
+
+    body = preview.render("/hands/0/1/0").body.decode("utf-8")
+    assert get_question(hand, 1, 0) in body
+    assert hand.streets[1].questions[0].answer in body
+
+
+def test_static_files(preview):
+    from anki_poker_master import helper
+
+    response = preview.render("/default.css")
+    assert response.status == 200
+    assert response.body.decode("utf-8") == helper.default_css()
+    assert preview.render("/default.js").status == 200
+    response = preview.render("/hands/0/apm-card-small-As.png")
+    assert response.status == 200
+    assert response.content_type == "image/png"
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/nope",
+        "/scenarios/1",
+        "/scenarios/0/middle",
+        "/scenarios/x",
+        "/hands/1",
+        "/hands/0/9/0",
+        "/hands/0/1",
+        "/x/apm-card-small-XX.png",
+    ],
+)
+def test_not_found(preview, path):
+    assert preview.render(path).status == 404
+
+
+def test_changed_file_is_rendered_again(preview, tmp_path):
+    scenarios_file = tmp_path / "scenarios.yml"
+    assert "Opening" in preview.render("/scenarios/0").body.decode("utf-8")
+
+    scenarios_file.write_text(_SCENARIOS.replace("Opening", "Open raise"))
+    # make sure the modification time changes even on coarse file systems
+    stat = scenarios_file.stat()
+    os.utime(scenarios_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    body = preview.render("/scenarios/0").body.decode("utf-8")
+    assert "Open raise" in body
+    assert "Opening" not in body
+
+
+def test_invalid_file(preview, tmp_path):
+    (tmp_path / "scenarios.yml").write_text("- game: 1\n  ranges: 7\n")
+
+    response = preview.render("/scenarios/0")
+
+    assert response.status == 500
+    assert "Error" in response.body.decode("utf-8")
@@ -0,0 +1,93 @@
+"""
+Test the export of the scenarios and hands as a static website.
+"""
+
+import pathlib
+
+import pytest
+
+_SCENARIOS = """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+      Raise: 88+, AK
+- game: NLHE
+  position: BTN
+  scenario: Opening
+  ranges:
+      Raise: 22+, A2s+
+"""
+
+_PHH_DIR = (
+    pathlib.Path(__file__).parent.parent.parent
+    / "parser"
+    / "testdata"
+    / "test_phh"
+    / "test_parser_example_files_success"
+)
+
+_PHH_FILES = [_PHH_DIR / "dwan-ivey-2009.phh", _PHH_DIR / "00-15-36.phh"]
+
+
+@pytest.fixture
+def scenarios_file(tmp_path):
+    f = tmp_path / "scenarios.yml"
+    f.write_text(_SCENARIOS)
+    return f
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_export_site(tmp_path, scenarios_file, max_workers):
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.presenter.anki.preflop_scenario import html_full
+    from anki_poker_master.presenter.html.phh import get_questions_only
+    from anki_poker_master.presenter.html.site import export_site
+
+    out = tmp_path / "site"
+    nr_pages = export_site(out, scenarios_file, _PHH_FILES, max_workers=max_workers)
+
+    assert nr_pages == 5
+    index = (out / "index.html").read_text()
+    assert '<a href="scenario-0.html">NLHE / Opening / UTG</a>' in index
+    assert '<a href="scenario-1.html">NLHE / Opening / BTN</a>' in index
+    assert '<a href="hand-1.html">' in index
+    assert 'href="default.css"' in index
+
+    scenarios = parse_scenario_yml(_SCENARIOS)
+    assert html_full(scenarios[1]) in (out / "scenario-1.html").read_text()
+
+    hand = parse(_PHH_FILES[0].read_text())
+    page = (out / "hand-0.html").read_text()
+    for question in get_questions_only(hand):
+        assert question in page
+    assert hand.streets[1].questions[0].answer in page
+
+    # The assets are shared by all pages
+    assert (out / "default.css").is_file()
+    assert (out / "default.js").is_file()
+    for c in hand.hero_cards + hand.streets[-1].board:
+        assert (out / f"apm-card-small-{c}.png").is_file()
+
+
+def test_export_site_sprite(tmp_path):
+    from anki_poker_master.presenter.html.card import SMALL_SPRITE
+    from anki_poker_master.presenter.html.site import export_site
+
+    out = tmp_path / "site"
+    export_site(out, phh_files=_PHH_FILES[:1], sprite=True)
+
+    assert "apm-card-small" in (out / "hand-0.html").read_text()
+    assert sorted(f.name for f in out.glob("*.png")) == [SMALL_SPRITE]
+
+
+def test_export_site_invalid_hand(tmp_path):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.presenter.html.site import export_site
+
+    invalid_file = tmp_path / "invalid.phh"
+    invalid_file.write_text("variant = 'NT'\n")
+
+    with pytest.raises(ValidationError, match="invalid.phh"):
+        export_site(tmp_path / "site", phh_files=[_PHH_FILES[0], invalid_file])
@@ -87,6 +87,78 @@ _apm_hero = 2
     assert os.path.getsize(deck_path) > 0
 
 
+def test_decks_with_sprite_use_single_media_file(tmp_path):
+    """
+    In sprite mode all cards are drawn from one sprite sheet per card size so
+    the packages contain a single media file.
+    """
+    from anki_poker_master.presenter.anki import write_decks_to_file
+    from anki_poker_master.presenter.anki.preflop_scenario import create_decks
+    from anki_poker_master.presenter.anki.phh import get_deck
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.model import PreflopScenario
+
+    scenario = PreflopScenario(
+        {"Raise": Range("88+"), "Call": Range("A8+")}, "UTG", "Opening", "NLHE"
+    )
+    decks, media_files = create_decks([scenario], sprite=True)
+    assert media_files == {"_apm-card-sprite.png"}
+    for deck in decks:
+        for note in deck.notes:
+            assert "<img" not in note.fields[0]
+    deck_path = os.path.join(tmp_path, "range.apkg")
+    write_decks_to_file(decks, media_files, deck_path)
+    assert os.path.getsize(deck_path) > 0
+
+    hand = parse(
+        """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = ["d dh p1 ????", "d dh p2 Th8c", "d dh p3 ????", "p3 cbr 12", "p1 f",
+  "p2 cc", "d db AhTs8h", "p2 cc"]
+"""
+    )
+    deck, media_files = get_deck([hand], sprite=True)
+    assert media_files == {"_apm-card-small-sprite.png"}
+    deck_path = os.path.join(tmp_path, "hand.apkg")
+    write_decks_to_file([deck], media_files, deck_path)
+    assert os.path.getsize(deck_path) > 0
+
+
+def test_mixed_strategy_answers():
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.presenter.anki.preflop_scenario import create_decks
+
+    scenarios = parse_scenario_yml(
+        """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+, AKo:0.7
+    Call: AKo:0.3
+"""
+    )
+    (deck_standard, deck_detailed), _ = create_decks(scenarios)
+
+    answers = {
+        note.fields[0].split("How should you play ")[1].split("?")[0]: note.fields[1]
+        for note in deck_detailed.notes
+    }
+    assert (
+        answers["AKo"] == "You should <b>Raise</b> 70% and <b>Call</b> 30% of the time."
+    )
+    assert answers["AA"] == "You should <b>Raise</b>."
+    row_answers = [n.fields[1] for n in deck_standard.notes if "AXo?" in n.fields[0]]
+    assert row_answers == [
+        "<b>Fold:</b> AQo-"
+        "<br><b>Raise:</b> AKo"
+        "<br><b>Mixed:</b> AKo (Raise 70%, Call 30%)"
+    ]
+
+
 def test_row_question_cards():
     """
     Row questions are the ones that ask "What should you do with KXs?" and
@@ -237,3 +309,26 @@ def test_row_question_cards():
 
     for q, tested in was_tested.items():
         assert tested, f"Question '{q}' was not tested"
+
+
+def test_analytics_in_notes():
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.presenter.anki.preflop_scenario import create_decks
+
+    scenarios = parse_scenario_yml(
+        """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+
+  notes: Tight
+"""
+    )
+    (deck_standard, deck_detailed), _ = create_decks(scenarios, analytics=True)
+    notes = deck_standard.notes + deck_detailed.notes
+    assert all("Tight<table class='analytics'>" in "".join(n.fields) for n in notes)
+
+    (deck_standard, deck_detailed), _ = create_decks(scenarios)
+    notes = deck_standard.notes + deck_detailed.notes
+    assert not any("analytics" in "".join(n.fields) for n in notes)
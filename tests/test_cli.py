@@ -1,3 +1,5 @@
+import pathlib
+
 import pytest
 
 
@@ -83,6 +85,25 @@ def test_generate_deck(capsys, tmp_path):
     assert pkg_path.stat().st_size > 0
 
 
+def test_generate_deck_from_solver_export(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    export_file = tmp_path / "export.csv"
+    export_file.write_text(
+        "game,position,scenario,hand,Raise,Call\n"
+        "NLHE,UTG,Opening,AA,1,0\n"
+        "NLHE,UTG,Opening,AKo,0.7,0.3\n"
+    )
+    pkg_path = tmp_path / "test.apkg"
+    main_with_args(["range", "-s", str(export_file), "-o", str(pkg_path)])
+    assert pkg_path.exists()
+
+    export_file.write_text("game,position,scenario,hand,Raise\nNLHE,UTG,Opening,AX,1\n")
+    with pytest.raises(SystemExit):
+        main_with_args(["range", "-s", str(export_file), "-o", str(tmp_path / "x")])
+    assert "line 2: 'AX' is an invalid hand" in capsys.readouterr().out
+
+
 def test_generate_deck_only_if_it_doesnt_exist(capsys, tmp_path):
     from anki_poker_master.cli import main_with_args
 
@@ -182,3 +203,536 @@ def test_generate_deck_with_custom_range_color(capsys, tmp_path):
     assert captured == ("", "")
     assert pkg_path.exists()
     assert pkg_path.stat().st_size > 0
+
+
+_PHH_EXAMPLE_DIR = (
+    pathlib.Path(__file__).parent
+    / "parser"
+    / "testdata"
+    / "test_phh"
+    / "test_parser_example_files_success"
+)
+
+
+def test_postflop_example(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    scenarios_file = tmp_path / "postflop.yml"
+    main_with_args(["postflop", "-s", str(scenarios_file), "-e"])
+    assert "Example postflop scenarios file written to" in capsys.readouterr().out
+
+    pkg_path = tmp_path / "postflop.apkg"
+    main_with_args(["postflop", "-s", str(scenarios_file), "-o", str(pkg_path)])
+    assert capsys.readouterr() == ("", "")
+    assert pkg_path.stat().st_size > 0
+
+    scenarios_file.write_text("- board: Ah 7c\n")
+    with pytest.raises(SystemExit) as e:
+        main_with_args(["postflop", "-s", str(scenarios_file), "-o", str(pkg_path)])
+    assert e.value.code == 1
+    assert "already exists" in capsys.readouterr().out
+    with pytest.raises(SystemExit) as e:
+        main_with_args(
+            ["postflop", "-s", str(scenarios_file), "-o", str(tmp_path / "x.apkg")]
+        )
+    assert e.value.code == 1
+    assert "'Ah 7c' is an invalid board" in capsys.readouterr().out
+
+
+def test_hand_compile(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+    from anki_poker_master.parser import hand_cache
+
+    cache_path = tmp_path / "hands"
+    main_with_args(
+        ["--verbose", "hand", "compile", "-o", str(cache_path), str(_PHH_EXAMPLE_DIR)]
+    )
+    captured = capsys.readouterr()
+    num_hands = len(list(_PHH_EXAMPLE_DIR.glob("*.phh")))
+    assert f"{num_hands} hands written to" in captured.out
+    assert not cache_path.exists()
+    cache_path = tmp_path / "hands.apmh"
+    assert len(hand_cache.loads(cache_path.read_bytes())) == num_hands
+
+
+def test_hand_compile_only_if_it_doesnt_exist(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    cache_path = tmp_path / "hands.apmh"
+    cache_path.write_text("existing file")
+    with pytest.raises(SystemExit) as e:
+        main_with_args(
+            ["hand", "compile", "-o", str(cache_path), str(_PHH_EXAMPLE_DIR)]
+        )
+    captured = capsys.readouterr()
+    assert "already exists" in captured.out
+    assert cache_path.read_text() == "existing file"
+
+
+def test_hand_compile_invalid_hand(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    invalid_file = tmp_path / "invalid.phh"
+    invalid_file.write_text("not a hand")
+    cache_path = tmp_path / "hands.apmh"
+    with pytest.raises(SystemExit) as e:
+        main_with_args(["hand", "compile", "-o", str(cache_path), str(invalid_file)])
+    assert e.value.code == 1
+    assert "Error parsing PHH" in capsys.readouterr().out
+    assert not cache_path.exists()
+
+
+def test_generate_hand_deck_from_compiled_hands(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    cache_path = tmp_path / "hands.apmh"
+    main_with_args(["hand", "compile", "-o", str(cache_path), str(_PHH_EXAMPLE_DIR)])
+    pkg_from_cache = tmp_path / "from_cache.apkg"
+    main_with_args(["hand", "-o", str(pkg_from_cache), str(cache_path)])
+    pkg_from_phh = tmp_path / "from_phh.apkg"
+    main_with_args(["hand", "-o", str(pkg_from_phh), str(_PHH_EXAMPLE_DIR)])
+
+    assert pkg_from_cache.stat().st_size > 0
+    assert pkg_from_cache.stat().st_size == pkg_from_phh.stat().st_size
+
+
+def test_generate_hand_deck_with_odds(tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    pkg_path = tmp_path / "odds.apkg"
+    main_with_args(["hand", "--odds", "-o", str(pkg_path), str(_PHH_EXAMPLE_DIR)])
+
+    assert pkg_path.stat().st_size > 0
+
+
+def test_hand_validate(capsys, tmp_path):
+    import json
+    from anki_poker_master.cli import main_with_args
+
+    ok_file = _PHH_EXAMPLE_DIR / "dwan-ivey-2009.phh"
+    bad_file = tmp_path / "bad.phh"
+    bad_file.write_text("")
+
+    main_with_args(["hand", "validate", "-j", "1", str(ok_file)])
+    captured = capsys.readouterr()
+    assert [json.loads(line) for line in captured.out.splitlines()] == [
+        {"file": str(ok_file), "status": "ok"}
+    ]
+
+    with pytest.raises(SystemExit) as e:
+        main_with_args(["hand", "validate", str(ok_file), str(tmp_path)])
+    assert e.value.code == 1
+    captured = capsys.readouterr()
+    assert [json.loads(line) for line in captured.out.splitlines()] == [
+        {"file": str(ok_file), "status": "ok"},
+        {"file": str(bad_file), "status": "error", "message": "Invalid PHH (empty)"},
+    ]
+
+
+def test_hand_index_and_query(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    index_path = tmp_path / "hands.apmi"
+    main_with_args(
+        ["hand", "index", "-j", "1", "-o", str(index_path), str(_PHH_EXAMPLE_DIR)]
+    )
+    captured = capsys.readouterr()
+    num_hands = len(list(_PHH_EXAMPLE_DIR.glob("*.phh")))
+    assert f"{num_hands} hands in {index_path}" in captured.out
+
+    pkg_from_index = tmp_path / "from_index.apkg"
+    main_with_args(
+        ["hand", "-q", "3bet pot", "-o", str(pkg_from_index), str(index_path)]
+    )
+    pkg_from_phh = tmp_path / "from_phh.apkg"
+    main_with_args(
+        ["hand", "-q", "3bet pot", "-o", str(pkg_from_phh), str(_PHH_EXAMPLE_DIR)]
+    )
+
+    assert _read_apkg_decks_and_note_count(pkg_from_index)[1] == 2
+    assert _read_apkg_decks_and_note_count(pkg_from_phh)[1] == 2
+
+
+def test_hand_invalid_query(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    pkg_path = tmp_path / "hands.apkg"
+    with pytest.raises(SystemExit) as e:
+        main_with_args(
+            ["hand", "-q", "hero XYZ", "-o", str(pkg_path), str(_PHH_EXAMPLE_DIR)]
+        )
+    assert e.value.code == 1
+    assert "'XYZ' is not a range" in capsys.readouterr().out
+    assert not pkg_path.exists()
+
+
+@pytest.mark.parametrize("stratify_by", [[], ["--stratify-by", "street"]])
+def test_generate_hand_deck_with_selected_hands(tmp_path, stratify_by):
+    from anki_poker_master.cli import main_with_args
+
+    pkg_path = tmp_path / "selected.apkg"
+    main_with_args(
+        ["hand", "--select", "2", *stratify_by, "-o", str(pkg_path)]
+        + [str(_PHH_EXAMPLE_DIR)]
+    )
+
+    assert _read_apkg_decks_and_note_count(pkg_path)[1] == 2
+
+
+def test_stratify_by_requires_select(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    with pytest.raises(SystemExit) as e:
+        main_with_args(
+            ["hand", "--stratify-by", "title", "-o", str(tmp_path / "x.apkg")]
+            + [str(_PHH_EXAMPLE_DIR)]
+        )
+    assert e.value.code == 1
+    assert "--select" in capsys.readouterr().out
+
+
+def test_hand_compile_key_spots(tmp_path):
+    from anki_poker_master.cli import main_with_args
+    from anki_poker_master.parser import hand_cache
+
+    def nr_questions(*options):
+        cache_path = tmp_path / f"hands{len(options)}.apmh"
+        main_with_args(
+            ["hand", "compile", *options, "-o", str(cache_path)]
+            + [str(_PHH_EXAMPLE_DIR)]
+        )
+        hands = hand_cache.loads(cache_path.read_bytes())
+        return sum(len(s.questions) for h in hands for s in h.streets)
+
+    assert nr_questions() == 21
+    assert nr_questions("--key-spots") == 18
+    assert nr_questions("--key-spots", "--spot-rules", "all-in,facing-raise") == 7
+
+
+def test_hand_from_site_histories(capsys, tmp_path):
+    import json
+    from anki_poker_master.cli import main_with_args
+    from anki_poker_master.parser import hand_cache
+
+    site_dir = pathlib.Path(__file__).parent / "parser" / "testdata"
+    site_dir = site_dir / "test_site_history"
+
+    cache_path = tmp_path / "hands.apmh"
+    main_with_args(["hand", "compile", "-o", str(cache_path), str(site_dir)])
+    captured = capsys.readouterr()
+    # The hand that can't be converted is skipped
+    assert "pokerstars.txt:82: newbie posts a blind outside" in captured.out
+    assert "4 hands written to" in captured.out
+    hands = hand_cache.loads(cache_path.read_bytes())
+    assert sorted(h.source for h in hands) == [
+        "GGPoker Hand #RC1234567890",
+        "PokerStars Hand #233043339012",
+        "PokerStars Hand #233043339013",
+        "PokerStars Hand #233043339014",
+    ]
+
+    pkg_path = tmp_path / "hands.apkg"
+    main_with_args(
+        ["hand", "-j", "1", "-o", str(pkg_path), str(site_dir / "ggpoker.txt")]
+    )
+    assert pkg_path.stat().st_size > 0
+
+    with pytest.raises(SystemExit) as e:
+        main_with_args(["hand", "validate", "-j", "1", str(site_dir)])
+    assert e.value.code == 1
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(r["status"] for r in results) == ["error", "ok", "ok", "ok", "ok"]
+
+
+def test_invalid_spot_rules(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    with pytest.raises(SystemExit) as e:
+        main_with_args(
+            ["hand", "--key-spots", "--spot-rules", "all-in,bluff"]
+            + ["-o", str(tmp_path / "x.apkg"), str(_PHH_EXAMPLE_DIR)]
+        )
+    assert e.value.code == 1
+    assert "unknown study spot rules bluff" in capsys.readouterr().out
+    assert not (tmp_path / "x.apkg").exists()
+
+
+def _read_apkg_decks_and_note_count(pkg_path):
+    """
+    Return the names of the decks (excluding "Default") and the number of
+    notes in the Anki package.
+    """
+    import json
+    import sqlite3
+    import zipfile
+
+    with zipfile.ZipFile(pkg_path) as z:
+        db_path = pkg_path.parent / f"{pkg_path.stem}.anki2"
+        db_path.write_bytes(z.read("collection.anki2"))
+    conn = sqlite3.connect(db_path)
+    try:
+        (decks_json,) = conn.execute("SELECT decks FROM col").fetchone()
+        (note_count,) = conn.execute("SELECT COUNT(*) FROM notes").fetchone()
+    finally:
+        conn.close()
+    deck_names = sorted(
+        d["name"] for d in json.loads(decks_json).values() if d["name"] != "Default"
+    )
+    return deck_names, note_count
+
+
+def test_generate_hand_deck_shard_by_directory(capsys, tmp_path, monkeypatch):
+    import shutil
+    from anki_poker_master.cli import main_with_args
+
+    for d, names in (("a", ["00-15-36", "00-18-39"]), ("b", ["dwan-ivey-2009"])):
+        (tmp_path / "hands" / d).mkdir(parents=True)
+        for name in names:
+            shutil.copy(
+                _PHH_EXAMPLE_DIR / f"{name}.phh", tmp_path / "hands" / d / f"{name}.phh"
+            )
+    monkeypatch.chdir(tmp_path)
+
+    main_with_args(
+        ["hand", "--shard-by", "directory", "-o", "out.apkg", "-j", "2", "hands"]
+    )
+
+    captured = capsys.readouterr()
+    assert "2 hands written to out-hands_a.apkg" in captured.out
+    assert "1 hands written to out-hands_b.apkg" in captured.out
+    assert not (tmp_path / "out.apkg").exists()
+    assert _read_apkg_decks_and_note_count(tmp_path / "out-hands_a.apkg") == (
+        ["AnkiPokerMaster::HandHistory::hands::a"],
+        2,
+    )
+    assert _read_apkg_decks_and_note_count(tmp_path / "out-hands_b.apkg") == (
+        ["AnkiPokerMaster::HandHistory::hands::b"],
+        1,
+    )
+
+
+def test_generate_hand_deck_shards_with_the_same_name(capsys, tmp_path, monkeypatch):
+    import shutil
+    from anki_poker_master.cli import main_with_args
+
+    # Both directories are "hands_a_b" in the name of a file
+    for d, names in (("a/b", ["00-15-36", "00-18-39"]), ("a_b", ["dwan-ivey-2009"])):
+        (tmp_path / "hands" / d).mkdir(parents=True)
+        for name in names:
+            shutil.copy(
+                _PHH_EXAMPLE_DIR / f"{name}.phh", tmp_path / "hands" / d / f"{name}.phh"
+            )
+    monkeypatch.chdir(tmp_path)
+
+    main_with_args(["hand", "--shard-by", "directory", "-o", "out.apkg", "hands"])
+
+    assert sorted(p.name for p in tmp_path.glob("*.apkg")) == [
+        "out-hands_a_b.apkg",
+        "out-hands_a_b_2.apkg",
+    ]
+    note_counts = sorted(
+        _read_apkg_decks_and_note_count(p) for p in tmp_path.glob("*.apkg")
+    )
+    assert note_counts == [
+        (["AnkiPokerMaster::HandHistory::hands::a::b"], 2),
+        (["AnkiPokerMaster::HandHistory::hands::a_b"], 1),
+    ]
+
+
+def test_generate_hand_deck_shard_by_title_and_max_notes(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    main_with_args(
+        [
+            "hand",
+            "--shard-by",
+            "title",
+            "--max-notes",
+            "1",
+            "-o",
+            str(tmp_path / "out"),
+            str(_PHH_EXAMPLE_DIR),
+        ]
+    )
+
+    title = "NLHE_50_000_100_000_ante_30_000"
+    for i in (1, 2):
+        decks, note_count = _read_apkg_decks_and_note_count(
+            tmp_path / f"out-{title}-{i}.apkg"
+        )
+        # format_n() separates thousands with thin spaces
+        assert decks == [
+            "AnkiPokerMaster::HandHistory::NLHE 50\u2009000/100\u2009000 (ante 30\u2009000)"
+        ]
+        assert note_count == 1
+    assert len(list(tmp_path.glob("*.apkg"))) == 5
+
+
+def test_generate_hand_deck_only_if_it_doesnt_exist(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    (tmp_path / "out.apkg").write_text("existing file")
+    invalid_file = tmp_path / "invalid.phh"
+    invalid_file.write_text("not a hand")
+    # The hands aren't read if the package already exists
+    with pytest.raises(SystemExit) as e:
+        main_with_args(["hand", "-o", str(tmp_path / "out"), str(invalid_file)])
+    assert e.value.code == 1
+    assert (
+        capsys.readouterr().out == f"The file {tmp_path / 'out.apkg'} already exists.\n"
+    )
+
+
+def test_generate_hand_deck_shards_only_if_they_dont_exist(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    (tmp_path / "out-2.apkg").write_text("existing file")
+    with pytest.raises(SystemExit) as e:
+        main_with_args(
+            [
+                "hand",
+                "--max-notes",
+                "3",
+                "-o",
+                str(tmp_path / "out"),
+                str(_PHH_EXAMPLE_DIR),
+            ]
+        )
+    captured = capsys.readouterr()
+    assert "out-2.apkg already exists" in captured.out
+    assert not (tmp_path / "out-1.apkg").exists()
+
+
+def test_export_html(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    scenarios_file = tmp_path / "scenarios.yml"
+    main_with_args(["range", "-e", "-s", str(scenarios_file)])
+    out = tmp_path / "site"
+    phh_file = _PHH_EXAMPLE_DIR / "dwan-ivey-2009.phh"
+    main_with_args(
+        ["export-html", "-s", str(scenarios_file), "-o", str(out), str(phh_file)]
+    )
+    assert (out / "index.html").is_file()
+    assert (out / "hand-0.html").is_file()
+    assert (out / "scenario-0.html").is_file()
+
+    # Refuse to write into a directory that is not empty
+    with pytest.raises(SystemExit) as e:
+        main_with_args(["export-html", "-o", str(out), str(phh_file)])
+    assert e.value.code == 1
+    assert "already exists" in capsys.readouterr().out
+
+
+def test_range_diff(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    old_file = tmp_path / "old.yml"
+    old_file.write_text(
+        """
+- game: NLHE
+  position: CO
+  scenario: Open
+  ranges:
+      Raise: 55+
+"""
+    )
+    new_file = tmp_path / "new.yml"
+    new_file.write_text(
+        """
+- game: NLHE
+  position: CO
+  scenario: Open
+  ranges:
+      Raise: 44+
+"""
+    )
+    report = tmp_path / "diff.html"
+
+    main_with_args(["range", "diff", "-o", str(report), str(old_file), str(new_file)])
+
+    assert capsys.readouterr().out == (
+        "NLHE / Open / CO\n"
+        "    Fold: 95.5% -> 95.0% (-0.5)\n"
+        "    Raise: 4.5% -> 5.0% (+0.5)\n"
+        "    Changed hands: 44 (Fold -> Raise)\n"
+    )
+    assert 'title="Fold → Raise">44</td>' in report.read_text()
+
+    main_with_args(["range", "diff", str(old_file), str(old_file)])
+    assert capsys.readouterr().out == "The ranges are the same.\n"
+
+
+def test_generate_deck_with_analytics(tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    scenarios_file = tmp_path / "scenarios.yml"
+    scenarios_file.write_text(
+        """
+- game: NLHE
+  position: BB
+  scenario: vs BTN open
+  villain_range: 22+, A2s+, ATo+
+  ranges:
+    Call: 22+, AJo+
+""".lstrip()
+    )
+    pkg_path = tmp_path / "test.apkg"
+    main_with_args(
+        ["range", "--analytics", "-s", str(scenarios_file), "-o", str(pkg_path)]
+    )
+    assert pkg_path.exists()
+
+
+def test_range_push_fold(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    pkg_path = tmp_path / "push_fold.apkg"
+    main_with_args(
+        [
+            "range",
+            "push-fold",
+            "--stacks",
+            "1-3,10",
+            "--players",
+            "2",
+            "--calling-ranges",
+            "-o",
+            str(pkg_path),
+        ]
+    )
+    assert capsys.readouterr() == ("", "")
+    assert pkg_path.stat().st_size > 0
+
+    with pytest.raises(SystemExit) as e:
+        main_with_args(["range", "push-fold", "-o", str(pkg_path)])
+    assert e.value.code == 1
+    assert "already exists" in capsys.readouterr().out
+
+    for args in (
+        ["--stacks", "a-b"],
+        ["--players", "12"],
+        ["--stacks", "1", "--ante", "0.125"],
+    ):
+        with pytest.raises(SystemExit) as e:
+            main_with_args(
+                ["range", "push-fold", "-o", str(tmp_path / "x.apkg")] + args
+            )
+        assert e.value.code == 1
+        assert "Invalid push/fold chart" in capsys.readouterr().out
+
+
+def test_range_push_fold_with_ante(capsys, tmp_path):
+    from anki_poker_master.cli import main_with_args
+
+    # The example of the documentation
+    pkg_path = tmp_path / "push_fold.apkg"
+    main_with_args(
+        "range push-fold --stacks 1-25 --players 6 --ante 0.125 -o".split()
+        + [str(pkg_path)]
+    )
+    assert capsys.readouterr() == (
+        "Skipped the stack depths below the big blind and the ante: 1BB\n",
+        "",
+    )
+    assert pkg_path.stat().st_size > 0
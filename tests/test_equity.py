@@ -0,0 +1,168 @@
+import pytest
+from poker.hand import Hand
+
+
+def test_table_hands():
+    from anki_poker_master.equity import TABLE_HANDS
+
+    assert len(set(TABLE_HANDS)) == 169
+    assert TABLE_HANDS[:3] == ["AA", "AKs", "AQs"]
+    assert TABLE_HANDS[13:15] == ["AKo", "KK"]
+    assert TABLE_HANDS[-1] == "22"
+
+
+@pytest.mark.parametrize("hand, nr_combos", [("AA", 6), ("AKs", 4), ("AKo", 12)])
+def test_hand_combos(hand, nr_combos):
+    from anki_poker_master.equity import hand_combos
+
+    combos = hand_combos(hand)
+    assert len(combos) == len(set(combos)) == nr_combos
+    assert all(a != b for a, b in combos)
+
+
+@pytest.mark.parametrize(
+    "hand, villain_hand, expected",
+    [
+        ("AA", "KK", 0.82),
+        ("AKo", "22", 0.47),
+        ("AKs", "QJs", 0.63),
+        ("72o", "AA", 0.12),
+        ("JTs", "JTs", 0.5),
+    ],
+)
+def test_preflop_equity(hand, villain_hand, expected):
+    from anki_poker_master.equity import preflop_equity_table
+
+    table = preflop_equity_table()
+    equity = table.equity(Hand(hand), Hand(villain_hand))
+    assert equity == pytest.approx(expected, abs=0.02)
+    assert equity + table.equity(Hand(villain_hand), Hand(hand)) == pytest.approx(
+        1, abs=1e-4
+    )
+
+
+def test_range_equity():
+    from anki_poker_master.equity import preflop_equity_table
+
+    table = preflop_equity_table()
+    equity = table.range_equity({Hand("AA"): 1.0}, {Hand("KK"): 1.0, Hand("AKo"): 0.5})
+    # 6 x 6 matchups against KK and 6 x 6 against AKo (the AKo combos that
+    # contain none of the two aces), the latter with half the weight
+    expected = (
+        36 * table.equity(Hand("AA"), Hand("KK"))
+        + 18 * table.equity(Hand("AA"), Hand("AKo"))
+    ) / 54
+    assert equity == pytest.approx(expected)
+
+
+def test_nr_matchups():
+    from anki_poker_master.equity import preflop_equity_table
+
+    table = preflop_equity_table()
+    with pytest.raises(ValueError):
+        table.range_equity({Hand("AA"): 1.0}, {})
+    # A hand against itself splits the pot on average
+    assert table.range_equity({Hand("AKs"): 1.0}, {Hand("AKs"): 1.0}) == pytest.approx(
+        0.5, abs=1e-4
+    )
+
+
+def test_matchups():
+    from anki_poker_master.equity import TABLE_HANDS, preflop_equity_table
+
+    table = preflop_equity_table()
+    nr_matchups, equities = table.matchups("AA")
+    assert len(nr_matchups) == len(equities) == 169
+    # 6 combinations of AA against 1 combination of AA and 6*6 of KK
+    assert nr_matchups[TABLE_HANDS.index("AA")] == 6
+    assert nr_matchups[TABLE_HANDS.index("KK")] == 36
+    # AA against the 1225 combinations left, 6 times
+    assert sum(nr_matchups) == 6 * 1225
+    assert equities[TABLE_HANDS.index("KK")] == table.equity(Hand("AA"), Hand("KK"))
+
+
+@pytest.mark.parametrize(
+    "hero_cards, board, villain_cards, expected",
+    [
+        # River: the flush wins, two pair loses and the board plays
+        (("Ah", "Kh"), ("Qh", "7c", "2h", "3d", "9h"), (("Js", "Jd"),), 1.0),
+        (("Ah", "Kh"), ("Qh", "7c", "2h", "3d", "9s"), (("Js", "Jd"),), 0.0),
+        (("2c", "3c"), ("Ah", "Ad", "As", "Ac", "Kh"), (("4d", "5d"),), 0.5),
+        # Turn: 9 hearts and 3 aces out of the 44 remaining cards
+        (("Ah", "Kh"), ("Qh", "7c", "2h", "3d"), (("Js", "Jd"),), 15 / 44),
+        # Multiway: the board plays for everyone
+        (
+            ("2c", "3c"),
+            ("Ah", "Ad", "As", "Ac", "Kh"),
+            (("4d", "5d"), ("Qs", "Jd")),
+            1 / 3,
+        ),
+    ],
+)
+def test_equity_vs_cards(hero_cards, board, villain_cards, expected):
+    from anki_poker_master.equity import equity_vs_cards
+
+    assert equity_vs_cards(hero_cards, board, villain_cards) == pytest.approx(expected)
+
+
+def test_equity_vs_cards_preflop_uses_table():
+    from anki_poker_master.equity import equity_vs_cards, preflop_equity_table
+
+    equity = equity_vs_cards(("Ah", "Ad"), (), (("Ks", "Kc"),))
+    assert equity == preflop_equity_table().equity(Hand("AA"), Hand("KK"))
+
+
+def test_equity_vs_range():
+    from anki_poker_master.equity import equity_vs_cards, equity_vs_range
+
+    board = ("Qh", "7c", "2h", "3d", "9s")
+    # AK loses against the 6 combinations of JJ and beats the 4 of 54s
+    expected = (6 * 0.0 + 4 * 1.0) / 10
+    assert equity_vs_range(("Ah", "Kh"), board, "JJ, 54s") == pytest.approx(expected)
+    assert equity_vs_range(("Ah", "Kh"), board, "JJ") == equity_vs_cards(
+        ("Ah", "Kh"), board, (("Js", "Jd"),)
+    )
+    with pytest.raises(ValueError):
+        equity_vs_range(("Ah", "Ad"), ("As", "Ac", "2d"), "AA")
+
+
+def test_equity_vs_range_preflop_card_removal():
+    from anki_poker_master.equity import equity_vs_range, preflop_equity_table
+
+    table = preflop_equity_table()
+    # Only 3 of the 6 combinations of AA are possible with an ace in hand
+    expected = (3 * table.equity(Hand("AKs"), Hand("AA"))) + 6 * table.equity(
+        Hand("AKs"), Hand("QQ")
+    )
+    assert equity_vs_range(("Ah", "Kh"), (), "AA, QQ") == pytest.approx(expected / 9)
+
+
+def test_equity_is_memoized():
+    from anki_poker_master.equity import equity_vs_range
+
+    equity_vs_range.cache_clear()
+    for _ in range(3):
+        equity_vs_range(("Ah", "Kh"), ("Qh", "7c", "2h"), "22+, AJs+")
+    info = equity_vs_range.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+
+def test_equity_flop_is_deterministic():
+    from anki_poker_master.equity import equity_vs_range
+
+    args = (("Ah", "Kh"), ("Qh", "7c", "2h"), "22+, AJs+, KQs")
+    first = equity_vs_range(*args)
+    equity_vs_range.cache_clear()
+    assert equity_vs_range(*args) == first
+    assert first == pytest.approx(0.51, abs=0.02)
+
+
+def test_equity_vs_range_ignores_suits():
+    from anki_poker_master.equity import _postflop_equity_vs_range, equity_vs_range
+
+    _postflop_equity_vs_range.cache_clear()
+    equity = equity_vs_range(("Ah", "Kh"), ("Qh", "7c", "2d"), "22+, AJs+")
+    # The same spot with other suits and in another order
+    assert equity_vs_range(("Ks", "As"), ("2h", "Qs", "7d"), "22+, AJs+") == equity
+    info = _postflop_equity_vs_range.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "better, worse",
+    [
+        ("AsKsQsJsTs2c3d", "9s9h9d9c2s3s4h"),  # straight flush > quads
+        ("9s9h9d9c2s3s4h", "8s8h8d2c2s3s4h"),  # quads > full house
+        ("8s8h8d2c2s3s4h", "As9s7s4s2s3c3h"),  # full house > flush
+        ("As9s7s4s2s3c3h", "Ah2c3d4s5hKcKd"),  # flush > straight (wheel)
+        ("6h2c3d4s5hKcKd", "Ah2c3d4s5hKcKd"),  # 6-high straight > wheel
+        ("Ah2c3d4s5hKcKd", "QhQcQd7s5h3c2d"),  # straight > trips
+        ("QhQcQd7s5h3c2d", "AhAcKdKs5h5c2d"),  # trips > two pair
+        ("AhAcKdKs7h5c2d", "AhAcKdKs6h5c5d"),  # kicker of the two pair
+        ("AhAcKdKs5h5c2d", "AhAc7d6s5h3c2d"),  # two pair > pair
+        ("AhAc7d6s5h3c2d", "AhKcJd9s7h3c2d"),  # pair > high card
+        ("AhKcJd9s7h3c2d", "AhKcJd9s6h3c2d"),  # fifth kicker
+    ],
+)
+def test_evaluate_order(better, worse):
+    from anki_poker_master.evaluator import card_indices, evaluate
+
+    def cards(s):
+        return card_indices([s[i : i + 2] for i in range(0, len(s), 2)])
+
+    assert evaluate(cards(better)) > evaluate(cards(worse))
+
+
+def test_evaluate_ignores_cards_outside_the_best_five():
+    from anki_poker_master.evaluator import card_indices, evaluate
+
+    assert evaluate(card_indices(["As", "Ks", "Qs", "Js", "Ts", "2c", "3d"])) == (
+        evaluate(card_indices(["Ah", "Kh", "Qh", "Jh", "Th"]))
+    )
+    assert evaluate(card_indices(["Ah", "Ac", "Kd", "Ks", "Qh", "Qc", "2d"])) == (
+        evaluate(card_indices(["Ah", "Ac", "Kd", "Ks", "Qh"]))
+    )
+
+
+def test_evaluate_matches_pokerkit():
+    from pokerkit import StandardHighHand
+
+    from anki_poker_master.evaluator import RANKS, SUITS, evaluate
+
+    deck = [r + s for r in RANKS for s in SUITS]
+    rng = random.Random(0)
+    hands = [rng.sample(range(52), 7) for _ in range(500)]
+    values = [evaluate(h) for h in hands]
+    reference = [StandardHighHand.from_game("".join(deck[c] for c in h)) for h in hands]
+    for i in range(len(hands) - 1):
+        expected = (reference[i] > reference[i + 1]) - (reference[i] < reference[i + 1])
+        actual = (values[i] > values[i + 1]) - (values[i] < values[i + 1])
+        assert actual == expected, [deck[c] for c in hands[i] + hands[i + 1]]
+
+
+def test_card_index():
+    from anki_poker_master.evaluator import card_index
+
+    assert card_index("2c") == 0
+    assert card_index("As") == 51
+    with pytest.raises(ValueError):
+        card_index("1s")
@@ -8,6 +8,7 @@ from anki_poker_master.presenter.anki.preflop_scenario import (
     html_top_right_quadrant_blank,
     html_bottom_left_quadrant_blank,
     html_bottom_right_quadrant_blank,
+    html_tables,
     extra_css,
     html_legend,
 )
@@ -409,3 +410,101 @@ def test_dark_mode(pytestconfig, golden_dir):
     html += "</div>"
     html += "<script>\n" + textwrap.indent(helper.default_js(), 4 * " ") + "</script>\n"
     compare_or_update_golden(pytestconfig, golden_dir / "file.html", html)
+
+
+def test_html_diff(pytestconfig, golden_dir):
+    from anki_poker_master.model import PreflopScenario
+    from anki_poker_master.model.range_diff import diff_scenarios
+    from anki_poker_master.presenter.anki.preflop_scenario import html_diff
+
+    old = PreflopScenario({"Raise": Range("55+, A9s+")}, "CO", "Open", "NLHE")
+    new = PreflopScenario(
+        {"Raise": Range("44+, A8s+"), "Call": Range("22-33")}, "CO", "Open", "NLHE"
+    )
+
+    html = html_diff(diff_scenarios(old, new))
+
+    assert html.count(" changed") == 4
+    assert '<td class="raise suited changed" title="Fold → Raise">A8s</td>' in html
+    compare_or_update_golden(pytestconfig, golden_dir / "table.html", html)
+
+
+def test_mixed_strategy_table(pytestconfig, golden_dir):
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    (scenario,) = parse_scenario_yml(
+        """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+, AKo:0.7, AQs:0.5
+    Call: JJ, AKo:0.3
+"""
+    )
+
+    html = html_full(scenario)
+
+    assert (
+        '<td class="raise offsuit mixed" title="Raise 70%, Call 30%">AKo'
+        '<div class="frequencies"><span class="raise" style="width: 70%"></span>'
+        '<span class="call" style="width: 30%"></span></div></td>'
+    ) in html
+    assert 'title="Raise 50%, Fold 50%">AQs' in html
+    # The frequencies would give away the answer of blanked out hands
+    assert "mixed" not in html_top_left_quadrant_blank(scenario)
+    compare_or_update_golden(pytestconfig, golden_dir / "table.html", html)
+
+
+def test_html_tables():
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    (scenario,) = parse_scenario_yml(
+        """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+, AKo:0.7, A8s:0.5, 88
+    Call: JJ, AKo:0.3, 98o
+"""
+    )
+
+    # The tables share the cells, but are the same as when rendered one by one
+    assert html_tables(scenario) == [
+        html_full(scenario),
+        html_top_left_quadrant_blank(scenario),
+        html_top_right_quadrant_blank(scenario),
+        html_bottom_left_quadrant_blank(scenario),
+        html_bottom_right_quadrant_blank(scenario),
+    ]
+
+
+def test_html_analytics(pytestconfig, golden_dir):
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.presenter.anki.preflop_scenario import html_analytics
+
+    with_villain, without_villain = parse_scenario_yml(
+        """
+- game: NLHE
+  position: BB
+  scenario: vs BTN open
+  villain_range: 22+, A2s+, ATo+
+  ranges:
+    Raise: QQ+, AKs
+    Call: 22-JJ, AQs-A6s, AJo+
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+, AKo:0.7
+"""
+    )
+
+    html = html_analytics(with_villain)
+
+    assert "<th>Equity vs 22+, A2s+, ATo+</th>" in html
+    assert "<tr><th class='row'>Raise</th><td>22 (1.7%)</td>" in html
+    assert "Equity" not in html_analytics(without_villain)
+    assert "<td>26.4 (2.0%)</td>" in html_analytics(without_villain)
+    compare_or_update_golden(pytestconfig, golden_dir / "table.html", html)
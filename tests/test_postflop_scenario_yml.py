@@ -0,0 +1,105 @@
+import pytest
+
+
+def test_basics():
+    from anki_poker_master.parser.postflop_scenario import (
+        parse_postflop_scenario_yml,
+    )
+
+    yml_file = """
+- game: NLHE
+  position: BTN vs BB
+  scenario: SRP
+  board: Ah 7c 2d
+  hero_range: AA, 77, AKs
+  actions:
+    Bet: set, top pair
+    Check: [air]
+  default_action: Fold
+  notes: This is a test
+  source: "https://example.com"
+""".lstrip()
+    scenarios = parse_postflop_scenario_yml(yml_file)
+    assert len(scenarios) == 1
+    s = scenarios[0]
+    assert (s.game, s.position, s.scenario) == ("NLHE", "BTN vs BB", "SRP")
+    assert s.board == ["Ah", "7c", "2d"]
+    assert str(s.hero_range) == "AA, 77, AKs"
+    assert s.actions == {"Bet": ["set", "top pair"], "Check": ["air"]}
+    assert s.action("two pair") == "Fold"
+    assert s.notes == "This is a test"
+    assert s.source == "https://example.com"
+
+
+def test_default_scenario():
+    from anki_poker_master.parser.postflop_scenario import (
+        parse_postflop_scenario_yml,
+    )
+
+    yml_file = """
+- DEFAULT: true
+  game: NLHE
+  position: BTN vs BB
+  scenario: SRP
+- board: Ah7c2d
+  actions:
+    Bet: set
+- board: "Kd, Qd, 4s, 2d"
+  position: CO vs BB
+  actions:
+    Bet: flush
+""".lstrip()
+    scenarios = parse_postflop_scenario_yml(yml_file)
+    assert [(s.game, s.position) for s in scenarios] == [
+        ("NLHE", "BTN vs BB"),
+        ("NLHE", "CO vs BB"),
+    ]
+    assert scenarios[1].board == ["Kd", "Qd", "4s", "2d"]
+    # All hands if there is no range
+    assert len(scenarios[0].hero_range.hands) == 169
+    assert scenarios[0].action("air") == "Check"
+
+
+@pytest.mark.parametrize(
+    "scenario, message",
+    [
+        ("board: Ah 7c\n  actions: {Bet: set}", "'Ah 7c' is an invalid board"),
+        ("board: Ah 7c 7c\n  actions: {Bet: set}", "is an invalid board"),
+        ("board: Ah 7c 2x\n  actions: {Bet: set}", "is an invalid board"),
+        ("board: Ah 7c 2d\n  actions: {Bet: nuts}", "'nuts' is an invalid hand class"),
+        (
+            "board: Ah 7c 2d\n  hero_range: AXY\n  actions: {Bet: set}",
+            "'AXY' is an invalid range",
+        ),
+        (
+            "board: Ah 7c 2d\n  actions: {Bet: set, Check: 'air, set'}",
+            "Hand class 'set' is listed for the actions 'Bet' and 'Check'",
+        ),
+        ("board: Ah 7c 2d", "Missing key: 'actions'"),
+    ],
+)
+def test_invalid(scenario, message):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.postflop_scenario import (
+        parse_postflop_scenario_yml,
+    )
+
+    yml_file = f"""
+- game: NLHE
+  position: BTN
+  scenario: SRP
+  {scenario}
+"""
+    with pytest.raises(ValidationError) as e:
+        parse_postflop_scenario_yml(yml_file)
+    assert message in e.value.humanize_error()
+
+
+def test_example_file():
+    from anki_poker_master.parser.postflop_scenario import (
+        EXAMPLE_POSTFLOP_SCENARIO_FILE,
+        parse_postflop_scenario_yml,
+    )
+
+    scenarios = parse_postflop_scenario_yml(EXAMPLE_POSTFLOP_SCENARIO_FILE)
+    assert len(scenarios) == 2
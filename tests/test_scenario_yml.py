@@ -535,3 +535,137 @@ def test_default_ranges():
     assert scenarios[0].ranges.keys() == {"Call", "Raise", "Fold"}
     assert scenarios[1].ranges.keys() == {"Call", "Raise", "Fold"}
     assert scenarios[2].ranges.keys() == {"Call", "Fold"}
+
+
+@pytest.mark.parametrize("frequency", ["0.7", "70%", "70.0%"])
+def test_range_frequencies(frequency):
+    from poker.hand import Hand, Range
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    yml_file = f"""
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+, AKo:{frequency}, AJs+:0.5
+    Call: JJ, AKo:0.3, AJs+:0.25
+""".lstrip()
+    (scenario,) = parse_scenario_yml(yml_file)
+
+    assert scenario.frequencies.hand_frequencies(Hand("AKo")) == pytest.approx(
+        {"Raise": 0.7, "Call": 0.3}
+    )
+    assert scenario.frequencies.hand_frequencies(Hand("AQs")) == pytest.approx(
+        {"Raise": 0.5, "Call": 0.25, "Fold": 0.25}
+    )
+    assert scenario.ranges["Raise"] == Range("QQ+, AJs+, AKo")
+    assert scenario.ranges["Call"] == Range("JJ")
+
+
+def test_scenario_without_frequencies():
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    yml_file = """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+
+""".lstrip()
+    (scenario,) = parse_scenario_yml(yml_file)
+
+    assert scenario.frequencies is None
+
+
+def test_range_frequencies_cant_exceed_100_percent():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    yml_file = """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+, AKo:0.7
+    Call: AKo:40%, KK
+""".lstrip()
+    with pytest.raises(ValidationError) as excinfo:
+        parse_scenario_yml(yml_file)
+    err_msg = (
+        "The frequencies of AKo, KK add up to more than 100% in scenario "
+        "'NLHE / Opening / UTG'"
+    )
+    assert err_msg in excinfo.value.humanize_error()
+
+
+@pytest.mark.parametrize("invalid_frequency", ["0", "1.5", "150%", "x", ""])
+def test_invalid_range_frequencies(invalid_frequency):
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    yml_file = f"""
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: "QQ+, AKo:{invalid_frequency}"
+""".lstrip()
+    with pytest.raises(ValidationError) as excinfo:
+        parse_scenario_yml(yml_file)
+    err_msg = f"'{invalid_frequency}' is an invalid frequency"
+    assert err_msg in excinfo.value.humanize_error()
+
+
+def test_villain_range():
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    yml_file = """
+- game: NLHE
+  position: BB
+  scenario: vs BTN open
+  villain_range: 22+, ATo+
+  ranges:
+    Call: 22+
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+
+""".lstrip()
+    with_villain, without_villain = parse_scenario_yml(yml_file)
+    assert with_villain.villain_range == poker.Range("22+, ATo+")
+    assert without_villain.villain_range is None
+
+
+def test_villain_range_cant_have_frequencies():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    yml_file = """
+- game: NLHE
+  position: BB
+  scenario: vs BTN open
+  villain_range: 22+, ATo:0.5
+  ranges:
+    Call: 22+
+""".lstrip()
+    with pytest.raises(ValidationError) as excinfo:
+        parse_scenario_yml(yml_file)
+    assert "the villain range can't have frequencies" in excinfo.value.humanize_error()
+
+
+def test_villain_range_cant_be_empty():
+    from anki_poker_master.model import ValidationError
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+
+    yml_file = """
+- game: NLHE
+  position: BB
+  scenario: vs BTN open
+  villain_range: ""
+  ranges:
+    Call: 22+
+""".lstrip()
+    with pytest.raises(ValidationError) as excinfo:
+        parse_scenario_yml(yml_file)
+    assert "the villain range can't be empty" in excinfo.value.humanize_error()
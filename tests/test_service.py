@@ -0,0 +1,135 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+
+_SCENARIOS = """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+
+"""
+
+_HAND = """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 Th8c",
+  "d dh p3 ????",
+  "p3 cbr 12",
+  "p1 f",
+  "p2 cc",
+]
+"""
+
+
+@pytest.fixture(scope="module")
+def deck_service():
+    from anki_poker_master.service import DeckService
+
+    with DeckService(max_workers=2, max_concurrent=2) as s:
+        yield s
+
+
+def _request(deck_service, target, body, method="POST", content_length=None):
+    """
+    Send one request to the service on an ephemeral port and return the
+    status, the headers and the body of the response. The Content-Length
+    header is the length of the body unless specified.
+    """
+    if content_length is None:
+        content_length = len(body)
+
+    async def run():
+        server = await asyncio.start_server(deck_service.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(
+                f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+                f"Content-Length: {content_length}\r\n\r\n".encode("ascii")
+                + body
+            )
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        return response
+
+    head, _, body = asyncio.run(run()).partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = dict(h.lower().split(": ", 1) for h in header_lines)
+    return int(status_line.split()[1]), headers, body
+
+
+def _notes(pkg):
+    with zipfile.ZipFile(io.BytesIO(pkg)) as z:
+        return set(json.loads(z.read("media")).values())
+
+
+def test_scenarios(deck_service):
+    status, headers, body = _request(
+        deck_service, "/scenarios?tags=poker,test", _SCENARIOS.encode("utf-8")
+    )
+    assert status == 200
+    assert headers["content-type"] == "application/apkg"
+    assert int(headers["content-length"]) == len(body)
+    assert zipfile.is_zipfile(io.BytesIO(body))
+
+
+def test_hands_as_json_list(deck_service):
+    status, _, body = _request(
+        deck_service, "/hands?sprite=1", json.dumps([_HAND, _HAND]).encode("utf-8")
+    )
+    assert status == 200
+    assert _notes(body) == {"_apm-card-small-sprite.png"}
+
+
+def test_invalid_upload(deck_service):
+    status, headers, body = _request(deck_service, "/hands", b'variant = "NT"')
+    assert status == 400
+    assert headers["content-type"].startswith("text/plain")
+    assert body
+
+
+def test_not_found_and_wrong_method(deck_service):
+    assert _request(deck_service, "/other", b"")[0] == 404
+    assert _request(deck_service, "/hands", b"", method="GET")[0] == 405
+
+
+def test_invalid_content_length(deck_service):
+    assert _request(deck_service, "/hands", b"", content_length="x")[0] == 411
+    status, _, body = _request(deck_service, "/hands", b"", content_length=-1)
+    assert status == 400
+    assert body == b"invalid Content-Length"
+
+
+def test_upload_too_large():
+    from anki_poker_master.service import DeckService
+
+    with DeckService(max_workers=1, max_upload_size=10) as s:
+        assert _request(s, "/scenarios", _SCENARIOS.encode("utf-8"))[0] == 413
+
+
+def test_results_are_memoized(deck_service):
+    from anki_poker_master.service import Options
+
+    async def run():
+        content = _SCENARIOS.encode("utf-8")
+        first, second = await asyncio.gather(
+            deck_service.build("scenarios", content, Options(["memo"])),
+            deck_service.build("scenarios", content, Options(["memo"])),
+        )
+        other = await deck_service.build("scenarios", content, Options(["other"]))
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first[0] and second[0] and other[0]
+    # The same package (deck ids are random, so a rebuild would differ)
+    assert first[1] is second[1]
+    assert other[1] != first[1]
@@ -0,0 +1,130 @@
+import json
+import zipfile
+
+_SCENARIOS = """
+- game: NLHE
+  position: UTG
+  scenario: Opening
+  ranges:
+    Raise: QQ+
+- game: NLHE
+  position: BTN
+  scenario: Opening
+  ranges:
+    Raise: 22+
+"""
+
+_HAND = """variant = "NT"
+antes = [0, 0, 0]
+blinds_or_straddles = [2, 4, 0]
+min_bet = 2
+starting_stacks = [110, 420, 450]
+actions = [
+  "d dh p1 ????",
+  "d dh p2 Th8c",
+  "d dh p3 ????",
+  "p3 cbr 12",
+  "p1 f",
+  "p2 cc",
+]
+"""
+
+
+def _media_files(pkg_path):
+    with zipfile.ZipFile(pkg_path) as z:
+        return set(json.loads(z.read("media")).values())
+
+
+def test_add_scenarios_incrementally(tmp_path):
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.session import BuildSession
+
+    first, second = parse_scenario_yml(_SCENARIOS)
+    session = BuildSession(tags=["test"])
+    session.add_scenarios([first])
+    nr_notes = session.nr_notes
+    deck_ids = [d.deck_id for d in session.decks]
+    session.add_scenarios([second])
+
+    assert session.nr_notes == 2 * nr_notes
+    assert [d.deck_id for d in session.decks] == deck_ids
+    assert all(n.tags == ["test"] for d in session.decks for n in d.notes)
+    session.write(str(tmp_path / "scenarios.apkg"))
+    assert (tmp_path / "scenarios.apkg").stat().st_size > 0
+
+
+def test_add_hands_to_subdecks(tmp_path):
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.session import BuildSession
+
+    session = BuildSession(sprite=True, odds=True)
+    session.add_hands([parse(_HAND)])
+    session.add_hands([parse(_HAND), parse(_HAND)], subdeck="NLHE 2/4")
+
+    assert [d.name for d in session.decks] == [
+        "AnkiPokerMaster::HandHistory",
+        "AnkiPokerMaster::HandHistory::NLHE 2/4",
+    ]
+    assert [len(d.notes) for d in session.decks] == [1, 2]
+    assert any('<p class="odds">' in f for f in session.decks[0].notes[0].fields)
+    pkg_path = tmp_path / "hands.apkg"
+    session.write(str(pkg_path))
+    assert _media_files(pkg_path) == {"_apm-card-small-sprite.png"}
+
+
+def test_write_several_packages(tmp_path):
+    from anki_poker_master.parser.phh import parse
+    from anki_poker_master.parser.preflop_scenario import parse_scenario_yml
+    from anki_poker_master.session import BuildSession
+
+    session = BuildSession()
+    session.add_scenarios(parse_scenario_yml(_SCENARIOS))
+    session.write(str(tmp_path / "1.apkg"))
+    session.clear()
+    assert session.nr_notes == 0
+    assert session.decks == []
+
+    session.add_hands([parse(_HAND)])
+    session.write(str(tmp_path / "2.apkg"))
+
+    assert "apm-card-small-Th.png" not in _media_files(tmp_path / "1.apkg")
+    assert _media_files(tmp_path / "2.apkg") == {
+        "apm-card-small-Th.png",
+        "apm-card-small-8c.png",
+    }
+
+
+def test_add_postflop_scenarios(tmp_path):
+    from anki_poker_master.parser.postflop_scenario import (
+        parse_postflop_scenario_yml,
+    )
+    from anki_poker_master.session import BuildSession
+
+    scenarios = parse_postflop_scenario_yml(
+        """
+- game: NLHE
+  position: BTN vs BB
+  scenario: SRP
+  board: Ah 7c 2d
+  hero_range: AA, 77, AKs, KQs
+  actions:
+    Bet: set, top pair
+"""
+    )
+    session = BuildSession(tags=["test"])
+    session.add_postflop_scenarios(scenarios)
+
+    assert [d.name for d in session.decks] == ["AnkiPokerMaster::Postflop"]
+    notes = session.decks[0].notes
+    # One note per hand class of the range: set, top pair and air
+    assert len(notes) == 3
+    assert "How should you play <b>set</b>" in notes[0].fields[0]
+    assert "A-high, rainbow" in notes[0].fields[0]
+    assert notes[0].fields[1] == "You should <b>Bet</b>."
+    assert notes[2].fields[1] == "You should <b>Check</b>."
+    session.write(str(tmp_path / "postflop.apkg"))
+    assert _media_files(tmp_path / "postflop.apkg") == {
+        "apm-card-Ah.png",
+        "apm-card-7c.png",
+        "apm-card-2d.png",
+    }